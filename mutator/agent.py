@@ -16,6 +16,7 @@ from .llm.client import LLMClient
 from .tools.manager import ToolManager
 from .context.manager import ContextManager
 from .execution.executor import TaskExecutor
+from .execution.subagent_pool import get_subagent_pool
 
 
 class Mutator:
@@ -26,12 +27,14 @@ class Mutator:
     It manages initialization, tool registration, context management, and task execution.
     """
     
-    def __init__(self, config: AgentConfig):
+    def __init__(self, config: AgentConfig, context_manager: Optional[ContextManager] = None):
         """
         Initialize the coding agent with the given configuration.
         
         Args:
             config: Agent configuration object
+            context_manager: Optional already-initialized context manager to share
+                (used by pooled sub-agents to reuse the parent's vector store)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -39,9 +42,12 @@ class Mutator:
         # Initialize components
         self.llm_client = None
         self.tool_manager = None
-        self.context_manager = None
+        self.context_manager = context_manager
         self.executor = None
         
+        # Shared context managers are owned (and cleaned up) by another agent
+        self._owns_context_manager = context_manager is None
+        
         # Track initialization state
         self._initialized = False
         
@@ -63,7 +69,7 @@ class Mutator:
         self.logger.info("Initializing Mutator...")
         
         # Initialize LLM client
-        self.llm_client = LLMClient(self.config.llm_config)
+        self.llm_client = LLMClient(self.config.llm_config, project_root=self.config.working_directory)
         
         # Initialize tool manager
         self.tool_manager = ToolManager(
@@ -78,12 +84,18 @@ class Mutator:
         # Register tool schemas with LLM client
         self._register_tools_with_llm()
         
-        # Initialize context manager
-        self.context_manager = ContextManager(
-            self.config.context_config,
-            self.config.vector_store_config,
-            self.config.working_directory
-        )
+        # Initialize context manager unless a shared one was provided
+        if self.context_manager is None:
+            self.context_manager = ContextManager(
+                self.config.context_config,
+                self.config.vector_store_config,
+                self.config.working_directory
+            )
+            
+            # Let delegated sub-agents reuse the loaded vector store and embedding model
+            get_subagent_pool().register_context_manager(
+                self.config.working_directory, self.context_manager
+            )
         
         # Initialize executor
         from .execution.planner import TaskPlanner
@@ -225,12 +237,31 @@ class Mutator:
         
         return health_info
     
-    async def search_context(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """Search for relevant context."""
+    async def search_context(self, query: str, max_results: int = 10, language: Optional[str] = None,
+                             path_prefix: Optional[str] = None, element_type: Optional[str] = None,
+                             document_type: Optional[str] = None, where: Optional[Dict[str, Any]] = None,
+                             where_document: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Search for relevant context.
+        
+        Filters are applied inside the indexes: language, path_prefix (relative
+        directory), element_type ("function", "class", ...) and document_type
+        ("chunk" or "element"). where and where_document are passed to the
+        vector store as raw ChromaDB filters.
+        """
         if not self._initialized:
             raise RuntimeError("Agent not initialized. Call initialize() first.")
         
-        return self.context_manager.search_context(query, limit=max_results)
+        return self.context_manager.search_context(
+            query,
+            limit=max_results,
+            language=language,
+            path_prefix=path_prefix,
+            element_type=element_type,
+            document_type=document_type,
+            where=where,
+            where_document=where_document
+        )
     
     async def add_context_from_file(self, file_path: str) -> None:
         """Add context from a file."""
@@ -293,7 +324,9 @@ class Mutator:
     
     async def cleanup(self) -> None:
         """Clean up resources."""
-        if self.context_manager:
+        if self.context_manager and self._owns_context_manager:
+            # Also cleans up the sub-agent runtimes built on this context manager
+            await get_subagent_pool().release_context_manager(self.context_manager)
             await self.context_manager.cleanup()
         
         if self.executor:
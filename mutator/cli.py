@@ -27,6 +27,7 @@ from rich.text import Text
 from .agent import Mutator
 from .core.types import TaskType, ExecutionMode, AgentEvent
 from .core.config import AgentConfig, ConfigManager
+from .execution.subagent_pool import get_subagent_pool
 from . import create_agent
 
 # Create CLI application
@@ -489,6 +490,9 @@ async def _chat_single_async(message: str, project_path: Optional[str], config_f
             import traceback
             console.print(f"[dim]Critical error traceback:\n{traceback.format_exc()}[/dim]")
         raise typer.Exit(1)
+    finally:
+        # Clean up sub-agent runtimes created by delegate_task
+        await get_subagent_pool().shutdown()
 
 
 async def _chat_interactive_async(project_path: Optional[str], config_file: Optional[str], model: Optional[str], provider: Optional[str], verbose: bool, execution_mode: ExecutionMode):
@@ -608,15 +612,26 @@ async def _chat_interactive_async(project_path: Optional[str], config_file: Opti
                     
                     tool_calls_made = False
                     final_response_printed = False
+                    streaming_text = False  # Streamed tokens of the current response are on screen
                     
                     # Always use interactive_chat for chat command (read-only)
                     async for event in agent.interactive_chat(user_input):
                         # Show debug events if verbose
-                        if verbose and event.event_type not in ["tool_call_started", "tool_call_completed", "llm_response", "warning", "task_failed"]:
+                        if verbose and event.event_type not in ["llm_token", "tool_output", "tool_call_started", "tool_call_completed", "llm_response", "warning", "task_failed"]:
                             console.print(f"[dim]DEBUG: {event.event_type} - {event.data}[/dim]")
                         
-                        if event.event_type == "tool_call_started":
+                        if event.event_type == "llm_token":
+                            if not streaming_text:
+                                progress.stop()
+                                console.print()
+                                streaming_text = True
+                            console.print(event.data.get("content", ""), end="", markup=False, highlight=False)
+                        
+                        elif event.event_type == "tool_call_started":
                             progress.stop()
+                            if streaming_text:
+                                console.print()
+                                streaming_text = False
                             tool_calls_made = True
                             tool_name = event.data.get("tool_name", "unknown")
                             console.print(f"\n[bold blue]🔧 Using tool: {tool_name}[/bold blue]")
@@ -624,6 +639,10 @@ async def _chat_interactive_async(project_path: Optional[str], config_file: Opti
                             if params:
                                 console.print(f"   Parameters: {params}")
                         
+                        elif event.event_type == "tool_output":
+                            # Output lines of a running tool (e.g. run_shell) as they are produced
+                            console.print(f"   {event.data.get('line', '')}", style="dim", markup=False, highlight=False)
+                        
                         elif event.event_type == "tool_call_completed":
                             tool_name = event.data.get("tool_name", "unknown")
                             success = event.data.get("success", False)
@@ -671,7 +690,12 @@ async def _chat_interactive_async(project_path: Optional[str], config_file: Opti
                             if content and not has_tool_calls:
                                 if not is_follow_up:
                                     progress.stop()
-                                console.print(Panel(content, title="Agent Response", border_style="green"))
+                                if streaming_text:
+                                    # Already shown token by token
+                                    console.print()
+                                    streaming_text = False
+                                else:
+                                    console.print(Panel(content, title="Agent Response", border_style="green"))
                                 final_response_printed = True
 
                         elif event.event_type == "task_failed":
@@ -744,6 +768,9 @@ async def _chat_interactive_async(project_path: Optional[str], config_file: Opti
             import traceback
             console.print(f"[dim]Debug traceback:\n{traceback.format_exc()}[/dim]")
         raise typer.Exit(1)
+    finally:
+        # Clean up sub-agent runtimes created by delegate_task
+        await get_subagent_pool().shutdown()
 
 
 @app.command()
@@ -1012,9 +1039,11 @@ def _print_event(event: AgentEvent):
 def _print_execution_summary(events: List[AgentEvent]):
     """Print execution summary."""
     
-    # Count events by type
+    # Count events by type; streamed tokens and tool output are not execution steps
     event_counts = {}
     for event in events:
+        if event.event_type in ("llm_token", "tool_output"):
+            continue
         event_counts[event.event_type] = event_counts.get(event.event_type, 0) + 1
     
     # Create summary table
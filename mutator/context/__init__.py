@@ -9,7 +9,7 @@ from .manager import ContextManager
 from .vector_store import VectorStoreManager
 from .code_analyzer import CodeAnalyzer
 from .indexer import CodebaseIndexer
-from .search import ContextSearcher
+from .search import ContextSearcher, SearchFilters
 from .git_integration import GitIntegration
 
 __all__ = [
@@ -18,6 +18,7 @@ __all__ = [
     "CodeAnalyzer",
     "CodebaseIndexer",
     "ContextSearcher",
+    "SearchFilters",
     "GitIntegration",
     "initialize_environment"
 ] 
\ No newline at end of file
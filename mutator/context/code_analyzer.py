@@ -6,6 +6,7 @@ like functions and classes, and determine file languages.
 """
 
 import re
+import bisect
 import fnmatch
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional, Set
@@ -14,6 +15,224 @@ import os
 from ..core.config import ContextConfig
 
 
+_NEWLINE_PATTERN = re.compile('\n')
+_BRACE_PATTERN = re.compile('[{}]')
+
+
+def _translate_gitignore_glob(pattern: str) -> str:
+    """Translate a gitignore glob (without leading or trailing slash) into a regex."""
+    result = []
+    i, n = 0, len(pattern)
+    
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/'):
+                if i + 2 == n:
+                    # Trailing "**" matches everything inside
+                    result.append('.*')
+                    i += 2
+                    continue
+                if pattern[i + 2] == '/':
+                    # "**/" matches zero or more directories
+                    result.append('(?:.*/)?')
+                    i += 3
+                    continue
+            result.append('[^/]*')
+            while i + 1 < n and pattern[i + 1] == '*':
+                i += 1
+        elif c == '?':
+            result.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j == -1:
+                result.append('\\[')
+            else:
+                body = pattern[i + 1:j].replace('\\', '\\\\')
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                result.append(f'[{body}]')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    
+    return ''.join(result)
+
+
+class _GitignoreRuleSet:
+    """Compiled rules of a single .gitignore file."""
+    
+    _GLOB_CHARS = frozenset('*?[\\')
+    
+    def __init__(self, base: str, lines: List[str]):
+        """
+        Compile the rules of a .gitignore file.
+        
+        Args:
+            base: Directory of the .gitignore file relative to the root ("" for the root)
+            lines: Pattern lines of the file, in order
+        """
+        self.base = base
+        self.prefix = base + '/' if base else ''
+        self.negated: List[bool] = []
+        
+        # Rules are split by what they are matched against: patterns without a
+        # slash match the entry name at any depth, the others the path relative
+        # to the .gitignore directory. The common literal ("node_modules") and
+        # extension ("*.log") name patterns become dict lookups; the rest are
+        # combined into regexes. Everything is built once for files and once for
+        # directories, since "dir/" rules only apply to directories.
+        self._names: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self._suffixes: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        name_rules: List[Tuple[int, str, bool]] = []
+        path_rules: List[Tuple[int, str, bool]] = []
+        
+        for line in lines:
+            rule = self._parse_rule(line)
+            if rule is None:
+                continue
+            glob, negated, dir_only, anchored = rule
+            index = len(self.negated)
+            self.negated.append(negated)
+            
+            if anchored:
+                path_rules.append((index, _translate_gitignore_glob(glob), dir_only))
+            elif not self._GLOB_CHARS.intersection(glob):
+                self._add_lookup(self._names, glob, index, dir_only)
+            elif glob.startswith('*.') and not self._GLOB_CHARS.intersection(glob[1:]):
+                self._add_lookup(self._suffixes, glob[1:], index, dir_only)
+            else:
+                name_rules.append((index, _translate_gitignore_glob(glob), dir_only))
+        
+        self._name_regex = (self._compile(name_rules, False), self._compile(name_rules, True))
+        self._path_regex = (self._compile(path_rules, False), self._compile(path_rules, True))
+    
+    @staticmethod
+    def _add_lookup(tables: Tuple[Dict[str, int], Dict[str, int]], key: str,
+                    index: int, dir_only: bool) -> None:
+        """Record a rule in the file and directory lookup tables (later rules win)."""
+        if not dir_only:
+            tables[0][key] = index
+        tables[1][key] = index
+    
+    @staticmethod
+    def _parse_rule(line: str) -> Optional[Tuple[str, bool, bool, bool]]:
+        """Parse a pattern line into (glob, negated, directory_only, anchored)."""
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return None
+        
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\') and line[1:2] in ('#', '!'):
+            line = line[1:]
+        
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return None
+        
+        # A slash at the beginning or in the middle anchors the pattern
+        anchored = '/' in line
+        return line.lstrip('/'), negated, dir_only, anchored
+    
+    @staticmethod
+    def _compile(rules: List[Tuple[int, str, bool]], directories: bool) -> Optional['re.Pattern']:
+        """Combine rules into one regex whose first matching group is the last rule."""
+        alternatives = [
+            f'(?P<r{index}>{regex})'
+            for index, regex, dir_only in reversed(rules)
+            if directories or not dir_only
+        ]
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives), re.DOTALL)
+    
+    def match(self, rel_path: str, name: str, is_dir: bool) -> Optional[int]:
+        """Get the index of the last rule matching a path inside this file's directory."""
+        candidates = []
+        
+        index = self._names[is_dir].get(name)
+        if index is not None:
+            candidates.append(index)
+        
+        suffixes = self._suffixes[is_dir]
+        if suffixes:
+            dot = name.find('.')
+            while dot != -1:
+                index = suffixes.get(name[dot:])
+                if index is not None:
+                    candidates.append(index)
+                dot = name.find('.', dot + 1)
+        
+        name_regex = self._name_regex[is_dir]
+        if name_regex:
+            match = name_regex.fullmatch(name)
+            if match:
+                candidates.append(int(match.lastgroup[1:]))
+        
+        path_regex = self._path_regex[is_dir]
+        if path_regex:
+            match = path_regex.fullmatch(rel_path[len(self.prefix):])
+            if match:
+                candidates.append(int(match.lastgroup[1:]))
+        
+        return max(candidates) if candidates else None
+
+
+class GitignoreMatcher:
+    """
+    Pre-compiled matcher for all .gitignore files of a repository.
+    
+    Lookups cost a few regex matches per path regardless of how many patterns
+    the repository defines. Rules of deeper .gitignore files take precedence
+    over those of their parents, and within a file the last matching rule wins,
+    so negations are applied in the same order git applies them.
+    """
+    
+    def __init__(self):
+        self._rule_sets: List[_GitignoreRuleSet] = []
+    
+    def add_file(self, base: str, lines: List[str]) -> None:
+        """Add the pattern lines of a .gitignore located in a relative directory."""
+        rule_set = _GitignoreRuleSet(base, lines)
+        if rule_set.negated:
+            self._rule_sets.append(rule_set)
+            # Deepest directories first
+            self._rule_sets.sort(key=lambda rs: rs.base.count('/') + bool(rs.base), reverse=True)
+    
+    @property
+    def rule_count(self) -> int:
+        """Total number of compiled rules."""
+        return sum(len(rule_set.negated) for rule_set in self._rule_sets)
+    
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Check a single path (its parents are not considered).
+        
+        Returns:
+            True if ignored, False if re-included by a negation, None if no rule matches
+        """
+        name = rel_path.rsplit('/', 1)[-1]
+        for rule_set in self._rule_sets:
+            if rule_set.prefix and not rel_path.startswith(rule_set.prefix):
+                continue
+            index = rule_set.match(rel_path, name, is_dir)
+            if index is not None:
+                return not rule_set.negated[index]
+        return None
+
+
 class CodeAnalyzer:
     """
     Analyzes code files and extracts structural elements.
@@ -29,16 +248,28 @@ class CodeAnalyzer:
     - Automatically detects and parses .gitignore files in git repositories
     - Supports standard gitignore patterns including wildcards and directory patterns
     - Handles gitignore negation patterns (patterns starting with '!')
-    - Caches gitignore patterns for performance
+    - Compiles all patterns into a few combined regexes, so checks do not scale
+      with the number of patterns
+    - Treats everything inside an ignored directory as ignored, so traversals can
+      prune whole directories
     - Only applies gitignore patterns in actual git repositories (directories with .git)
     """
     
+    # Combined element regexes per language, shared by all instances
+    _element_regex_cache: Dict[str, Optional[Tuple['re.Pattern', Dict[int, Tuple[str, int]]]]] = {}
+    
+    # Languages whose blocks are delimited by indentation instead of braces
+    _INDENT_BLOCK_LANGUAGES = frozenset({'python', 'ruby'})
+    
     def __init__(self, context_config: ContextConfig):
         """Initialize the code analyzer."""
         self.context_config = context_config
         self._language_map = self._build_language_map()
         self._language_patterns = self._build_language_patterns()
+        self._config_regex = self._compile_config_patterns()
         self._gitignore_patterns: Optional[List[Tuple[str, Path]]] = None
+        self._gitignore_files: List[Path] = []
+        self._gitignore_matcher: Optional[GitignoreMatcher] = None
         self._gitignore_cache_path: Optional[Path] = None
     
     def _build_language_map(self) -> Dict[str, str]:
@@ -160,25 +391,9 @@ class CodeAnalyzer:
         }
     
     def _find_gitignore_files(self, working_directory: Path) -> List[Path]:
-        """Find all .gitignore files in the directory tree."""
-        gitignore_files = []
-        
-        # Check if this is a git repository
-        if not (working_directory / '.git').exists():
-            return gitignore_files
-        
-        # Find all .gitignore files
-        for root, dirs, files in os.walk(working_directory):
-            root_path = Path(root)
-            
-            # Skip .git directory
-            if '.git' in dirs:
-                dirs.remove('.git')
-            
-            if '.gitignore' in files:
-                gitignore_files.append(root_path / '.gitignore')
-        
-        return gitignore_files
+        """Find all .gitignore files that apply to the directory tree."""
+        self._load_gitignore_patterns(working_directory)
+        return list(self._gitignore_files)
     
     def _parse_gitignore_file(self, gitignore_path: Path, working_directory: Path) -> List[Tuple[str, Path]]:
         """Parse a .gitignore file and return patterns with their base directory."""
@@ -200,21 +415,7 @@ class CodeAnalyzer:
                 if not line or line.startswith('#'):
                     continue
                 
-                # Handle negation patterns (we'll keep them as-is for now)
-                if line.startswith('!'):
-                    patterns.append((line, gitignore_dir))
-                    continue
-                
-                # Convert gitignore patterns to fnmatch patterns
-                # Handle directory patterns (ending with /)
-                if line.endswith('/'):
-                    patterns.append((line.rstrip('/'), gitignore_dir))
-                    patterns.append((line.rstrip('/') + '/*', gitignore_dir))
-                else:
-                    patterns.append((line, gitignore_dir))
-                    # Add pattern for matching directories
-                    patterns.append((line + '/', gitignore_dir))
-                    patterns.append((line + '/*', gitignore_dir))
+                patterns.append((line, gitignore_dir))
                 
         except Exception:
             # If we can't read the file, skip it
@@ -223,108 +424,63 @@ class CodeAnalyzer:
         return patterns
     
     def _load_gitignore_patterns(self, working_directory: Path) -> List[Tuple[str, Path]]:
-        """Load and cache gitignore patterns with their base directories."""
+        """Load, compile and cache gitignore patterns with their base directories."""
         if self._gitignore_patterns is not None and self._gitignore_cache_path == working_directory:
             return self._gitignore_patterns
         
         all_patterns = []
-        gitignore_files = self._find_gitignore_files(working_directory)
-        
-        for gitignore_file in gitignore_files:
-            patterns = self._parse_gitignore_file(gitignore_file, working_directory)
-            all_patterns.extend(patterns)
+        gitignore_files = []
+        matcher = GitignoreMatcher()
+        
+        # Only apply gitignore patterns in git repositories
+        if (working_directory / '.git').exists():
+            for root, dirs, files in os.walk(working_directory):
+                root_path = Path(root)
+                rel_root = root_path.relative_to(working_directory).as_posix()
+                rel_root = '' if rel_root == '.' else rel_root
+                
+                if '.gitignore' in files:
+                    gitignore_file = root_path / '.gitignore'
+                    patterns = self._parse_gitignore_file(gitignore_file, working_directory)
+                    matcher.add_file(rel_root, [pattern for pattern, _ in patterns])
+                    gitignore_files.append(gitignore_file)
+                    all_patterns.extend(patterns)
+                
+                # Git does not read .gitignore files inside ignored directories
+                dirs[:] = [
+                    d for d in dirs
+                    if d != '.git' and not self._is_ignored_entry(
+                        f"{rel_root}/{d}" if rel_root else d, d, True, matcher
+                    )
+                ]
         
         # Cache the patterns
         self._gitignore_patterns = all_patterns
+        self._gitignore_files = gitignore_files
+        self._gitignore_matcher = matcher if matcher.rule_count else None
         self._gitignore_cache_path = working_directory
         
         return all_patterns
     
-    def _matches_gitignore_pattern(self, file_path: Path, working_directory: Path) -> bool:
-        """Check if a file matches any gitignore pattern."""
-        gitignore_patterns = self._load_gitignore_patterns(working_directory)
-        
-        if not gitignore_patterns:
-            return False
-        
-        relative_path = file_path.relative_to(working_directory)
-        
-        # Track if file should be ignored
-        should_ignore = False
-        
-        # Check against all gitignore patterns
-        for pattern, base_dir in gitignore_patterns:
-            # Handle negation patterns
-            if pattern.startswith('!'):
-                negation_pattern = pattern[1:]
-                if self._matches_gitignore_pattern_relative(relative_path, negation_pattern, base_dir, working_directory):
-                    should_ignore = False  # Negation pattern matches, so don't ignore
-                continue
-            
-            # Check if pattern matches
-            if self._matches_gitignore_pattern_relative(relative_path, pattern, base_dir, working_directory):
-                should_ignore = True
-        
-        return should_ignore
+    def _compile_config_patterns(self) -> Optional['re.Pattern']:
+        """Compile the configured ignore patterns into a single regex."""
+        patterns = self.context_config.ignore_patterns
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in patterns))
     
-    def _matches_gitignore_pattern_relative(self, file_relative_path: Path, pattern: str, 
-                                          pattern_base_dir: Path, working_directory: Path) -> bool:
-        """Check if a file matches a gitignore pattern relative to the pattern's base directory."""
-        # Get the relative path from the pattern's base directory to the working directory
-        try:
-            base_relative_to_working = pattern_base_dir.relative_to(working_directory)
-        except ValueError:
-            return False
-        
-        # Check if the file is within the scope of this gitignore file
-        if base_relative_to_working != Path('.'):
-            # The gitignore is in a subdirectory, check if file is in that subdirectory
-            try:
-                file_relative_to_base = file_relative_path.relative_to(base_relative_to_working)
-            except ValueError:
-                # File is not in the subdirectory, so this pattern doesn't apply
-                return False
-        else:
-            # Gitignore is in the root directory
-            file_relative_to_base = file_relative_path
-        
-        # Convert to string for pattern matching
-        path_str = str(file_relative_to_base)
-        filename = file_relative_to_base.name
-        
-        # Apply the pattern matching logic
-        return self._matches_pattern(path_str, pattern, filename)
-    
-    def _matches_pattern(self, path_str: str, pattern: str, filename: str) -> bool:
-        """Check if a path matches a gitignore pattern."""
-        # Direct filename match
-        if fnmatch.fnmatch(filename, pattern):
+    def _is_ignored_entry(self, rel_path: str, name: str, is_dir: bool,
+                          matcher: Optional[GitignoreMatcher]) -> bool:
+        """Check a single path against config and gitignore patterns, ignoring its parents."""
+        if self._config_regex and (self._config_regex.match(rel_path) or self._config_regex.match(name)):
             return True
-        
-        # Full path match
-        if fnmatch.fnmatch(path_str, pattern):
-            return True
-        
-        # Check if pattern matches any part of the path
-        path_parts = path_str.split('/')
-        
-        # For patterns like "*.log", check if any part matches
-        if '*' in pattern and not '/' in pattern:
-            return any(fnmatch.fnmatch(part, pattern) for part in path_parts)
-        
-        # For directory patterns, check if any parent directory matches
-        if pattern.endswith('/') or pattern.endswith('/*'):
-            clean_pattern = pattern.rstrip('/*')
-            for i in range(len(path_parts)):
-                partial_path = '/'.join(path_parts[:i+1])
-                if fnmatch.fnmatch(partial_path, clean_pattern):
-                    return True
-        
-        return False
+        return bool(matcher and matcher.match(rel_path, is_dir))
     
     def clear_gitignore_cache(self) -> None:
         """Clear the cached gitignore patterns."""
         self._gitignore_patterns = None
+        self._gitignore_files = []
+        self._gitignore_matcher = None
         self._gitignore_cache_path = None
     
     def get_ignore_patterns_info(self, working_directory: Path) -> Dict[str, Any]:
@@ -352,24 +508,46 @@ class CodeAnalyzer:
         
         return info
     
-    def should_ignore_file(self, file_path: Path, working_directory: Path) -> bool:
+    def should_ignore_file(self, file_path: Path, working_directory: Path,
+                           is_dir: Optional[bool] = None) -> bool:
         """Check if file should be ignored based on patterns and .gitignore."""
         if not file_path.is_relative_to(working_directory):
             return True
         
-        relative_path = file_path.relative_to(working_directory)
-        path_str = str(relative_path)
+        rel_path = file_path.relative_to(working_directory).as_posix()
+        if rel_path == '.':
+            return False
         
-        # Check config ignore patterns first
-        for pattern in self.context_config.ignore_patterns:
-            if fnmatch.fnmatch(path_str, pattern) or fnmatch.fnmatch(file_path.name, pattern):
-                return True
+        if is_dir is None:
+            is_dir = file_path.is_dir()
         
-        # Check gitignore patterns if this is a git repository
-        if self._matches_gitignore_pattern(file_path, working_directory):
-            return True
+        return self.should_ignore_path(rel_path, working_directory, is_dir)
+    
+    def should_ignore_path(self, rel_path: str, working_directory: Path, is_dir: bool = False,
+                           check_parents: bool = True) -> bool:
+        """
+        Check a path relative to the working directory against the ignore rules.
+        
+        Args:
+            rel_path: POSIX path relative to the working directory
+            working_directory: Root the gitignore files are loaded from
+            is_dir: Whether the path is a directory (for "dir/" patterns)
+            check_parents: Also check parent directories; traversals that already
+                pruned ignored directories can skip this
+        
+        Returns:
+            True if the path (or one of its parent directories) is ignored
+        """
+        self._load_gitignore_patterns(working_directory)
+        matcher = self._gitignore_matcher
+        
+        parts = rel_path.split('/')
+        if check_parents:
+            for i in range(1, len(parts)):
+                if self._is_ignored_entry('/'.join(parts[:i]), parts[i - 1], True, matcher):
+                    return True
         
-        return False
+        return self._is_ignored_entry(rel_path, parts[-1], is_dir, matcher)
     
     def get_file_language(self, file_path: Path) -> str:
         """Determine the programming language of a file."""
@@ -410,34 +588,142 @@ class CodeAnalyzer:
         
         return chunks
     
-    def extract_code_elements(self, content: str, language: str) -> List[Dict[str, Any]]:
-        """Extract code elements (functions, classes) from content using generic patterns."""
-        elements = []
+    def _get_element_regex(self, language: str) -> Optional[Tuple['re.Pattern', Dict[int, Tuple[str, int]]]]:
+        """
+        Get the combined element regex of a language, compiling it on first use.
+        
+        All class and function patterns of the language are joined into one
+        alternation so the content is scanned once. The returned mapping goes
+        from the outer group of each alternative to its (element type, name
+        group) pair. Compiled regexes are cached at class level and shared by
+        every analyzer.
+        """
+        cache = CodeAnalyzer._element_regex_cache
+        if language in cache:
+            return cache[language]
         
-        # Get patterns for this language
         patterns = self._language_patterns.get(language, {})
+        alternatives = []
+        groups: Dict[int, Tuple[str, int]] = {}
+        group = 1
+        
+        for element_type in ('class', 'function'):
+            for pattern in patterns.get(element_type, []):
+                inner_groups = re.compile(pattern).groups
+                alternatives.append(f'({pattern})')
+                groups[group] = (element_type, group + 1 if inner_groups else group)
+                group += 1 + inner_groups
+        
+        compiled = (re.compile('|'.join(alternatives), re.MULTILINE), groups) if alternatives else None
+        cache[language] = compiled
+        return compiled
+    
+    @staticmethod
+    def _assign_indent_end_lines(lines: List[str], elements: List[Dict[str, Any]],
+                                 closes_with_end: bool = False) -> None:
+        """Set end lines for indentation-delimited blocks in one pass over the lines."""
+        stack: List[Tuple[int, Dict[str, Any]]] = []
+        next_element = 0
+        last_code_line = 0
+        
+        for line_number, text in enumerate(lines, 1):
+            stripped = text.strip()
+            indent = len(text) - len(text.lstrip())
+            
+            if stripped:
+                # A line at or left of a block's indentation closes the block
+                while stack and indent <= stack[-1][0] and line_number > stack[-1][1]['line']:
+                    block_indent, element = stack.pop()
+                    if closes_with_end and stripped == 'end' and indent == block_indent:
+                        element['end_line'] = line_number
+                    else:
+                        element['end_line'] = last_code_line
+                last_code_line = line_number
+            
+            while next_element < len(elements) and elements[next_element]['line'] == line_number:
+                stack.append((indent, elements[next_element]))
+                next_element += 1
+        
+        for _, element in stack:
+            element['end_line'] = last_code_line or element['line']
+    
+    @staticmethod
+    def _assign_brace_end_lines(content: str, elements: List[Dict[str, Any]],
+                                starts: List[int], line_starts: List[int]) -> None:
+        """Set end lines for brace-delimited blocks in one pass over the braces."""
+        stack: List[Tuple[int, Dict[str, Any]]] = []
+        pending: Optional[Dict[str, Any]] = None
+        next_element = 0
+        depth = 0
+        
+        for match in _BRACE_PATTERN.finditer(content):
+            position = match.start()
+            while next_element < len(elements) and starts[next_element] < position:
+                if pending is not None:
+                    # Declaration without a body (e.g. a prototype)
+                    pending['end_line'] = pending['line']
+                pending = elements[next_element]
+                next_element += 1
+            
+            if match.group() == '{':
+                depth += 1
+                if pending is not None:
+                    stack.append((depth, pending))
+                    pending = None
+            else:
+                if pending is not None:
+                    pending['end_line'] = pending['line']
+                    pending = None
+                if stack and stack[-1][0] == depth:
+                    stack.pop()[1]['end_line'] = bisect.bisect_right(line_starts, position)
+                depth = max(0, depth - 1)
+        
+        last_line = len(line_starts)
+        for _, element in stack:
+            element['end_line'] = last_line
+        for element in elements:
+            element.setdefault('end_line', element['line'])
+    
+    def extract_code_elements(self, content: str, language: str) -> List[Dict[str, Any]]:
+        """
+        Extract code elements (functions, classes) from content using generic patterns.
+        
+        Runs in time linear in the content size: one combined regex pass finds
+        all elements, line numbers come from a line-offset table, and block end
+        lines are found in a single pass over indentation or braces.
+        
+        Returns:
+            Elements ordered by position, each with type, name, line, end_line
+            and signature
+        """
+        compiled = self._get_element_regex(language)
+        if compiled is None:
+            return []
+        regex, groups = compiled
+        
+        # Offsets of the first character of every line, for bisect lookups
+        line_starts = [0]
+        line_starts.extend(match.end() for match in _NEWLINE_PATTERN.finditer(content))
         
-        # Extract classes
-        class_patterns = patterns.get('class', [])
-        for pattern in class_patterns:
-            for match in re.finditer(pattern, content, re.MULTILINE):
-                elements.append({
-                    'type': 'class',
-                    'name': match.group(1),
-                    'line': content[:match.start()].count('\n') + 1,
-                    'signature': match.group(0)
-                })
-        
-        # Extract functions
-        function_patterns = patterns.get('function', [])
-        for pattern in function_patterns:
-            for match in re.finditer(pattern, content, re.MULTILINE):
-                elements.append({
-                    'type': 'function',
-                    'name': match.group(1),
-                    'line': content[:match.start()].count('\n') + 1,
-                    'signature': match.group(0)
-                })
+        elements = []
+        starts = []
+        for match in regex.finditer(content):
+            element_type, name_group = groups[match.lastindex]
+            elements.append({
+                'type': element_type,
+                'name': match.group(name_group),
+                'line': bisect.bisect_right(line_starts, match.start()),
+                'signature': match.group(0)
+            })
+            starts.append(match.start())
+        
+        if not elements:
+            return elements
+        
+        if language in self._INDENT_BLOCK_LANGUAGES:
+            self._assign_indent_end_lines(content.split('\n'), elements, closes_with_end=language == 'ruby')
+        else:
+            self._assign_brace_end_lines(content, elements, starts, line_starts)
         
         return elements
     
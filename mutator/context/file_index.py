@@ -0,0 +1,374 @@
+"""
+Project file index for the Coding Agent Framework.
+
+This module keeps one in-memory listing of the project tree per working
+directory, already filtered by the ignore rules and carrying stat metadata, so
+search tools, the fallback searcher and the indexer can query it instead of
+walking the tree on every call. The index is kept fresh incrementally: only
+directories whose mtime changed since the last scan are listed again.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class FileEntry:
+    """A file or directory in the project index."""
+    path: str  # POSIX path relative to the index root ("" for the root itself), absolute outside it
+    name: str
+    is_dir: bool
+    size: int
+    mtime: float
+    mode: int
+    is_symlink: bool = False
+
+    @property
+    def permissions(self) -> str:
+        """Permission bits in the same octal form as `ls` uses."""
+        return oct(self.mode)[-3:]
+
+
+class FileIndex:
+    """Incrementally maintained index of the non-ignored files of a project."""
+
+    def __init__(self, root: Path, code_analyzer: Any, refresh_interval: float = 1.0):
+        """
+        Initialize the file index.
+
+        Args:
+            root: Project root to index
+            code_analyzer: CodeAnalyzer providing the ignore rules
+            refresh_interval: Minimum seconds between freshness checks
+        """
+        self.root = Path(root).absolute()
+        self.code_analyzer = code_analyzer
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+
+        # Relative directory path -> {child name: entry}
+        self._children: Dict[str, Dict[str, FileEntry]] = {}
+        # Relative directory path -> mtime seen when it was last listed
+        self._dir_mtimes: Dict[str, float] = {}
+        # Relative .gitignore path -> mtime, to detect ignore rule changes
+        self._gitignore_mtimes: Dict[str, float] = {}
+
+        self._built = False
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+
+        self.stats: Dict[str, Any] = {
+            "full_scans": 0,
+            "incremental_refreshes": 0,
+            "directories_rescanned": 0,
+            "last_scan_time": 0.0
+        }
+
+    # -- Scanning --------------------------------------------------------
+
+    @staticmethod
+    def _join(parent: str, name: str) -> str:
+        return f"{parent}/{name}" if parent else name
+
+    def _is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        # Parents were already checked when the walk descended into them
+        return self.code_analyzer.should_ignore_path(rel_path, self.root, is_dir, check_parents=False)
+
+    def _scan_directory(self, rel_dir: str) -> None:
+        """List one directory into the index, descending into new subdirectories."""
+        abs_dir = self.root / rel_dir if rel_dir else self.root
+        try:
+            dir_mtime = abs_dir.stat().st_mtime
+            scanner = os.scandir(abs_dir)
+        except OSError:
+            self._remove_directory(rel_dir)
+            return
+
+        previous = self._children.get(rel_dir, {})
+        children: Dict[str, FileEntry] = {}
+        new_dirs: List[str] = []
+
+        with scanner:
+            for item in scanner:
+                rel_path = self._join(rel_dir, item.name)
+                try:
+                    is_dir = item.is_dir(follow_symlinks=False)
+                    if not is_dir and not item.is_file():
+                        continue  # Sockets, fifos and dangling links
+                    if self._is_ignored(rel_path, is_dir):
+                        continue
+                    item_stat = item.stat()
+                    children[item.name] = FileEntry(
+                        path=rel_path,
+                        name=item.name,
+                        is_dir=is_dir,
+                        size=item_stat.st_size,
+                        mtime=item_stat.st_mtime,
+                        mode=item_stat.st_mode,
+                        is_symlink=item.is_symlink()
+                    )
+                except OSError:
+                    continue
+
+                if item.name == ".gitignore":
+                    self._gitignore_mtimes[rel_path] = children[item.name].mtime
+                if is_dir and rel_path not in self._children:
+                    new_dirs.append(rel_path)
+
+        # Forget subdirectories that disappeared or became ignored
+        for name, entry in previous.items():
+            if entry.is_dir and name not in children:
+                self._remove_directory(entry.path)
+            elif name == ".gitignore" and name not in children:
+                self._gitignore_mtimes.pop(entry.path, None)
+
+        self._children[rel_dir] = children
+        self._dir_mtimes[rel_dir] = dir_mtime
+
+        for sub_dir in new_dirs:
+            self._scan_directory(sub_dir)
+
+    def _remove_directory(self, rel_dir: str) -> None:
+        """Drop a directory and everything below it from the index."""
+        prefix = rel_dir + "/"
+        for key in [k for k in self._children if k == rel_dir or k.startswith(prefix)]:
+            del self._children[key]
+            self._dir_mtimes.pop(key, None)
+        for key in [k for k in self._gitignore_mtimes if k.startswith(prefix)]:
+            del self._gitignore_mtimes[key]
+
+    def _full_scan(self) -> None:
+        """Rebuild the whole index from scratch."""
+        start_time = time.time()
+        self._children.clear()
+        self._dir_mtimes.clear()
+        self._gitignore_mtimes.clear()
+        self.code_analyzer.clear_gitignore_cache()
+
+        self._scan_directory("")
+
+        self._built = True
+        self.stats["full_scans"] += 1
+        self.stats["last_scan_time"] = time.time() - start_time
+        self.logger.debug(
+            f"Indexed {self.file_count()} files under {self.root} in {self.stats['last_scan_time']:.2f}s"
+        )
+
+    def _gitignore_changed(self, known: Dict[str, float]) -> bool:
+        """Check whether any .gitignore file was added, removed or modified."""
+        if known != self._gitignore_mtimes:
+            return True
+        for rel_path, mtime in known.items():
+            try:
+                if (self.root / rel_path).stat().st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Bring the index up to date with the file system.
+
+        Directories whose mtime changed are listed again; a change to any
+        .gitignore file triggers a full rescan since it can affect any path.
+        Checks are throttled to once per refresh_interval unless forced.
+        """
+        with self._lock:
+            now = time.time()
+            if not self._built or force:
+                self._full_scan()
+                self._last_refresh = now
+                return
+
+            if now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+
+            known_gitignores = dict(self._gitignore_mtimes)
+            changed = []
+            for rel_dir, mtime in list(self._dir_mtimes.items()):
+                abs_dir = self.root / rel_dir if rel_dir else self.root
+                try:
+                    if abs_dir.stat().st_mtime != mtime:
+                        changed.append(rel_dir)
+                except OSError:
+                    changed.append(rel_dir)
+
+            # Parents first so removed subtrees are dropped before being visited
+            for rel_dir in sorted(changed, key=lambda d: d.count("/") if d else -1):
+                if rel_dir in self._dir_mtimes:
+                    self._scan_directory(rel_dir)
+
+            if self._gitignore_changed(known_gitignores):
+                self.logger.debug("Ignore rules changed, rebuilding file index")
+                self._full_scan()
+                return
+
+            if changed:
+                self.stats["incremental_refreshes"] += 1
+                self.stats["directories_rescanned"] += len(changed)
+
+    def invalidate(self) -> None:
+        """Force the next query to check the file system for changes."""
+        with self._lock:
+            self._last_refresh = 0.0
+
+    # -- Queries ---------------------------------------------------------
+
+    def relative_path(self, path: Path) -> Optional[str]:
+        """Convert a path to the index's relative form, or None if outside the root."""
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.root / path
+        # Collapse ".." lexically, like the shell does, without following symlinks
+        path = Path(os.path.normpath(path))
+        try:
+            rel_path = path.relative_to(os.path.normpath(self.root)).as_posix()
+        except ValueError:
+            return None
+        return "" if rel_path == "." else rel_path
+
+    def iter_files(self, under: str = "") -> Iterator[FileEntry]:
+        """Iterate over indexed files, optionally below a relative directory."""
+        self.refresh()
+        with self._lock:
+            prefix = under.strip("/")
+            dirs = [
+                d for d in self._children
+                if not prefix or d == prefix or d.startswith(prefix + "/")
+            ]
+            entries = [
+                entry
+                for rel_dir in sorted(dirs)
+                for entry in self._children[rel_dir].values()
+                if not entry.is_dir
+            ]
+        return iter(entries)
+
+    def files(self, under: str = "") -> List[FileEntry]:
+        """Get all indexed files, optionally below a relative directory."""
+        return list(self.iter_files(under))
+
+    def list_directory(self, rel_dir: str = "") -> Optional[List[FileEntry]]:
+        """Get the immediate children of a directory, or None if it is not indexed."""
+        self.refresh()
+        with self._lock:
+            children = self._children.get(rel_dir.strip("/"))
+            return list(children.values()) if children is not None else None
+
+    def restat(self, entry: FileEntry) -> FileEntry:
+        """
+        Refresh the size and mtime of an entry.
+
+        Editing a file does not change its directory's mtime, so callers that
+        report metadata for a handful of results should restat them first.
+        """
+        try:
+            entry_stat = (self.root / entry.path).stat()
+            entry.size = entry_stat.st_size
+            entry.mtime = entry_stat.st_mtime
+            entry.mode = entry_stat.st_mode
+        except OSError:
+            pass
+        return entry
+
+    def file_count(self) -> int:
+        """Number of indexed files."""
+        return sum(
+            1 for children in self._children.values()
+            for entry in children.values() if not entry.is_dir
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                "root": str(self.root),
+                "directories": len(self._children),
+                "files": self.file_count()
+            }
+
+
+def scan_directory(directory: Path) -> List[FileEntry]:
+    """
+    List a directory that no index covers, such as one outside the project.
+
+    The entries carry absolute paths and no ignore rules are applied.
+    """
+    entries = []
+    with os.scandir(directory) as scanner:
+        for item in scanner:
+            try:
+                is_dir = item.is_dir(follow_symlinks=False)
+                if not is_dir and not item.is_file():
+                    continue
+                item_stat = item.stat()
+            except OSError:
+                continue
+            entries.append(FileEntry(
+                path=Path(item.path).absolute().as_posix(),
+                name=item.name,
+                is_dir=is_dir,
+                size=item_stat.st_size,
+                mtime=item_stat.st_mtime,
+                mode=item_stat.st_mode,
+                is_symlink=item.is_symlink()
+            ))
+    return entries
+
+
+# Global file indexes keyed by absolute project root
+_file_indexes: Dict[str, FileIndex] = {}
+_file_indexes_lock = threading.Lock()
+
+
+def get_file_index(working_directory: Any, code_analyzer: Any = None) -> FileIndex:
+    """
+    Get the shared file index for a project root, creating it on first use.
+
+    Args:
+        working_directory: Project root directory
+        code_analyzer: CodeAnalyzer whose ignore rules the index uses when it is
+            created (defaults to the shared analyzer used by the search tools)
+    """
+    key = str(Path(working_directory).absolute())
+    with _file_indexes_lock:
+        index = _file_indexes.get(key)
+        if index is None:
+            if code_analyzer is None:
+                # Import here to avoid circular imports
+                from ..core.path_utils import get_code_analyzer
+                code_analyzer = get_code_analyzer()
+            index = FileIndex(Path(key), code_analyzer)
+            _file_indexes[key] = index
+        return index
+
+
+def invalidate_file_indexes(path: Any) -> None:
+    """
+    Make every index covering a path check the file system on its next query.
+
+    Tools that write files call this so the refresh throttle does not hide
+    the files they just created. Registered trigram indexes are invalidated
+    too, so searches see the files' new contents.
+    """
+    # Import here to avoid circular imports
+    from .trigram_index import invalidate_trigram_indexes
+
+    path = Path(path).absolute()
+    with _file_indexes_lock:
+        indexes = list(_file_indexes.values())
+    for index in indexes:
+        if index.relative_path(path) is not None:
+            index.invalidate()
+    invalidate_trigram_indexes(path)
+
+
+__all__ = ["FileEntry", "FileIndex", "get_file_index", "invalidate_file_indexes", "scan_directory"]
@@ -0,0 +1,299 @@
+"""
+Indexing manifest for the Coding Agent Framework.
+
+This module stores the per-file indexing state (content hash, stat, document
+ids) in a small SQLite database kept in the vector store directory. Rows are
+updated incrementally as batches are written, so large projects neither
+rewrite a single metadata blob on every save nor parse it on every startup,
+and the state no longer lives as a document inside the searchable collection.
+
+Each record also carries the number and size of the documents the file
+produced. Per-language and per-document-type totals are kept up to date in
+the same transactions, so collection statistics are a single small read.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+MANIFEST_FILENAME = "index_manifest.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    collection TEXT NOT NULL,
+    path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    mtime REAL,
+    size INTEGER,
+    chunk_ids TEXT NOT NULL DEFAULT '[]',
+    indexed_at TEXT,
+    doc_stats TEXT,
+    PRIMARY KEY (collection, path)
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    collection TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    documents INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (collection, dimension, key)
+);
+CREATE TABLE IF NOT EXISTS state (
+    collection TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (collection, key)
+);
+"""
+
+
+class IndexManifest:
+    """SQLite-backed record of which files are indexed and how."""
+
+    def __init__(self, db_path: Optional[Path], collection_name: str = "codebase"):
+        """
+        Open (or create) the manifest.
+
+        Args:
+            db_path: SQLite database file, or None for an in-memory manifest
+            collection_name: Vector store collection the rows belong to
+        """
+        self.collection_name = collection_name
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        database = ":memory:"
+        if db_path is not None:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                database = str(db_path)
+            except OSError as e:
+                self.logger.warning(f"Cannot create manifest directory, using in-memory manifest: {str(e)}")
+        self.db_path = database
+
+        # The indexer writes from its writer thread, so share one guarded connection
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        if database != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate_schema()
+        self._conn.commit()
+
+    def _migrate_schema(self) -> None:
+        """Add columns introduced after a manifest was created."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+        if 'doc_stats' not in columns:
+            # Existing rows get NULL stats, which the indexer treats as unknown
+            self._conn.execute("ALTER TABLE files ADD COLUMN doc_stats TEXT")
+
+    @classmethod
+    def for_vector_store(cls, vector_config: Any) -> "IndexManifest":
+        """Open the manifest stored in a vector store's directory."""
+        return cls(Path(vector_config.path) / MANIFEST_FILENAME, vector_config.collection_name)
+
+    # -- Files -----------------------------------------------------------
+
+    def load_files(self) -> Dict[str, Dict[str, Any]]:
+        """Load all file records of the collection, keyed by relative path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, hash, mtime, size, chunk_ids, indexed_at, doc_stats FROM files WHERE collection = ?",
+                (self.collection_name,)
+            ).fetchall()
+
+        return {
+            path: {
+                'hash': file_hash,
+                'mtime': mtime,
+                'size': size,
+                'chunk_ids': json.loads(chunk_ids) if chunk_ids else [],
+                'indexed_at': indexed_at,
+                'doc_stats': json.loads(doc_stats) if doc_stats else None
+            }
+            for path, file_hash, mtime, size, chunk_ids, indexed_at, doc_stats in rows
+        }
+
+    def upsert_files(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Insert or replace file records in one transaction.
+
+        A record's optional 'doc_stats' ({'language': ..., 'documents': {type:
+        count}, 'bytes': {type: bytes}}) replaces the file's previous
+        contribution to the aggregates.
+        """
+        if not records:
+            return
+
+        rows = [
+            (
+                self.collection_name,
+                path,
+                record.get('hash', ''),
+                record.get('mtime'),
+                record.get('size'),
+                json.dumps(record.get('chunk_ids', [])),
+                record.get('indexed_at'),
+                json.dumps(record['doc_stats']) if record.get('doc_stats') is not None else None
+            )
+            for path, record in records.items()
+        ]
+        with self._lock, self._conn:
+            deltas = self._stats_deltas(self._load_doc_stats(list(records)), -1)
+            for record in records.values():
+                self._add_deltas(deltas, record.get('doc_stats'), 1)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(collection, path, hash, mtime, size, chunk_ids, indexed_at, doc_stats) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._apply_deltas(deltas)
+
+    def delete_files(self, paths: Iterable[str]) -> None:
+        """Delete the records of the given files."""
+        paths = list(paths)
+        if not paths:
+            return
+        with self._lock, self._conn:
+            self._apply_deltas(self._stats_deltas(self._load_doc_stats(paths), -1))
+            self._conn.executemany(
+                "DELETE FROM files WHERE collection = ? AND path = ?",
+                [(self.collection_name, path) for path in paths]
+            )
+
+    def file_count(self) -> int:
+        """Number of indexed files in the collection."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE collection = ?", (self.collection_name,)
+            ).fetchone()[0]
+
+    # -- Aggregates ------------------------------------------------------
+
+    def _load_doc_stats(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """Stored document stats of the given files (caller holds the lock)."""
+        stats = []
+        # Stay below SQLite's limit on bound parameters
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT doc_stats FROM files WHERE collection = ? AND doc_stats IS NOT NULL "
+                f"AND path IN ({', '.join('?' * len(chunk))})",
+                [self.collection_name, *chunk]
+            ).fetchall()
+            stats.extend(json.loads(row[0]) for row in rows)
+        return stats
+
+    @staticmethod
+    def _add_deltas(deltas: Dict[Tuple[str, str], List[int]], doc_stats: Optional[Dict[str, Any]],
+                    sign: int) -> None:
+        """Add (sign=1) or subtract (sign=-1) one file's stats to per-key deltas."""
+        if not doc_stats:
+            return
+        documents = doc_stats.get('documents', {})
+        sizes = doc_stats.get('bytes', {})
+        language_delta = deltas.setdefault(('language', doc_stats.get('language') or 'unknown'), [0, 0])
+        for document_type in set(documents) | set(sizes):
+            count = documents.get(document_type, 0) * sign
+            size = sizes.get(document_type, 0) * sign
+            type_delta = deltas.setdefault(('document_type', document_type), [0, 0])
+            type_delta[0] += count
+            type_delta[1] += size
+            language_delta[0] += count
+            language_delta[1] += size
+
+    @classmethod
+    def _stats_deltas(cls, stats: Iterable[Dict[str, Any]], sign: int) -> Dict[Tuple[str, str], List[int]]:
+        deltas: Dict[Tuple[str, str], List[int]] = {}
+        for doc_stats in stats:
+            cls._add_deltas(deltas, doc_stats, sign)
+        return deltas
+
+    def _apply_deltas(self, deltas: Dict[Tuple[str, str], List[int]]) -> None:
+        """Apply per-key deltas to the aggregates table (caller holds the lock)."""
+        rows = [
+            (self.collection_name, dimension, key, documents, size)
+            for (dimension, key), (documents, size) in deltas.items()
+            if documents or size
+        ]
+        if not rows:
+            return
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO aggregates (collection, dimension, key) VALUES (?, ?, ?)",
+            [row[:3] for row in rows]
+        )
+        self._conn.executemany(
+            "UPDATE aggregates SET documents = documents + ?, bytes = bytes + ? "
+            "WHERE collection = ? AND dimension = ? AND key = ?",
+            [(documents, size, collection, dimension, key)
+             for collection, dimension, key, documents, size in rows]
+        )
+        self._conn.execute(
+            "DELETE FROM aggregates WHERE collection = ? AND documents <= 0",
+            (self.collection_name,)
+        )
+
+    def get_document_stats(self) -> Dict[str, Any]:
+        """
+        Get document counts and sizes per language and per document type.
+
+        'complete' is False while some records predate document stats, in
+        which case the totals only cover the files indexed since.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dimension, key, documents, bytes FROM aggregates WHERE collection = ?",
+                (self.collection_name,)
+            ).fetchall()
+            unknown = self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE collection = ? AND doc_stats IS NULL",
+                (self.collection_name,)
+            ).fetchone()[0]
+
+        stats: Dict[str, Any] = {'languages': {}, 'document_types': {}, 'total_bytes': 0, 'complete': not unknown}
+        for dimension, key, documents, size in rows:
+            if dimension == 'language':
+                stats['languages'][key] = {'documents': documents, 'bytes': size}
+                stats['total_bytes'] += size
+            else:
+                stats['document_types'][key] = {'documents': documents, 'bytes': size}
+        return stats
+
+    # -- State -----------------------------------------------------------
+
+    def get_state(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a collection-level state value."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM state WHERE collection = ? AND key = ?",
+                (self.collection_name, key)
+            ).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, **values: Optional[str]) -> None:
+        """Set collection-level state values."""
+        rows = [(self.collection_name, key, value) for key, value in values.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (collection, key, value) VALUES (?, ?, ?)", rows
+            )
+
+    def clear(self) -> None:
+        """Forget every file and state value of the collection."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE collection = ?", (self.collection_name,))
+            self._conn.execute("DELETE FROM state WHERE collection = ?", (self.collection_name,))
+            self._conn.execute("DELETE FROM aggregates WHERE collection = ?", (self.collection_name,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["IndexManifest", "MANIFEST_FILENAME"]
@@ -7,11 +7,15 @@ indexing operations for the context manager.
 
 import threading
 import logging
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import os
-import fnmatch
 import json
 import hashlib
 
@@ -20,21 +24,75 @@ from git import Repo, InvalidGitRepositoryError
 from ..core.config import ContextConfig, VectorStoreConfig
 from .vector_store import VectorStoreManager
 from .code_analyzer import CodeAnalyzer
+from .file_index import FileIndex, get_file_index
+from .index_manifest import IndexManifest
+
+
+# Version of the document metadata; indexes written with another one are rebuilt
+DOCUMENT_METADATA_VERSION = "2"
+
+
+def directory_key(depth: int) -> str:
+    """Metadata field holding a document's ancestor directory at the given depth."""
+    return f"dir_{depth}"
+
+
+def directory_metadata(relative_path: str) -> Dict[str, str]:
+    """
+    Metadata fields naming every ancestor directory of a file.
+    
+    "src/pkg/util.py" gives {"dir_1": "src", "dir_2": "src/pkg"}, so a
+    directory filter is a single equality test however many files it holds.
+    """
+    parts = relative_path.replace('\\', '/').split('/')[:-1]
+    return {directory_key(depth): '/'.join(parts[:depth]) for depth in range(1, len(parts) + 1)}
+
+
+@dataclass
+class _PreparedFile:
+    """Documents produced for one file, ready to be embedded and written."""
+    file_path: Path
+    relative_path: str
+    documents: List[str] = field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+    content_hash: str = ""
+    language: str = "unknown"
+    unchanged: bool = False  # Content matches the indexed version, only the stat changed
+    renamed_from: Optional[str] = None  # Deleted file with identical content
+    
+    def add(self, doc_id: str, document: str, metadata: Dict[str, Any]) -> None:
+        self.ids.append(doc_id)
+        self.documents.append(document)
+        self.metadatas.append(metadata)
+    
+    def document_stats(self) -> Dict[str, Any]:
+        """Number and UTF-8 size of the documents per document type, as stored in the manifest."""
+        documents: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
+        for document, metadata in zip(self.documents, self.metadatas):
+            document_type = metadata.get('document_type', 'unknown')
+            documents[document_type] = documents.get(document_type, 0) + 1
+            sizes[document_type] = sizes.get(document_type, 0) + len(document.encode('utf-8', errors='ignore'))
+        return {'language': self.language, 'documents': documents, 'bytes': sizes}
 
 
 class CodebaseIndexer:
     """Handles codebase indexing operations."""
     
     def __init__(self, context_config: ContextConfig, vector_store: VectorStoreManager,
-                 code_analyzer: CodeAnalyzer, working_directory: Path):
+                 code_analyzer: CodeAnalyzer, working_directory: Path,
+                 file_index: Optional[FileIndex] = None, manifest: Optional[IndexManifest] = None):
         """Initialize the codebase indexer."""
         self.context_config = context_config
         self.vector_store = vector_store
         self.code_analyzer = code_analyzer
         self.working_directory = working_directory
+        self.file_index = file_index or get_file_index(working_directory, code_analyzer)
+        self.manifest = manifest or IndexManifest.for_vector_store(vector_store.vector_config)
         self.logger = logging.getLogger(__name__)
         
-        # Metadata storage ID
+        # Collection document that held the indexing state before the manifest
         self._metadata_id = "indexing_metadata"
         
         # Indexing state
@@ -42,6 +100,8 @@ class CodebaseIndexer:
         self._indexing_complete = False
         self._indexing_error: Optional[str] = None
         self._indexing_thread: Optional[threading.Thread] = None
+        self._indexing_progress: Dict[str, Any] = {}
+        self._rename_sources: Dict[str, str] = {}
         
         # Load persisted metadata
         self._load_indexing_metadata()
@@ -60,38 +120,22 @@ class CodebaseIndexer:
             self._git_repo = None
     
     def _load_indexing_metadata(self) -> None:
-        """Load indexing metadata from vector store."""
+        """Load indexing state from the manifest."""
         try:
-            # Try to get existing metadata
-            results = self.vector_store.collection.get(
-                ids=[self._metadata_id],
-                include=['metadatas']
-            )
+            self._indexed_files = self.manifest.load_files()
+            # Opening ChromaDB is slow, so only look for legacy state if a database exists
+            if not self._indexed_files and self.vector_store.has_persisted_collection():
+                self._migrate_legacy_metadata()
             
-            if results['metadatas'] and len(results['metadatas']) > 0:
-                metadata = results['metadatas'][0]
-                last_scan_str = metadata.get('last_scan_time')
-                if last_scan_str:
-                    self._last_scan_time = datetime.fromisoformat(last_scan_str)
-                else:
-                    self._last_scan_time = None
-                
-                # Parse indexed_files from JSON string
-                indexed_files_json = metadata.get('indexed_files_json', '{}')
-                try:
-                    self._indexed_files = json.loads(indexed_files_json)
-                except json.JSONDecodeError:
-                    self._indexed_files = {}
-                
-                # Parse indexing_complete from string
-                indexing_complete_str = metadata.get('indexing_complete', 'False')
-                self._indexing_complete = indexing_complete_str.lower() in ('true', '1', 'yes')
-                
+            last_scan_str = self.manifest.get_state('last_scan_time')
+            self._last_scan_time = datetime.fromisoformat(last_scan_str) if last_scan_str else None
+            
+            indexing_complete_str = self.manifest.get_state('indexing_complete', 'False')
+            self._indexing_complete = indexing_complete_str.lower() in ('true', '1', 'yes')
+            
+            if self._indexed_files:
                 self.logger.debug(f"Loaded indexing metadata: {len(self._indexed_files)} files previously indexed")
             else:
-                self._last_scan_time = None
-                self._indexed_files = {}
-                self._indexing_complete = False
                 self.logger.debug("No previous indexing metadata found")
                 
         except Exception as e:
@@ -100,78 +144,152 @@ class CodebaseIndexer:
             self._indexed_files = {}
             self._indexing_complete = False
     
-    def _save_indexing_metadata(self) -> None:
-        """Save indexing metadata to vector store."""
+    def _migrate_legacy_metadata(self) -> None:
+        """Move state stored by older versions in a collection document into the manifest."""
         try:
-            # Convert indexed_files dict to JSON string for storage
-            indexed_files_json = json.dumps(self._indexed_files) if self._indexed_files else "{}"
+            results = self.vector_store.collection.get(
+                ids=[self._metadata_id],
+                include=['metadatas']
+            )
+            if not results['metadatas']:
+                return
+            
+            metadata = results['metadatas'][0]
+            try:
+                legacy_files = json.loads(metadata.get('indexed_files_json', '{}'))
+            except json.JSONDecodeError:
+                legacy_files = {}
             
-            metadata = {
-                'last_scan_time': self._last_scan_time.isoformat() if self._last_scan_time else None,
-                'indexed_files_json': indexed_files_json,
-                'indexing_complete': str(self._indexing_complete),
-                'metadata_type': 'indexing_metadata'
+            # Old records only hashed mtime:size, so every file is re-checked once;
+            # keeping the paths lets deleted files still be purged
+            self._indexed_files = {
+                relative_path: {'hash': '', 'mtime': None, 'size': None, 'chunk_ids': []}
+                for relative_path in legacy_files
             }
+            self.manifest.upsert_files(self._indexed_files)
+            self.manifest.set_state(
+                last_scan_time=metadata.get('last_scan_time'),
+                indexing_complete=metadata.get('indexing_complete', 'False')
+            )
             
-            # Check if metadata document already exists
-            try:
-                existing = self.vector_store.collection.get(
-                    ids=[self._metadata_id],
-                    include=['metadatas']
-                )
-                if existing['metadatas'] and len(existing['metadatas']) > 0:
-                    # Update existing metadata
-                    self.vector_store.collection.update(
-                        ids=[self._metadata_id],
-                        metadatas=[metadata]
-                    )
-                else:
-                    # Create new metadata document
-                    self.vector_store.collection.add(
-                        ids=[self._metadata_id],
-                        documents=["Indexing metadata"],
-                        metadatas=[metadata]
-                    )
-            except Exception:
-                # If update fails, try to add (might be first time)
-                self.vector_store.collection.add(
-                    ids=[self._metadata_id],
-                    documents=["Indexing metadata"],
-                    metadatas=[metadata]
-                )
+            # The metadata document polluted search results
+            self.vector_store.collection.delete(ids=[self._metadata_id])
+            self.logger.info(f"Migrated indexing metadata of {len(self._indexed_files)} files to the manifest")
             
+        except Exception as e:
+            self.logger.debug(f"No legacy indexing metadata migrated: {str(e)}")
+    
+    def _save_indexing_metadata(self) -> None:
+        """Save collection-level indexing state (file records are written as batches complete)."""
+        try:
+            self.manifest.set_state(
+                last_scan_time=self._last_scan_time.isoformat() if self._last_scan_time else None,
+                indexing_complete=str(self._indexing_complete),
+                metadata_version=DOCUMENT_METADATA_VERSION
+            )
             self.logger.debug("Saved indexing metadata")
             
         except Exception as e:
             self.logger.warning(f"Failed to save indexing metadata: {str(e)}")
     
     def _get_file_hash(self, file_path: Path) -> str:
-        """Get a hash of the file content and modification time."""
+        """Get a hash of the file content."""
         try:
-            stat = file_path.stat()
-            # Use both modification time and size for a quick hash
-            content = f"{stat.st_mtime}:{stat.st_size}"
-            return hashlib.md5(content.encode()).hexdigest()
-        except Exception:
+            return hashlib.sha256(file_path.read_bytes()).hexdigest()
+        except OSError:
             return ""
     
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        """Get a hash of a document's text."""
+        return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
+    
     def _has_file_changed(self, file_path: Path) -> bool:
-        """Check if a file has changed since last indexing."""
-        relative_path = str(file_path.relative_to(self.working_directory))
-        current_hash = self._get_file_hash(file_path)
+        """
+        Check if a file may have changed since last indexing.
         
-        if not current_hash:
-            return True  # If we can't get hash, assume changed
+        Files with the same mtime and size as when they were indexed are skipped
+        without being read. Other files are candidates: their content hash is
+        compared when they are read, so a touch or a branch switch that leaves
+        the content alone does not re-embed them.
+        """
+        relative_path = str(file_path.relative_to(self.working_directory))
+        record = self._indexed_files.get(relative_path)
+        if not isinstance(record, dict) or record.get('doc_stats') is None:
+            return True  # Never indexed, or indexed by an older version
         
-        stored_hash = self._indexed_files.get(relative_path)
-        return stored_hash != current_hash
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return True
+        return record.get('mtime') != stat.st_mtime or record.get('size') != stat.st_size
     
-    def _mark_file_indexed(self, file_path: Path) -> None:
-        """Mark a file as indexed with its current hash."""
+    def _mark_file_indexed(self, file_path: Path, content_hash: Optional[str] = None,
+                           chunk_ids: Optional[List[str]] = None,
+                           doc_stats: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Mark a file as indexed with its content hash, current stat, document ids
+        and document stats.
+        
+        Returns the new record so the caller can persist it, or None if the file
+        could not be read.
+        """
         relative_path = str(file_path.relative_to(self.working_directory))
-        file_hash = self._get_file_hash(file_path)
-        if file_hash:
-            self._indexed_files[relative_path] = file_hash
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        
+        file_hash = content_hash or self._get_file_hash(file_path)
+        if not file_hash:
+            return None
+        
+        if chunk_ids is None:
+            # Content unchanged, so are its documents
+            previous = self._indexed_files.get(relative_path)
+            chunk_ids = previous.get('chunk_ids', []) if isinstance(previous, dict) else []
+            if doc_stats is None and isinstance(previous, dict):
+                doc_stats = previous.get('doc_stats')
+        
+        record = {
+            'hash': file_hash,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'chunk_ids': list(chunk_ids),
+            'indexed_at': datetime.now().isoformat(),
+            'doc_stats': doc_stats
+        }
+        self._indexed_files[relative_path] = record
+        return record
+    
+    def _find_deleted_files(self) -> Dict[str, Any]:
+        """Get the indexed files that no longer exist or are now ignored."""
+        deleted = {}
+        for relative_path, record in self._indexed_files.items():
+            file_path = self.working_directory / relative_path
+            if not file_path.is_file() or self.code_analyzer.should_ignore_path(
+                    Path(relative_path).as_posix(), self.working_directory):
+                deleted[relative_path] = record
+        return deleted
+    
+    def _purge_files(self, relative_paths: List[str]) -> None:
+        """Remove all documents of the given files from the vector store."""
+        if not relative_paths:
+            return
+        
+        try:
+            ids = self.vector_store.get_ids_for_files(relative_paths)
+            if ids:
+                self.vector_store.delete_documents(ids)
+        except Exception as e:
+            self.logger.warning(f"Failed to purge documents of deleted files: {str(e)}")
+            return
+        
+        for relative_path in relative_paths:
+            self._indexed_files.pop(relative_path, None)
+        self.manifest.delete_files(relative_paths)
+        self._indexing_progress['files_purged'] = len(relative_paths)
+        self.logger.info(f"Purged {len(ids)} documents of {len(relative_paths)} deleted files")
     
     def index_codebase(self, force_reindex: bool = False, async_mode: bool = True) -> None:
         """Index the entire codebase for vector search."""
@@ -179,17 +297,24 @@ class CodebaseIndexer:
             self.logger.info("Indexing already in progress")
             return
         
+        if not force_reindex and self._indexed_files \
+                and self.manifest.get_state('metadata_version') != DOCUMENT_METADATA_VERSION:
+            # Documents lack metadata that search filters rely on
+            self.logger.info("Index was written by an older version, reindexing")
+            force_reindex = True
+        
         # Check if we need to reindex
         if not force_reindex and self._indexing_complete:
-            # Check if any files have changed
+            # Check if any files have changed or been deleted
             files_to_check = self._collect_files_to_index()
             changed_files = [f for f in files_to_check if self._has_file_changed(f)]
+            deleted_files = self._find_deleted_files()
             
-            if not changed_files:
+            if not changed_files and not deleted_files:
                 self.logger.info("No files have changed since last indexing")
                 return
             else:
-                self.logger.info(f"Found {len(changed_files)} changed files to reindex")
+                self.logger.info(f"Found {len(changed_files)} changed and {len(deleted_files)} deleted files to reindex")
         
         if async_mode:
             self._start_background_indexing(force_reindex)
@@ -227,6 +352,7 @@ class CodebaseIndexer:
         # Clear existing embeddings if force reindex
         if force_reindex:
             self.vector_store.clear_collection()
+            self.manifest.clear()
             self._indexed_files = {}
             self._indexing_complete = False
         
@@ -239,7 +365,15 @@ class CodebaseIndexer:
         else:
             files_to_index = all_files
         
-        if not files_to_index:
+        # Files that disappeared; their content hashes let renamed files reuse their vectors
+        deleted_files = self._find_deleted_files()
+        self._rename_sources = {
+            record['hash']: relative_path
+            for relative_path, record in deleted_files.items()
+            if isinstance(record, dict) and record.get('hash')
+        }
+        
+        if not files_to_index and not deleted_files:
             self.logger.info("No files found to index")
             return
             
@@ -252,20 +386,12 @@ class CodebaseIndexer:
             if len(files_to_index) > 5:
                 self.logger.debug(f"... and {len(files_to_index) - 5} more files")
         
-        # Process files in smaller batches
-        batch_size = 5
-        for i in range(0, len(files_to_index), batch_size):
-            batch = files_to_index[i:i + batch_size]
-            try:
-                self._index_file_batch(batch)
-                # Mark files as indexed
-                for file_path in batch:
-                    self._mark_file_indexed(file_path)
-                # Force garbage collection after each batch
-                import gc
-                gc.collect()
-            except Exception as e:
-                self.logger.warning(f"Failed to index batch {i//batch_size + 1}: {str(e)}")
+        if files_to_index:
+            self._run_indexing_pipeline(files_to_index)
+        
+        # Purge after the pipeline so renamed files could reuse the old vectors first
+        self._purge_files(list(deleted_files))
+        self._rename_sources = {}
         
         self._last_scan_time = datetime.now()
         self._indexing_complete = True
@@ -277,57 +403,12 @@ class CodebaseIndexer:
         files_to_index = []
         max_files = getattr(self.context_config, 'max_files_to_index', 50)
         
-        # Collect all eligible files more efficiently
-        all_files = []
-        
-        def should_skip_directory(dir_path: Path) -> bool:
-            """Check if we should skip an entire directory."""
-            if not dir_path.is_relative_to(self.working_directory):
-                return True
-            
-            relative_path = dir_path.relative_to(self.working_directory)
-            path_str = str(relative_path)
-            
-            # Check if directory matches ignore patterns
-            for pattern in self.context_config.ignore_patterns:
-                if fnmatch.fnmatch(path_str, pattern) or fnmatch.fnmatch(dir_path.name, pattern):
-                    return True
-            
-            return False
-        
-        # Walk through directories more efficiently
-        for root, dirs, files in os.walk(self.working_directory):
-            root_path = Path(root)
-            
-            # Skip ignored directories and remove them from dirs to prevent traversal
-            dirs[:] = [d for d in dirs if not should_skip_directory(root_path / d)]
-            
-            # Process files in current directory
-            for file_name in files:
-                file_path = root_path / file_name
-                
-                if not file_path.is_file():
-                    continue
-                
-                if self.code_analyzer.should_ignore_file(file_path, self.working_directory):
-                    continue
-                
-                try:
-                    file_size = file_path.stat().st_size
-                    # Skip very large files
-                    if file_size > 1024 * 1024:  # Skip files > 1MB
-                        continue
-                    all_files.append((file_path, file_size))
-                    
-                    # Early exit if we have enough files
-                    if len(all_files) >= max_files * 2:  # Collect a bit more for sorting
-                        break
-                except (OSError, PermissionError):
-                    continue
-            
-            # Early exit if we have enough files
-            if len(all_files) >= max_files * 2:
-                break
+        # Eligible files come from the shared index, already filtered by ignore rules
+        all_files = [
+            (self.working_directory / entry.path, entry.size)
+            for entry in self.file_index.iter_files()
+            if entry.size <= 1024 * 1024  # Skip files > 1MB
+        ]
         
         # Sort by size and take the smallest files first
         all_files.sort(key=lambda x: x[1])
@@ -359,98 +440,284 @@ class CodebaseIndexer:
             self.logger.warning(f"Failed to check git changes: {str(e)}")
             return True
     
-    def _index_file_batch(self, files: List[Path]) -> None:
-        """Index a batch of files."""
-        documents = []
-        metadatas = []
-        ids = []
+    def _get_worker_count(self) -> int:
+        """Number of reader/chunker threads to use."""
+        workers = getattr(self.vector_store.vector_config, 'indexing_workers', 0)
+        return workers if workers > 0 else min(32, (os.cpu_count() or 1) + 4)
+    
+    def _run_indexing_pipeline(self, files: List[Path]) -> None:
+        """
+        Index files through a read/chunk -> embed -> write pipeline.
         
-        for file_path in files:
-            try:
-                # Remove existing documents for this file first
-                relative_path = file_path.relative_to(self.working_directory)
-                self._remove_file_documents(relative_path)
-                
-                # Read file content
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
+        Files are read and chunked on a thread pool while the main thread embeds
+        complete batches with one large encode() call. Each embedded batch is
+        written on a separate writer thread (stale ids deleted and new
+        documents upserted in bulk) so the next batch can be embedded meanwhile.
+        """
+        vector_config = self.vector_store.vector_config
+        flush_size = max(1, getattr(vector_config, 'embedding_batch_size', 64)) * 4
+        workers = self._get_worker_count()
+        
+        self._indexing_progress = {
+            'files_total': len(files),
+            'files_indexed': 0,
+            'files_failed': 0,
+            'files_unchanged': 0,
+            'renames_detected': 0,
+            'chunks_indexed': 0,
+            'embeddings_computed': 0,
+            'embeddings_reused': 0,
+            'elapsed': 0.0,
+            'files_per_second': 0.0,
+            'chunks_per_second': 0.0,
+            'started_at': time.time()
+        }
+        
+        batch: List[_PreparedFile] = []
+        batch_documents = 0
+        write_future: Optional[Future] = None
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="index-reader") as readers, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-writer") as writer:
+            # Keep a bounded window of files being read ahead of the embedder
+            file_iter = iter(files)
+            in_flight = deque(
+                readers.submit(self._prepare_file, file_path)
+                for file_path in itertools.islice(file_iter, workers * 4)
+            )
+            
+            while in_flight:
+                prepared = in_flight.popleft().result()
+                next_file = next(file_iter, None)
+                if next_file is not None:
+                    in_flight.append(readers.submit(self._prepare_file, next_file))
                 
-                # Skip empty files
-                if not content.strip():
+                if prepared is None:
+                    self._indexing_progress['files_failed'] += 1
                     continue
                 
-                # Get file metadata
-                language = self.code_analyzer.get_file_language(file_path)
-                
-                # Chunk the content
-                chunks = self.code_analyzer.chunk_content(
-                    content, 
-                    self.vector_store.vector_config.chunk_size,
-                    self.vector_store.vector_config.chunk_overlap
-                )
-                
-                # Limit chunks per file
-                max_chunks_per_file = 3
-                chunk_count = 0
-                
-                # Create embeddings for each chunk
-                for chunk_idx, (chunk_content, start_line, end_line) in enumerate(chunks):
-                    if not chunk_content.strip() or chunk_count >= max_chunks_per_file:
-                        continue
-                    
-                    doc_id = f"{relative_path}::{chunk_idx}"
-                    
-                    documents.append(chunk_content)
-                    metadatas.append({
-                        'file_path': str(relative_path),
-                        'language': language,
-                        'start_line': start_line,
-                        'end_line': end_line,
-                        'chunk_index': chunk_idx,
-                        'file_size': len(content),
-                        'indexed_at': datetime.now().isoformat(),
-                        'document_type': 'code_chunk'
-                    })
-                    ids.append(doc_id)
-                    chunk_count += 1
+                batch.append(prepared)
+                batch_documents += len(prepared.documents)
+                if batch_documents >= flush_size:
+                    write_future = self._flush_batch(batch, writer, write_future)
+                    batch, batch_documents = [], 0
+            
+            if batch:
+                write_future = self._flush_batch(batch, writer, write_future)
+            if write_future is not None:
+                self._wait_for_write(write_future)
+        
+        progress = self._indexing_progress
+        self.logger.info(
+            f"Indexed {progress['files_indexed']} files ({progress['chunks_indexed']} chunks) "
+            f"in {progress['elapsed']:.1f}s: {progress['files_per_second']:.1f} files/s, "
+            f"{progress['chunks_per_second']:.1f} chunks/s "
+            f"({progress['files_unchanged']} unchanged, {progress['embeddings_reused']} embeddings reused)"
+        )
+    
+    def _prepare_file(self, file_path: Path) -> Optional[_PreparedFile]:
+        """Read, chunk and extract elements of a file (runs on a reader thread)."""
+        try:
+            relative_path = str(file_path.relative_to(self.working_directory))
+            prepared = _PreparedFile(file_path=file_path, relative_path=relative_path)
+            
+            # Read file content
+            data = file_path.read_bytes()
+            prepared.content_hash = hashlib.sha256(data).hexdigest()
+            
+            record = self._indexed_files.get(relative_path)
+            if isinstance(record, dict) and record.get('hash') == prepared.content_hash \
+                    and record.get('doc_stats') is not None:
+                # Touched or checked out again without a content change
+                prepared.unchanged = True
+                return prepared
+            if record is None:
+                prepared.renamed_from = self._rename_sources.get(prepared.content_hash)
+            
+            content = data.decode('utf-8', errors='ignore')
+            language = self.code_analyzer.get_file_language(file_path)
+            prepared.language = language
+            
+            # Empty files are still marked indexed so their old documents are removed
+            if not content.strip():
+                return prepared
+            
+            # Get file metadata
+            indexed_at = datetime.now().isoformat()
+            directories = directory_metadata(relative_path)
+            
+            # Chunk the content
+            chunks = self.code_analyzer.chunk_content(
+                content, 
+                self.vector_store.vector_config.chunk_size,
+                self.vector_store.vector_config.chunk_overlap
+            )
+            
+            # Limit chunks per file
+            max_chunks_per_file = 3
+            chunk_count = 0
+            
+            for chunk_idx, (chunk_content, start_line, end_line) in enumerate(chunks):
+                if not chunk_content.strip() or chunk_count >= max_chunks_per_file:
+                    continue
                 
-                # Extract code elements
-                elements = self.code_analyzer.extract_code_elements(content, language)
-                for element in elements:
-                    doc_id = f"{relative_path}::{element['type']}::{element['name']}"
-                    
-                    documents.append(f"{element['signature']}\n\n{element.get('docstring', '')}")
-                    metadatas.append({
-                        'file_path': str(relative_path),
-                        'language': language,
-                        'element_type': element['type'],
-                        'element_name': element['name'],
-                        'line_number': element['line'],
-                        'indexed_at': datetime.now().isoformat(),
-                        'document_type': 'code_element'
-                    })
-                    ids.append(doc_id)
+                prepared.add(f"{relative_path}::{chunk_idx}", chunk_content, {
+                    'file_path': relative_path,
+                    'language': language,
+                    'start_line': start_line,
+                    'end_line': end_line,
+                    'chunk_index': chunk_idx,
+                    'file_size': len(content),
+                    'indexed_at': indexed_at,
+                    'document_type': 'code_chunk',
+                    **directories
+                })
+                chunk_count += 1
+            
+            # Extract code elements
+            elements = self.code_analyzer.extract_code_elements(content, language)
+            for element in elements:
+                doc_id = f"{relative_path}::{element['type']}::{element['name']}"
+                if doc_id in prepared.ids:
+                    # Same name defined twice in one file
+                    doc_id = f"{doc_id}::{element['line']}"
                 
-            except Exception as e:
-                self.logger.warning(f"Failed to index {file_path}: {str(e)}")
+                prepared.add(doc_id, f"{element['signature']}\n\n{element.get('docstring', '')}", {
+                    'file_path': relative_path,
+                    'language': language,
+                    'element_type': element['type'],
+                    'element_name': element['name'],
+                    'line_number': element['line'],
+                    'end_line': element['end_line'],
+                    'indexed_at': indexed_at,
+                    'document_type': 'code_element',
+                    **directories
+                })
+            
+            return prepared
+            
+        except Exception as e:
+            self.logger.warning(f"Failed to index {file_path}: {str(e)}")
+            return None
+    
+    def _flush_batch(self, batch: List[_PreparedFile], writer: ThreadPoolExecutor,
+                     previous_write: Optional[Future]) -> Optional[Future]:
+        """Embed a batch and hand it to the writer thread."""
+        progress = self._indexing_progress
+        changed = [prepared for prepared in batch if not prepared.unchanged]
+        progress['files_unchanged'] += len(batch) - len(changed)
+        
+        documents = [doc for prepared in changed for doc in prepared.documents]
+        metadatas = [meta for prepared in changed for meta in prepared.metadatas]
+        ids = [doc_id for prepared in changed for doc_id in prepared.ids]
+        
+        try:
+            # Current documents of these files, plus those of files they were renamed from
+            source_paths = [prepared.relative_path for prepared in changed]
+            for prepared in changed:
+                if prepared.renamed_from:
+                    self.logger.debug(f"Detected rename: {prepared.renamed_from} -> {prepared.relative_path}")
+                    source_paths.append(prepared.renamed_from)
+                    progress['renames_detected'] += 1
+            existing = self.vector_store.get_file_documents(source_paths)
+            
+            embeddings = None
+            if documents and self.vector_store.has_embedding_model():
+                embeddings = self._embed_with_reuse(documents, existing)
+        except Exception as e:
+            self.logger.warning(f"Failed to embed batch of {len(documents)} documents: {str(e)}")
+            return previous_write
+        
+        # Documents these files (or their rename sources) produced before but no longer do
+        new_ids = set(ids)
+        stale_ids = [doc_id for doc_id in existing['ids'] if doc_id not in new_ids]
         
-        # Add to vector store
-        if documents:
-            self.vector_store.add_documents(documents, metadatas, ids)
+        # Only one write in flight, so memory stays bounded
+        if previous_write is not None:
+            self._wait_for_write(previous_write)
+        
+        return writer.submit(self._write_batch, batch, documents, metadatas, ids, embeddings, stale_ids)
     
-    def _remove_file_documents(self, relative_path: Path) -> None:
-        """Remove existing documents for a file from the vector store."""
+    def _embed_with_reuse(self, documents: List[str], existing: Dict[str, List[Any]]) -> List[List[float]]:
+        """
+        Embed documents, reusing stored embeddings of identical existing documents.
+        
+        Chunks and elements are matched by content hash rather than id, so an
+        unchanged function keeps its vector even when its line numbers shift or
+        its file was renamed.
+        """
+        reusable = {
+            self._content_hash(document): embedding
+            for document, embedding in zip(existing['documents'], existing['embeddings'])
+            if document is not None and embedding is not None
+        }
+        
+        embeddings: List[Optional[List[float]]] = [
+            reusable.get(self._content_hash(document)) for document in documents
+        ]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.vector_store.embed_documents([documents[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        
+        self._indexing_progress['embeddings_computed'] += len(missing)
+        self._indexing_progress['embeddings_reused'] += len(documents) - len(missing)
+        return embeddings
+    
+    def _wait_for_write(self, write_future: Future) -> None:
+        """Wait for a pending write and log its failure."""
         try:
-            # Query for documents from this file
-            results = self.vector_store.collection.get(
-                where={'file_path': str(relative_path)}
+            write_future.result()
+        except Exception as e:
+            self.logger.warning(f"Failed to write indexing batch: {str(e)}")
+    
+    def _write_batch(self, batch: List[_PreparedFile], documents: List[str],
+                     metadatas: List[Dict[str, Any]], ids: List[str],
+                     embeddings: Optional[List[List[float]]], stale_ids: List[str]) -> None:
+        """Replace the documents of a batch of files in the vector store (writer thread)."""
+        if stale_ids:
+            self.vector_store.delete_documents(stale_ids)
+        
+        self.vector_store.upsert_documents(documents, metadatas, ids, embeddings)
+        
+        records = {}
+        renamed = []
+        for prepared in batch:
+            record = self._mark_file_indexed(
+                prepared.file_path,
+                prepared.content_hash,
+                None if prepared.unchanged else prepared.ids,
+                None if prepared.unchanged else prepared.document_stats()
             )
-            
-            if results['ids']:
-                # Delete existing documents
-                self.vector_store.collection.delete(ids=results['ids'])
-                self.logger.debug(f"Removed {len(results['ids'])} existing documents for {relative_path}")
+            if record is not None:
+                records[prepared.relative_path] = record
+            if prepared.renamed_from:
+                self._indexed_files.pop(prepared.renamed_from, None)
+                renamed.append(prepared.renamed_from)
+        
+        # One manifest transaction per batch
+        self.manifest.upsert_files(records)
+        self.manifest.delete_files(renamed)
+        
+        progress = self._indexing_progress
+        progress['files_indexed'] += len(batch)
+        progress['chunks_indexed'] += len(documents)
+        progress['elapsed'] = max(time.time() - progress['started_at'], 1e-6)
+        progress['files_per_second'] = progress['files_indexed'] / progress['elapsed']
+        progress['chunks_per_second'] = progress['chunks_indexed'] / progress['elapsed']
+        self.logger.debug(
+            f"Indexing progress: {progress['files_indexed']}/{progress['files_total']} files, "
+            f"{progress['files_per_second']:.1f} files/s, {progress['chunks_per_second']:.1f} chunks/s"
+        )
+    
+    def get_document_stats(self) -> Dict[str, Any]:
+        """Get the maintained document counts and sizes per language and document type."""
+        try:
+            return self.manifest.get_document_stats()
         except Exception as e:
-            self.logger.warning(f"Failed to remove existing documents for {relative_path}: {str(e)}")
+            self.logger.warning(f"Failed to read document stats: {str(e)}")
+            return {}
     
     def get_indexing_status(self) -> Dict[str, Any]:
         """Get the current indexing status."""
@@ -460,11 +727,17 @@ class CodebaseIndexer:
             'indexing_error': self._indexing_error,
             'last_scan_time': self._last_scan_time.isoformat() if self._last_scan_time else None,
             'has_git_repo': self._git_repo is not None,
-            'indexed_files_count': len(self._indexed_files) if hasattr(self, '_indexed_files') else 0
+            'indexed_files_count': len(self._indexed_files) if hasattr(self, '_indexed_files') else 0,
+            'progress': dict(self._indexing_progress)
         }
     
     def stop_indexing(self) -> None:
         """Stop any ongoing indexing operations."""
         self._indexing_in_progress = False
         if self._indexing_thread and self._indexing_thread.is_alive():
-            self._indexing_thread.join(timeout=5.0) 
\ No newline at end of file
+            self._indexing_thread.join(timeout=5.0)
+    
+    def close(self) -> None:
+        """Stop indexing and release the manifest."""
+        self.stop_indexing()
+        self.manifest.close() 
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""
+Lexical search index for the Coding Agent Framework.
+
+This module keeps an in-memory inverted index over chunks of the project's
+files and ranks them with BM25. Files are split at function and class
+boundaries, identifiers are tokenized into their camelCase and snake_case
+parts, and the index is brought up to date incrementally from file stats
+before each query, so only changed files are read again. Every file is
+indexed whatever the query, so document frequencies and chunk lengths, and
+with them the scores, do not depend on earlier queries; path filters and
+trigram candidates only restrict which chunks are returned. Files are read as raw bytes (memory-mapped when large) and tokenized without
+decoding them as a whole. It backs the search_files_sementic tool and the
+context searcher's fallback when vector search is unavailable.
+"""
+
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .file_index import FileIndex, get_file_index
+from .trigram_index import get_trigram_index
+from ..tools.content_search import count_lines, open_buffer
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+# ASCII word characters plus any non-ASCII byte; \w is ASCII-only for bytes
+_BYTES_WORD_PATTERN = re.compile(rb'[\w\x80-\xff]+')
+_WORD_PART_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does",
+    "did", "will", "would", "should", "could", "can", "may", "might", "must"
+})
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search tokens.
+
+    Identifiers produce their camelCase and snake_case parts as well as the
+    whole identifier, so "getUserName" matches queries for "user name" and
+    for "getusername".
+    """
+    tokens: List[str] = []
+    for word in _WORD_PATTERN.findall(text):
+        _add_word_tokens(word, tokens)
+    return [token for token in tokens if len(token) > 1 and token not in STOP_WORDS]
+
+
+def _add_word_tokens(word: str, tokens: List[str]) -> None:
+    parts = _WORD_PART_PATTERN.findall(word) if word.isascii() else []
+    if len(parts) > 1:
+        tokens.extend(part.lower() for part in parts)
+    tokens.append(word.lower())
+
+
+def tokenize_bytes(data: bytes) -> List[str]:
+    """
+    Tokenize raw UTF-8 data exactly like tokenize() does its decoded text.
+
+    Words are found on the bytes and only those with non-ASCII bytes are
+    decoded, so plain ASCII code is never decoded as a whole.
+    """
+    tokens: List[str] = []
+    for word in _BYTES_WORD_PATTERN.findall(data):
+        if word.isascii():
+            _add_word_tokens(word.decode("ascii"), tokens)
+        else:
+            for part in _WORD_PATTERN.findall(word.decode("utf-8", errors="ignore")):
+                _add_word_tokens(part, tokens)
+    return [token for token in tokens if len(token) > 1 and token not in STOP_WORDS]
+
+
+@dataclass
+class LexicalChunk:
+    """A contiguous range of lines of a file, indexed as one document."""
+    path: str
+    start_line: int
+    end_line: int
+    length: int  # Number of tokens
+    start_offset: int = 0  # Byte range of the lines in the file
+    end_offset: int = 0
+    element_type: str = ""
+    element_name: str = ""
+    language: str = "text"
+
+    @property
+    def label(self) -> str:
+        """Enclosing definition as "<type> <name>", or "" outside definitions."""
+        return f"{self.element_type} {self.element_name}" if self.element_name else ""
+
+
+@dataclass
+class LexicalHit:
+    """A ranked search result."""
+    chunk: LexicalChunk
+    score: float
+    matched_terms: List[str] = field(default_factory=list)
+
+
+class LexicalIndex:
+    """BM25-ranked inverted index over function-level chunks of a project."""
+
+    def __init__(self, root: Path, file_index: Optional[FileIndex] = None,
+                 max_file_size: int = 1024 * 1024, max_chunk_lines: int = 60):
+        """
+        Initialize the lexical index.
+
+        Args:
+            root: Project root
+            file_index: File index providing the files and the code analyzer
+            max_file_size: Larger files are not indexed
+            max_chunk_lines: Definitions longer than this are split into several chunks
+        """
+        self.root = Path(root).absolute()
+        self.file_index = file_index or get_file_index(self.root)
+        self.max_file_size = max_file_size
+        self.max_chunk_lines = max_chunk_lines
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+
+        self._chunks: Dict[int, LexicalChunk] = {}
+        # Chunk id -> distinct terms, needed to remove the chunk from the postings
+        self._chunk_terms: Dict[int, Tuple[str, ...]] = {}
+        # Term -> {chunk id: term frequency}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # Relative path -> (mtime, size, line count, chunk ids)
+        self._files: Dict[str, Tuple[float, int, int, List[int]]] = {}
+        self._next_id = 0
+        self._total_length = 0
+
+        self.stats: Dict[str, Any] = {
+            "files_indexed": 0,
+            "files_removed": 0,
+            "queries": 0,
+            "last_refresh_time": 0.0
+        }
+
+    # -- Chunking --------------------------------------------------------
+
+    def _chunk_ranges(self, buffer: Any, line_count: int, language: str) -> List[Tuple[int, int, str, str]]:
+        """
+        Split a file into (start_line, end_line, element_type, element_name) ranges.
+
+        Every definition starts a new chunk that runs until the next one, so
+        the chunks cover each line exactly once.
+        """
+        code_analyzer = self.file_index.code_analyzer
+        elements = []
+        # Plain text has no definitions, so it is never decoded
+        if code_analyzer and language != "text":
+            text = buffer[:].decode("utf-8", errors="ignore")
+            elements = code_analyzer.extract_code_elements(text, language)
+
+        boundaries: List[Tuple[int, str, str]] = [(1, "", "")]
+        for element in elements:
+            if element['line'] == boundaries[-1][0]:
+                boundaries[-1] = (element['line'], element['type'], element['name'])
+            else:
+                boundaries.append((element['line'], element['type'], element['name']))
+
+        ranges = []
+        for i, (start, element_type, element_name) in enumerate(boundaries):
+            end = boundaries[i + 1][0] - 1 if i + 1 < len(boundaries) else line_count
+            for window_start in range(start, end + 1, self.max_chunk_lines):
+                window_end = min(end, window_start + self.max_chunk_lines - 1)
+                ranges.append((window_start, window_end, element_type, element_name))
+        return ranges
+
+    # -- Maintenance -----------------------------------------------------
+
+    def _remove_file(self, rel_path: str) -> None:
+        record = self._files.pop(rel_path, None)
+        if record is None:
+            return
+        for chunk_id in record[3]:
+            chunk = self._chunks.pop(chunk_id)
+            self._total_length -= chunk.length
+            for term in self._chunk_terms.pop(chunk_id):
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+
+    def _add_file(self, rel_path: str, mtime: float, size: int) -> None:
+        chunk_ids: List[int] = []
+        line_count = 0
+        if size <= self.max_file_size:
+            try:
+                with open_buffer(self.root / rel_path) as buffer:
+                    line_count = self._add_chunks(rel_path, buffer, chunk_ids)
+            except (OSError, ValueError):
+                pass
+
+        self._files[rel_path] = (mtime, size, line_count, chunk_ids)
+
+    def _add_chunks(self, rel_path: str, buffer: Any, chunk_ids: List[int]) -> int:
+        """Index the chunks of a file's raw contents, returning its line count."""
+        # Binary files are recorded but not indexed
+        if not len(buffer) or b"\0" in buffer[:8192]:
+            return 0
+
+        # Byte offset of the start of every line, plus the end of the buffer
+        line_starts = [0]
+        position = buffer.find(b"\n")
+        while position != -1:
+            line_starts.append(position + 1)
+            position = buffer.find(b"\n", position + 1)
+        line_count = count_lines(buffer)
+        if len(line_starts) == line_count:
+            line_starts.append(len(buffer))
+
+        language = self.file_index.code_analyzer.get_file_language(Path(rel_path)) \
+            if self.file_index.code_analyzer else "text"
+        for start, end, element_type, element_name in self._chunk_ranges(buffer, line_count, language):
+            start_offset, end_offset = line_starts[start - 1], line_starts[end]
+            counts = Counter(tokenize_bytes(buffer[start_offset:end_offset]))
+            if not counts:
+                continue
+
+            chunk_id = self._next_id
+            self._next_id += 1
+            length = sum(counts.values())
+            self._chunks[chunk_id] = LexicalChunk(
+                path=rel_path,
+                start_line=start,
+                end_line=end,
+                length=length,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                element_type=element_type,
+                element_name=element_name,
+                language=language
+            )
+            self._chunk_terms[chunk_id] = tuple(counts)
+            for term, count in counts.items():
+                self._postings.setdefault(term, {})[chunk_id] = count
+            self._total_length += length
+            chunk_ids.append(chunk_id)
+
+        return line_count
+
+    def refresh(self) -> None:
+        """
+        Re-index files whose mtime or size changed and drop files that disappeared.
+
+        Files are stat'ed directly since editing a file in place does not
+        change its directory's mtime.
+        """
+        with self._lock:
+            start_time = time.time()
+            current: Dict[str, Tuple[float, int]] = {}
+            for entry in self.file_index.iter_files():
+                try:
+                    file_stat = os.stat(self.root / entry.path)
+                except OSError:
+                    continue
+                current[entry.path] = (file_stat.st_mtime, file_stat.st_size)
+
+            removed = [path for path in self._files if path not in current]
+            for path in removed:
+                self._remove_file(path)
+
+            changed = 0
+            for path, (mtime, size) in current.items():
+                record = self._files.get(path)
+                if record is None or record[:2] != (mtime, size):
+                    self._remove_file(path)
+                    self._add_file(path, mtime, size)
+                    changed += 1
+
+            if changed or removed:
+                self.stats["files_indexed"] += changed
+                self.stats["files_removed"] += len(removed)
+                self.stats["last_refresh_time"] = time.time() - start_time
+                self.logger.debug(
+                    f"Lexical index updated: {changed} files indexed, {len(removed)} removed "
+                    f"in {self.stats['last_refresh_time']:.2f}s"
+                )
+
+    # -- Queries ---------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10,
+               path_filter: Optional[Callable[[str], bool]] = None,
+               chunk_filter: Optional[Callable[[LexicalChunk], bool]] = None) -> List[LexicalHit]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query: Free-text query; identifiers are split like indexed text
+            limit: Maximum number of hits
+            path_filter: Optional predicate on relative paths restricting the hits
+            chunk_filter: Optional predicate on chunks restricting the hits
+
+        Returns:
+            Hits ordered by descending score
+        """
+        terms = sorted(set(tokenize(query)))
+
+        # With a trigram index only files containing at least one term are returned
+        candidate_paths: Optional[Set[str]] = None
+        trigram_index = get_trigram_index(self.root)
+        if trigram_index is not None and terms:
+            candidate_paths = trigram_index.candidates_for_any(terms)
+
+        with self._lock:
+            # The whole corpus, so BM25 statistics do not depend on the query
+            self.refresh()
+            self.stats["queries"] += 1
+            if not terms or not self._chunks or limit <= 0:
+                return []
+
+            chunk_count = len(self._chunks)
+            average_length = self._total_length / chunk_count
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (chunk_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    length_norm = _K1 * (1 - _B + _B * self._chunks[chunk_id].length / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + \
+                        idf * frequency * (_K1 + 1) / (frequency + length_norm)
+
+            candidates = (
+                (score, -chunk_id) for chunk_id, score in scores.items()
+                if (candidate_paths is None or self._chunks[chunk_id].path in candidate_paths)
+                and (path_filter is None or path_filter(self._chunks[chunk_id].path))
+                and (chunk_filter is None or chunk_filter(self._chunks[chunk_id]))
+            )
+            # Ties go to the earlier indexed chunk so results are stable
+            top = heapq.nlargest(limit, candidates)
+
+            return [
+                LexicalHit(
+                    chunk=self._chunks[-negated_id],
+                    score=score,
+                    matched_terms=[term for term in terms if -negated_id in self._postings.get(term, ())]
+                )
+                for score, negated_id in top
+            ]
+
+    def read_lines(self, chunk: LexicalChunk) -> List[str]:
+        """Read the lines of a chunk from disk, decoding only the chunk's bytes."""
+        try:
+            with open(self.root / chunk.path, "rb") as f:
+                f.seek(chunk.start_offset)
+                data = f.read(chunk.end_offset - chunk.start_offset)
+        except OSError:
+            return []
+        if data.endswith(b"\n"):
+            data = data[:-1]
+        return data.decode("utf-8", errors="ignore").split("\n") if data else []
+
+    def file_line_count(self, rel_path: str) -> int:
+        """Number of lines of an indexed file, or 0 if it is not indexed."""
+        with self._lock:
+            record = self._files.get(rel_path)
+            return record[2] if record else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                "root": str(self.root),
+                "files": len(self._files),
+                "chunks": len(self._chunks),
+                "terms": len(self._postings)
+            }
+
+
+# Lexical indexes keyed by absolute project root
+_lexical_indexes: Dict[str, LexicalIndex] = {}
+_lexical_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(working_directory: Any, file_index: Optional[FileIndex] = None) -> LexicalIndex:
+    """
+    Get the shared lexical index for a project root, creating it on first use.
+
+    The index is built lazily by its first query.
+    """
+    key = str(Path(working_directory).absolute())
+    with _lexical_indexes_lock:
+        index = _lexical_indexes.get(key)
+        if index is None:
+            index = LexicalIndex(Path(key), file_index or get_file_index(key))
+            _lexical_indexes[key] = index
+        return index
+
+
+__all__ = ["LexicalIndex", "LexicalChunk", "LexicalHit", "STOP_WORDS", "tokenize", "tokenize_bytes",
+           "get_lexical_index"]
@@ -7,6 +7,7 @@ specialized components.
 """
 
 import logging
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -16,8 +17,10 @@ from ..core.config import ContextConfig, VectorStoreConfig
 from .suppress_warnings import initialize_environment
 from .vector_store import VectorStoreManager
 from .code_analyzer import CodeAnalyzer
+from .file_index import get_file_index
+from .trigram_index import TrigramIndex, TRIGRAM_INDEX_FILENAME, register_trigram_index, unregister_trigram_index
 from .indexer import CodebaseIndexer
-from .search import ContextSearcher
+from .search import ContextSearcher, SearchFilters
 from .git_integration import GitIntegration
 
 
@@ -45,25 +48,50 @@ class ContextManager:
     
     def _setup_components(self) -> None:
         """Setup all specialized components."""
-        # Initialize vector store manager
+        # Initialize vector store manager (ChromaDB and the embedding model load on first use)
         self.vector_store = VectorStoreManager(self.vector_config)
         
         # Initialize code analyzer
         self.code_analyzer = CodeAnalyzer(self.context_config)
         
+        # Shared project file index (also used by the search tools)
+        self.file_index = get_file_index(self.working_directory, self.code_analyzer)
+        
+        # Optional trigram index used transparently by the content search tools
+        self.trigram_index: Optional[TrigramIndex] = None
+        if getattr(self.context_config, 'enable_trigram_index', False):
+            try:
+                self.trigram_index = TrigramIndex(
+                    self.working_directory,
+                    Path(self.vector_config.path) / TRIGRAM_INDEX_FILENAME,
+                    self.file_index,
+                    self.context_config.max_file_size
+                )
+                register_trigram_index(self.trigram_index)
+                # Searches scan every file until the build is done
+                self.trigram_index.build_in_background()
+            except Exception as e:
+                self.logger.warning(f"Failed to open trigram index: {str(e)}")
+                self.trigram_index = None
+        
         # Initialize indexer
         self.indexer = CodebaseIndexer(
             self.context_config,
             self.vector_store,
             self.code_analyzer,
-            self.working_directory
+            self.working_directory,
+            self.file_index
         )
         
         # Initialize searcher
         self.searcher = ContextSearcher(
             self.vector_store,
             self.code_analyzer,
-            self.working_directory
+            self.working_directory,
+            self.file_index,
+            retrieval_mode=self.context_config.retrieval_mode,
+            rrf_k=self.context_config.rrf_k,
+            rerank_results=self.context_config.rerank_results
         )
         
         # Initialize Git integration
@@ -101,8 +129,32 @@ class ContextManager:
         """Index the entire codebase for vector search."""
         self.indexer.index_codebase(force_reindex, async_mode)
     
-    def search_context(self, query: str, limit: int = 10) -> List[ContextItem]:
-        """Search for relevant context using vector similarity or fallback methods."""
+    def ready(self) -> Future:
+        """
+        Load the vector store and embedding model in the background.
+        
+        Returns a future that resolves once both are loaded; awaiting it is
+        optional, since they also load on first use.
+        """
+        return self.vector_store.ready()
+    
+    def search_context(self, query: str, limit: int = 10, language: Optional[str] = None,
+                       path_prefix: Optional[str] = None, element_type: Optional[str] = None,
+                       document_type: Optional[str] = None, where: Optional[Dict[str, Any]] = None,
+                       where_document: Optional[Dict[str, Any]] = None) -> List[ContextItem]:
+        """
+        Search for relevant context using vector similarity or fallback methods.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            language: Only return results in this language (e.g. "python")
+            path_prefix: Only return results from files below this relative path
+            element_type: Only return code elements of this type (e.g. "function", "class")
+            document_type: "chunk" for file chunks or "element" for functions and classes
+            where: Raw ChromaDB metadata filter (vector search only)
+            where_document: Raw ChromaDB document filter (vector search only)
+        """
         indexing_status = self.indexer.get_indexing_status()
         indexing_ready = (
             indexing_status['indexing_complete'] and 
@@ -110,7 +162,15 @@ class ContextManager:
             not indexing_status['indexing_error']
         )
         
-        return self.searcher.search_context(query, limit, indexing_ready)
+        filters = SearchFilters(
+            language=language,
+            path_prefix=path_prefix,
+            element_type=element_type,
+            document_type=document_type,
+            where=where,
+            where_document=where_document
+        )
+        return self.searcher.search_context(query, limit, indexing_ready, filters)
     
     def get_file_context(self, file_path: str) -> Optional[ContextItem]:
         """Get context for a specific file."""
@@ -128,7 +188,7 @@ class ContextManager:
         """Get a summary of the current context."""
         try:
             # Get vector store stats
-            vector_stats = self.vector_store.get_collection_stats()
+            vector_stats = self.vector_store.get_collection_stats(self.indexer.get_document_stats())
             
             # Get indexing status
             indexing_status = self.indexer.get_indexing_status()
@@ -177,8 +237,13 @@ class ContextManager:
     async def cleanup(self) -> None:
         """Clean up resources used by the context manager."""
         try:
-            # Stop any ongoing indexing
-            self.indexer.stop_indexing()
+            # Stop any ongoing indexing and release the manifest
+            self.indexer.close()
+            self.searcher.close()
+            
+            if self.trigram_index is not None:
+                unregister_trigram_index(self.trigram_index)
+                self.trigram_index.close()
             
             # Clean up vector store resources if needed
             if hasattr(self.vector_store, 'cleanup'):
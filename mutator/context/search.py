@@ -1,50 +1,290 @@
 """
 Search operations for the Coding Agent Framework.
 
-This module handles context search operations, including vector similarity search
-and fallback text-based search methods.
+This module handles context search operations: vector similarity search, BM25
+lexical search, and a hybrid mode fusing both with reciprocal-rank fusion.
 """
 
 import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
+from ..core.config import RetrievalMode
 from ..core.types import ContextItem, ContextType
 from .vector_store import VectorStoreManager
 from .code_analyzer import CodeAnalyzer
+from .file_index import FileIndex, get_file_index
+from .indexer import directory_key
+from .lexical_index import LexicalChunk, LexicalIndex, get_lexical_index, tokenize
+
+
+# Short document type names accepted by SearchFilters
+_DOCUMENT_TYPES = {'chunk': 'code_chunk', 'element': 'code_element'}
+
+
+@dataclass
+class SearchFilters:
+    """
+    Restrictions applied inside the indexes while searching for context.
+    
+    language, path_prefix, element_type and document_type apply to both
+    vector and lexical search. where and where_document are raw ChromaDB
+    filters and only apply to vector search.
+    """
+    language: Optional[str] = None
+    path_prefix: Optional[str] = None  # Relative directory or file path
+    element_type: Optional[str] = None  # e.g. "function" or "class"
+    document_type: Optional[str] = None  # "chunk"/"code_chunk" or "element"/"code_element"
+    where: Optional[Dict[str, Any]] = None
+    where_document: Optional[Dict[str, Any]] = None
+    
+    def __post_init__(self) -> None:
+        if self.document_type:
+            self.document_type = _DOCUMENT_TYPES.get(self.document_type, self.document_type)
+        if self.path_prefix is not None:
+            self.path_prefix = posixpath.normpath(self.path_prefix.replace('\\', '/')).strip('/')
+            if self.path_prefix in ('', '.'):
+                self.path_prefix = None
+    
+    @property
+    def has_vector_only_filters(self) -> bool:
+        """Whether raw ChromaDB filters are set, which lexical search cannot apply."""
+        return bool(self.where or self.where_document)
+    
+    def matches_path(self, path: str) -> bool:
+        """Check a relative path against the path prefix."""
+        if not self.path_prefix:
+            return True
+        return path == self.path_prefix or path.startswith(self.path_prefix + '/')
+    
+    def matches_chunk(self, chunk: LexicalChunk) -> bool:
+        """Check a lexical index chunk against the structured filters."""
+        if self.language and chunk.language != self.language:
+            return False
+        if self.element_type and chunk.element_type != self.element_type:
+            return False
+        if self.document_type == 'code_element' and not chunk.element_type:
+            return False
+        return self.matches_path(chunk.path)
+    
+    def to_where(self) -> Optional[Dict[str, Any]]:
+        """
+        Build the ChromaDB metadata filter.
+        
+        Metadata filters cannot match string prefixes, so a path prefix
+        matches the file itself or the ancestor directory stored at its depth.
+        """
+        conditions: List[Dict[str, Any]] = []
+        if self.language:
+            conditions.append({'language': self.language})
+        if self.element_type:
+            conditions.append({'element_type': self.element_type})
+        if self.document_type:
+            conditions.append({'document_type': self.document_type})
+        if self.path_prefix:
+            depth = self.path_prefix.count('/') + 1
+            conditions.append({'$or': [
+                {'file_path': self.path_prefix},
+                {directory_key(depth): self.path_prefix}
+            ]})
+        if self.where:
+            conditions.append(self.where)
+        
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {'$and': conditions}
 
 
 class ContextSearcher:
     """Handles context search operations."""
     
     def __init__(self, vector_store: VectorStoreManager, code_analyzer: CodeAnalyzer,
-                 working_directory: Path):
-        """Initialize the context searcher."""
+                 working_directory: Path, file_index: Optional[FileIndex] = None,
+                 lexical_index: Optional[LexicalIndex] = None,
+                 retrieval_mode: RetrievalMode = RetrievalMode.HYBRID,
+                 rrf_k: int = 60, rerank_results: bool = False):
+        """
+        Initialize the context searcher.
+        
+        Args:
+            vector_store: Vector store for similarity search
+            code_analyzer: Code analyzer for languages and ignore rules
+            working_directory: Project root
+            file_index: Shared file index of the project
+            lexical_index: BM25 index (defaults to the shared one of the project)
+            retrieval_mode: Use vector search, lexical search or both fused
+            rrf_k: Reciprocal-rank fusion constant
+            rerank_results: Whether to rerank fused results by query term coverage
+        """
         self.vector_store = vector_store
         self.code_analyzer = code_analyzer
         self.working_directory = working_directory
+        self.file_index = file_index or get_file_index(working_directory, code_analyzer)
+        # Built lazily by the first lexical search
+        self.lexical_index = lexical_index or get_lexical_index(working_directory, self.file_index)
+        self.retrieval_mode = RetrievalMode(retrieval_mode)
+        self.rrf_k = rrf_k
+        self.rerank_results = rerank_results
         self.logger = logging.getLogger(__name__)
+        
+        # Runs the lexical query while the calling thread runs the vector query
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
     
     def search_context(self, query: str, limit: int = 10, 
-                      indexing_ready: bool = True) -> List[ContextItem]:
-        """Search for relevant context using vector similarity or fallback methods."""
+                      indexing_ready: bool = True,
+                      filters: Optional[SearchFilters] = None) -> List[ContextItem]:
+        """Search for relevant context using vector similarity, lexical ranking or both."""
         # Use fallback search if indexing is not ready
         if not indexing_ready:
             self.logger.debug("Using fallback search (indexing not ready)")
-            return self._fallback_search(query, limit)
+            return self._fallback_search(query, limit, filters)
+        
+        if self.retrieval_mode == RetrievalMode.LEXICAL or not self.vector_store.has_embedding_model():
+            return self._fallback_search(query, limit, filters)
+        
+        if self.retrieval_mode == RetrievalMode.HYBRID:
+            return self._hybrid_search(query, limit, filters)
         
         try:
-            # Try vector similarity search first
-            if self.vector_store.has_embedding_model():
-                results = self.vector_store.search(query, limit)
-                return self._convert_vector_results(results)
-            else:
-                # No embedding model, use fallback
-                return self._fallback_search(query, limit)
-            
+            return self._vector_search(query, limit, filters)
         except Exception as e:
             self.logger.warning(f"Vector search failed, using fallback: {str(e)}")
-            return self._fallback_search(query, limit)
+            return self._fallback_search(query, limit, filters)
+    
+    def _vector_search(self, query: str, limit: int,
+                       filters: Optional[SearchFilters] = None) -> List[ContextItem]:
+        """Run a vector similarity search, filtering inside the collection."""
+        filter_kwargs: Dict[str, Any] = {}
+        if filters is not None:
+            where = filters.to_where()
+            if where:
+                filter_kwargs['where'] = where
+            if filters.where_document:
+                filter_kwargs['where_document'] = filters.where_document
+        
+        return self._convert_vector_results(self.vector_store.search(query, limit, **filter_kwargs))
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-search")
+            return self._executor
+    
+    def _hybrid_search(self, query: str, limit: int,
+                       filters: Optional[SearchFilters] = None) -> List[ContextItem]:
+        """
+        Run vector and lexical search concurrently and fuse their rankings.
+        
+        Each retriever returns a deeper candidate list than requested so that
+        items ranked moderately by both can surface after fusion.
+        """
+        if filters is not None and filters.has_vector_only_filters:
+            # Lexical results could not honour the raw filters
+            try:
+                return self._vector_search(query, limit, filters)
+            except Exception as e:
+                self.logger.warning(f"Vector search failed, using fallback: {str(e)}")
+                return self._fallback_search(query, limit, filters)
+        
+        depth = limit * 3
+        lexical_future = self._get_executor().submit(self._fallback_search, query, depth, filters)
+        
+        try:
+            vector_items = self._vector_search(query, depth, filters)
+        except Exception as e:
+            self.logger.warning(f"Vector search failed, using lexical results only: {str(e)}")
+            vector_items = []
+        lexical_items = lexical_future.result()
+        
+        fused = self._fuse_results({'vector': vector_items, 'lexical': lexical_items})
+        if self.rerank_results:
+            fused = self._rerank(query, fused)
+        return fused[:limit]
+    
+    @staticmethod
+    def _item_range(item: ContextItem) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+        line_start = item.line_start
+        line_end = item.line_end if item.line_end is not None else line_start
+        return item.source, line_start, line_end
+    
+    @classmethod
+    def _overlaps(cls, first: ContextItem, second: ContextItem) -> bool:
+        """Whether two items cover overlapping lines of the same file."""
+        source, start, end = cls._item_range(first)
+        other_source, other_start, other_end = cls._item_range(second)
+        if source != other_source:
+            return False
+        if start is None or other_start is None:
+            # Without line ranges only identical content counts as the same chunk
+            return first.content == second.content
+        return start <= other_end and other_start <= end
+    
+    def _fuse_results(self, rankings: Dict[str, List[ContextItem]]) -> List[ContextItem]:
+        """
+        Fuse rankings with reciprocal-rank fusion, merging overlapping chunks.
+        
+        A group of overlapping chunks scores 1 / (rrf_k + rank) for the best
+        rank it reached in each ranking and is represented by its best ranked
+        chunk.
+        """
+        groups: List[Dict[str, Any]] = []
+        depth = max((len(items) for items in rankings.values()), default=0)
+        
+        # Walk the rankings rank by rank so each group keeps its best ranked item
+        for rank in range(depth):
+            for name, items in rankings.items():
+                if rank >= len(items):
+                    continue
+                item = items[rank]
+                group = next((g for g in groups if self._overlaps(g['item'], item)), None)
+                if group is None:
+                    group = {'item': item, 'ranks': {}}
+                    groups.append(group)
+                group['ranks'].setdefault(name, rank + 1)
+        
+        for group in groups:
+            group['score'] = sum(1.0 / (self.rrf_k + rank) for rank in group['ranks'].values())
+        groups.sort(key=lambda g: g['score'], reverse=True)
+        
+        top_score = groups[0]['score'] if groups else 1.0
+        return [
+            group['item'].model_copy(update={
+                'relevance_score': group['score'] / top_score,
+                'metadata': {**group['item'].metadata, 'retrieved_by': sorted(group['ranks'])}
+            })
+            for group in groups
+        ]
+    
+    def _rerank(self, query: str, items: List[ContextItem]) -> List[ContextItem]:
+        """
+        Rerank items by how many of the query terms their content covers.
+        
+        A cheap local scorer: the final score averages the fused score with
+        the fraction of distinct query terms found in the item.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return items
+        
+        reranked = []
+        for item in items:
+            coverage = len(terms.intersection(tokenize(item.content))) / len(terms)
+            score = (item.relevance_score + coverage) / 2
+            reranked.append(item.model_copy(update={'relevance_score': score}))
+        reranked.sort(key=lambda item: item.relevance_score, reverse=True)
+        return reranked
+    
+    def close(self) -> None:
+        """Stop the background search thread."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
     
     def _convert_vector_results(self, results: Dict[str, Any]) -> List[ContextItem]:
         """Convert vector search results to ContextItem objects."""
@@ -69,7 +309,8 @@ class ContextSearcher:
                 metadata=metadata,
                 relevance_score=relevance_score,
                 source=metadata.get('file_path', ''),
-                line_start=metadata.get('start_line'),
+                # Code element documents record their first line as line_number
+                line_start=metadata.get('start_line', metadata.get('line_number')),
                 line_end=metadata.get('end_line')
             ))
         
@@ -85,77 +326,57 @@ class ContextSearcher:
             }.get(metadata['element_type'], ContextType.FILE)
         return ContextType.FILE
     
-    def _fallback_search(self, query: str, limit: int = 10) -> List[ContextItem]:
-        """Fallback search using simple text matching when vector search is unavailable."""
-        context_items = []
-        query_lower = query.lower()
+    def _fallback_search(self, query: str, limit: int = 10,
+                         filters: Optional[SearchFilters] = None) -> List[ContextItem]:
+        """
+        Fallback search ranking code chunks with BM25 when vector search is unavailable.
         
+        Raw ChromaDB filters in `filters` cannot be applied here and are ignored.
+        """
         try:
-            # Search in files using simple text matching
-            file_count = 0
-            for file_path in self.working_directory.rglob('*'):
-                if file_count >= limit:
-                    break
-                    
-                if not file_path.is_file():
-                    continue
-                
-                if self.code_analyzer.should_ignore_file(file_path, self.working_directory):
-                    continue
-                
-                try:
-                    content = file_path.read_text(encoding='utf-8', errors='ignore')
-                    if query_lower in content.lower():
-                        context_item = self._create_text_match_context(
-                            file_path, content, query_lower
-                        )
-                        if context_item:
-                            context_items.append(context_item)
-                            file_count += 1
-                except Exception:
-                    continue  # Skip files that can't be read
-            
-            return context_items
-            
+            hits = self.lexical_index.search(
+                query, limit,
+                chunk_filter=filters.matches_chunk if filters is not None else None
+            )
         except Exception as e:
             self.logger.error(f"Fallback search failed: {str(e)}")
             return []
-    
-    def _create_text_match_context(self, file_path: Path, content: str, 
-                                  query_lower: str) -> Optional[ContextItem]:
-        """Create a context item from text matching results."""
-        relative_path = file_path.relative_to(self.working_directory)
         
-        # Find the line containing the query
-        lines = content.split('\n')
-        matching_lines = []
-        
-        for i, line in enumerate(lines):
-            if query_lower in line.lower():
-                matching_lines.append((i + 1, line.strip()))
-                if len(matching_lines) >= 3:  # Limit to 3 matches per file
-                    break
+        if not hits:
+            return []
         
-        if not matching_lines:
-            return None
+        # Scale scores into the 0-1 range used by vector results
+        top_score = hits[0].score or 1.0
+        context_items = []
+        for hit in hits:
+            chunk = hit.chunk
+            lines = self.lexical_index.read_lines(chunk)
+            if not lines:
+                continue
+            
+            metadata = {
+                'file_path': chunk.path,
+                'language': chunk.language,
+                'start_line': chunk.start_line,
+                'end_line': chunk.end_line,
+                'matched_terms': hit.matched_terms,
+                'search_method': 'bm25'
+            }
+            if chunk.element_type:
+                metadata['element_type'] = chunk.element_type
+                metadata['element_name'] = chunk.element_name
+            
+            context_items.append(ContextItem(
+                type=self._determine_context_type(metadata),
+                content='\n'.join(lines),
+                metadata=metadata,
+                relevance_score=hit.score / top_score,
+                source=chunk.path,
+                line_start=chunk.start_line,
+                line_end=chunk.end_line
+            ))
         
-        context_content = '\n'.join([
-            f"Line {line_num}: {line}" for line_num, line in matching_lines
-        ])
-        
-        return ContextItem(
-            type=ContextType.FILE,
-            content=context_content,
-            metadata={
-                'file_path': str(relative_path),
-                'language': self.code_analyzer.get_file_language(file_path),
-                'search_method': 'fallback_text_match'
-            },
-            relevance_score=0.7,  # Fixed relevance for text matches
-            source=str(relative_path),
-            line_start=matching_lines[0][0],
-            line_end=matching_lines[-1][0]
-        )
+        return context_items
     
     def get_file_context(self, file_path: str) -> Optional[ContextItem]:
         """Get context for a specific file."""
@@ -15,6 +15,16 @@ import contextlib
 from typing import Generator
 
 
+# Thread pool sizes of the math libraries used to compute embeddings
+_THREAD_VARIABLES = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+)
+
+
 def configure_onnx_environment_early():
     """Configure environment variables before any ONNX-related imports."""
     # Core ONNX runtime settings
@@ -28,12 +38,7 @@ def configure_onnx_environment_early():
     os.environ['SENTENCE_TRANSFORMERS_DISABLE_ONNX'] = '1'
     os.environ['SENTENCE_TRANSFORMERS_DEVICE'] = 'cpu'
     
-    # Threading and parallelism
-    os.environ['OMP_NUM_THREADS'] = '1'
-    os.environ['OPENBLAS_NUM_THREADS'] = '1'
-    os.environ['MKL_NUM_THREADS'] = '1'
-    os.environ['VECLIB_MAXIMUM_THREADS'] = '1'
-    os.environ['NUMEXPR_NUM_THREADS'] = '1'
+    # Threading and parallelism (thread counts are set by configure_embedding_environment)
     os.environ['TOKENIZERS_PARALLELISM'] = 'false'
     
     # PyTorch settings
@@ -53,14 +58,21 @@ def configure_onnx_environment():
     configure_onnx_environment_early()
 
 
-def configure_embedding_environment():
-    """Configure environment variables to prevent ONNX runtime issues."""
-    # Disable ONNX runtime optimizations that cause issues on macOS
-    os.environ['OMP_NUM_THREADS'] = '1'
-    os.environ['OPENBLAS_NUM_THREADS'] = '1'
-    os.environ['MKL_NUM_THREADS'] = '1'
-    os.environ['VECLIB_MAXIMUM_THREADS'] = '1'
-    os.environ['NUMEXPR_NUM_THREADS'] = '1'
+def configure_embedding_environment(num_threads: int = 0):
+    """
+    Configure environment variables to prevent ONNX runtime issues.
+    
+    Args:
+        num_threads: Threads the math libraries use to compute embeddings. A
+            configured count overrides the environment; with 0 an existing
+            setting is kept and the CPU count is used otherwise.
+    """
+    threads = str(num_threads or os.cpu_count() or 1)
+    for variable in _THREAD_VARIABLES:
+        if num_threads:
+            os.environ[variable] = threads
+        else:
+            os.environ.setdefault(variable, threads)
     
     # Additional PyTorch configurations
     os.environ['PYTORCH_MPS_HIGH_WATERMARK_RATIO'] = '0.0'
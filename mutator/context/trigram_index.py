@@ -0,0 +1,380 @@
+"""
+Trigram index for the Coding Agent Framework.
+
+This module keeps an optional on-disk index of the byte trigrams each project
+file contains. Content searches decompose their pattern into trigrams that any
+match must contain and only open the files whose posting lists have all of
+them, so most searches read a handful of files instead of the whole tree. The
+index is brought up to date incrementally from file mtimes and sizes, checked
+at most once per refresh interval like the file index, and can be built in a
+background thread so the first search does not wait for it.
+
+Trigrams are taken from ASCII-lowercased bytes, matching the case-insensitive
+searches of the tools. Trigrams with non-ASCII bytes are never used to filter,
+since their case folding differs between bytes and str.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .file_index import FileIndex, get_file_index
+
+
+TRIGRAM_INDEX_FILENAME = "trigram_index.sqlite3"
+
+# Most trigrams a posting query filters by, well below SQLite's variable limit
+_MAX_QUERY_TRIGRAMS = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL,
+    size INTEGER,
+    indexed INTEGER NOT NULL,
+    trigrams BLOB
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, file_id)
+) WITHOUT ROWID;
+"""
+
+
+def _extract_trigrams(data: bytes) -> Set[int]:
+    """Get the distinct trigrams of a buffer as 24-bit integers."""
+    data = data.lower()
+    # zip over shifted views dedupes in C before the Python-level packing
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def query_trigrams(literal: str) -> Set[int]:
+    """Get the trigrams of a literal that can safely be used to filter files."""
+    data = literal.encode("utf-8").lower()
+    return {
+        (data[i] << 16) | (data[i + 1] << 8) | data[i + 2]
+        for i in range(len(data) - 2)
+        if data[i] < 0x80 and data[i + 1] < 0x80 and data[i + 2] < 0x80
+    }
+
+
+class TrigramIndex:
+    """On-disk trigram posting lists over the files of a project."""
+
+    def __init__(self, root: Path, db_path: Optional[Path] = None,
+                 file_index: Optional[FileIndex] = None, max_file_size: int = 1024 * 1024,
+                 refresh_interval: float = 1.0):
+        """
+        Open (or create) the trigram index.
+
+        Args:
+            root: Project root
+            db_path: SQLite database file, or None for an in-memory index
+            file_index: File index providing the files and their stat
+            max_file_size: Larger files are not indexed and are always candidates
+            refresh_interval: Minimum seconds between freshness checks
+        """
+        self.root = Path(root).absolute()
+        self.file_index = file_index or get_file_index(self.root)
+        self.max_file_size = max_file_size
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+        self._build_thread: Optional[threading.Thread] = None
+
+        database = ":memory:"
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            database = str(db_path)
+        self.db_path = database
+
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        if database != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        # An index built for another project root is useless here
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        if row is None or row[0] != str(self.root):
+            with self._conn:
+                self._conn.execute("DELETE FROM postings")
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('root', ?)", (str(self.root),))
+
+        # Relative path -> (file id, mtime, size), and the files too large to index
+        self._files: Dict[str, Tuple[int, float, int]] = {}
+        self._paths_by_id: Dict[int, str] = {}
+        self._unindexed: Set[str] = set()
+        for file_id, path, mtime, size, indexed in self._conn.execute(
+            "SELECT id, path, mtime, size, indexed FROM files"
+        ):
+            self._track(file_id, path, mtime, size, indexed)
+
+        self.stats: Dict[str, Any] = {
+            "files_indexed": 0,
+            "files_removed": 0,
+            "queries": 0,
+            "candidates_returned": 0,
+            "last_refresh_time": 0.0
+        }
+
+    # -- Maintenance -----------------------------------------------------
+
+    def _track(self, file_id: int, path: str, mtime: float, size: int, indexed: bool) -> None:
+        self._files[path] = (file_id, mtime, size)
+        self._paths_by_id[file_id] = path
+        if not indexed:
+            self._unindexed.add(path)
+
+    def _remove_file(self, file_id: int) -> None:
+        row = self._conn.execute("SELECT trigrams FROM files WHERE id = ?", (file_id,)).fetchone()
+        trigrams_blob = row[0] if row else None
+        if trigrams_blob:
+            trigrams = array("I")
+            trigrams.frombytes(trigrams_blob)
+            self._conn.executemany(
+                "DELETE FROM postings WHERE trigram = ? AND file_id = ?",
+                ((trigram, file_id) for trigram in trigrams)
+            )
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+        path = self._paths_by_id.pop(file_id, None)
+        self._files.pop(path, None)
+        self._unindexed.discard(path)
+
+    def _add_file(self, rel_path: str, mtime: float, size: int) -> None:
+        trigrams: Optional[Set[int]] = None
+        if size <= self.max_file_size:
+            try:
+                trigrams = _extract_trigrams((self.root / rel_path).read_bytes())
+            except OSError:
+                trigrams = None
+
+        blob = array("I", sorted(trigrams)).tobytes() if trigrams is not None else None
+        cursor = self._conn.execute(
+            "INSERT INTO files (path, mtime, size, indexed, trigrams) VALUES (?, ?, ?, ?, ?)",
+            (rel_path, mtime, size, 1 if trigrams is not None else 0, blob)
+        )
+        file_id = cursor.lastrowid
+        self._track(file_id, rel_path, mtime, size, trigrams is not None)
+        if trigrams:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO postings (trigram, file_id) VALUES (?, ?)",
+                ((trigram, file_id) for trigram in trigrams)
+            )
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Re-index files whose mtime or size changed and drop files that disappeared.
+
+        Files are stat'ed directly: editing a file in place does not change its
+        directory's mtime, so the file index alone would miss the edit and a
+        search could skip a file that now matches. Checks are throttled to
+        once per refresh_interval unless forced or invalidated.
+        """
+        with self._lock:
+            start_time = time.time()
+            if not force and start_time - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = start_time
+
+            current: Dict[str, Tuple[float, int]] = {}
+            for entry in self.file_index.iter_files():
+                try:
+                    file_stat = os.stat(self.root / entry.path)
+                except OSError:
+                    continue
+                current[entry.path] = (file_stat.st_mtime, file_stat.st_size)
+
+            stored = dict(self._files)
+
+            changed = 0
+            removed = 0
+            with self._conn:
+                for path, (file_id, mtime, size) in stored.items():
+                    if current.get(path) != (mtime, size):
+                        self._remove_file(file_id)
+                        if path not in current:
+                            removed += 1
+                for path, (mtime, size) in current.items():
+                    if path not in stored or stored[path][1:3] != (mtime, size):
+                        self._add_file(path, mtime, size)
+                        changed += 1
+
+            if changed or removed:
+                self.stats["files_indexed"] += changed
+                self.stats["files_removed"] += removed
+                self.stats["last_refresh_time"] = time.time() - start_time
+                self.logger.debug(
+                    f"Trigram index updated: {changed} files indexed, {removed} removed "
+                    f"in {self.stats['last_refresh_time']:.2f}s"
+                )
+
+    def invalidate(self) -> None:
+        """Force the next query to check the files for changes."""
+        with self._lock:
+            self._last_refresh = 0.0
+
+    def build_in_background(self) -> threading.Thread:
+        """
+        Bring the index up to date in a daemon thread.
+
+        Until the build finishes, queries return None (every file is a
+        candidate) instead of waiting for it.
+        """
+        with self._lock:
+            if self._build_thread is None or not self._build_thread.is_alive():
+                self._build_thread = threading.Thread(
+                    target=self._build, name="trigram-index-build", daemon=True
+                )
+                self._build_thread.start()
+            return self._build_thread
+
+    def _build(self) -> None:
+        try:
+            self.refresh(force=True)
+        except Exception as e:
+            self.logger.warning(f"Failed to build trigram index: {str(e)}")
+
+    def _building(self) -> bool:
+        thread = self._build_thread
+        return thread is not None and thread.is_alive()
+
+    # -- Queries ---------------------------------------------------------
+
+    def _files_with_all(self, trigrams: Iterable[int]) -> Set[int]:
+        """Ids of the indexed files containing every trigram."""
+        # Requiring a subset of the trigrams still never drops a matching file
+        selected = sorted(trigrams)[:_MAX_QUERY_TRIGRAMS]
+        if not selected:
+            return set()
+        placeholders = ",".join("?" * len(selected))
+        return {
+            row[0] for row in self._conn.execute(
+                f"SELECT file_id FROM postings WHERE trigram IN ({placeholders}) "
+                f"GROUP BY file_id HAVING COUNT(*) = ?",
+                (*selected, len(selected))
+            )
+        }
+
+    def _paths(self, file_ids: Set[int]) -> Set[str]:
+        """Paths of the given files plus every file that could not be indexed."""
+        paths = set(self._unindexed)
+        paths.update(self._paths_by_id[file_id] for file_id in file_ids if file_id in self._paths_by_id)
+        return paths
+
+    def candidates_for_literals(self, literals: List[str]) -> Optional[Set[str]]:
+        """
+        Get the files that may contain all of the given literals.
+
+        Returns None when the literals yield no usable trigram, meaning every
+        file is a candidate.
+        """
+        trigrams: Set[int] = set()
+        for literal in literals:
+            trigrams |= query_trigrams(literal)
+        if not trigrams or self._building():
+            return None
+
+        with self._lock:
+            self.refresh()
+            paths = self._paths(self._files_with_all(trigrams))
+            self.stats["queries"] += 1
+            self.stats["candidates_returned"] += len(paths)
+            return paths
+
+    def candidates_for_regex(self, pattern: str, flags: int = 0) -> Optional[Set[str]]:
+        """Get the files that may contain a match of a regex, or None if it can't be narrowed."""
+        # Import here to avoid circular imports
+        from ..tools.content_search import required_literals
+        return self.candidates_for_literals(required_literals(pattern, flags))
+
+    def candidates_for_any(self, terms: List[str]) -> Optional[Set[str]]:
+        """
+        Get the files that may contain at least one of the terms.
+
+        Returns None if any term is too short to filter by, since that term
+        could then occur in any file.
+        """
+        term_trigrams = [query_trigrams(term) for term in terms]
+        if not term_trigrams or not all(term_trigrams) or self._building():
+            return None
+
+        with self._lock:
+            self.refresh()
+            file_ids: Set[int] = set()
+            for trigrams in term_trigrams:
+                file_ids |= self._files_with_all(trigrams)
+            paths = self._paths(file_ids)
+            self.stats["queries"] += 1
+            self.stats["candidates_returned"] += len(paths)
+            return paths
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            file_count = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            return {**self.stats, "root": str(self.root), "files": file_count}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Trigram indexes registered per absolute project root
+_trigram_indexes: Dict[str, TrigramIndex] = {}
+_trigram_indexes_lock = threading.Lock()
+
+
+def register_trigram_index(index: TrigramIndex) -> None:
+    """Make a trigram index available to the search tools for its project root."""
+    with _trigram_indexes_lock:
+        _trigram_indexes[str(index.root)] = index
+
+
+def unregister_trigram_index(index: TrigramIndex) -> None:
+    """Stop the search tools from using a trigram index."""
+    with _trigram_indexes_lock:
+        if _trigram_indexes.get(str(index.root)) is index:
+            del _trigram_indexes[str(index.root)]
+
+
+def get_trigram_index(working_directory: Any) -> Optional[TrigramIndex]:
+    """Get the trigram index registered for a project root, if any."""
+    with _trigram_indexes_lock:
+        return _trigram_indexes.get(str(Path(working_directory).absolute()))
+
+
+def invalidate_trigram_indexes(path: Any) -> None:
+    """Make every registered index covering a path check the files on its next query."""
+    path = Path(path).absolute()
+    with _trigram_indexes_lock:
+        indexes = list(_trigram_indexes.values())
+    for index in indexes:
+        if index.file_index.relative_path(path) is not None:
+            index.invalidate()
+
+
+__all__ = [
+    "TrigramIndex",
+    "TRIGRAM_INDEX_FILENAME",
+    "query_trigrams",
+    "register_trigram_index",
+    "unregister_trigram_index",
+    "get_trigram_index",
+    "invalidate_trigram_indexes"
+]
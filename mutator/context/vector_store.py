@@ -3,64 +3,274 @@ Vector store management for the Coding Agent Framework.
 
 This module handles vector storage operations using ChromaDB for semantic search
 and context retrieval.
+
+ChromaDB and sentence-transformers (which imports torch) take seconds to
+import and load, so both are imported on first use, and the client and the
+embedding model are created when a search or an indexing run first needs
+them. ready() loads them in the background ahead of time.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 # Apply comprehensive ONNX suppression before any ML library imports
 from .suppress_warnings import suppress_onnx_warnings
 
-import chromadb
-with suppress_onnx_warnings():
-    from sentence_transformers import SentenceTransformer
-
 from ..core.config import VectorStoreConfig
 from .suppress_warnings import configure_embedding_environment
 
 
+# Heavy dependencies, imported by _lazy_import on first use
+_LAZY_IMPORTS = ("chromadb", "SentenceTransformer")
+
+
+def _lazy_import(name: str) -> Any:
+    """Import one of the heavy dependencies and keep it as a module attribute."""
+    module_globals = globals()
+    if name not in module_globals:
+        if name == "chromadb":
+            import chromadb as value
+        else:
+            with suppress_onnx_warnings():
+                from sentence_transformers import SentenceTransformer as value
+        module_globals[name] = value
+    return module_globals[name]
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps mutator.context.vector_store.chromadb and .SentenceTransformer
+    # importable (and patchable) without importing them at module load
+    if name in _LAZY_IMPORTS:
+        return _lazy_import(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Query result fields holding one row per query
+_PER_QUERY_FIELDS = ('ids', 'embeddings', 'documents', 'uris', 'data', 'metadatas', 'distances')
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings with an optional time to live."""
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of cached embeddings (0 disables caching)
+            ttl: Seconds an embedding stays valid (0 for no expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize query text for cache lookups.
+        
+        Only whitespace is collapsed; case is kept since cased models embed
+        differently cased text differently.
+        """
+        return " ".join(text.split())
+    
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        """Get a cached embedding, counting the hit or miss."""
+        key = (model_name, self.normalize(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, model_name: str, text: str, embedding: List[float]) -> None:
+        """Cache an embedding, evicting the least recently used ones beyond max_size."""
+        if self.max_size <= 0:
+            return
+        key = (model_name, self.normalize(text))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop all cached embeddings."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
 class VectorStoreManager:
     """Manages vector storage operations using ChromaDB."""
     
     def __init__(self, vector_config: VectorStoreConfig):
-        """Initialize the vector store manager."""
+        """
+        Initialize the vector store manager.
+        
+        The ChromaDB client and the embedding model are created lazily on
+        first use, or in the background when vector_config.warm_up is set.
+        """
+        if vector_config.type.lower() != "chromadb":
+            raise ValueError(f"Unsupported vector store type: {vector_config.type}")
+        
         self.vector_config = vector_config
         self.logger = logging.getLogger(__name__)
+        self.query_cache = QueryEmbeddingCache(vector_config.query_cache_size, vector_config.query_cache_ttl)
         
-        # Initialize vector store
-        self._setup_vector_store()
+        # Separate locks so a search needing the collection does not wait for the model
+        self._store_lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._ready_lock = threading.Lock()
+        self._chroma_client = None
+        self._collection = None
+        self._embedding_model = None
+        self._embedding_model_loaded = False
+        self._ready: Optional[Future] = None
         
-        # Initialize embedding model
-        self._setup_embedding_model()
+        if vector_config.warm_up:
+            self.ready()
     
-    def _setup_vector_store(self) -> None:
-        """Setup the vector store (ChromaDB by default)."""
-        if self.vector_config.type.lower() != "chromadb":
-            raise ValueError(f"Unsupported vector store type: {self.vector_config.type}")
+    # -- Lazy components -------------------------------------------------
+    
+    @property
+    def chroma_client(self) -> Any:
+        """ChromaDB client, created on first access."""
+        if self._chroma_client is None:
+            self._setup_vector_store()
+        return self._chroma_client
+    
+    @chroma_client.setter
+    def chroma_client(self, client: Any) -> None:
+        self._chroma_client = client
+    
+    @property
+    def collection(self) -> Any:
+        """ChromaDB collection, created on first access."""
+        if self._collection is None:
+            self._setup_vector_store()
+        return self._collection
+    
+    @collection.setter
+    def collection(self, collection: Any) -> None:
+        self._collection = collection
+    
+    @property
+    def embedding_model(self) -> Any:
+        """SentenceTransformer model loaded on first access, or None if it failed to load."""
+        if not self._embedding_model_loaded:
+            self._setup_embedding_model()
+        return self._embedding_model
+    
+    @embedding_model.setter
+    def embedding_model(self, model: Any) -> None:
+        self._embedding_model = model
+        self._embedding_model_loaded = True
+    
+    def ready(self) -> "Future[VectorStoreManager]":
+        """
+        Load the vector store and the embedding model in a background thread.
         
+        Calling it again returns the same future. The future resolves to this
+        manager once both are loaded, or raises if the vector store could not
+        be opened; a missing embedding model is not an error, searches fall
+        back to lexical matching.
+        """
+        with self._ready_lock:
+            if self._ready is None:
+                self._ready = Future()
+                # Daemon thread so a warm-up never delays interpreter exit
+                threading.Thread(target=self._warm_up, name="vector-store-warm-up", daemon=True).start()
+            return self._ready
+    
+    def _warm_up(self) -> None:
         try:
-            # Initialize ChromaDB client
-            self.chroma_client = chromadb.PersistentClient(
-                path=self.vector_config.path
-            )
-            
-            # Get or create collection
-            self.collection = self.chroma_client.get_or_create_collection(
-                name=self.vector_config.collection_name,
-                metadata={"description": "Codebase context embeddings"}
-            )
-            self.logger.debug(f"ChromaDB collection '{self.vector_config.collection_name}' ready")
-            
+            self._setup_vector_store()
+            self._setup_embedding_model()
         except Exception as e:
-            self.logger.error(f"Failed to setup vector store: {str(e)}")
-            raise
+            self._ready.set_exception(e)
+        else:
+            self._ready.set_result(self)
+    
+    def is_loaded(self) -> bool:
+        """Check whether both the vector store and the embedding model are loaded, without loading them."""
+        return self._collection is not None and self._embedding_model_loaded
+    
+    def has_persisted_collection(self) -> bool:
+        """Check whether a ChromaDB database exists on disk, without opening it."""
+        return (Path(self.vector_config.path) / "chroma.sqlite3").exists()
+    
+    def _setup_vector_store(self) -> None:
+        """Setup the vector store (ChromaDB by default)."""
+        with self._store_lock:
+            if self._collection is not None:
+                return
+            
+            try:
+                # Initialize ChromaDB client
+                client = self._chroma_client or _lazy_import("chromadb").PersistentClient(
+                    path=self.vector_config.path
+                )
+                self._chroma_client = client
+                
+                # Get or create collection
+                self._collection = client.get_or_create_collection(
+                    name=self.vector_config.collection_name,
+                    metadata={"description": "Codebase context embeddings"}
+                )
+                self.logger.debug(f"ChromaDB collection '{self.vector_config.collection_name}' ready")
+                
+            except Exception as e:
+                self.logger.error(f"Failed to setup vector store: {str(e)}")
+                raise
     
     def _setup_embedding_model(self) -> None:
         """Setup the sentence transformer model for embeddings."""
+        with self._model_lock:
+            if not self._embedding_model_loaded:
+                self._load_embedding_model()
+                self._embedding_model_loaded = True
+    
+    def _load_embedding_model(self) -> None:
+        """Load the model, leaving it None if that fails."""
         try:
             # Configure environment to prevent ONNX runtime issues
-            configure_embedding_environment()
+            configure_embedding_environment(self.vector_config.embedding_threads)
             
             model_name = self.vector_config.embedding_model
             
@@ -69,29 +279,31 @@ class VectorStoreManager:
             
             with suppress_onnx_warnings():
                 # Additional configuration to prevent ONNX runtime issues
-                import torch
-                torch.set_num_threads(1)  # Reduce thread contention
-                
                 # Disable ONNX providers at the PyTorch level
                 import os
                 os.environ['ONNXRUNTIME_PROVIDERS'] = 'CPUExecutionProvider'
                 
                 # Load model with specific configuration to avoid ONNX issues
-                self.embedding_model = SentenceTransformer(
+                self._embedding_model = _lazy_import("SentenceTransformer")(
                     model_name, 
                     device=device,
                     trust_remote_code=False,
                     token=False
                 )
                 
+                # Torch reads the environment only when first imported
+                if self.vector_config.embedding_threads > 0:
+                    import torch
+                    torch.set_num_threads(self.vector_config.embedding_threads)
+                
                 # Set model to evaluation mode and disable gradients
-                self.embedding_model.eval()
-                for param in self.embedding_model.parameters():
+                self._embedding_model.eval()
+                for param in self._embedding_model.parameters():
                     param.requires_grad = False
                 
                 # Disable ONNX optimization if available
-                if hasattr(self.embedding_model, '_modules'):
-                    for module in self.embedding_model._modules.values():
+                if hasattr(self._embedding_model, '_modules'):
+                    for module in self._embedding_model._modules.values():
                         if hasattr(module, 'eval'):
                             module.eval()
             
@@ -100,7 +312,7 @@ class VectorStoreManager:
         except Exception as e:
             self.logger.warning(f"Failed to load embedding model: {str(e)}")
             # Fallback: set embedding model to None and use simple text matching
-            self.embedding_model = None
+            self._embedding_model = None
             self.logger.debug("Using fallback text matching instead of embeddings")
     
     def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], 
@@ -132,43 +344,206 @@ class VectorStoreManager:
             self.logger.error(f"Failed to add documents to vector store: {str(e)}")
             raise
     
-    def search(self, query: str, limit: int = 10) -> Dict[str, Any]:
-        """Search for similar documents in the vector store."""
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """
+        Embed documents with the SentenceTransformer model.
+        
+        Documents are encoded in large batches on all CPU cores, which is much
+        faster than letting ChromaDB embed them one add() call at a time.
+        """
+        if not self.embedding_model:
+            raise ValueError("Embedding model not available")
+        
+        with suppress_onnx_warnings():
+            embeddings = self.embedding_model.encode(
+                documents,
+                batch_size=self.vector_config.embedding_batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        return embeddings.tolist()
+    
+    def upsert_documents(self, documents: List[str], metadatas: List[Dict[str, Any]],
+                         ids: List[str], embeddings: Optional[List[List[float]]] = None) -> None:
+        """Insert or replace documents in bulk, with precomputed embeddings if given."""
+        if not documents:
+            return
+        
+        batch_size = 1000  # Safe batch size for ChromaDB
+        for i in range(0, len(documents), batch_size):
+            batch = {
+                'documents': documents[i:i + batch_size],
+                'metadatas': metadatas[i:i + batch_size],
+                'ids': ids[i:i + batch_size]
+            }
+            if embeddings is not None:
+                batch['embeddings'] = embeddings[i:i + batch_size]
+            self.collection.upsert(**batch)
+        
+        self.logger.debug(f"Upserted {len(documents)} documents to vector store")
+    
+    def get_ids_for_files(self, file_paths: List[str]) -> List[str]:
+        """Get the ids of all documents belonging to any of the given files."""
+        if not file_paths:
+            return []
+        
+        results = self.collection.get(
+            where={'file_path': {'$in': list(file_paths)}},
+            include=[]
+        )
+        return results['ids']
+    
+    def get_file_documents(self, file_paths: List[str]) -> Dict[str, List[Any]]:
+        """
+        Get the ids, texts and stored embeddings of all documents of the given files.
+        
+        Used by incremental indexing to reuse the embeddings of unchanged chunks.
+        """
+        if not file_paths:
+            return {'ids': [], 'documents': [], 'embeddings': []}
+        
+        results = self.collection.get(
+            where={'file_path': {'$in': list(file_paths)}},
+            include=['documents', 'embeddings']
+        )
+        embeddings = results.get('embeddings')
+        if embeddings is None:
+            embeddings = [None] * len(results['ids'])
+        return {
+            'ids': results['ids'],
+            'documents': results.get('documents') or [None] * len(results['ids']),
+            'embeddings': [
+                embedding.tolist() if hasattr(embedding, 'tolist') else embedding
+                for embedding in embeddings
+            ]
+        }
+    
+    def delete_documents(self, ids: List[str]) -> None:
+        """Delete documents by id in bulk."""
+        batch_size = 1000
+        for i in range(0, len(ids), batch_size):
+            self.collection.delete(ids=ids[i:i + batch_size])
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed search queries, reusing cached embeddings of repeated queries.
+        
+        All cache misses are encoded together in one batch.
+        """
+        model_name = self.vector_config.embedding_model
+        embeddings: List[Optional[List[float]]] = [
+            self.query_cache.get(model_name, query) for query in queries
+        ]
+        
+        # Distinct texts that still need the model, in first-seen order
+        missing: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(QueryEmbeddingCache.normalize(queries[i]), []).append(i)
+        
+        if missing:
+            texts = list(missing)
+            for text, embedding in zip(texts, self.embed_documents(texts)):
+                self.query_cache.put(model_name, text, embedding)
+                for i in missing[text]:
+                    embeddings[i] = embedding
+        
+        return embeddings
+    
+    def search(self, query: str, limit: int = 10, where: Optional[Dict[str, Any]] = None,
+               where_document: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Search for similar documents in the vector store.
+        
+        Args:
+            query: Query text
+            limit: Maximum number of results
+            where: ChromaDB metadata filter, e.g. {"language": "python"}
+            where_document: ChromaDB document content filter, e.g. {"$contains": "async"}
+        """
         if not self.embedding_model:
             raise ValueError("Embedding model not available for search")
         
         try:
-            with suppress_onnx_warnings():
-                results = self.collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
+            # Embed with the same model used at indexing time
+            results = self.collection.query(
+                query_embeddings=self.embed_queries([query]),
+                n_results=limit,
+                where=where,
+                where_document=where_document
+            )
             return results
             
         except Exception as e:
             self.logger.error(f"Vector search failed: {str(e)}")
             raise
     
-    def get_collection_stats(self) -> Dict[str, Any]:
-        """Get statistics about the vector store collection."""
+    def search_many(self, queries: List[str], limit: int = 10, where: Optional[Dict[str, Any]] = None,
+                    where_document: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Search for several queries with one embedding batch and one collection query.
+        
+        The filters are the same as for search() and apply to every query.
+        
+        Returns:
+            One result per query, each shaped like the result of search()
+        """
+        if not self.embedding_model:
+            raise ValueError("Embedding model not available for search")
+        if not queries:
+            return []
+        
         try:
-            collection_count = self.collection.count()
-            
-            # Get file counts by language (sample for stats)
             results = self.collection.query(
-                query_texts=[""],
-                n_results=min(collection_count, 1000)
+                query_embeddings=self.embed_queries(queries),
+                n_results=limit,
+                where=where,
+                where_document=where_document
             )
             
-            language_counts = {}
-            if results['metadatas']:
-                for metadata in results['metadatas'][0]:
-                    lang = metadata.get('language', 'unknown')
-                    language_counts[lang] = language_counts.get(lang, 0) + 1
+            # ChromaDB returns one row per query embedding in each of these fields
+            return [
+                {
+                    key: [value[i]] if key in _PER_QUERY_FIELDS and value is not None else value
+                    for key, value in results.items()
+                }
+                for i in range(len(queries))
+            ]
             
+        except Exception as e:
+            self.logger.error(f"Vector search failed: {str(e)}")
+            raise
+    
+    def get_collection_stats(self, document_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get statistics about the vector store collection.
+        
+        Breakdowns come from the counts the indexer maintains in its manifest
+        (see CodebaseIndexer.get_document_stats) rather than from scanning the
+        collection, so this never runs a query. While ChromaDB is not loaded yet,
+        complete maintained counts also provide the total instead of opening it.
+        
+        Args:
+            document_stats: Maintained per-language and per-document-type stats
+        """
+        try:
+            document_stats = document_stats or {}
+            languages = document_stats.get('languages', {})
+            document_types = document_stats.get('document_types', {})
+            if self._collection is None and document_stats.get('complete'):
+                total_documents = sum(stats['documents'] for stats in document_types.values())
+            else:
+                total_documents = self.collection.count()
             return {
-                'total_documents': collection_count,
-                'languages': language_counts,
+                'total_documents': total_documents,
+                'languages': {language: stats['documents'] for language, stats in languages.items()},
+                'language_bytes': {language: stats['bytes'] for language, stats in languages.items()},
+                'document_types': {
+                    document_type: stats['documents']
+                    for document_type, stats in document_types.items()
+                },
+                'total_bytes': document_stats.get('total_bytes', 0),
+                'stats_complete': document_stats.get('complete', False),
                 'collection_name': self.vector_config.collection_name
             }
             
@@ -195,11 +570,12 @@ class VectorStoreManager:
         return self.embedding_model is not None
     
     def health_check(self) -> Dict[str, Any]:
-        """Check the health of the vector store."""
+        """Check the health of the vector store without loading it."""
         return {
-            "collection_initialized": self.collection is not None,
-            "embedding_model_loaded": self.embedding_model is not None,
-            "collection_count": self.collection.count() if self.collection else 0
+            "collection_initialized": self._collection is not None,
+            "embedding_model_loaded": self._embedding_model is not None,
+            "collection_count": self._collection.count() if self._collection is not None else 0,
+            "query_cache": self.query_cache.get_stats()
         }
     
     def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
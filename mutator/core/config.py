@@ -56,6 +56,21 @@ class VectorStoreType(str, Enum):
     FAISS = "faiss"
 
 
+class RetrievalMode(str, Enum):
+    """Context retrieval strategies."""
+    VECTOR = "vector"
+    LEXICAL = "lexical"
+    HYBRID = "hybrid"
+
+
+class ResponseCacheMode(str, Enum):
+    """How LLM responses are cached on disk."""
+    OFF = "off"
+    CACHE = "cache"  # Serve repeated requests from the cache, store new responses
+    RECORD = "record"  # Always call the provider and store every response
+    REPLAY = "replay"  # Only serve stored responses, never call the provider
+
+
 class LLMConfig(BaseModel):
     """Configuration for LLM client."""
     provider: LLMProvider = LLMProvider.OPENAI
@@ -75,6 +90,18 @@ class LLMConfig(BaseModel):
     max_retries: int = 5
     retry_delay: float = 1.0
     stream: bool = False
+    context_window: Optional[int] = None  # Input token limit; looked up from the model when unset
+    prompt_caching: bool = True  # Mark the system prompt, tools and history as cacheable (Anthropic cache_control)
+    
+    # Client-side rate limiting, shared by all clients of the same provider and model
+    requests_per_minute: Optional[int] = None  # Known limit; otherwise learned from response headers
+    tokens_per_minute: Optional[int] = None  # Known limit; otherwise learned from response headers
+    rate_limit_cooldown: float = 10.0  # Pause after a rate limit error without Retry-After, doubled on repeats
+    
+    # Local response cache and record/replay
+    response_cache_mode: ResponseCacheMode = ResponseCacheMode.OFF
+    response_cache_path: str = "./llm_cache/responses.sqlite3"
+    response_cache_max_size_mb: int = 256  # LRU eviction beyond this size (not applied while recording)
     
     # Function calling settings
     function_calling: bool = True
@@ -294,6 +321,18 @@ class VectorStoreConfig(BaseModel):
     chunk_overlap: int = 50
     max_chunks: int = 1000  # Added to match tests
     
+    # Indexing throughput
+    embedding_batch_size: int = 64  # Texts per SentenceTransformer.encode batch
+    indexing_workers: int = 0  # Reader/chunker threads (0 = based on CPU count)
+    embedding_threads: int = 0  # Threads used to compute embeddings (0 = CPU count)
+    
+    # Query embedding cache
+    query_cache_size: int = 1024  # Cached query embeddings (0 = disabled)
+    query_cache_ttl: float = 3600.0  # Seconds a cached query embedding stays valid (0 = no expiry)
+    
+    # Startup
+    warm_up: bool = False  # Load ChromaDB and the embedding model in the background at startup
+    
     # ChromaDB specific
     persist_directory: Optional[str] = None
     
@@ -394,6 +433,14 @@ class ContextConfig(BaseModel):
     context_window_size: int = 8000  # tokens
     max_files_to_index: int = 50  # Reduced from 10000 to 50 for better performance
     
+    # Content search
+    enable_trigram_index: bool = False  # Keep a trigram index next to the vector store for fast grep
+    
+    # Context retrieval
+    retrieval_mode: RetrievalMode = RetrievalMode.HYBRID
+    rrf_k: int = 60  # Reciprocal-rank fusion constant; larger values flatten rank differences
+    rerank_results: bool = False  # Rerank fused results by query term coverage
+    
     # Context prioritization
     prioritize_recent_files: bool = True
     prioritize_modified_files: bool = True
@@ -401,7 +448,13 @@ class ContextConfig(BaseModel):
     
     # Memory management
     compress_old_context: bool = True
-    context_compression_threshold: int = 20
+    context_compression_threshold: int = 20  # Messages in an agent's history before older ones are summarized
+    stale_tool_result_turns: int = 3  # Model turns after which large tool results are elided (0 keeps them)
+    stale_tool_result_tokens: int = 200  # Tool results up to this size are never elided
+    # Largest share of the context window the messages of a role may fill
+    context_role_budgets: Dict[str, float] = Field(default_factory=lambda: {
+        "tool": 0.5, "assistant": 0.3
+    })
     
     # Project context files
     project_context_files: List[str] = Field(default_factory=lambda: [
@@ -730,7 +783,7 @@ class ConfigManager:
 
 # Export configuration classes
 __all__ = [
-    "LLMProvider", "VectorStoreType", "LLMConfig", "ToolConfig", "MCPServerConfig",
+    "LLMProvider", "VectorStoreType", "RetrievalMode", "ResponseCacheMode", "LLMConfig", "ToolConfig", "MCPServerConfig",
     "VectorStoreConfig", "SafetyConfig", "ExecutionConfig", "ContextConfig",
     "AgentConfig", "ConfigManager"
 ] 
\ No newline at end of file
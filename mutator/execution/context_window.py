@@ -0,0 +1,269 @@
+"""
+Context window management for the Coding Agent Framework.
+
+This module keeps the message history of the LangGraph agent loop within the
+model's context window. Before each model call it elides tool results that
+have gone stale, keeps each message role within its share of the window and,
+once the history grows past the compression threshold, folds the older
+messages into a rolling summary. The changes are written back to the agent
+state, so the history stays bounded and every call after a compaction sends
+the same prefix as the one before it.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+from ..core.config import AgentConfig
+from ..llm.client import LLMClient
+from ..llm.tokens import message_text
+
+
+# additional_kwargs flags set on compacted messages
+ELIDED_KEY = "context_elided"
+SUMMARY_KEY = "context_summary"
+REMOVED_KEY = "context_removed"
+
+# Longest rendering of a single message in a summarization request
+_SUMMARY_MESSAGE_CHARS = 4000
+
+_SUMMARY_PROMPT = (
+    "Summarize the following part of a coding agent's work so the agent can continue without it. "
+    "Keep the decisions made, files read or changed with their relevant details, tool results that "
+    "are still needed, errors encountered and what remains to be done. Be concise and factual.\n\n"
+)
+
+
+def merge_messages(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
+    """add_messages reducer that also drops messages replaced by a removal marker."""
+    merged = add_messages(left, right)
+    return [message for message in merged if not message.additional_kwargs.get(REMOVED_KEY)]
+
+
+def _role(message: BaseMessage) -> str:
+    if isinstance(message, SystemMessage):
+        return "system"
+    if isinstance(message, AIMessage):
+        return "assistant"
+    if isinstance(message, ToolMessage):
+        return "tool"
+    return "user"
+
+
+def _replace(message: BaseMessage, content: str, **flags: Any) -> BaseMessage:
+    """Copy of a message with new content and flags, keeping its id and tool calls."""
+    return message.copy(update={
+        "content": content,
+        "additional_kwargs": {**message.additional_kwargs, **flags}
+    })
+
+
+class ContextWindowManager:
+    """Fits the agent's message history into the model's context window."""
+
+    def __init__(self, llm_client: LLMClient, config: AgentConfig):
+        self.llm_client = llm_client
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.stats: Dict[str, int] = {
+            "elided_messages": 0,
+            "elided_tokens": 0,
+            "summaries": 0,
+            "summarized_messages": 0
+        }
+
+    def message_tokens(self, message: BaseMessage) -> int:
+        """Tokens of a LangChain message, counted once per distinct content."""
+        return self.llm_client.token_counter.count_message({
+            "role": _role(message),
+            "content": message.content,
+            "tool_calls": message.additional_kwargs.get("tool_calls")
+        })
+
+    def available_tokens(self, system_message: Optional[str] = None) -> int:
+        """Tokens left for the history after the system prompt, tools and the response."""
+        counter = self.llm_client.token_counter
+        reserved = self.config.llm_config.max_tokens
+        reserved += counter.count_tools(self.llm_client.get_function_schemas())
+        if system_message:
+            reserved += counter.count_message({"role": "system", "content": system_message})
+        return max(self.llm_client.context_window - reserved, 0)
+
+    async def fit(self, messages: List[BaseMessage],
+                  system_message: Optional[str] = None) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+        """
+        Compact a message history to fit the context window.
+
+        Args:
+            messages: Agent state messages, oldest first
+            system_message: System prompt that will be sent in front of them
+
+        Returns:
+            The messages to send, and the updates that make the agent state
+            match them (replacements and removal markers for merge_messages)
+        """
+        available = self.available_tokens(system_message)
+        messages = list(messages)
+        updates: Dict[str, BaseMessage] = {}
+
+        def replace(index: int, message: BaseMessage) -> None:
+            messages[index] = message
+            updates[message.id] = message
+
+        self._elide_stale_tool_results(messages, replace)
+        self._apply_role_budgets(messages, available, replace)
+
+        context_config = self.config.context_config
+        total = sum(self.message_tokens(message) for message in messages)
+        if context_config.compress_old_context and (
+                len(messages) > context_config.context_compression_threshold or total > available):
+            summarized = await self._summarize(messages, replace)
+            for message in summarized:
+                updates[message.id] = _replace(message, "", **{REMOVED_KEY: True})
+            total = sum(self.message_tokens(message) for message in messages)
+
+        if total > available:
+            self._enforce_window(messages, available, replace)
+
+        return messages, list(updates.values())
+
+    def _elided(self, message: BaseMessage, tool_names: Dict[str, str]) -> BaseMessage:
+        tokens = self.message_tokens(message)
+        self.stats["elided_messages"] += 1
+        self.stats["elided_tokens"] += tokens
+        if isinstance(message, ToolMessage):
+            name = tool_names.get(message.tool_call_id, "tool")
+            note = f"[Earlier {name} result elided ({tokens} tokens); call the tool again if it is still needed]"
+        else:
+            note = f"[Earlier message elided ({tokens} tokens)]"
+        return _replace(message, note, **{ELIDED_KEY: True})
+
+    @staticmethod
+    def _tool_names(messages: List[BaseMessage]) -> Dict[str, str]:
+        names = {}
+        for message in messages:
+            for tool_call in message.additional_kwargs.get("tool_calls") or []:
+                names[tool_call.get("id")] = tool_call.get("function", {}).get("name", "tool")
+        return names
+
+    def _elide_stale_tool_results(self, messages: List[BaseMessage], replace) -> None:
+        """Elide large tool results the model has moved past."""
+        stale_turns = self.config.context_config.stale_tool_result_turns
+        if stale_turns <= 0:
+            return
+        tool_names = self._tool_names(messages)
+        turns_after = 0
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if isinstance(message, AIMessage):
+                turns_after += 1
+            elif (isinstance(message, ToolMessage) and turns_after >= stale_turns
+                  and not message.additional_kwargs.get(ELIDED_KEY)
+                  and self.message_tokens(message) > self.config.context_config.stale_tool_result_tokens):
+                replace(index, self._elided(message, tool_names))
+
+    def _apply_role_budgets(self, messages: List[BaseMessage], available: int, replace) -> None:
+        """Elide the oldest messages of a role that fills more than its share of the window."""
+        tool_names = self._tool_names(messages)
+        for role, share in self.config.context_config.context_role_budgets.items():
+            budget = int(available * share)
+            indexes = [index for index, message in enumerate(messages) if _role(message) == role]
+            total = sum(self.message_tokens(messages[index]) for index in indexes)
+            # The task and the latest message are never elided
+            for index in indexes:
+                if index == 0 or index == len(messages) - 1:
+                    continue
+                if total <= budget:
+                    break
+                message = messages[index]
+                if message.additional_kwargs.get(ELIDED_KEY) or not message_text(message.content):
+                    continue
+                elided = self._elided(message, tool_names)
+                total -= self.message_tokens(message) - self.message_tokens(elided)
+                replace(index, elided)
+
+    def _summary_cut(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message kept verbatim after summarizing the ones before it."""
+        keep = max(self.config.context_config.context_compression_threshold // 2, 1)
+        cut = len(messages) - keep
+        # Tool results stay with the assistant message that requested them
+        while cut > 1 and isinstance(messages[cut], ToolMessage):
+            cut -= 1
+        return cut
+
+    async def _summarize(self, messages: List[BaseMessage], replace) -> List[BaseMessage]:
+        """
+        Fold the older messages (after the task) into one summary message.
+
+        Returns:
+            The messages that were folded into the summary and must be removed,
+            or nothing if no summary could be made
+        """
+        cut = self._summary_cut(messages)
+        if cut <= 2:
+            return []
+        folded = messages[1:cut]
+
+        summary = await self._request_summary(folded)
+        if summary is None:
+            # Nothing is dropped; elision still keeps the history within the window
+            return []
+        content = f"Summary of the work so far:\n{summary}"
+        self.stats["summaries"] += 1
+        self.stats["summarized_messages"] += len(folded)
+
+        # The summary takes the place (and id) of the first folded message
+        summary_message = HumanMessage(content=content, id=folded[0].id,
+                                       additional_kwargs={SUMMARY_KEY: True})
+        replace(1, summary_message)
+        del messages[2:cut]
+        self.logger.debug(f"Summarized {len(folded)} messages into {self.message_tokens(summary_message)} tokens")
+        return folded[1:]
+
+    async def _request_summary(self, messages: List[BaseMessage]) -> Optional[str]:
+        transcript = []
+        for message in messages:
+            text = message_text(message.content)
+            tool_calls = message.additional_kwargs.get("tool_calls") or []
+            for tool_call in tool_calls:
+                function = tool_call.get("function", {})
+                text += f"\n[called {function.get('name')}({function.get('arguments', '')})]"
+            if len(text) > _SUMMARY_MESSAGE_CHARS:
+                text = text[:_SUMMARY_MESSAGE_CHARS] + " [...]"
+            transcript.append(f"{_role(message)}: {text}")
+
+        response = await self.llm_client.complete_with_messages(
+            [{"role": "user", "content": _SUMMARY_PROMPT + "\n\n".join(transcript)}],
+            max_tokens=min(self.config.llm_config.max_tokens, 1024),
+            # With tools the model may answer with a tool call instead of a summary
+            use_tools=False
+        )
+        if not response.success or not response.content:
+            self.logger.warning(f"Summarizing the message history failed: {response.error or 'no summary returned'}")
+            return None
+        return response.content
+
+    def _enforce_window(self, messages: List[BaseMessage], available: int, replace) -> None:
+        """Elide the oldest messages until the history fits, as a last resort."""
+        tool_names = self._tool_names(messages)
+        total = sum(self.message_tokens(message) for message in messages)
+        for index in range(1, len(messages) - 1):
+            if total <= available:
+                break
+            message = messages[index]
+            if message.additional_kwargs.get(ELIDED_KEY) or message.additional_kwargs.get(SUMMARY_KEY):
+                continue
+            elided = self._elided(message, tool_names)
+            total -= self.message_tokens(message) - self.message_tokens(elided)
+            replace(index, elided)
+        if total > available:
+            self.logger.warning(f"Message history needs {total} tokens, more than the {available} available")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get compaction statistics."""
+        return {**self.stats, "context_window": self.llm_client.context_window}
+
+
+__all__ = ["ContextWindowManager", "merge_messages"]
@@ -11,17 +11,19 @@ import logging
 import time
 import signal
 import sys
-from typing import Dict, List, Any, Optional, AsyncIterator, Type
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple, Type
 from datetime import datetime
 import json
 
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langchain_core.outputs import ChatResult, ChatGeneration
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
 from langchain_core.tools import BaseTool
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ensure_config
 from langgraph.graph import StateGraph, END
-from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 from typing_extensions import TypedDict
 from typing import Annotated
@@ -39,6 +41,7 @@ from ..llm.client import LLMClient
 from ..tools.manager import ToolManager
 from ..context.manager import ContextManager
 from .planner import TaskPlanner
+from .context_window import ContextWindowManager, merge_messages
 
 
 class GracefulShutdown:
@@ -74,7 +77,7 @@ _shutdown_handler = GracefulShutdown()
 
 class AgentState(TypedDict):
     """State for LangGraph workflow."""
-    messages: Annotated[list, add_messages]
+    messages: Annotated[list, merge_messages]
 
 
 class CustomLangChainModel(BaseChatModel):
@@ -110,8 +113,52 @@ class CustomLangChainModel(BaseChatModel):
         **kwargs: Any,
     ) -> ChatResult:
         """Generate a response asynchronously."""
+        # Call our LLM client
+        response = await self.llm_client.complete_with_messages(self._format_messages(messages))
+        
+        # Convert response back to LangChain format
+        ai_message = AIMessage(content=response.content or "", additional_kwargs=self._tool_call_kwargs(response))
         
-        # Convert LangChain messages to our format
+        # Create chat generation
+        generation = ChatGeneration(message=ai_message)
+        return ChatResult(generations=[generation])
+    
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream a response; text arrives as it is generated, tool calls in the final chunk."""
+        async for item in self.llm_client.stream_with_messages(self._format_messages(messages)):
+            if isinstance(item, str):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=item))
+            else:
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(content="", additional_kwargs=self._tool_call_kwargs(item)),
+                    generation_info={"finish_reason": item.finish_reason}
+                )
+    
+    @staticmethod
+    def _tool_call_kwargs(response: LLMResponse) -> Dict[str, Any]:
+        """additional_kwargs carrying a response's tool calls in OpenAI format."""
+        if not response.tool_calls:
+            return {}
+        return {"tool_calls": [
+            {
+                "id": tc.id or tc.call_id,
+                "type": "function",
+                "function": {
+                    "name": tc.name,
+                    "arguments": json.dumps(tc.arguments)
+                }
+            }
+            for tc in response.tool_calls
+        ]}
+    
+    def _format_messages(self, messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        """Convert LangChain messages to our format."""
         formatted_messages = []
         
         # Convert to our format
@@ -165,33 +212,7 @@ class CustomLangChainModel(BaseChatModel):
                         "tool_call_id": msg.tool_call_id
                     })
         
-        # Call our LLM client
-        response = await self.llm_client.complete_with_messages(formatted_messages)
-        
-        # Convert response back to LangChain format
-        if response.tool_calls:
-            # Create AI message with tool calls
-            tool_calls = []
-            for tc in response.tool_calls:
-                tool_calls.append({
-                    "id": tc.id or tc.call_id,
-                    "type": "function", 
-                    "function": {
-                        "name": tc.name,
-                        "arguments": json.dumps(tc.arguments)
-                    }
-                })
-            
-            ai_message = AIMessage(
-                content=response.content or "",
-                additional_kwargs={"tool_calls": tool_calls}
-            )
-        else:
-            ai_message = AIMessage(content=response.content)
-        
-        # Create chat generation
-        generation = ChatGeneration(message=ai_message)
-        return ChatResult(generations=[generation])
+        return formatted_messages
     
     def bind_tools(self, tools):
         """Bind tools to the model. For our implementation, this just returns self."""
@@ -200,6 +221,22 @@ class CustomLangChainModel(BaseChatModel):
         return self
 
 
+# Key in a workflow run's "configurable" config holding its event queue
+# (streamed llm_token events and tool_output events from running tools)
+RUN_EVENTS_KEY = "run_events"
+
+
+class _TokenEventHandler(AsyncCallbackHandler):
+    """Forwards streamed model tokens to a queue as llm_token events."""
+    
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+    
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.queue.put_nowait(AgentEvent(event_type="llm_token", data={"content": token}))
+
+
 class CustomLangChainTool(BaseTool):
     """LangChain-compatible wrapper for our tools."""
     
@@ -279,6 +316,16 @@ class TaskExecutor:
         self.model_with_tools = None
         self.workflow_app = None
         
+        # System message and the tool names it was built for; reused so every
+        # call sends a byte-identical (cacheable) prompt prefix
+        self._system_message_cache: Optional[Tuple[Tuple[str, ...], str]] = None
+        
+        # Keeps the workflow's message history within the model's context window
+        self.context_window = ContextWindowManager(llm_client, config)
+        
+        # Events emitted by running tools join the event stream of their run
+        self.tool_manager.set_event_callback(self._emit_run_event)
+        
         # Log initialization info
         self.logger.debug(f"TaskExecutor initialized with LangChain backend")
         if self.debug_mode:
@@ -384,20 +431,71 @@ class TaskExecutor:
         else:
             return "end"
     
-    async def _call_model(self, state: AgentState):
+    async def _call_model(self, state: AgentState, config: Optional[RunnableConfig] = None):
         """Call model node for workflow."""
         messages = state["messages"]
         
         # Add system message if not already present
-        has_system_message = any(isinstance(msg, SystemMessage) for msg in messages)
-        if not has_system_message:
-            system_content = self._create_system_message()
-            system_msg = SystemMessage(content=system_content)
-            messages = [system_msg] + messages
+        system_content = None
+        if not any(isinstance(msg, SystemMessage) for msg in messages):
+            system_content = self._get_system_message()
         
-        # Call model with tools
-        response = await self.model_with_tools.ainvoke(messages)
-        return {"messages": [response]}
+        # Compact the history; the updates keep the state in line with what is sent
+        messages, updates = await self.context_window.fit(messages, system_content)
+        if system_content:
+            messages = [SystemMessage(content=system_content)] + messages
+        
+        # Call model with tools, streaming tokens when this run has a consumer for them
+        run_events = (config or {}).get("configurable", {}).get(RUN_EVENTS_KEY)
+        if run_events is not None and self._streaming_enabled():
+            response = await self.model_with_tools.ainvoke(
+                messages,
+                config={"callbacks": [_TokenEventHandler(run_events)]},
+                stream=True
+            )
+        else:
+            response = await self.model_with_tools.ainvoke(messages)
+        return {"messages": updates + [response]}
+    
+    def _streaming_enabled(self) -> bool:
+        """Whether model tokens are streamed as llm_token events."""
+        return bool(self.config.llm_config.stream or self.config.execution_config.enable_streaming)
+    
+    def _emit_run_event(self, event: AgentEvent) -> None:
+        """Tool event callback: queue an event on the workflow run the calling tool belongs to."""
+        run_events = ensure_config().get("configurable", {}).get(RUN_EVENTS_KEY)
+        if run_events is not None:
+            run_events.put_nowait(event)
+    
+    async def _stream_workflow(self, inputs: Dict[str, Any], config: RunnableConfig,
+                               **stream_kwargs: Any) -> AsyncIterator[Any]:
+        """Stream a workflow run, interleaving its queued events (tokens, tool output) as they arrive."""
+        # The queue travels with this run's config, so concurrent runs keep their events apart
+        queue: asyncio.Queue = asyncio.Queue()
+        config = {**config, "configurable": {**config.get("configurable", {}), RUN_EVENTS_KEY: queue}}
+        workflow_stream = self.workflow_app.astream(inputs, config=config, **stream_kwargs)
+        next_event = asyncio.ensure_future(workflow_stream.__anext__())
+        try:
+            while True:
+                queued = asyncio.ensure_future(queue.get())
+                await asyncio.wait({next_event, queued}, return_when=asyncio.FIRST_COMPLETED)
+                if queued.done():
+                    yield queued.result()
+                    continue
+                queued.cancel()
+                
+                # Queued events always precede the node output that produced them
+                while not queue.empty():
+                    yield queue.get_nowait()
+                try:
+                    event = next_event.result()
+                except StopAsyncIteration:
+                    break
+                yield event
+                next_event = asyncio.ensure_future(workflow_stream.__anext__())
+        finally:
+            if not next_event.done():
+                next_event.cancel()
     
     def add_conversation_turn(self, turn: ConversationTurn) -> None:
         """Add a conversation turn to the history."""
@@ -450,7 +548,12 @@ class TaskExecutor:
                 async def process_workflow_with_shutdown_checks():
                     iteration_count = 0
                     try:
-                        async for event in self.workflow_app.astream(inputs, config=config):
+                        async for event in self._stream_workflow(inputs, config):
+                            # Streamed tokens and tool output are not workflow iterations
+                            if isinstance(event, AgentEvent):
+                                yield event
+                                continue
+                            
                             # Check for graceful shutdown request before processing each event
                             if _shutdown_handler.check_shutdown():
                                 self.logger.warning("Graceful shutdown requested, stopping task execution")
@@ -731,7 +834,12 @@ class TaskExecutor:
                 # Stream through the workflow with timeout and shutdown checks
                 async def process_chat_workflow_with_shutdown_checks():
                     iteration_count = 0
-                    async for output in self.workflow_app.astream(inputs, config=config, stream_mode="updates"):
+                    async for output in self._stream_workflow(inputs, config, stream_mode="updates"):
+                        # Streamed tokens and tool output are not workflow iterations
+                        if isinstance(output, AgentEvent):
+                            yield output
+                            continue
+                        
                         # Check for graceful shutdown request before processing each output
                         if _shutdown_handler.check_shutdown():
                             self.logger.warning("Graceful shutdown requested, stopping interactive chat")
@@ -776,6 +884,12 @@ class TaskExecutor:
                     current_time = asyncio.get_event_loop().time()
                     if current_time - start_time > chat_timeout:
                         raise asyncio.TimeoutError(f"Interactive chat timed out after {chat_timeout} seconds")
+                    
+                    # Streamed tokens are passed on as they are
+                    if isinstance(output, AgentEvent):
+                        yield output
+                        continue
+                    
                     # Process each output immediately
                     for node_name, node_output in output.items():
                         if node_name == "agent":
@@ -1017,6 +1131,13 @@ class TaskExecutor:
             # Log cleanup error but don't raise
             self.logger.warning(f"Warning: Error during executor cleanup: {e}")
 
+    def _get_system_message(self) -> str:
+        """Get the system message, rebuilding it only when the available tools change."""
+        tool_names = tuple(self.tool_manager.list_tools())
+        if self._system_message_cache is None or self._system_message_cache[0] != tool_names:
+            self._system_message_cache = (tool_names, self._create_system_message())
+        return self._system_message_cache[1]
+    
     def _create_system_message(self) -> str:
         """
         Create a comprehensive system message for the coding agent.
@@ -33,8 +33,8 @@ class TaskPlanner:
             # Get relevant context
             relevant_context = []
             if context:
-                search_results = self.context_manager.search_context(task, limit=10)
-                relevant_context = search_results
+                # Hybrid retrieval already dedupes and ranks, so a few items suffice
+                relevant_context = self.context_manager.search_context(task, limit=5)
             
             # Create the task prompt
             prompt = f"""Please help me with the following task:
@@ -47,7 +47,7 @@ Task: {task}
             if relevant_context:
                 prompt += "Relevant Context:\n"
                 for i, context_item in enumerate(relevant_context[:5], 1):
-                    prompt += f"{i}. {context_item.get('content', str(context_item))}\n"
+                    prompt += f"{i}. {self._format_context_item(context_item)}\n"
                 prompt += "\n"
             
             # Add guidance
@@ -60,6 +60,18 @@ Task: {task}
             self.logger.error(f"Failed to create task prompt: {str(e)}")
             return f"Error creating task prompt: {str(e)}"
     
+    def _format_context_item(self, context_item: Any) -> str:
+        """Format a context item with its location for the task prompt."""
+        if isinstance(context_item, dict):
+            return context_item.get('content', str(context_item))
+        
+        location = context_item.source or ""
+        if location and context_item.line_start:
+            location += f":{context_item.line_start}"
+            if context_item.line_end and context_item.line_end != context_item.line_start:
+                location += f"-{context_item.line_end}"
+        return f"{location}\n{context_item.content}" if location else context_item.content
+    
     def _get_task_guidance(self) -> str:
         """Get guidance for task execution."""
         return """## Available Tools & Approach:
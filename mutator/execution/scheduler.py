@@ -0,0 +1,112 @@
+"""
+Group scheduler for the Coding Agent Framework.
+
+This module runs independent units of work (such as delegated file groups in the
+batch tools) concurrently with bounded parallelism, per-unit timeouts and
+optional cancellation of the remaining units after the first failure. Results
+are yielded as each unit completes.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+GroupJob = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class GroupScheduler:
+    """Runs group jobs concurrently under a parallelism limit."""
+
+    def __init__(self, max_parallel: int = 1, timeout: Optional[float] = None,
+                 cancel_on_failure: bool = False):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_parallel: Maximum number of jobs running at the same time
+            timeout: Per-job timeout in seconds (None disables it)
+            cancel_on_failure: Cancel the remaining jobs after the first failed one
+        """
+        self.max_parallel = max(1, int(max_parallel or 1))
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.cancel_on_failure = cancel_on_failure
+        self.logger = logging.getLogger(__name__)
+
+    async def _run_job(self, index: int, job: GroupJob,
+                       semaphore: asyncio.Semaphore) -> Tuple[int, Dict[str, Any]]:
+        """Run a single job under the semaphore and normalize its outcome."""
+        async with semaphore:
+            start_time = time.time()
+            try:
+                if self.timeout:
+                    result = await asyncio.wait_for(job(), timeout=self.timeout)
+                else:
+                    result = await job()
+            except asyncio.TimeoutError:
+                result = {
+                    "success": False,
+                    "timed_out": True,
+                    "error": f"Group timed out after {self.timeout} seconds"
+                }
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            result["execution_time"] = time.time() - start_time
+            return index, result
+
+    async def run(self, jobs: List[GroupJob]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Run jobs and yield (index, result) pairs in completion order.
+
+        Every job yields exactly one result. Jobs cancelled because of an earlier
+        failure yield a result with "cancelled" set to True.
+        """
+        if not jobs:
+            return
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        tasks = {
+            asyncio.ensure_future(self._run_job(index, job, semaphore)): index
+            for index, job in enumerate(jobs)
+        }
+        pending = set(tasks)
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                failed = False
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    index, result = task.result()
+                    failed = failed or not result.get("success", False)
+                    yield index, result
+
+                if failed and self.cancel_on_failure and pending:
+                    self.logger.warning(f"Group failed, cancelling {len(pending)} remaining groups")
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    for task in pending:
+                        if not task.cancelled():
+                            # Finished before the cancellation took effect
+                            yield task.result()
+                            continue
+                        yield tasks[task], {
+                            "success": False,
+                            "cancelled": True,
+                            "error": "Cancelled after an earlier group failed"
+                        }
+                    pending = set()
+        finally:
+            # Don't leave jobs running if the consumer stops early
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+__all__ = ["GroupScheduler", "GroupJob"]
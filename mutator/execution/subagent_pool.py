@@ -0,0 +1,168 @@
+"""
+Sub-agent runtime pool for the Coding Agent Framework.
+
+This module keeps initialized sub-agent runtimes alive between delegate_task
+calls so that the LLM client, tool registrations, compiled LangGraph workflow
+and context components (vector collection and embedding model) are built once
+per concurrent delegation instead of once per delegation. A runtime is
+checked out by one task at a time.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+
+
+class SubAgentPool:
+    """Pool of initialized sub-agent runtimes reused by delegated tasks."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+        # All runtimes built by the pool, and those not checked out, keyed by
+        # absolute working directory
+        self._runtimes: Dict[str, List[Any]] = {}
+        self._idle: Dict[str, List[Any]] = {}
+
+        # Context managers owned by running agents, shared with their sub-agents
+        self._shared_context_managers: Dict[str, Any] = {}
+
+        # Pool statistics
+        self.stats: Dict[str, Any] = {
+            "runtimes_created": 0,
+            "runtimes_reused": 0,
+            "total_startup_time": 0.0
+        }
+
+    @staticmethod
+    def _key(working_directory: str) -> str:
+        """Normalize a working directory into a pool key."""
+        return str(Path(working_directory or ".").absolute())
+
+    def register_context_manager(self, working_directory: str, context_manager: Any) -> None:
+        """Share an already-initialized context manager with sub-agents of a directory."""
+        if context_manager is None:
+            return
+        key = self._key(working_directory)
+        self._shared_context_managers[key] = context_manager
+        self.logger.debug(f"Registered shared context manager for {key}")
+
+    async def release_context_manager(self, context_manager: Any) -> None:
+        """
+        Drop a shared context manager and the runtimes built on top of it.
+
+        Idle runtimes are cleaned up now, checked-out ones when they are
+        released; runtimes of other agents are left alone.
+        """
+        for key in [k for k, cm in self._shared_context_managers.items() if cm is context_manager]:
+            del self._shared_context_managers[key]
+
+        dropped = [
+            runtime for runtimes in self._idle.values() for runtime in runtimes
+            if runtime.context_manager is context_manager
+        ]
+        for pool in (self._runtimes, self._idle):
+            for key, runtimes in pool.items():
+                runtimes[:] = [rt for rt in runtimes if rt.context_manager is not context_manager]
+
+        await self._cleanup(dropped)
+
+    async def _cleanup(self, runtimes: List[Any]) -> None:
+        for runtime in runtimes:
+            try:
+                await runtime.cleanup()
+            except Exception as e:
+                self.logger.warning(f"Warning: Error cleaning up sub-agent runtime: {e}")
+
+    async def acquire(self, working_directory: str) -> Any:
+        """
+        Check out an initialized sub-agent runtime for a working directory.
+
+        A runtime keeps per-run state (execution mode, streaming queue,
+        context window statistics), so it runs one task at a time: an idle
+        runtime is reused when there is one, otherwise a new runtime is built,
+        reusing the context manager of the parent agent when one has been
+        registered. Return it with release() when the task is done.
+        """
+        key = self._key(working_directory)
+
+        idle = self._idle.get(key)
+        if idle:
+            self.stats["runtimes_reused"] += 1
+            return idle.pop()
+
+        # Import here to avoid circular imports
+        from ..agent import Mutator
+        from ..core.config import AgentConfig
+
+        start_time = time.time()
+
+        config = AgentConfig()
+        config.working_directory = key
+
+        runtime = Mutator(config, context_manager=self._shared_context_managers.get(key))
+        await runtime.initialize()
+
+        startup_time = time.time() - start_time
+        self.stats["runtimes_created"] += 1
+        self.stats["total_startup_time"] += startup_time
+
+        self._runtimes.setdefault(key, []).append(runtime)
+        self.logger.debug(f"Created sub-agent runtime for {key} in {startup_time:.2f}s")
+
+        return runtime
+
+    async def release(self, runtime: Any) -> None:
+        """Return a checked-out runtime to the pool, or clean it up if it was dropped."""
+        key = self._key(runtime.config.working_directory)
+        if runtime in self._runtimes.get(key, []):
+            self._idle.setdefault(key, []).append(runtime)
+            return
+
+        # Dropped or shut down while it was running a task
+        await self._cleanup([runtime])
+
+    @asynccontextmanager
+    async def checkout(self, working_directory: str) -> AsyncIterator[Any]:
+        """Check out a runtime for the duration of one task."""
+        runtime = await self.acquire(working_directory)
+        try:
+            yield runtime
+        finally:
+            await self.release(runtime)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            **self.stats,
+            "active_runtimes": sum(len(runtimes) for runtimes in self._runtimes.values()),
+            "idle_runtimes": sum(len(runtimes) for runtimes in self._idle.values()),
+            "shared_context_managers": len(self._shared_context_managers)
+        }
+
+    async def shutdown(self) -> None:
+        """
+        Clean up the runtimes of every agent in the process.
+
+        Idle runtimes are cleaned up now, checked-out ones when they are
+        released. Meant for process exit; an agent releases only its own
+        runtimes through release_context_manager().
+        """
+        runtimes = [runtime for idle in self._idle.values() for runtime in idle]
+        self._idle.clear()
+        self._runtimes.clear()
+        await self._cleanup(runtimes)
+
+
+# Global sub-agent pool instance
+_global_pool = SubAgentPool()
+
+
+def get_subagent_pool() -> SubAgentPool:
+    """Get the global sub-agent pool instance."""
+    return _global_pool
+
+
+__all__ = ["SubAgentPool", "get_subagent_pool"]
@@ -29,19 +29,64 @@ from ..core.types import (
     ConversationTurn,
     TaskType,
 )
-from ..core.config import LLMConfig
+from ..core.config import LLMConfig, ResponseCacheMode
+from .rate_limiter import RateLimiter, get_rate_limiter, response_headers
+from .response_cache import ResponseCache, get_response_cache, request_key
+from .tokens import TokenCounter, get_context_window
 
 
 class LLMClient:
     """Client for interacting with language models through litellm."""
     
-    def __init__(self, config: LLMConfig):
-        """Initialize the LLM client with configuration."""
+    def __init__(self, config: LLMConfig, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None, project_root: Optional[str] = None):
+        """
+        Initialize the LLM client with configuration.
+        
+        Args:
+            config: LLM configuration
+            rate_limiter: Limiter pacing the calls; defaults to the one shared by all clients
+            response_cache: Cache of responses; defaults to the one at the configured
+                path when response_cache_mode is not off
+            project_root: Working directory of the agent, left out of response cache keys
+        """
         self.config = config
+        self.project_root = project_root
         self.logger = logging.getLogger(__name__)
         self._setup_litellm()
         self._conversation_history: List[ConversationTurn] = []
         self._function_schemas: Dict[str, Dict[str, Any]] = {}
+        # Provider-format tool list, rebuilt only when functions change so the
+        # prompt prefix stays byte-identical between calls
+        self._tools_cache: Optional[List[Dict[str, Any]]] = None
+        
+        # Token usage across calls, including prompt cache reads and writes
+        self.usage_totals: Dict[str, int] = {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cache_read_tokens": 0,
+            "cache_write_tokens": 0
+        }
+        
+        # Counts are cached per text, so re-sent history is tokenized once
+        self.token_counter = TokenCounter(self._prepare_model_string())
+        
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._rate_limit_key = (self.config.provider.value, self.config.model)
+        self.rate_limiter.configure(
+            self._rate_limit_key,
+            requests_per_minute=self.config.requests_per_minute,
+            tokens_per_minute=self.config.tokens_per_minute,
+            cooldown=self.config.rate_limit_cooldown
+        )
+        
+        self.response_cache = response_cache
+        if self.response_cache is None and self.config.response_cache_mode != ResponseCacheMode.OFF:
+            self.response_cache = get_response_cache(
+                self.config.response_cache_path,
+                self.config.response_cache_mode,
+                self.config.response_cache_max_size_mb * 1024 * 1024
+            )
         
         # Set up logging
         if self.config.debug:
@@ -105,6 +150,7 @@ class LLMClient:
     def register_function(self, name: str, function: Callable[[Dict[str, Any]], Any], schema: Dict[str, Any]) -> None:
         """Register a function for function calling."""
         self._function_schemas[name] = schema
+        self._tools_cache = None
         self.logger.debug(f"Registered function: {name}")
     
     def register_functions(self, functions: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Dict[str, Any]]]) -> None:
@@ -115,6 +161,7 @@ class LLMClient:
     def clear_functions(self) -> None:
         """Clear all registered functions."""
         self._function_schemas.clear()
+        self._tools_cache = None
         self.logger.debug("Cleared all registered functions")
     
     def get_function_schemas(self) -> List[Dict[str, Any]]:
@@ -168,7 +215,11 @@ class LLMClient:
         return await self.complete_with_messages(messages, **kwargs)
     
     async def complete_with_messages(self, messages: List[Dict[str, Any]], **kwargs) -> LLMResponse:
-        """Complete with a list of messages."""
+        """
+        Complete with a list of messages.
+        
+        Pass use_tools=False to send the request without the registered tools.
+        """
         max_retries = kwargs.get("max_retries", self.config.max_retries)
         retry_delay = kwargs.get("retry_delay", self.config.retry_delay)
         
@@ -196,12 +247,36 @@ class LLMClient:
                 
                 # Add provider-specific parameters
                 self._add_provider_specific_params(params, kwargs)
+                self._apply_prompt_caching(params)
+                
+                cache_key = None
+                if self.response_cache is not None:
+                    cache_key = request_key(params, self.project_root)
+                    cached = self.response_cache.get(cache_key)
+                    if cached is not None:
+                        self.logger.debug(f"LLM response served from cache ({cache_key[:12]})")
+                        return LLMResponse(**cached)
+                    if self.response_cache.mode == ResponseCacheMode.REPLAY:
+                        return LLMResponse(
+                            content="",
+                            success=False,
+                            error=f"No recorded response for request {cache_key[:12]} in replay mode"
+                        )
                 
-                # Make the API call
+                # Wait for room in the shared budget, then make the API call
+                reserved_tokens = self._estimate_request_tokens(params)
+                await self.rate_limiter.acquire(self._rate_limit_key, reserved_tokens)
                 start_time = time.time()
                 response = await acompletion(**params)
                 execution_time = time.time() - start_time
                 
+                self.rate_limiter.record_response(
+                    self._rate_limit_key,
+                    response_headers(response),
+                    reserved_tokens,
+                    self._usage_total_tokens(response)
+                )
+                
                 # Extract response content
                 content = response.choices[0].message.content or ""
                 
@@ -213,11 +288,19 @@ class LLMClient:
                     content=content,
                     tool_calls=tool_calls,
                     finish_reason=response.choices[0].finish_reason,
-                    usage=response.usage.dict() if response.usage else None,
+                    usage=self._extract_usage(response),
                     model=response.model,
                     success=True
                 )
                 
+                if cache_key is not None:
+                    self.response_cache.put(
+                        cache_key,
+                        llm_response.model_dump(mode="json", exclude={"timestamp"}),
+                        model=self.config.model,
+                        latency=execution_time
+                    )
+                
                 self.logger.debug(f"LLM response completed in {execution_time:.2f}s")
                 return llm_response
                 
@@ -260,18 +343,9 @@ class LLMClient:
                 if attempt < max_retries and self._is_retryable_error(e, error_msg):
                     # Check if it's a rate limit error for special handling
                     if self._is_rate_limit_error(error_msg, error_msg):
-                        # For rate limit errors, use more aggressive backoff
-                        # Start with 60 seconds base wait time for rate limits
-                        base_wait = 60
-                        exponential_factor = 2 ** attempt
-                        wait_time = base_wait * exponential_factor
-                        
-                        # Cap the wait time at 10 minutes to be reasonable
-                        wait_time = min(wait_time, 600)
-                        
-                        self.logger.info(f"Rate limit detected, waiting {wait_time:.1f} seconds before retry (attempt {attempt + 1}/{max_retries + 1})...")
-                        self.logger.info("This is normal behavior - the system will automatically retry after the rate limit period.")
-                        await asyncio.sleep(wait_time)
+                        # Pause every caller of this model; the next attempt waits in acquire()
+                        wait_time = self.rate_limiter.record_rate_limit(self._rate_limit_key, response_headers(e))
+                        self.logger.info(f"Rate limit detected, retrying in {wait_time:.1f} seconds (attempt {attempt + 1}/{max_retries + 1})...")
                     else:
                         # For other retryable errors, use standard exponential backoff
                         wait_time = retry_delay * (2 ** attempt)
@@ -290,20 +364,13 @@ class LLMClient:
     def _add_provider_specific_params(self, params: Dict[str, Any], kwargs: Dict[str, Any]) -> None:
         """Add provider-specific parameters to the API call."""
         provider = self.config.provider.value
+        use_tools = bool(self._function_schemas) and kwargs.get("use_tools", True)
         
         # Parameters supported by OpenAI and compatible providers
         if provider in ["openai", "azure", "huggingface", "ollama", "custom"]:
             # Add function schemas if available - use tools format for OpenAI (functions deprecated)
-            if self._function_schemas:
-                # Convert function schemas to tools format for OpenAI
-                tools = []
-                for schema in self._function_schemas.values():
-                    tool = {
-                        "type": "function",
-                        "function": schema
-                    }
-                    tools.append(tool)
-                params["tools"] = tools
+            if use_tools:
+                params["tools"] = self._get_tools()
                 params["tool_choice"] = kwargs.get("tool_choice", "auto")
             
             # Add OpenAI-specific parameters
@@ -317,17 +384,8 @@ class LLMClient:
         # Parameters supported by Anthropic
         elif provider == "anthropic":
             # Anthropic supports tools instead of functions
-            if self._function_schemas:
-                # Convert function schemas to Anthropic tools format
-                tools = []
-                for schema in self._function_schemas.values():
-                    tool = {
-                        "name": schema["name"],
-                        "description": schema["description"],
-                        "input_schema": schema["parameters"]
-                    }
-                    tools.append(tool)
-                params["tools"] = tools
+            if use_tools:
+                params["tools"] = self._get_tools()
             
             # Anthropic supports top_p but not frequency/presence penalties
             if self.config.top_p is not None:
@@ -336,19 +394,8 @@ class LLMClient:
         # Parameters supported by Google
         elif provider == "google":
             # Google supports tools and top_p
-            if self._function_schemas:
-                # Convert function schemas to Google tools format
-                tools = []
-                for schema in self._function_schemas.values():
-                    tool = {
-                        "function_declarations": [{
-                            "name": schema["name"],
-                            "description": schema["description"],
-                            "parameters": schema["parameters"]
-                        }]
-                    }
-                    tools.append(tool)
-                params["tools"] = tools
+            if use_tools:
+                params["tools"] = self._get_tools()
             
             if self.config.top_p is not None:
                 params["top_p"] = self.config.top_p
@@ -358,6 +405,101 @@ class LLMClient:
             if self.config.top_p is not None:
                 params["top_p"] = self.config.top_p
     
+    def _get_tools(self) -> List[Dict[str, Any]]:
+        """
+        Convert the registered function schemas to the provider's tools format.
+        
+        Tools are sorted by name so that clients registering the same tools in
+        a different order still send an identical, cacheable prefix.
+        """
+        if self._tools_cache is None:
+            provider = self.config.provider.value
+            tools = []
+            for name, schema in sorted(self._function_schemas.items()):
+                if provider == "anthropic":
+                    tools.append({
+                        "name": schema["name"],
+                        "description": schema["description"],
+                        "input_schema": schema["parameters"]
+                    })
+                elif provider == "google":
+                    tools.append({
+                        "function_declarations": [{
+                            "name": schema["name"],
+                            "description": schema["description"],
+                            "parameters": schema["parameters"]
+                        }]
+                    })
+                else:
+                    tools.append({
+                        "type": "function",
+                        "function": schema
+                    })
+            self._tools_cache = tools
+        return self._tools_cache
+    
+    def _apply_prompt_caching(self, params: Dict[str, Any]) -> None:
+        """
+        Mark the stable prompt prefix as cacheable.
+        
+        Anthropic caches up to explicit cache_control breakpoints, so one is
+        placed after the tools, one after the last system message and one on
+        the newest message, letting each turn read the previous turn's prefix
+        from the cache. OpenAI caches long prefixes automatically and only
+        needs them to be identical, which the fixed ordering of system prompt,
+        tools and history provides.
+        """
+        if not self.config.prompt_caching or self.config.provider.value != "anthropic":
+            return
+        
+        cache_control = {"type": "ephemeral"}
+        if params.get("tools"):
+            # Copy so the cached tool list is never modified
+            params["tools"] = params["tools"][:-1] + [{**params["tools"][-1], "cache_control": cache_control}]
+        
+        messages = list(params["messages"])
+        system_indexes = [i for i, message in enumerate(messages) if message.get("role") == "system"]
+        breakpoints = {system_indexes[-1]} if system_indexes else set()
+        if messages and messages[-1].get("role") in ("user", "tool"):
+            breakpoints.add(len(messages) - 1)
+        
+        for i in breakpoints:
+            content = messages[i].get("content")
+            if isinstance(content, str) and content:
+                content = [{"type": "text", "text": content}]
+            if not content or not isinstance(content, list):
+                continue
+            content = content[:-1] + [{**content[-1], "cache_control": cache_control}]
+            messages[i] = {**messages[i], "content": content}
+        params["messages"] = messages
+    
+    def _extract_usage(self, response: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get a response's token usage with prompt cache reads and writes.
+        
+        Adds cache_read_tokens and cache_write_tokens whichever way the
+        provider reports them (Anthropic cache_read_input_tokens and
+        cache_creation_input_tokens, OpenAI prompt_tokens_details.cached_tokens),
+        and adds the call to usage_totals.
+        """
+        if not response.usage:
+            return None
+        usage = response.usage.dict()
+        if not isinstance(usage, dict):
+            return usage
+        
+        details = usage.get("prompt_tokens_details") or {}
+        if not isinstance(details, dict):
+            details = getattr(details, "__dict__", {})
+        usage["cache_read_tokens"] = usage.get("cache_read_input_tokens") or details.get("cached_tokens") or 0
+        usage["cache_write_tokens"] = usage.get("cache_creation_input_tokens") or 0
+        
+        for key in self.usage_totals:
+            value = usage.get(key)
+            if isinstance(value, int):
+                self.usage_totals[key] += value
+        return usage
+    
     def _extract_tool_calls(self, response: Any) -> List[ToolCall]:
         """Extract tool calls from the LLM response."""
         tool_calls = []
@@ -525,10 +667,17 @@ class LLMClient:
         """Add a conversation turn to the history."""
         self._conversation_history.append(turn)
         
-        # Limit conversation history size
-        max_history = 50
-        if len(self._conversation_history) > max_history:
-            self._conversation_history = self._conversation_history[-max_history:]
+        # Keep the newest turns that fit half of the context window
+        budget = self.context_window // 2
+        tokens = [self.token_counter.count_message({"role": t.role, "content": t.content})
+                  for t in self._conversation_history]
+        total = sum(tokens)
+        start = 0
+        while total > budget and start < len(tokens) - 1:
+            total -= tokens[start]
+            start += 1
+        if start:
+            self._conversation_history = self._conversation_history[start:]
     
     def get_conversation_history(self) -> List[ConversationTurn]:
         """Get the conversation history."""
@@ -651,12 +800,30 @@ class LLMClient:
                               progress_callback: Optional[Callable[[str, float], None]] = None,
                               **kwargs) -> AsyncGenerator[str, None]:
         """Stream completion with progress updates and retry logic."""
+        messages = [{"role": "user", "content": prompt}]
+        async for item in self.stream_with_messages(messages, progress_callback, **kwargs):
+            if isinstance(item, str):
+                yield item
+            elif not item.success:
+                yield f"Error: {item.error}"
+    
+    async def stream_with_messages(self, messages: List[Dict[str, Any]],
+                                   progress_callback: Optional[Callable[[str, float], None]] = None,
+                                   **kwargs) -> AsyncGenerator[Union[str, LLMResponse], None]:
+        """
+        Stream a completion of a list of messages.
+        
+        Yields the text deltas as they arrive, then one LLMResponse with the
+        full content, the tool calls assembled from their deltas, the finish
+        reason and usage (or success=False with the error).
+        """
         max_retries = kwargs.get("max_retries", self.config.max_retries)
         retry_delay = kwargs.get("retry_delay", self.config.retry_delay)
         
         for attempt in range(max_retries + 1):
+            # Text deltas yielded so far
+            chunks: List[str] = []
             try:
-                messages = [{"role": "user", "content": prompt}]
                 prepared_messages = self._prepare_messages(messages)
                 
                 # Add system prompt if provided and not disabled
@@ -666,52 +833,120 @@ class LLMClient:
                 params = {
                     "model": self._prepare_model_string(),
                     "messages": prepared_messages,
-                    "temperature": self.config.temperature,
-                    "max_tokens": self.config.max_tokens,
+                    "temperature": kwargs.get("temperature", self.config.temperature),
+                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
                     "stream": True,
-                    "timeout": self.config.timeout,
+                    "timeout": kwargs.get("timeout", self.config.timeout),
                 }
                 
                 # Add base_url if configured
                 if self.config.base_url:
                     params["api_base"] = self.config.base_url
                 
-                # Add function schemas if available - use tools format for OpenAI (functions deprecated)
-                if self._function_schemas:
-                    # Convert function schemas to tools format for OpenAI
-                    tools = []
-                    for schema in self._function_schemas.values():
-                        tool = {
-                            "type": "function",
-                            "function": schema
-                        }
-                        tools.append(tool)
-                    params["tools"] = tools
+                self._add_provider_specific_params(params, kwargs)
+                self._apply_prompt_caching(params)
                 
-                chunk_count = 0
-                full_content = ""
+                # Ask for a final usage chunk so usage, prompt cache reads and the
+                # rate limiter's token reservation are accounted as for other calls.
+                # Custom OpenAI-compatible servers may reject the option.
+                if self.config.provider.value != "custom":
+                    params["stream_options"] = {"include_usage": True}
                 
-                async for chunk in await acompletion(**params):
-                    if chunk.choices and chunk.choices[0].delta:
-                        delta = chunk.choices[0].delta
-                        if hasattr(delta, 'content') and delta.content:
-                            content = delta.content
-                            full_content += content
-                            chunk_count += 1
-                            
-                            # Call progress callback if provided
+                cache_key = None
+                if self.response_cache is not None:
+                    cache_key = request_key(params, self.project_root)
+                    cached = self.response_cache.get(cache_key)
+                    if cached is not None:
+                        self.logger.debug(f"Stream served from cache ({cache_key[:12]})")
+                        for chunk_count, content in enumerate(cached["chunks"], 1):
                             if progress_callback:
-                                # Estimate progress (this is approximate)
-                                estimated_progress = min(chunk_count / 100.0, 0.9)
-                                progress_callback(content, estimated_progress)
-                            
+                                progress_callback(content, min(chunk_count / 100.0, 0.9))
                             yield content
+                        if progress_callback:
+                            progress_callback("", 1.0)
+                        yield LLMResponse(**cached["response"])
+                        return
+                    if self.response_cache.mode == ResponseCacheMode.REPLAY:
+                        yield LLMResponse(
+                            content="",
+                            success=False,
+                            error=f"No recorded response for request {cache_key[:12]} in replay mode"
+                        )
+                        return
+                
+                # Tool call deltas by index: id, name and argument fragments
+                tool_call_parts: Dict[int, Dict[str, Any]] = {}
+                finish_reason = None
+                model = None
+                usage_chunk = None
+                
+                reserved_tokens = self._estimate_request_tokens(params)
+                await self.rate_limiter.acquire(self._rate_limit_key, reserved_tokens)
+                start_time = time.time()
+                first_token_time = None
+                async for chunk in await acompletion(**params):
+                    if isinstance(getattr(chunk, 'model', None), str):
+                        model = chunk.model
+                    if getattr(chunk, 'usage', None):
+                        usage_chunk = chunk
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if isinstance(getattr(choice, 'finish_reason', None), str):
+                        finish_reason = choice.finish_reason
+                    delta = choice.delta
+                    if not delta:
+                        continue
+                    
+                    self._add_tool_call_deltas(tool_call_parts, getattr(delta, 'tool_calls', None))
+                    
+                    content = getattr(delta, 'content', None)
+                    if content and isinstance(content, str):
+                        if first_token_time is None:
+                            first_token_time = time.time() - start_time
+                        chunks.append(content)
+                        
+                        # Call progress callback if provided
+                        if progress_callback:
+                            # Estimate progress (this is approximate)
+                            estimated_progress = min(len(chunks) / 100.0, 0.9)
+                            progress_callback(content, estimated_progress)
+                        
+                        yield content
+                
+                execution_time = time.time() - start_time
+                usage = self._extract_usage(usage_chunk) if usage_chunk else None
+                self.rate_limiter.record_response(
+                    self._rate_limit_key,
+                    reserved_tokens=reserved_tokens,
+                    used_tokens=self._usage_total_tokens(usage_chunk) if usage_chunk else None
+                )
                 
                 # Final progress update
                 if progress_callback:
                     progress_callback("", 1.0)
                 
-                # If we get here, the stream completed successfully
+                llm_response = LLMResponse(
+                    content="".join(chunks),
+                    tool_calls=self._assemble_tool_calls(tool_call_parts),
+                    finish_reason=finish_reason,
+                    usage=usage if isinstance(usage, dict) else None,
+                    model=model or self.config.model,
+                    success=True
+                )
+                
+                if cache_key is not None:
+                    self.response_cache.put(
+                        cache_key,
+                        {"chunks": chunks,
+                         "response": llm_response.model_dump(mode="json", exclude={"timestamp"})},
+                        model=self.config.model,
+                        latency=execution_time
+                    )
+                
+                if first_token_time is not None:
+                    self.logger.debug(f"Stream completed in {execution_time:.2f}s, first token after {first_token_time:.2f}s")
+                yield llm_response
                 return
                     
             except Exception as e:
@@ -749,19 +984,13 @@ class LLMClient:
                 elif not self._is_timeout_error(e, error_msg):  # Avoid duplicate logging for timeouts
                     self.logger.error(f"Stream completion failed (attempt {attempt + 1}/{max_retries + 1}): {error_msg}")
                 
-                # Check if this is a retryable error
-                if attempt < max_retries and self._is_retryable_error(e, error_msg):
+                # Retry only before any output was yielded, which would otherwise be repeated
+                if not chunks and attempt < max_retries and self._is_retryable_error(e, error_msg):
                     # Check if it's a rate limit error for special handling
                     if self._is_rate_limit_error(error_msg, error_msg):
-                        # For rate limit errors, use more aggressive backoff
-                        base_wait = 60
-                        exponential_factor = 2 ** attempt
-                        wait_time = base_wait * exponential_factor
-                        wait_time = min(wait_time, 600)  # Cap at 10 minutes
-                        
-                        self.logger.info(f"Rate limit detected in stream, waiting {wait_time:.1f} seconds before retry (attempt {attempt + 1}/{max_retries + 1})...")
-                        self.logger.info("This is normal behavior - the system will automatically retry after the rate limit period.")
-                        await asyncio.sleep(wait_time)
+                        # Pause every caller of this model; the next attempt waits in acquire()
+                        wait_time = self.rate_limiter.record_rate_limit(self._rate_limit_key, response_headers(e))
+                        self.logger.info(f"Rate limit detected in stream, retrying in {wait_time:.1f} seconds (attempt {attempt + 1}/{max_retries + 1})...")
                     else:
                         # For other retryable errors, use standard exponential backoff
                         wait_time = retry_delay * (2 ** attempt)
@@ -769,11 +998,46 @@ class LLMClient:
                         await asyncio.sleep(wait_time)
                     continue
                 
-                # If we've exhausted retries or it's not retryable, yield error
+                # If we've exhausted retries or it's not retryable, report the error
                 self.logger.error(f"Stream completion failed after {attempt + 1} attempts: {error_msg}")
-                yield f"Error: {error_msg}"
+                yield LLMResponse(content="".join(chunks), success=False, error=error_msg)
                 return
     
+    @staticmethod
+    def _add_tool_call_deltas(parts: Dict[int, Dict[str, Any]], deltas: Any) -> None:
+        """Merge streamed tool call deltas into the calls assembled so far."""
+        for position, delta in enumerate(deltas or []):
+            index = getattr(delta, 'index', None)
+            if not isinstance(index, int):
+                index = position
+            part = parts.setdefault(index, {"id": None, "name": None, "arguments": []})
+            if getattr(delta, 'id', None):
+                part["id"] = delta.id
+            function = getattr(delta, 'function', None)
+            if function is not None:
+                if getattr(function, 'name', None):
+                    part["name"] = function.name
+                if getattr(function, 'arguments', None):
+                    part["arguments"].append(function.arguments)
+    
+    def _assemble_tool_calls(self, parts: Dict[int, Dict[str, Any]]) -> List[ToolCall]:
+        """Build tool calls from their accumulated deltas."""
+        tool_calls = []
+        for index in sorted(parts):
+            part = parts[index]
+            arguments_json = "".join(part["arguments"])
+            try:
+                arguments = json.loads(arguments_json) if arguments_json else {}
+            except json.JSONDecodeError as e:
+                self.logger.error(f"Failed to parse streamed tool call arguments: {e}")
+                arguments = {}
+            tool_calls.append(ToolCall(
+                id=part["id"] or f"call_{int(time.time() * 1000)}_{index}",
+                name=part["name"] or "unknown_tool",
+                arguments=arguments
+            ))
+        return tool_calls
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the current model."""
         return {
@@ -783,13 +1047,37 @@ class LLMClient:
             "max_tokens": self.config.max_tokens,
             "has_functions": len(self._function_schemas) > 0,
             "function_count": len(self._function_schemas),
+            "context_window": self.context_window,
+            "usage_totals": dict(self.usage_totals),
+            "response_cache": self.response_cache.get_stats() if self.response_cache else None,
             "conversation_length": len(self._conversation_history)
         }
     
+    @property
+    def context_window(self) -> int:
+        """Input token limit of the model."""
+        return self.config.context_window or get_context_window(self._prepare_model_string())
+    
     def estimate_tokens(self, text: str) -> int:
-        """Estimate the number of tokens in text."""
-        # Simple estimation: ~4 characters per token
-        return len(text) // 4
+        """Count the tokens in text with the model's tokenizer."""
+        return self.token_counter.count(text)
+    
+    def _estimate_request_tokens(self, params: Dict[str, Any]) -> int:
+        """
+        Estimate the tokens a call counts against a tokens-per-minute limit.
+        
+        Providers count the prompt plus max_tokens when admitting a request;
+        the reservation is corrected with the reported usage afterwards.
+        """
+        prompt_tokens = self.token_counter.count_messages(params.get("messages", []))
+        prompt_tokens += self.token_counter.count_tools(params.get("tools"))
+        return prompt_tokens + (params.get("max_tokens") or 0)
+    
+    @staticmethod
+    def _usage_total_tokens(response: Any) -> Optional[int]:
+        """Total tokens reported in a response's usage, if any."""
+        total_tokens = getattr(response.usage, 'total_tokens', None) if response.usage else None
+        return total_tokens if isinstance(total_tokens, int) else None
     
     def validate_config(self) -> List[str]:
         """Validate the current configuration."""
@@ -0,0 +1,342 @@
+"""
+Client-side rate limiting for the Coding Agent Framework.
+
+This module paces LLM calls with token buckets for requests and tokens per
+minute, kept per provider and model and shared by every client in the
+process, so parallel sub-agents draw from one budget instead of each
+discovering the quota through its own 429. Limits are configured or learned
+from the provider's rate-limit response headers, token reservations are
+reconciled with the reported usage, and a rate-limited response pauses the
+whole key for its Retry-After (or an adaptive cool-down) instead of every
+caller backing off on its own schedule.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+# (provider, model)
+RateLimitKey = Tuple[str, str]
+
+# Longest pause after repeated rate limit errors without a Retry-After
+_MAX_COOLDOWN = 300.0
+
+# Learned request limits start at this share of the rejected rate, which
+# needs at least _ADAPTIVE_MIN_REQUESTS calls in the last minute to be
+# meaningful, and grow by one request per minute with each success
+_ADAPTIVE_FACTOR = 0.9
+_ADAPTIVE_MIN_REQUESTS = 5
+
+# Header names across providers, lowercase without litellm's "llm_provider-" prefix
+_LIMIT_HEADERS = {
+    'requests_limit': ('x-ratelimit-limit-requests', 'anthropic-ratelimit-requests-limit'),
+    'requests_remaining': ('x-ratelimit-remaining-requests', 'anthropic-ratelimit-requests-remaining'),
+    'tokens_limit': ('x-ratelimit-limit-tokens', 'anthropic-ratelimit-tokens-limit'),
+    'tokens_remaining': ('x-ratelimit-remaining-tokens', 'anthropic-ratelimit-tokens-remaining'),
+}
+
+
+def response_headers(source: Any) -> Dict[str, str]:
+    """
+    Collect the HTTP response headers litellm attaches to a response or exception.
+
+    Names are lowercased and litellm's "llm_provider-" prefix is removed.
+    """
+    hidden_params = getattr(source, '_hidden_params', None)
+    http_response = getattr(source, 'response', None)
+    candidates = [
+        getattr(source, '_response_headers', None),
+        hidden_params.get('additional_headers') if isinstance(hidden_params, dict) else None,
+        getattr(source, 'litellm_response_headers', None),
+        getattr(http_response, 'headers', None) if http_response is not None else None,
+    ]
+
+    headers: Dict[str, str] = {}
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            items = dict(candidate).items()
+        except (TypeError, ValueError):
+            continue
+        for name, value in items:
+            name = str(name).lower()
+            if name.startswith('llm_provider-'):
+                name = name[len('llm_provider-'):]
+            headers.setdefault(name, str(value))
+    return headers
+
+
+def parse_retry_after(headers: Dict[str, str]) -> Optional[float]:
+    """Seconds to wait according to retry-after-ms or Retry-After (seconds or HTTP date)."""
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_number(headers: Dict[str, str], field_name: str) -> Optional[float]:
+    for name in _LIMIT_HEADERS[field_name]:
+        if name in headers:
+            try:
+                return float(headers[name])
+            except ValueError:
+                return None
+    return None
+
+
+@dataclass
+class _Bucket:
+    """Token bucket refilled continuously at capacity per minute; the level may go negative."""
+    capacity: float
+    level: float
+    updated: float
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def take(self, amount: float, now: float) -> float:
+        """Reserve amount and return the seconds until the reservation is covered."""
+        self.refill(now)
+        # A single call larger than the bucket would otherwise never fit
+        self.level -= min(amount, self.capacity)
+        return max(-self.level * 60.0 / self.capacity, 0.0)
+
+    def set_capacity(self, capacity: float, now: float) -> None:
+        self.refill(now)
+        self.level = min(self.level, capacity)
+        self.capacity = capacity
+
+
+def _new_bucket(capacity: float, now: float) -> _Bucket:
+    return _Bucket(capacity=capacity, level=capacity, updated=now)
+
+
+@dataclass
+class _KeyState:
+    """Rate limiting state of one provider and model."""
+    requests: Optional[_Bucket] = None
+    tokens: Optional[_Bucket] = None
+    adaptive: bool = False  # Request limit was learned from rate limit errors
+    blocked_until: float = 0.0
+    cooldown: float = 10.0
+    consecutive_limits: int = 0
+    recent_requests: Deque[float] = field(default_factory=deque)
+    stats: Dict[str, float] = field(default_factory=lambda: {
+        "requests": 0,
+        "rate_limited": 0,
+        "waits": 0,
+        "total_wait": 0.0
+    })
+
+
+class RateLimiter:
+    """Shared requests-per-minute and tokens-per-minute pacing of LLM calls."""
+
+    def __init__(self):
+        """Initialize a limiter without any known limits."""
+        self.logger = logging.getLogger(__name__)
+        # Guards state shared by clients on different event loops and threads
+        self._lock = threading.Lock()
+        self._states: Dict[RateLimitKey, _KeyState] = {}
+
+    def _state(self, key: RateLimitKey) -> _KeyState:
+        state = self._states.get(key)
+        if state is None:
+            state = _KeyState()
+            self._states[key] = state
+        return state
+
+    def configure(self, key: RateLimitKey, requests_per_minute: Optional[int] = None,
+                  tokens_per_minute: Optional[int] = None, cooldown: Optional[float] = None) -> None:
+        """
+        Set known limits of a provider and model.
+
+        Unset values keep what is already known; limits reported by response
+        headers later replace configured ones.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key)
+            if requests_per_minute:
+                state.adaptive = False
+                if state.requests is None:
+                    state.requests = _new_bucket(requests_per_minute, now)
+                else:
+                    state.requests.set_capacity(requests_per_minute, now)
+            if tokens_per_minute:
+                if state.tokens is None:
+                    state.tokens = _new_bucket(tokens_per_minute, now)
+                else:
+                    state.tokens.set_capacity(tokens_per_minute, now)
+            if cooldown is not None:
+                state.cooldown = cooldown
+
+    async def acquire(self, key: RateLimitKey, tokens: int = 0) -> float:
+        """
+        Wait until a call of the given estimated size fits the budget.
+
+        The request and its tokens are reserved immediately, so concurrent
+        callers queue up behind each other in arrival order instead of all
+        waking at once.
+
+        Returns:
+            Seconds waited
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key)
+            wait = max(state.blocked_until - now, 0.0)
+            if state.requests is not None:
+                wait = max(wait, state.requests.take(1, now))
+            if state.tokens is not None and tokens > 0:
+                wait = max(wait, state.tokens.take(tokens, now))
+
+            state.recent_requests.append(now + wait)
+            while state.recent_requests and state.recent_requests[0] < now - 60.0:
+                state.recent_requests.popleft()
+            state.stats["requests"] += 1
+            if wait > 0:
+                state.stats["waits"] += 1
+                state.stats["total_wait"] += wait
+
+        if wait > 0:
+            self.logger.debug(f"Rate limiter pacing {key[1]}: waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_response(self, key: RateLimitKey, headers: Optional[Dict[str, str]] = None,
+                        reserved_tokens: int = 0, used_tokens: Optional[int] = None) -> None:
+        """
+        Learn from a successful call.
+
+        Args:
+            key: Provider and model
+            headers: Response headers, see response_headers()
+            reserved_tokens: Tokens reserved by acquire()
+            used_tokens: Tokens the provider reported in the usage
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key)
+            state.consecutive_limits = 0
+            if state.adaptive:
+                state.requests.capacity += 1
+            if used_tokens is not None and state.tokens is not None:
+                state.tokens.refill(now)
+                state.tokens.level = min(state.tokens.capacity,
+                                         state.tokens.level + reserved_tokens - used_tokens)
+            if headers:
+                self._apply_headers(state, headers, now)
+
+    def record_rate_limit(self, key: RateLimitKey, headers: Optional[Dict[str, str]] = None) -> float:
+        """
+        Pause all calls of a provider and model after a rate limit error.
+
+        The pause is the Retry-After the provider sent, or else a cool-down
+        that doubles with each consecutive rate limit error. Without a known
+        request limit, one is learned from the rate that was just rejected.
+
+        Returns:
+            Seconds until calls resume
+        """
+        headers = headers or {}
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key)
+            state.stats["rate_limited"] += 1
+            self._apply_headers(state, headers, now)
+
+            retry_after = parse_retry_after(headers)
+            if retry_after is None:
+                retry_after = min(state.cooldown * (2 ** state.consecutive_limits), _MAX_COOLDOWN)
+            state.consecutive_limits += 1
+
+            observed = sum(1 for started in state.recent_requests if started >= now - 60.0)
+            if state.requests is None and observed >= _ADAPTIVE_MIN_REQUESTS:
+                state.requests = _Bucket(capacity=observed * _ADAPTIVE_FACTOR, level=0.0, updated=now)
+                state.adaptive = True
+            elif state.requests is not None:
+                if state.adaptive:
+                    # Multiplicative decrease
+                    state.requests.capacity = max(state.requests.capacity * _ADAPTIVE_FACTOR, 1.0)
+                # The provider's view wins over our estimate of what is left
+                state.requests.refill(now)
+                state.requests.level = min(state.requests.level, 0.0)
+
+            state.blocked_until = max(state.blocked_until, now + retry_after)
+
+        self.logger.info(f"Rate limited on {key[1]}, pausing calls for {retry_after:.1f}s")
+        return retry_after
+
+    @staticmethod
+    def _apply_headers(state: _KeyState, headers: Dict[str, str], now: float) -> None:
+        for bucket_name in ('requests', 'tokens'):
+            limit = _header_number(headers, f'{bucket_name}_limit')
+            remaining = _header_number(headers, f'{bucket_name}_remaining')
+            bucket = getattr(state, bucket_name)
+            if limit:
+                if bucket_name == 'requests':
+                    state.adaptive = False
+                if bucket is None:
+                    bucket = _new_bucket(limit, now)
+                    setattr(state, bucket_name, bucket)
+                else:
+                    bucket.set_capacity(limit, now)
+            if remaining is not None and bucket is not None:
+                bucket.refill(now)
+                bucket.level = min(bucket.level, remaining)
+
+    def get_stats(self, key: RateLimitKey) -> Dict[str, Any]:
+        """Get the known limits and pacing statistics of a provider and model."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key)
+            for bucket in (state.requests, state.tokens):
+                if bucket is not None:
+                    bucket.refill(now)
+            return {
+                **state.stats,
+                "requests_per_minute": state.requests.capacity if state.requests else None,
+                "tokens_per_minute": state.tokens.capacity if state.tokens else None,
+                "requests_available": state.requests.level if state.requests else None,
+                "tokens_available": state.tokens.level if state.tokens else None,
+                "blocked_for": max(state.blocked_until - now, 0.0)
+            }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter shared by all LLM clients."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+
+__all__ = ["RateLimiter", "RateLimitKey", "get_rate_limiter", "parse_retry_after", "response_headers"]
@@ -0,0 +1,242 @@
+"""
+LLM response cache for the Coding Agent Framework.
+
+This module stores LLM responses in a SQLite database keyed by a canonical
+hash of the request (model, messages, tools and sampling parameters). In
+cache mode repeated requests are answered locally and the database is kept
+below a size limit by evicting the least recently used entries. Record mode
+stores every response of a session, and replay mode answers only from such a
+recording without network access, which turns a recorded session into an
+offline fixture for tests and benchmarks. The project root and tool result
+fields that differ on every run (file modification times) are replaced by
+placeholders before hashing, so a session recorded in one checkout or
+temporary directory replays in another.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core.config import ResponseCacheMode
+
+
+# Request parameters that do not affect the response
+_VOLATILE_PARAMS = frozenset({"timeout", "api_base", "api_key", "api_version", "metadata"})
+
+# Stands in for the project root in hashed requests
+PROJECT_ROOT_PLACEHOLDER = "<project>"
+
+# Numeric tool result fields that differ between runs, as they appear in the
+# dicts and JSON that tool messages carry
+_VOLATILE_RESULT_FIELDS = re.compile(
+    r"""(['"](?:modified|mtime|startup_time|execution_time)['"]\s*:\s*)-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"""
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def _normalized(value: Any, roots: List[str]) -> Any:
+    """Replace the project root and volatile result fields in every string of a request."""
+    if isinstance(value, str):
+        for root in roots:
+            value = value.replace(root, PROJECT_ROOT_PLACEHOLDER)
+        return _VOLATILE_RESULT_FIELDS.sub(r"\1<volatile>", value)
+    if isinstance(value, dict):
+        return {key: _normalized(item, roots) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalized(item, roots) for item in value]
+    return value
+
+
+def request_key(params: Dict[str, Any], project_root: Optional[str] = None) -> str:
+    """
+    Hash the parts of a litellm request that determine its response.
+
+    Keys are serialized sorted and without whitespace, so equal requests hash
+    equally regardless of how their dicts were built. Paths under project_root
+    (as given or with symlinks resolved) hash as if the project lived at the
+    same place, and file modification times in tool results are ignored.
+    """
+    canonical = {key: value for key, value in params.items() if key not in _VOLATILE_PARAMS}
+    roots = []
+    if project_root:
+        # Longest first, so a resolved root containing the other is replaced whole
+        roots = sorted({str(Path(project_root).absolute()), os.path.realpath(project_root)},
+                       key=len, reverse=True)
+    canonical = _normalized(canonical, roots)
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed store of LLM responses with LRU eviction."""
+
+    def __init__(self, db_path: Optional[Path], mode: ResponseCacheMode = ResponseCacheMode.CACHE,
+                 max_size: int = 256 * 1024 * 1024):
+        """
+        Open (or create) the cache.
+
+        Args:
+            db_path: SQLite database file, or None for an in-memory cache
+            mode: How the cache is used, see ResponseCacheMode
+            max_size: Total size in bytes of stored responses before eviction
+        """
+        self.mode = ResponseCacheMode(mode)
+        self.max_size = max_size
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        database = ":memory:"
+        if db_path is not None:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                database = str(db_path)
+            except OSError as e:
+                self.logger.warning(f"Cannot create response cache directory, using in-memory cache: {str(e)}")
+        self.db_path = database
+
+        # Shared by the clients of all sub-agents, possibly on other threads
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        if database != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        self.stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "provider_time_saved": 0.0
+        }
+
+    @property
+    def reads(self) -> bool:
+        """Whether stored responses are served."""
+        return self.mode in (ResponseCacheMode.CACHE, ResponseCacheMode.REPLAY)
+
+    @property
+    def writes(self) -> bool:
+        """Whether new responses are stored."""
+        return self.mode in (ResponseCacheMode.CACHE, ResponseCacheMode.RECORD)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a stored response, or None (counting the miss) if there is none."""
+        if not self.reads:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.stats["hits"] += 1
+            self.stats["provider_time_saved"] += row[1]
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any], model: Optional[str] = None,
+            latency: float = 0.0) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Request key, see request_key()
+            response: JSON-serializable response
+            model: Model that produced it, for inspection
+            latency: Seconds the provider took, reported as time saved on hits
+        """
+        if not self.writes:
+            return
+        payload = json.dumps(response, default=str, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, latency, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, payload, len(payload.encode("utf-8")), latency, now, now)
+            )
+            self.stats["stores"] += 1
+            # A recording is a fixture and must stay complete
+            if self.mode == ResponseCacheMode.CACHE:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used responses beyond max_size (caller holds the lock)."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.stats["evictions"] += len(evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {
+                **self.stats,
+                "mode": self.mode.value,
+                "entries": entries,
+                "size": size,
+                "max_size": self.max_size
+            }
+
+    def clear(self) -> None:
+        """Delete every stored response."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Open caches keyed by (database path, mode)
+_response_caches: Dict[tuple, ResponseCache] = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache(db_path: str, mode: ResponseCacheMode, max_size: int) -> ResponseCache:
+    """Get the shared response cache for a database path and mode, opening it on first use."""
+    key = (str(Path(db_path).absolute()), ResponseCacheMode(mode))
+    with _response_caches_lock:
+        cache = _response_caches.get(key)
+        if cache is None:
+            cache = ResponseCache(Path(key[0]), mode, max_size)
+            _response_caches[key] = cache
+        return cache
+
+
+__all__ = ["ResponseCache", "PROJECT_ROOT_PLACEHOLDER", "get_response_cache", "request_key"]
@@ -0,0 +1,117 @@
+"""
+Token counting for the Coding Agent Framework.
+
+This module counts tokens with the tokenizer litellm selects for a model
+(tiktoken for OpenAI models, the provider tokenizer where litellm ships one)
+and caches the count of every text it has seen, so a message history that is
+re-sent on every turn is only tokenized once. It also looks up the input
+context window of a model.
+"""
+
+import json
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import litellm
+
+
+# Input limit assumed for models litellm does not know
+DEFAULT_CONTEXT_WINDOW = 8000
+
+# Tokens a chat format adds around each message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_text(content: Any) -> str:
+    """Text of a message content, which may be a string or a list of content blocks."""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return str(content)
+
+
+@lru_cache(maxsize=64)
+def get_context_window(model: str, default: int = DEFAULT_CONTEXT_WINDOW) -> int:
+    """Input token limit of a model according to litellm's model map, or default if unknown."""
+    try:
+        info = litellm.get_model_info(model)
+    except Exception:
+        return default
+    return info.get("max_input_tokens") or info.get("max_tokens") or default
+
+
+class TokenCounter:
+    """Counts tokens for one model, caching the count of each text."""
+
+    def __init__(self, model: str, cache_size: int = 8192):
+        """
+        Initialize the counter.
+
+        Args:
+            model: Model name as passed to litellm
+            cache_size: Number of text counts to keep
+        """
+        self.model = model
+        self.cache_size = cache_size
+        self.logger = logging.getLogger(__name__)
+        # Keyed by (length, hash) so large texts are not kept alive by the cache
+        self._cache: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+        self._tokenizer_failed = False
+        self.stats = {"hits": 0, "misses": 0}
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text."""
+        if not text:
+            return 0
+        key = (len(text), hash(text))
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return tokens
+
+        self.stats["misses"] += 1
+        tokens = self._tokenize(text)
+        self._cache[key] = tokens
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def _tokenize(self, text: str) -> int:
+        if not self._tokenizer_failed:
+            try:
+                return litellm.token_counter(model=self.model, text=text)
+            except Exception as e:
+                # Without a tokenizer (e.g. offline and not bundled), estimate from then on
+                self._tokenizer_failed = True
+                self.logger.debug(f"Tokenizer unavailable for {self.model}, estimating token counts: {str(e)}")
+        return len(text) // 4
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        """Number of tokens a chat message occupies, including tool calls."""
+        tokens = MESSAGE_OVERHEAD_TOKENS + self.count(message_text(message.get("content")))
+        tool_calls = message.get("tool_calls")
+        if tool_calls:
+            tokens += self.count(json.dumps(tool_calls, sort_keys=True, default=str))
+        return tokens
+
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        """Number of tokens of a list of chat messages."""
+        return sum(self.count_message(message) for message in messages)
+
+    def count_tools(self, tools: Optional[List[Dict[str, Any]]]) -> int:
+        """Number of tokens of tool schemas sent with a request."""
+        if not tools:
+            return 0
+        return self.count(json.dumps(tools, sort_keys=True, default=str))
+
+
+__all__ = ["DEFAULT_CONTEXT_WINDOW", "TokenCounter", "get_context_window", "message_text"]
@@ -14,7 +14,7 @@ from pathlib import Path
 from collections import defaultdict
 
 from ..core.types import AgentEvent, ToolResult, ExecutionMode
-from ..core.config import AgentConfig
+from ..core.config import AgentConfig, ExecutionConfig
 from ..llm.client import LLMClient
 from .decorator import tool
 
@@ -31,11 +31,88 @@ def _group_items(items: List[Any], max_per_group: int = 20) -> List[List[Any]]:
     return groups
 
 
+def _get_execution_config() -> ExecutionConfig:
+    """Get the execution config of the agent running the current tool, or the defaults."""
+    from .decorator import get_tool_context
+    
+    context = get_tool_context()
+    tool_manager = context.tool_manager if context else None
+    agent_config = getattr(tool_manager, "config", None)
+    execution_config = getattr(agent_config, "execution_config", None)
+    
+    if isinstance(execution_config, ExecutionConfig):
+        return execution_config
+    return ExecutionConfig()
+
+
+async def _delegate_groups(groups: List[List[Any]],
+                           build_delegation: Callable[[int, List[Any]], Dict[str, Any]],
+                           count_key: str,
+                           max_parallel: Optional[int] = None,
+                           stop_on_failure: bool = False) -> List[Dict[str, Any]]:
+    """
+    Process groups with delegate_task concurrently and collect per-group results.
+    
+    Up to max_parallel groups (default: ExecutionConfig.max_parallel_tasks) run at
+    the same time, each limited by ExecutionConfig.subtask_timeout. Progress is
+    logged as each group completes; results are returned in group order.
+    """
+    # Import here to avoid circular imports
+    from .categories.task_tools import delegate_task
+    from ..execution.scheduler import GroupScheduler
+    
+    logger = logging.getLogger(__name__)
+    execution_config = _get_execution_config()
+    
+    scheduler = GroupScheduler(
+        max_parallel=max_parallel or execution_config.max_parallel_tasks,
+        timeout=execution_config.subtask_timeout,
+        cancel_on_failure=stop_on_failure
+    )
+    
+    def make_job(index: int, group: List[Any]):
+        async def job() -> Dict[str, Any]:
+            result = await delegate_task.execute(**build_delegation(index, group))
+            return {
+                "success": result.result.get("success", False) if result.success else False,
+                "summary": result.result.get("summary", "No summary available") if result.success else result.error,
+                "final_response": result.result.get("final_response", "") if result.success else "",
+                "tool_calls_made": result.result.get("tool_calls_made", 0) if result.success else 0
+            }
+        return job
+    
+    group_results = []
+    async for index, outcome in scheduler.run([make_job(i, group) for i, group in enumerate(groups)]):
+        group_result = {
+            "group_number": index + 1,
+            count_key: len(groups[index]),
+            "success": outcome.get("success", False),
+            "summary": outcome.get("summary", outcome.get("error", "No summary available")),
+            "final_response": outcome.get("final_response", ""),
+            "tool_calls_made": outcome.get("tool_calls_made", 0),
+            "execution_time": outcome.get("execution_time", 0.0)
+        }
+        for flag in ("timed_out", "cancelled"):
+            if outcome.get(flag):
+                group_result[flag] = True
+        
+        group_results.append(group_result)
+        logger.info(
+            f"Group {index + 1}/{len(groups)} {'completed' if group_result['success'] else 'failed'} "
+            f"({len(group_results)}/{len(groups)} done)"
+        )
+    
+    group_results.sort(key=lambda gr: gr["group_number"])
+    return group_results
+
+
 @tool
 async def process_search_files_by_name(pattern: str,
                                        operation_description: str,
                                        max_results: int = None,
-                                       delegate_processing_results: bool = False) -> Dict[str, Any]:
+                                       delegate_processing_results: bool = False,
+                                       max_parallel: int = None,
+                                       stop_on_failure: bool = False) -> Dict[str, Any]:
     """
     <short_description>
     Find files matching a pattern and process them in groups using delegate_task.
@@ -59,6 +136,7 @@ async def process_search_files_by_name(pattern: str,
     3. **Grouping Strategy**:
        - Files are grouped into batches of up to 20 items
        - Each group is processed independently
+       - Up to max_parallel groups run concurrently, each limited by the subtask timeout
        - Results from all groups are combined
 
     4. **Context Preservation**:
@@ -78,6 +156,8 @@ async def process_search_files_by_name(pattern: str,
         operation_description: Description with all the detailsof what operation to perform on matched files
         max_results: Maximum number of files to find (optional)
         delegate_processing_results: If True, a sub agent will process the results and return summary (default: False)
+        max_parallel: Maximum number of groups processed at the same time (default: execution config max_parallel_tasks)
+        stop_on_failure: If True, cancel the remaining groups after the first failed group (default: False)
     
     Returns:
         Dict containing search results and processing results from delegate_task
@@ -116,12 +196,7 @@ async def process_search_files_by_name(pattern: str,
         # Group items for processing
         groups = _group_items(items, max_per_group=20)
         
-        # Import delegate_task
-        from .categories.task_tools import delegate_task
-        
-        # Process each group using delegate_task
-        group_results = []
-        for i, group in enumerate(groups):
+        def build_delegation(i: int, group: List[Any]) -> Dict[str, Any]:
             group_task_description = f"""
 {operation_description}
 
@@ -146,21 +221,17 @@ Instructions:
                 "search_pattern": pattern
             }
             
-            # Delegate the task
-            result = await delegate_task.execute(
-                task_description=group_task_description,
-                expected_output=expected_output,
-                context_data=context_data
-            )
-            
-            group_results.append({
-                "group_number": i + 1,
-                "files_processed": len(group),
-                "success": result.result.get("success", False) if result.success else False,
-                "summary": result.result.get("summary", "No summary available") if result.success else result.error,
-                "final_response": result.result.get("final_response", "") if result.success else "",
-                "tool_calls_made": result.result.get("tool_calls_made", 0) if result.success else 0
-            })
+            return {
+                "task_description": group_task_description,
+                "expected_output": expected_output,
+                "context_data": context_data
+            }
+        
+        # Process the groups concurrently using delegate_task
+        group_results = await _delegate_groups(
+            groups, build_delegation, "files_processed",
+            max_parallel=max_parallel, stop_on_failure=stop_on_failure
+        )
         
         # Generate overall summary
         total_files = len(items)
@@ -188,7 +259,9 @@ async def process_search_files_by_content(pattern: str,
                                           operation_description: str,
                                           file_pattern: str = "*",
                                           max_results: int = 100,
-                                          delegate_processing_results: bool = False) -> Dict[str, Any]:
+                                          delegate_processing_results: bool = False,
+                                          max_parallel: int = None,
+                                          stop_on_failure: bool = False) -> Dict[str, Any]:
     """
     <short_description>
     Search for text patterns in files and process matches in groups using delegate_task.
@@ -214,6 +287,7 @@ async def process_search_files_by_content(pattern: str,
        - Matches are grouped into batches of up to 20 items
        - Groups are organized by file when possible
        - Each group is processed independently
+       - Up to max_parallel groups run concurrently, each limited by the subtask timeout
 
     4. **Context Preservation**:
        - Each group includes surrounding code context
@@ -233,6 +307,8 @@ async def process_search_files_by_content(pattern: str,
         file_pattern: Pattern for files to search (default: "*")
         max_results: Maximum number of matches to find
         delegate_processing_results: If True, a sub agent will process the results and return summary (default: False)
+        max_parallel: Maximum number of groups processed at the same time (default: execution config max_parallel_tasks)
+        stop_on_failure: If True, cancel the remaining groups after the first failed group (default: False)
     
     Returns:
         Dict containing search results and processing results from delegate_task
@@ -271,12 +347,7 @@ async def process_search_files_by_content(pattern: str,
         # Group items for processing
         groups = _group_items(items, max_per_group=20)
         
-        # Import delegate_task
-        from .categories.task_tools import delegate_task
-        
-        # Process each group using delegate_task
-        group_results = []
-        for i, group in enumerate(groups):
+        def build_delegation(i: int, group: List[Any]) -> Dict[str, Any]:
             group_task_description = f"""
 {operation_description}
 
@@ -303,21 +374,17 @@ Instructions:
                 "file_pattern": file_pattern
             }
             
-            # Delegate the task
-            result = await delegate_task.execute(
-                task_description=group_task_description,
-                expected_output=expected_output,
-                context_data=context_data
-            )
-            
-            group_results.append({
-                "group_number": i + 1,
-                "matches_processed": len(group),
-                "success": result.result.get("success", False) if result.success else False,
-                "summary": result.result.get("summary", "No summary available") if result.success else result.error,
-                "final_response": result.result.get("final_response", "") if result.success else "",
-                "tool_calls_made": result.result.get("tool_calls_made", 0) if result.success else 0
-            })
+            return {
+                "task_description": group_task_description,
+                "expected_output": expected_output,
+                "context_data": context_data
+            }
+        
+        # Process the groups concurrently using delegate_task
+        group_results = await _delegate_groups(
+            groups, build_delegation, "matches_processed",
+            max_parallel=max_parallel, stop_on_failure=stop_on_failure
+        )
         
         # Generate overall summary
         total_matches = len(items)
@@ -345,7 +412,9 @@ async def process_search_files_sementic(query: str,
                                         operation_description: str,
                                         file_types: List[str] = None,
                                         max_results: int = 50,
-                                        delegate_processing_results: bool = False) -> Dict[str, Any]:
+                                        delegate_processing_results: bool = False,
+                                        max_parallel: int = None,
+                                        stop_on_failure: bool = False) -> Dict[str, Any]:
     """
     <short_description>
     Perform semantic code search and process results in groups using delegate_task.
@@ -372,6 +441,7 @@ async def process_search_files_sementic(query: str,
        - Results are grouped into batches of up to 20 items
        - Groups are organized by file when possible
        - Each group is processed independently
+       - Up to max_parallel groups run concurrently, each limited by the subtask timeout
 
     4. **Context Preservation**:
        - Each group includes code snippets and context
@@ -391,6 +461,8 @@ async def process_search_files_sementic(query: str,
         file_types: Optional list of file extensions to search (e.g., ["py", "js", "ts"])
         max_results: Maximum number of results to return from search
         delegate_processing_results: If True, a sub agent will process the results and return summary (default: False)
+        max_parallel: Maximum number of groups processed at the same time (default: execution config max_parallel_tasks)
+        stop_on_failure: If True, cancel the remaining groups after the first failed group (default: False)
     
     Returns:
         Dict containing search results and processing results from delegate_task
@@ -430,12 +502,7 @@ async def process_search_files_sementic(query: str,
         # Group items for processing
         groups = _group_items(items, max_per_group=20)
         
-        # Import delegate_task
-        from .categories.task_tools import delegate_task
-        
-        # Process each group using delegate_task
-        group_results = []
-        for i, group in enumerate(groups):
+        def build_delegation(i: int, group: List[Any]) -> Dict[str, Any]:
             group_task_description = f"""
 {operation_description}
 
@@ -465,21 +532,17 @@ Instructions:
                 "file_types": file_types
             }
             
-            # Delegate the task
-            result = await delegate_task.execute(
-                task_description=group_task_description,
-                expected_output=expected_output,
-                context_data=context_data
-            )
-            
-            group_results.append({
-                "group_number": i + 1,
-                "results_processed": len(group),
-                "success": result.result.get("success", False) if result.success else False,
-                "summary": result.result.get("summary", "No summary available") if result.success else result.error,
-                "final_response": result.result.get("final_response", "") if result.success else "",
-                "tool_calls_made": result.result.get("tool_calls_made", 0) if result.success else 0
-            })
+            return {
+                "task_description": group_task_description,
+                "expected_output": expected_output,
+                "context_data": context_data
+            }
+        
+        # Process the groups concurrently using delegate_task
+        group_results = await _delegate_groups(
+            groups, build_delegation, "results_processed",
+            max_parallel=max_parallel, stop_on_failure=stop_on_failure
+        )
         
         # Generate overall summary
         total_results = len(items)
@@ -2,13 +2,11 @@
 AI and intelligent tools for the Coding Agent Framework.
 """
 
-import re
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Optional
 
 from ..decorator import tool
-from ...core.path_utils import should_exclude_from_search
-from .search_tools import _count_lines_in_file
+from ...context.lexical_index import LexicalHit, LexicalIndex, get_lexical_index, tokenize
 
 
 @tool
@@ -38,10 +36,11 @@ def search_files_sementic(query: str, file_types: List[str] = None, max_results:
        - Other text files - Basic text search
 
     3. **Search Intelligence**:
-       - Semantic matching beyond exact text
+       - BM25 ranking over function and class sized chunks
+       - Identifiers are split on camelCase and snake_case, so "user name" finds getUserName
        - Context-aware results with surrounding code
-       - Ranking by relevance and code structure
        - Filtering by file types and directories
+       - The index is kept in memory and only re-reads files that changed
 
     4. **Result Format**:
        - File path and line numbers with total file line count
@@ -84,28 +83,21 @@ def search_files_sementic(query: str, file_types: List[str] = None, max_results:
         # Default file types if not specified
         if file_types is None:
             file_types = ["py", "js", "ts", "java", "cpp", "c", "h", "hpp", "rb", "go", "rs", "php", "cs", "swift", "kt"]
+        extensions = {f".{ext}" for ext in file_types}
         
-        # Prepare search terms from query
-        search_terms = _prepare_search_terms(query)
+        # The shared index is updated incrementally, so only changed files are read
+        index = get_lexical_index(current_dir)
+        hits = index.search(
+            query,
+            max_results,
+            path_filter=lambda path: PurePosixPath(path).suffix in extensions
+        )
         
-        # Find relevant files
-        relevant_files = _find_relevant_files(current_dir, file_types)
-        
-        # Search through files
         results = []
-        for file_path in relevant_files:
-            try:
-                file_results = _search_file_content(file_path, search_terms, query)
-                results.extend(file_results)
-            except Exception as e:
-                # Skip files that can't be read
-                continue
-        
-        # Sort results by relevance score
-        results.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
-        
-        # Limit results
-        results = results[:max_results]
+        for hit in hits:
+            result = _hit_result(index, hit)
+            if result:
+                results.append(result)
         
         # Add summary information
         file_count = len(set(result["file"] for result in results))
@@ -122,122 +114,34 @@ def search_files_sementic(query: str, file_types: List[str] = None, max_results:
         return {"error": f"Codebase search failed: {str(e)}"}
 
 
-def _prepare_search_terms(query: str) -> List[str]:
-    """Prepare search terms from the query."""
-    # Split query into words and clean them
-    terms = re.findall(r'\b\w+\b', query.lower())
-    
-    # Remove common words that don't add value
-    stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did", "will", "would", "should", "could", "can", "may", "might", "must"}
-    
-    terms = [term for term in terms if term not in stop_words and len(term) > 2]
-    
-    return terms
-
-
-def _find_relevant_files(directory: Path, file_types: List[str]) -> List[Path]:
-    """Find files with relevant extensions."""
-    relevant_files = []
-    
-    # Create pattern for file extensions
-    extensions = [f".{ext}" for ext in file_types]
-    
-    try:
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and file_path.suffix in extensions:
-                # Skip files that should be excluded by .gitignore
-                if not should_exclude_from_search(file_path, directory):
-                    relevant_files.append(file_path)
-    except Exception:
-        pass
-    
-    return relevant_files
-
-
-def _search_file_content(file_path: Path, search_terms: List[str], original_query: str) -> List[Dict[str, Any]]:
-    """Search for terms within a file's content."""
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-    except Exception:
-        return []
+def _hit_result(index: LexicalIndex, hit: LexicalHit) -> Optional[Dict[str, Any]]:
+    """Build a search result for a ranked chunk, pointing at its best matching line."""
+    lines = index.read_lines(hit.chunk)
+    if not lines:
+        return None
     
-    results = []
-    file_line_count = len(lines)  # Get total line count for this file
+    # The line sharing the most terms with the query represents the chunk
+    matched = set(hit.matched_terms)
+    best_index = 0
+    best_overlap = 0
+    for i, line in enumerate(lines):
+        overlap = len(matched.intersection(tokenize(line)))
+        if overlap > best_overlap:
+            best_index, best_overlap = i, overlap
     
-    for line_num, line in enumerate(lines, 1):
-        line_lower = line.lower()
-        
-        # Calculate relevance score
-        relevance_score = 0
-        matched_terms = []
-        
-        for term in search_terms:
-            if term in line_lower:
-                relevance_score += 1
-                matched_terms.append(term)
-        
-        # Boost score for exact query matches
-        if original_query.lower() in line_lower:
-            relevance_score += 5
-        
-        # Boost score for function/class definitions
-        if re.search(r'\b(def|class|function|const|let|var|public|private|protected)\b', line_lower):
-            relevance_score += 2
-        
-        # Boost score for comments
-        if re.search(r'#|//|/\*|\*/', line):
-            relevance_score += 1
-        
-        if relevance_score > 0:
-            # Get context around the match
-            context_start = max(0, line_num - 3)
-            context_end = min(len(lines), line_num + 2)
-            context_lines = lines[context_start:context_end]
-            
-            # Detect function/class name if applicable
-            function_class_name = _detect_function_class_name(lines, line_num - 1)
-            
-            result = {
-                "file": str(file_path.relative_to(current_dir)),
-                "line_number": line_num,
-                "line_content": line.strip(),
-                "relevance_score": relevance_score,
-                "matched_terms": matched_terms,
-                "context": [line.rstrip() for line in context_lines],
-                "function_class": function_class_name,
-                "file_line_count": file_line_count
-            }
-            
-            results.append(result)
-    
-    return results
-
-
-def _detect_function_class_name(lines: List[str], current_line: int) -> str:
-    """Detect the function or class name that contains the current line."""
-    # Look backwards for function/class definitions
-    for i in range(current_line, max(0, current_line - 20), -1):
-        line = lines[i].strip()
-        
-        # Python function/class
-        python_match = re.search(r'^(def|class)\s+(\w+)', line)
-        if python_match:
-            return f"{python_match.group(1)} {python_match.group(2)}"
-        
-        # JavaScript/TypeScript function
-        js_match = re.search(r'(function\s+(\w+)|(\w+)\s*[:=]\s*function|(\w+)\s*\([^)]*\)\s*{)', line)
-        if js_match:
-            name = js_match.group(2) or js_match.group(3) or js_match.group(4)
-            if name:
-                return f"function {name}"
-        
-        # Java/C++ method
-        java_match = re.search(r'(public|private|protected|static).*?(\w+)\s*\([^)]*\)\s*{', line)
-        if java_match:
-            return f"method {java_match.group(2)}"
-    
-    return ""
+    context_lines = lines[max(0, best_index - 2):best_index + 3]
+    return {
+        "file": str(Path(hit.chunk.path)),
+        "line_number": hit.chunk.start_line + best_index,
+        "line_content": lines[best_index].strip(),
+        "relevance_score": round(hit.score, 3),
+        "matched_terms": hit.matched_terms,
+        "context": [context_line.rstrip() for context_line in context_lines],
+        "function_class": hit.chunk.label,
+        "start_line": hit.chunk.start_line,
+        "end_line": hit.chunk.end_line,
+        "file_line_count": index.file_line_count(hit.chunk.path)
+    }
 
 
 @tool
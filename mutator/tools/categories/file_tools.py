@@ -17,6 +17,7 @@ except ImportError:
 
 # Import indentation fixing functionality
 from .indentation_fixer import fix_indentation
+from ...context.file_index import invalidate_file_indexes
 
 
 @tool
@@ -267,6 +268,7 @@ def edit_file(file_path: str, start_line_inclusive: int, end_line_exclusive: int
         updated_content = '\n'.join(updated_lines)
         with open(path, 'w', encoding=encoding) as f:
             f.write(updated_content)
+        invalidate_file_indexes(path)
         
         # Generate merged content with 10 lines before and after the edited section
         context_lines_before = 10
@@ -365,6 +367,9 @@ def create_file(file_path: str, full_content: str = "") -> Dict[str, Any]:
         with open(path, 'w', encoding='utf-8') as f:
             f.write(full_content)
         
+        # Make the new file visible to searches right away
+        invalidate_file_indexes(path)
+        
         return {
             "content_length": len(full_content),
             "lines_created": len(full_content.splitlines()),
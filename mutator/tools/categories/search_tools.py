@@ -2,32 +2,51 @@
 Search and discovery tools for the Coding Agent Framework.
 """
 
+import os
 import re
 import glob
+import bisect
 import fnmatch
-from pathlib import Path
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
 from typing import Any, Dict, List, Optional
 
 from ..decorator import tool
-from ...core.path_utils import should_exclude_from_search
+from ..content_search import compile_query, count_file_lines, search_files
+from ...context.file_index import FileEntry, FileIndex, get_file_index, scan_directory
+from ...context.trigram_index import get_trigram_index
 
 
-def _count_lines_in_file(file_path: Path) -> int:
+@lru_cache(maxsize=20000)
+def _cached_line_count(file_path: str, mtime: float, size: int) -> int:
+    """Line count of a file version; mtime and size are part of the cache key."""
+    return count_file_lines(Path(file_path))
+
+
+def _count_lines_in_file(file_path: Path, mtime: Optional[float] = None, size: Optional[int] = None) -> int:
     """
     Count the number of lines in a file.
     
+    Counts are cached by (path, mtime, size), so repeated listings only read
+    files that changed.
+    
     Args:
         file_path: Path to the file to count lines in
+        mtime: Modification time if already known (avoids a stat call)
+        size: File size if already known
         
     Returns:
         Number of lines in the file, or 0 if file cannot be read
     """
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            return sum(1 for _ in f)
-    except Exception:
-        # Return 0 if file cannot be read (binary files, permission errors, etc.)
-        return 0
+    if mtime is None or size is None:
+        try:
+            file_stat = file_path.stat()
+        except OSError:
+            return 0
+        mtime, size = file_stat.st_mtime, file_stat.st_size
+    
+    # Counts newlines on the raw bytes (memory-mapped for large files) instead of decoding
+    return _cached_line_count(str(file_path), mtime, size)
 
 
 def _is_glob_pattern(pattern: str) -> bool:
@@ -93,6 +112,64 @@ def _validate_regex_pattern(pattern: str) -> Optional[str]:
         return f"Invalid regex pattern: {str(e)}"
 
 
+def _matches_glob(rel_path: str, pattern: str) -> bool:
+    """
+    Check a project-relative POSIX path against a glob pattern.
+    
+    Patterns without a slash match the file name at any depth (like rglob),
+    `**/` matches zero or more directories, and other patterns containing a
+    slash match the trailing path components.
+    
+    Args:
+        rel_path: Path relative to the working directory
+        pattern: Glob pattern to match
+        
+    Returns:
+        True if the path matches the pattern
+    """
+    if '**' in pattern:
+        return fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(rel_path, pattern.replace('**/', ''))
+    if '/' in pattern:
+        return PurePosixPath(rel_path).match(pattern)
+    return fnmatch.fnmatch(rel_path.rsplit('/', 1)[-1], pattern)
+
+
+def _entry_info(entry: FileEntry, working_directory: Path, include_line_count: bool = True) -> Dict[str, Any]:
+    """
+    Build the listing information for an index entry.
+    
+    Args:
+        entry: File index entry (metadata should be fresh)
+        working_directory: Working directory the entry is relative to
+        include_line_count: Whether to add the (cached) line count of files
+        
+    Returns:
+        Item information dictionary used by list_directory
+    """
+    item_info = {
+        "name": entry.name,
+        "type": "directory" if entry.is_dir else "file",
+        "size": entry.size,
+        "modified": entry.mtime,
+        "permissions": entry.permissions,
+        "is_symlink": entry.is_symlink
+    }
+    
+    # Add line count for files
+    if include_line_count and not entry.is_dir:
+        item_info["line_count"] = _count_lines_in_file(working_directory / entry.path, entry.mtime, entry.size)
+    
+    return item_info
+
+
+def _list_entries(file_index: FileIndex, directory: Path) -> Optional[List[FileEntry]]:
+    """Entries of a directory from the index, or from the file system if it is outside the index."""
+    rel_dir = file_index.relative_path(directory)
+    if rel_dir is None:
+        return scan_directory(directory)
+    return file_index.list_directory(rel_dir)
+
+
 def _build_tree_structure(directory: Path, max_depth: int = 3, max_children: int = 20, current_depth: int = 0, working_directory: Optional[Path] = None) -> Dict[str, Any]:
     """
     Build a tree structure for a directory with depth and children limits.
@@ -102,7 +179,7 @@ def _build_tree_structure(directory: Path, max_depth: int = 3, max_children: int
         max_depth: Maximum depth to traverse (default: 3)
         max_children: Maximum children per parent (default: 20)
         current_depth: Current depth in traversal
-        working_directory: Working directory for gitignore checks
+        working_directory: Working directory whose file index is used
         
     Returns:
         Tree structure dictionary
@@ -114,16 +191,18 @@ def _build_tree_structure(directory: Path, max_depth: int = 3, max_children: int
         working_directory = directory
     
     try:
+        file_index = get_file_index(working_directory)
+        all_items = _list_entries(file_index, directory)
+        if all_items is None:
+            return None
+        
         items = []
         child_count = 0
         
-        # Get all items in directory
-        all_items = list(directory.iterdir())
-        
         # Sort items: directories first, then files, alphabetically
-        all_items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
+        all_items.sort(key=lambda x: (not x.is_dir, x.name.lower()))
         
-        for item in all_items:
+        for entry in all_items:
             if child_count >= max_children:
                 # Add truncation info if we hit the limit
                 items.append({
@@ -133,40 +212,12 @@ def _build_tree_structure(directory: Path, max_depth: int = 3, max_children: int
                 })
                 break
             
-            # Skip files/directories that should be excluded by .gitignore
-            if should_exclude_from_search(item, working_directory):
-                continue
-            
-            item_info = {
-                "name": item.name,
-                "type": "file" if item.is_file() else "directory" if item.is_dir() else "other"
-            }
-            
-            # Add detailed information
-            try:
-                stat = item.stat()
-                item_info.update({
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "permissions": oct(stat.st_mode)[-3:],
-                    "is_symlink": item.is_symlink()
-                })
-            except:
-                # Handle permission errors gracefully
-                item_info.update({
-                    "size": "unknown",
-                    "modified": "unknown",
-                    "permissions": "unknown",
-                    "is_symlink": False
-                })
-            
-            # Add line count for files
-            if item.is_file():
-                item_info["line_count"] = _count_lines_in_file(item)
+            # Line counts are only reported for the flat listing, not every tree node
+            item_info = _entry_info(file_index.restat(entry), working_directory, include_line_count=False)
             
             # If it's a directory and we haven't reached max depth, recurse
-            if item.is_dir() and current_depth < max_depth - 1:
-                children = _build_tree_structure(item, max_depth, max_children, current_depth + 1, working_directory)
+            if entry.is_dir and current_depth < max_depth - 1:
+                children = _build_tree_structure(working_directory / entry.path, max_depth, max_children, current_depth + 1, working_directory)
                 if children:
                     item_info["children"] = children
             
@@ -179,7 +230,8 @@ def _build_tree_structure(directory: Path, max_depth: int = 3, max_children: int
         return None
 
 
-def search_files_by_name(name_pattern: str) -> Dict[str, Any]:
+def search_files_by_name(name_pattern: str, include_line_counts: bool = False,
+                         max_results: int = 0, cursor: str = "") -> Dict[str, Any]:
     """
     <short_description>Search for files by name pattern using glob or regex patterns.</short_description>
     
@@ -201,8 +253,13 @@ def search_files_by_name(name_pattern: str) -> Dict[str, Any]:
 
     3. **Performance**:
        - Optimized for large codebases
-       - Limits results to prevent overwhelming output
-       - Fast pattern matching using appropriate algorithms
+       - Files are not read unless include_line_counts is True; counts are cached per file version
+       - Use max_results and cursor to page through large result sets
+
+    4. **Pagination**:
+       - Matches are sorted by path
+       - When more matches remain, the result has has_more=True and a next_cursor
+       - Pass next_cursor as cursor to get the next page
 
     ## Examples
 
@@ -210,6 +267,9 @@ def search_files_by_name(name_pattern: str) -> Dict[str, Any]:
     - Find test files: `search_files_by_name("test_*.js")`
     - Find config files: `search_files_by_name("*config*")`
     - Regex search: `search_files_by_name("^api_.*\\.py$")`
+    - With line counts: `search_files_by_name("*.py", include_line_counts=True)`
+    - First page of 100: `search_files_by_name("*.ts", max_results=100)`
+    - Next page: `search_files_by_name("*.ts", max_results=100, cursor="src/app/routes.ts")`
 
     ## Use Cases
 
@@ -221,6 +281,9 @@ def search_files_by_name(name_pattern: str) -> Dict[str, Any]:
 
     Args:
         name_pattern: File name pattern (glob or regex)
+        include_line_counts: Whether to add the line count of each matching file (default: False)
+        max_results: Maximum number of matches to return in this page (default: 0 for all)
+        cursor: next_cursor from a previous page to continue after it (default: start)
     
     Returns:
         Dict containing matching files with metadata
@@ -231,89 +294,53 @@ def search_files_by_name(name_pattern: str) -> Dict[str, Any]:
         
         # Get the configured working directory
         search_path = Path(get_working_directory())
-        
-        matches = []
+        file_index = get_file_index(search_path)
         
         # Determine if pattern is glob or regex
         is_glob = any(char in name_pattern for char in ['*', '?', '[', ']'])
         
         if is_glob:
-            # Use glob pattern matching
-            try:
-                # Handle both simple patterns and recursive patterns
-                if '**' in name_pattern:
-                    pattern_parts = name_pattern.split('**/')
-                    if len(pattern_parts) == 2:
-                        # Pattern like "**/*.py"
-                        for file_path in search_path.rglob(pattern_parts[1]):
-                            if file_path.is_file() and not should_exclude_from_search(file_path, search_path):
-                                matches.append({
-                                    "path": str(file_path.relative_to(search_path)),
-                                    "size": file_path.stat().st_size,
-                                    "line_count": _count_lines_in_file(file_path)
-                                })
-                    else:
-                        # Complex recursive pattern
-                        for file_path in search_path.rglob('*'):
-                            if file_path.is_file() and file_path.match(name_pattern) and not should_exclude_from_search(file_path, search_path):
-                                matches.append({
-                                    "path": str(file_path.relative_to(search_path)),
-                                    "size": file_path.stat().st_size,
-                                    "line_count": _count_lines_in_file(file_path)
-                                })
-                else:
-                    # Simple glob pattern
-                    for file_path in search_path.rglob(name_pattern):
-                        if file_path.is_file() and not should_exclude_from_search(file_path, search_path):
-                            matches.append({
-                                "path": str(file_path.relative_to(search_path)),
-                                "size": file_path.stat().st_size,
-                                "line_count": _count_lines_in_file(file_path)
-                            })
-            except Exception as e:
-                return {"error": f"Glob pattern error: {str(e)}"}
+            def pattern_matches(entry: FileEntry) -> bool:
+                return _matches_glob(entry.path, name_pattern)
         else:
             # Use regex pattern matching
-            import re
             try:
                 pattern = re.compile(name_pattern)
-                
-                def pattern_matches(filename: str) -> bool:
-                    return bool(pattern.search(filename))
-                
             except re.error as e:
                 return {"error": f"Invalid regex pattern: {str(e)}"}
+            
+            def pattern_matches(entry: FileEntry) -> bool:
+                return bool(pattern.search(entry.name))
         
-        # Search function
-        def search_in_directory(path: Path):
-            try:
-                for item in path.iterdir():
-                    # Skip files/directories that should be excluded by .gitignore
-                    if should_exclude_from_search(item, search_path):
-                        continue
-                    
-                    if item.is_file():
-                        if pattern_matches(item.name):
-                            matches.append({
-                                "path": str(item.relative_to(search_path)),
-                                "size": item.stat().st_size,
-                                "line_count": _count_lines_in_file(item)
-                            })
-                    elif item.is_dir():
-                        search_in_directory(item)
-            except PermissionError:
-                # Skip directories we can't access
-                pass
-            except Exception:
-                # Skip other errors but continue searching
-                pass
-        
-        search_in_directory(search_path)
+        # Matching only looks at names; files are touched below for the returned page only
+        matched = sorted(
+            (entry for entry in file_index.iter_files() if pattern_matches(entry)),
+            key=lambda entry: entry.path
+        )
+        
+        # Keyset pagination: the cursor is the last path of the previous page
+        start = bisect.bisect_right([entry.path for entry in matched], cursor) if cursor else 0
+        end = start + max_results if max_results and max_results > 0 else len(matched)
+        page = matched[start:end]
+        
+        matches = []
+        for entry in page:
+            entry = file_index.restat(entry)
+            match = {
+                "path": str(Path(entry.path)),
+                "size": entry.size
+            }
+            if include_line_counts:
+                match["line_count"] = _count_lines_in_file(search_path / entry.path, entry.mtime, entry.size)
+            matches.append(match)
         
+        has_more = end < len(matched)
         return {
             "matches": matches,
-            "total_matches": len(matches),
-            "pattern_type": "glob" if is_glob else "regex"
+            "total_matches": len(matched),
+            "pattern_type": "glob" if is_glob else "regex",
+            "has_more": has_more,
+            "next_cursor": page[-1].path if has_more and page else None
         }
         
     except Exception as e:
@@ -356,6 +383,7 @@ def search_files_by_content(content_pattern: str, file_pattern: str = "*", max_r
     3. **Performance Optimization**:
        - Results are limited to prevent overwhelming output
        - Efficient file traversal with gitignore respect
+       - Files are scanned in parallel and the search stops once max_results is reached
 
     4. **Result Details**:
        - Returns file path, line number, and matching line content
@@ -393,12 +421,9 @@ def search_files_by_content(content_pattern: str, file_pattern: str = "*", max_r
         # Get the configured working directory
         search_path = Path(get_working_directory())
         
-        matches = []
-        
         # Compile regex pattern for content search
-        flags = re.IGNORECASE
         try:
-            content_regex = re.compile(content_pattern, flags)
+            query = compile_query(content_pattern, re.IGNORECASE)
         except re.error as e:
             return {"error": f"Invalid content regex pattern: {str(e)}"}
         
@@ -406,7 +431,8 @@ def search_files_by_content(content_pattern: str, file_pattern: str = "*", max_r
         is_glob = _is_glob_pattern(file_pattern)
         
         if is_glob:
-            files = search_path.rglob(file_pattern)
+            def file_matches(rel_path: str) -> bool:
+                return _matches_glob(rel_path, file_pattern)
         else:
             # Use regex patterns for file filtering
             regex_error = _validate_regex_pattern(file_pattern)
@@ -418,48 +444,26 @@ def search_files_by_content(content_pattern: str, file_pattern: str = "*", max_r
             except re.error as e:
                 return {"error": f"Invalid file regex pattern: {str(e)}"}
             
-            # Get all files and filter with regex
-            all_files = search_path.rglob("*")
-            
-            files = [f for f in all_files if f.is_file() and file_regex.search(str(f.relative_to(search_path)))]
-        
-        # Search through files
-        for file_path in files:
-            if not file_path.is_file():
-                continue
-            
-            # Skip files that should be excluded by .gitignore
-            if should_exclude_from_search(file_path, search_path):
-                continue
-                
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                lines = content.splitlines()
-                file_rel_path = str(file_path.relative_to(search_path))
-                file_has_matches = False
-                
-                for line_num, line in enumerate(lines, 1):
-                    if content_regex.search(line):
-                        if not file_has_matches:
-                            file_has_matches = True
-                        
-                        matches.append({
-                            "file": file_rel_path,
-                            "line_number": line_num,
-                            "line_content": line.strip(),
-                            "match": content_regex.search(line).group(),
-                            "file_line_count": len(lines)
-                        })
-                        
-                        if len(matches) >= max_results:
-                            break
-                            
-            except Exception:
-                # Skip files that can't be read
-                continue
-                
-            if len(matches) >= max_results:
-                break
+            def file_matches(rel_path: str) -> bool:
+                return bool(file_regex.search(str(Path(rel_path))))
+        
+        # Candidate files come from the shared index, already filtered by .gitignore
+        files = [
+            entry.path
+            for entry in get_file_index(search_path).iter_files()
+            if file_matches(entry.path)
+        ]
+        
+        # With a trigram index only files containing the pattern's literals need opening
+        trigram_index = get_trigram_index(search_path)
+        if trigram_index is not None:
+            candidates = trigram_index.candidates_for_regex(content_pattern, re.IGNORECASE)
+            if candidates is not None:
+                files = [rel_path for rel_path in files if rel_path in candidates]
+        
+        # Scan files in parallel, stopping as soon as enough matches are found
+        outcome = search_files(search_path, files, query, max_results)
+        matches = outcome.matches
         
         return {
             "matches": matches,
@@ -474,7 +478,8 @@ def search_files_by_content(content_pattern: str, file_pattern: str = "*", max_r
 
 
 @tool
-def list_directory(directory: str = ".", include_tree: bool = True, max_depth: int = 3, max_children: int = 20) -> Dict[str, Any]:
+def list_directory(directory: str = ".", include_tree: bool = True, max_depth: int = 3, max_children: int = 20,
+                   include_line_counts: bool = True) -> Dict[str, Any]:
     """
     <short_description>List the contents of a directory with detailed information including hidden files and optional tree structure.</short_description>
     
@@ -491,6 +496,7 @@ def list_directory(directory: str = ".", include_tree: bool = True, max_depth: i
 
     2. **File Information**:
        - Includes name, type, size, permissions, modification time, and line count for files
+       - Line counts are cached per file version and can be skipped with include_line_counts=False
        - Distinguishes between files, directories, and symlinks
        - Shows comprehensive metadata for each item
 
@@ -503,6 +509,7 @@ def list_directory(directory: str = ".", include_tree: bool = True, max_depth: i
        - Optional hierarchical tree view with configurable depth (default: 3 levels)
        - Limits children per parent to prevent overwhelming output (default: 20)
        - Shows truncation information when limits are reached
+       - Tree nodes carry no line counts; use the flat list for those
        - Maintains flat list for compatibility
 
     5. **Error Handling**:
@@ -516,6 +523,7 @@ def list_directory(directory: str = ".", include_tree: bool = True, max_depth: i
     - List with tree structure: `list_directory("src/components", include_tree=True)`
     - Flat list only: `list_directory(".", include_tree=False)`
     - Custom limits: `list_directory(".", max_depth=2, max_children=10)`
+    - Metadata only: `list_directory(".", include_line_counts=False)`
 
     ## Use Cases
     - Exploring project structure comprehensively
@@ -531,6 +539,7 @@ def list_directory(directory: str = ".", include_tree: bool = True, max_depth: i
         include_tree: Whether to include tree structure (default: True)
         max_depth: Maximum depth for tree structure (default: 3)
         max_children: Maximum children per parent in tree (default: 20)
+        include_line_counts: Whether to add line counts to the listed files (default: True)
     
     Returns:
         Dict containing directory contents with detailed file information including line counts, metadata, and optional tree structure
@@ -549,6 +558,7 @@ def list_directory(directory: str = ".", include_tree: bool = True, max_depth: i
             dir_path = Path(directory)
             if not dir_path.is_absolute():
                 dir_path = working_dir / directory
+            dir_path = Path(os.path.normpath(dir_path))
         
         if not dir_path.exists():
             return {"error": f"Directory not found: {directory}"}
@@ -556,41 +566,14 @@ def list_directory(directory: str = ".", include_tree: bool = True, max_depth: i
         if not dir_path.is_dir():
             return {"error": f"Path is not a directory: {directory}"}
         
-        items = []
+        # Entries come from the shared index, already filtered by .gitignore
+        file_index = get_file_index(working_dir)
+        entries = _list_entries(file_index, dir_path)
         
-        for item in dir_path.iterdir():
-            # Skip files/directories that should be excluded by .gitignore
-            if should_exclude_from_search(item, working_dir):
-                continue
-            
-            item_info = {
-                "name": item.name,
-                "type": "file" if item.is_file() else "directory" if item.is_dir() else "other"
-            }
-            
-            # Always include detailed information
-            try:
-                stat = item.stat()
-                item_info.update({
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "permissions": oct(stat.st_mode)[-3:],
-                    "is_symlink": item.is_symlink()
-                })
-            except:
-                # Handle permission errors gracefully
-                item_info.update({
-                    "size": "unknown",
-                    "modified": "unknown",
-                    "permissions": "unknown",
-                    "is_symlink": False
-                })
-            
-            # Add line count for files
-            if item.is_file():
-                item_info["line_count"] = _count_lines_in_file(item)
-            
-            items.append(item_info)
+        items = [
+            _entry_info(file_index.restat(entry), working_dir, include_line_counts)
+            for entry in entries or []
+        ]
         
         # Sort by name for consistent output
         items.sort(key=lambda x: x["name"].lower())
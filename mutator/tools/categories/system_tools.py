@@ -2,12 +2,13 @@
 System operation tools for the Coding Agent Framework.
 """
 
-import subprocess
 import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from ...core.types import AgentEvent
 from ..decorator import tool
+from ..shell_engine import run_command
 
 
 async def _summarize_long_output(output: str, output_type: str) -> str:
@@ -44,18 +45,6 @@ with Examples for any error or warnings.
         return f"Failed to summarize {output_type}: {str(e)}"
 
 
-def _count_lines(text: str) -> int:
-    """Count the number of lines in a text string."""
-    if not text:
-        return 0
-    # Split by newlines and filter out empty strings at the end
-    lines = text.split('\n')
-    # If the text ends with a newline, the last element will be empty
-    if lines and lines[-1] == '':
-        lines = lines[:-1]
-    return len(lines)
-
-
 def _get_first_n_lines(text: str, n: int) -> str:
     """Get the first n lines of text."""
     if not text:
@@ -88,12 +77,15 @@ async def run_shell(command: str, timeout: int = 30) -> Dict[str, Any]:
     2. **Timeout Control**:
        - Default timeout of 30 seconds prevents hanging commands
        - Configurable timeout for longer-running operations
+       - On timeout the command and every process it started are killed
 
     3. **Output Capture**:
        - Captures both stdout and stderr separately
        - Returns exit code for proper error handling
        - Preserves command output formatting
        - Automatically summarizes long output (>100 lines) using LLM
+       - Very long output keeps the first and last lines with an omission marker
+       - Commands run asynchronously, so several can run in parallel
 
     ## Examples
 
@@ -142,51 +134,66 @@ async def run_shell(command: str, timeout: int = 30) -> Dict[str, Any]:
         
         # Get current working directory
         # Import here to avoid circular imports
-        from ..decorator import get_working_directory
+        from ..decorator import get_working_directory, get_tool_context, emit_tool_event
+        from ...context.file_index import invalidate_file_indexes
         working_directory = get_working_directory()
         
-        result = subprocess.run(
+        # Stream output lines as events when someone is listening
+        on_output = None
+        context = get_tool_context()
+        if context and context.event_callback:
+            def on_output(stream: str, line: str) -> None:
+                emit_tool_event(AgentEvent(
+                    event_type="tool_output",
+                    data={"tool_name": "run_shell", "command": command, "stream": stream, "line": line}
+                ))
+        
+        # Runs without blocking the event loop; kills the process group on timeout
+        result = await run_command(
             command,
-            shell=True,
-            capture_output=True,
-            text=True,
             cwd=working_directory,
-            timeout=timeout
+            timeout=timeout,
+            on_output=on_output
         )
         
+        # Commands may create or delete files in the project
+        invalidate_file_indexes(working_directory)
+        
         # Process stdout
-        stdout_lines = _count_lines(result.stdout)
-        processed_stdout = result.stdout
+        stdout_lines = result.stdout.total_lines
+        stdout_text = result.stdout.get_text()
+        processed_stdout = stdout_text
         stdout_summary = None
         
         if stdout_lines > 100:
             # Use async function to summarize
-            stdout_summary = await _summarize_long_output(result.stdout, "stdout")
-            first_30_lines = _get_first_n_lines(result.stdout, 30)
+            stdout_summary = await _summarize_long_output(stdout_text, "stdout")
+            first_30_lines = _get_first_n_lines(stdout_text, 30)
             processed_stdout = f"SUMMARY (original had {stdout_lines} lines):\n<{stdout_summary}\n\n--- FIRST 30 LINES ---\n{first_30_lines}"
         
         # Process stderr
-        stderr_lines = _count_lines(result.stderr)
-        processed_stderr = result.stderr
+        stderr_lines = result.stderr.total_lines
+        stderr_text = result.stderr.get_text()
+        processed_stderr = stderr_text
         stderr_summary = None
         
         if stderr_lines > 100:
             # Use async function to summarize
-            stderr_summary = await _summarize_long_output(result.stderr, "stderr")
-            first_30_lines = _get_first_n_lines(result.stderr, 30)
+            stderr_summary = await _summarize_long_output(stderr_text, "stderr")
+            first_30_lines = _get_first_n_lines(stderr_text, 30)
             processed_stderr = f"SUMMARY (original had {stderr_lines} lines):\n{stderr_summary}\n\n--- FIRST 30 LINES ---\n{first_30_lines}"
         
         return {
-            "exit_code": result.returncode,
+            "exit_code": result.exit_code,
             "stdout": processed_stdout,
             "stderr": processed_stderr,
-            "success": result.returncode == 0,
+            "success": result.exit_code == 0,
             "working_directory": working_directory,
             "stdout_summarized": stdout_lines > 100,
             "stderr_summarized": stderr_lines > 100
         }
-    except subprocess.TimeoutExpired:
-        raise TimeoutError(f"Command timed out after {timeout} seconds")
+    except TimeoutError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to execute command: {str(e)}") from e
 
@@ -24,8 +24,10 @@ async def delegate_task(task_description: str, expected_output: str, context_dat
     <short_description>Delegate a specific task to a sub-agent and return a comprehensive summary.</short_description>
     
     <long_description>
-    This tool creates a dedicated sub-agent to perform a specific task and returns a detailed summary
+    This tool runs a specific task on a dedicated sub-agent and returns a detailed summary
     of the results. The sub-agent has full access to all tools and can perform complex operations.
+    Sub-agent runtimes are pooled per working directory, so repeated delegations reuse the
+    already-loaded tools, workflow and embedding model.
 
     ## Important Notes
 
@@ -78,19 +80,15 @@ async def delegate_task(task_description: str, expected_output: str, context_dat
     """
     try:
         # Import here to avoid circular imports
-        from ...agent import Mutator
-        from ...core.config import AgentConfig
         from ...core.types import ExecutionMode
-        
-        # Create sub-agent configuration
-        config = AgentConfig()
-        # Import here to avoid circular imports
+        from ...execution.subagent_pool import get_subagent_pool
         from ..decorator import get_working_directory
-        config.working_directory = get_working_directory()
         
-        # Create and initialize the sub-agent
-        sub_agent = Mutator(config)
-        await sub_agent.initialize()
+        # Check out a pooled sub-agent runtime; only delegations that find no idle
+        # runtime pay for LLM client, tool, workflow and embedding model setup
+        # (the pool logs the startup time and totals it in its stats)
+        pool = get_subagent_pool()
+        sub_agent = await pool.acquire(get_working_directory())
         
         # Prepare the complete task prompt
         task_prompt = _prepare_task_prompt(task_description, expected_output, context_data)
@@ -100,33 +98,41 @@ async def delegate_task(task_description: str, expected_output: str, context_dat
         execution_events = []
         tool_calls = []
         
-        async for event in sub_agent.execute_task(
-            task_prompt,
-            execution_mode=ExecutionMode.AGENT
-        ):
-            execution_events.append(event)
+        try:
+            async for event in sub_agent.execute_task(
+                task_prompt,
+                execution_mode=ExecutionMode.AGENT
+            ):
+                # Streamed tokens and tool output are repeated in the llm_response
+                # and tool results that follow them
+                if event.event_type in ("llm_token", "tool_output"):
+                    continue
+                execution_events.append(event)
             
-            # Extract meaningful output
-            if event.event_type == "llm_response":
-                content = event.data.get("content", "")
-                if content:
-                    task_output.append(content)
-            elif event.event_type == "tool_call_completed":
-                tool_name = event.data.get("tool_name", "")
-                success = event.data.get("success", False)
-                result = event.data.get("result", {})
+                # Extract meaningful output
+                if event.event_type == "llm_response":
+                    content = event.data.get("content", "")
+                    if content:
+                        task_output.append(content)
+                elif event.event_type == "tool_call_completed":
+                    tool_name = event.data.get("tool_name", "")
+                    success = event.data.get("success", False)
+                    result = event.data.get("result", {})
                 
-                tool_calls.append({
-                    "tool_name": tool_name,
-                    "success": success,
-                    "result": result
-                })
+                    tool_calls.append({
+                        "tool_name": tool_name,
+                        "success": success,
+                        "result": result
+                    })
                 
-                if success:
-                    task_output.append(f"✅ {tool_name} completed successfully")
-                else:
-                    error = event.data.get("error", "Unknown error")
-                    task_output.append(f"❌ {tool_name} failed: {error}")
+                    if success:
+                        task_output.append(f"✅ {tool_name} completed successfully")
+                    else:
+                        error = event.data.get("error", "Unknown error")
+                        task_output.append(f"❌ {tool_name} failed: {error}")
+        finally:
+            # The runtime holds per-run state, so it runs one task at a time
+            await pool.release(sub_agent)
         
         # Determine success based on execution
         success = len(execution_events) > 0 and not any(
@@ -0,0 +1,434 @@
+"""
+Parallel content search engine for the Coding Agent Framework.
+
+This module backs search_files_by_content. Candidate files are split into
+shards that a thread pool scans concurrently. Each file is scanned as a whole
+buffer with a multiline regex and match offsets are mapped back to line
+numbers, instead of splitting the file into lines and testing each one. Files
+are scanned as raw bytes (memory-mapped when large) and only matching lines
+are decoded. A literal that every match must contain is extracted from the
+pattern and used to reject files cheaply, and scanning stops across all
+workers as soon as the requested number of results is available.
+"""
+
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older Pythons
+    import sre_parse
+
+
+# Files handed to a worker at a time; small enough that stopping early wastes little work
+_SHARD_SIZE = 16
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+# Slice size used to count newlines in memory-mapped files
+_COUNT_CHUNK_SIZE = 1024 * 1024
+
+_REPEAT_OPS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT}
+if hasattr(sre_parse, "POSSESSIVE_REPEAT"):
+    _REPEAT_OPS.add(sre_parse.POSSESSIVE_REPEAT)
+_ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+
+
+def _collect_literals(parsed: Any, literals: List[str]) -> None:
+    """Collect the literal runs that any match of a parsed pattern must contain."""
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            literals.append("".join(run))
+            run.clear()
+
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+
+        flush()
+        if op is sre_parse.SUBPATTERN:
+            _collect_literals(av[-1], literals)
+        elif op in _REPEAT_OPS:
+            min_count, _, item = av
+            if min_count >= 1:
+                _collect_literals(item, literals)
+        # Alternations, classes, anchors and lookarounds guarantee no literal
+
+    flush()
+
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Get literal strings that every match of a regex must contain.
+
+    Returns an empty list when nothing can be guaranteed (for example when the
+    pattern is a top-level alternation). Never raises for valid patterns.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+
+    literals: List[str] = []
+    _collect_literals(parsed, literals)
+    return literals
+
+
+def _walk(parsed: Any) -> Iterator[Tuple[Any, Any]]:
+    """Yield every (op, argument) node of a parsed pattern, including nested ones."""
+    for op, av in parsed:
+        yield op, av
+        if op is sre_parse.SUBPATTERN:
+            yield from _walk(av[-1])
+        elif op in _REPEAT_OPS:
+            yield from _walk(av[2])
+        elif op is sre_parse.BRANCH:
+            for alternative in av[1]:
+                yield from _walk(alternative)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            yield from _walk(av[1])
+        elif op is _ATOMIC_GROUP:
+            yield from _walk(av)
+        elif op is sre_parse.GROUPREF_EXISTS:
+            for branch in av[1:]:
+                if branch is not None:
+                    yield from _walk(branch)
+        elif op is sre_parse.IN:
+            yield from av
+
+
+# Anchors whose meaning inside a whole buffer differs from a single line
+# ($ would also not match before the \r of a CRLF line)
+_LINE_ONLY_ANCHORS = {sre_parse.AT_END, sre_parse.AT_END_STRING, sre_parse.AT_BEGINNING_STRING}
+
+# Constructs that match characters, not bytes (or use Unicode classes)
+_CHAR_LEVEL_OPS = {
+    sre_parse.ANY, sre_parse.NOT_LITERAL, sre_parse.NEGATE,
+    sre_parse.CATEGORY, sre_parse.GROUPREF_EXISTS
+}
+_WORD_BOUNDARIES = {sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY}
+
+
+def _analyze_pattern(pattern: str, flags: int) -> Tuple[bool, bool]:
+    """
+    Check how a pattern may be run outside a single decoded line.
+
+    Returns (buffer_safe, bytes_safe): whether a MULTILINE search over a whole
+    buffer finds a match on every line that matches on its own, and whether
+    the same holds for the pattern compiled as bytes and run on UTF-8 data.
+    """
+    try:
+        nodes = list(_walk(sre_parse.parse(pattern, flags)))
+    except Exception:
+        return False, False
+
+    buffer_safe = not any(
+        op is sre_parse.AT and av in _LINE_ONLY_ANCHORS for op, av in nodes
+    )
+    bytes_safe = buffer_safe and pattern.isascii() and not any(
+        op in _CHAR_LEVEL_OPS
+        or (op is sre_parse.AT and av in _WORD_BOUNDARIES)
+        or (op is sre_parse.LITERAL and av >= 0x80)
+        or (op is sre_parse.RANGE and av[1] >= 0x80)
+        for op, av in nodes
+    )
+    return buffer_safe, bytes_safe
+
+
+# Candidate regexes that make every line a candidate
+_EVERY_LINE = re.compile(r"^", re.MULTILINE)
+_EVERY_LINE_BYTES = re.compile(rb"^", re.MULTILINE)
+
+
+@dataclass
+class ContentQuery:
+    """
+    A compiled content search.
+
+    Every hit is confirmed by running line_regex on the decoded line, exactly
+    like the original per-line search. The other regexes only find candidate
+    lines quickly: a whole-buffer version of the pattern where that finds
+    every matching line, otherwise a literal every match must contain.
+    """
+    pattern: str
+    flags: int = re.IGNORECASE
+    line_regex: "re.Pattern" = field(init=False)
+    regex: Optional["re.Pattern"] = field(init=False, default=None)
+    bytes_regex: Optional["re.Pattern"] = field(init=False, default=None)
+    prefilter: Optional["re.Pattern"] = field(init=False, default=None)
+    bytes_prefilter: Optional["re.Pattern"] = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        self.line_regex = re.compile(self.pattern, self.flags)
+
+        # ^ must still work at line boundaries inside the whole buffer
+        buffer_safe, bytes_safe = _analyze_pattern(self.pattern, self.flags)
+        if buffer_safe:
+            self.regex = re.compile(self.pattern, self.flags | re.MULTILINE)
+        if bytes_safe:
+            self.bytes_regex = re.compile(
+                self.pattern.encode("ascii"), (self.flags & ~re.UNICODE) | re.MULTILINE
+            )
+
+        # Case-insensitive is always safe, even when inline flags scope case sensitivity
+        literals = required_literals(self.pattern, self.flags)
+        if literals:
+            self.prefilter = re.compile(re.escape(max(literals, key=len)), re.IGNORECASE)
+        ascii_literals = [literal for literal in literals if literal.isascii()]
+        if ascii_literals:
+            literal = max(ascii_literals, key=len).encode("ascii")
+            self.bytes_prefilter = re.compile(re.escape(literal), re.IGNORECASE)
+
+
+def compile_query(pattern: str, flags: int = re.IGNORECASE) -> ContentQuery:
+    """
+    Compile a content search pattern.
+
+    Raises:
+        re.error: If the pattern is not a valid regular expression
+    """
+    return ContentQuery(pattern, flags)
+
+
+# Buffers are str, bytes or mmap objects
+Buffer = Union[str, bytes, mmap.mmap]
+
+
+def count_newlines(buffer: Buffer, start: int = 0, end: Optional[int] = None) -> int:
+    """Count newlines in a buffer range without copying large buffers at once."""
+    end = len(buffer) if end is None else end
+    if isinstance(buffer, str):
+        return buffer.count("\n", start, end)
+    if isinstance(buffer, bytes):
+        return buffer.count(b"\n", start, end)
+
+    # mmap has no count(); copy it in bounded chunks
+    total = 0
+    for chunk_start in range(start, end, _COUNT_CHUNK_SIZE):
+        total += buffer[chunk_start:min(chunk_start + _COUNT_CHUNK_SIZE, end)].count(b"\n")
+    return total
+
+
+def count_lines(buffer: Buffer) -> int:
+    """Number of lines in a buffer, counting a final line without a newline."""
+    length = len(buffer)
+    if not length:
+        return 0
+    last = buffer[length - 1:length]
+    return count_newlines(buffer) + (0 if last in ("\n", b"\n") else 1)
+
+
+def iter_candidate_lines(buffer: Buffer, regex: "re.Pattern") -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield (line_number, line_start, line_end) for each line where regex finds a match.
+
+    The regex runs over the whole buffer; each match is mapped to the line it
+    starts on by counting newlines since the previous hit, and the search
+    resumes at the next line so every line is yielded at most once.
+    """
+    newline = "\n" if isinstance(buffer, str) else b"\n"
+    length = len(buffer)
+    line_number = 1
+    counted_to = 0
+    pos = 0
+
+    while pos < length:
+        found = regex.search(buffer, pos)
+        if found is None:
+            return
+
+        start = found.start()
+        line_start = buffer.rfind(newline, 0, start) + 1
+        if line_start >= length:
+            return  # Empty match after the final newline, not a line
+        line_end = buffer.find(newline, start)
+        if line_end == -1:
+            line_end = length
+
+        line_number += count_newlines(buffer, counted_to, line_start)
+        counted_to = line_start
+        yield line_number, line_start, line_end
+
+        pos = line_end + 1
+
+
+def _scan(buffer: Buffer, candidates: "re.Pattern", query: ContentQuery,
+          rel_path: str, limit: int) -> List[Dict[str, Any]]:
+    """Confirm candidate lines with the per-line regex, decoding only those lines."""
+    matches: List[Dict[str, Any]] = []
+    line_count: Optional[int] = None
+
+    for line_number, line_start, line_end in iter_candidate_lines(buffer, candidates):
+        line = buffer[line_start:line_end]
+        if not isinstance(line, str):
+            line = line.decode("utf-8", errors="ignore")
+        if line.endswith("\r"):
+            line = line[:-1]
+
+        found = query.line_regex.search(line)
+        if found is None:
+            continue
+
+        if line_count is None:
+            line_count = count_lines(buffer)
+        matches.append({
+            "file": rel_path,
+            "line_number": line_number,
+            "line_content": line.strip(),
+            "match": found.group(),
+            "file_line_count": line_count
+        })
+        if len(matches) >= limit:
+            break
+
+    return matches
+
+
+def scan_text(text: str, query: ContentQuery, rel_path: str, limit: int) -> List[Dict[str, Any]]:
+    """Find the matching lines of a decoded file."""
+    if query.prefilter is not None and not query.prefilter.search(text):
+        return []
+    candidates = query.regex or query.prefilter or _EVERY_LINE
+    return _scan(text, candidates, query, rel_path, limit)
+
+
+def scan_bytes(buffer: Union[bytes, mmap.mmap], query: ContentQuery,
+               rel_path: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Find the matching lines of raw UTF-8 file data.
+
+    Candidate lines are found with bytes regexes directly on the buffer and
+    only those lines are decoded, so the file is never decoded as a whole.
+    """
+    if query.bytes_prefilter is not None and not query.bytes_prefilter.search(buffer):
+        return []
+    candidates = query.bytes_regex or query.bytes_prefilter or _EVERY_LINE_BYTES
+    return _scan(buffer, candidates, query, rel_path, limit)
+
+
+@contextmanager
+def open_buffer(path: Path) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Open a file's raw contents for scanning.
+
+    Large files are memory-mapped so scanning them keeps memory flat; small
+    files are read at once, which is cheaper than mapping them and not
+    exposed to the file being truncated while it is mapped.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def count_file_lines(path: Path) -> int:
+    """Count the lines of a file without decoding it, or 0 if it can't be read."""
+    try:
+        with open_buffer(path) as buffer:
+            return count_lines(buffer)
+    except (OSError, ValueError):
+        return 0
+
+
+def scan_file(path: Path, query: ContentQuery, rel_path: str, limit: int) -> List[Dict[str, Any]]:
+    """Find the matching lines of a file, or return nothing if it can't be read."""
+    try:
+        with open_buffer(path) as buffer:
+            return scan_bytes(buffer, query, rel_path, limit)
+    except (OSError, ValueError):
+        # Skip files that can't be read
+        return []
+
+
+@dataclass
+class SearchOutcome:
+    """Result of a content search over many files."""
+    matches: List[Dict[str, Any]]
+    files_scanned: int
+    stopped_early: bool
+
+
+def _default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def search_files(root: Path, rel_paths: Sequence[str], query: ContentQuery,
+                 max_results: int, max_workers: Optional[int] = None) -> SearchOutcome:
+    """
+    Search files in parallel, returning matches in the order of rel_paths.
+
+    Files are scanned in shards on a thread pool. Once the shards that precede
+    all unfinished work hold max_results matches, a shared stop flag makes the
+    remaining workers skip their files, so results stay deterministic while
+    work stops early.
+    """
+    root = Path(root)
+    shards = [rel_paths[i:i + _SHARD_SIZE] for i in range(0, len(rel_paths), _SHARD_SIZE)]
+    if not shards or max_results <= 0:
+        return SearchOutcome(matches=[], files_scanned=0, stopped_early=False)
+
+    stop = threading.Event()
+    scanned = [0]
+    scanned_lock = threading.Lock()
+
+    def scan_shard(shard: Sequence[str]) -> List[Dict[str, Any]]:
+        shard_matches: List[Dict[str, Any]] = []
+        for rel_path in shard:
+            if stop.is_set():
+                break
+            shard_matches.extend(scan_file(root / rel_path, query, rel_path, max_results - len(shard_matches)))
+            with scanned_lock:
+                scanned[0] += 1
+            if len(shard_matches) >= max_results:
+                break
+        return shard_matches
+
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    prefix_end = 0  # Shards [0, prefix_end) are complete
+    prefix_matches = 0
+
+    workers = max(1, max_workers or _default_workers())
+    with ThreadPoolExecutor(max_workers=min(workers, len(shards)), thread_name_prefix="content-search") as pool:
+        futures = {pool.submit(scan_shard, shard): index for index, shard in enumerate(shards)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            # Advance over the contiguous run of finished shards
+            while prefix_end in results and prefix_matches < max_results:
+                prefix_matches += len(results[prefix_end])
+                prefix_end += 1
+
+            if prefix_matches >= max_results:
+                stop.set()
+                for future in pending:
+                    future.cancel()
+                break
+
+    matches = [match for index in range(prefix_end) for match in results[index]]
+    return SearchOutcome(
+        matches=matches[:max_results],
+        files_scanned=scanned[0],
+        stopped_early=stop.is_set()
+    )
+
+
+__all__ = ["ContentQuery", "SearchOutcome", "MMAP_THRESHOLD", "compile_query", "count_file_lines",
+           "count_lines", "iter_candidate_lines", "open_buffer", "required_literals",
+           "scan_bytes", "scan_file", "scan_text", "search_files"]
@@ -6,41 +6,53 @@ from function signatures and docstrings.
 """
 
 import asyncio
+import contextvars
 import inspect
-import threading
 from typing import Any, Callable, Dict, Optional
 from pathlib import Path
 
-from ..core.types import ToolResult
+from ..core.types import AgentEvent, ToolResult
 from .schema_generator import SchemaGenerator
 
 
-# Thread-local storage for tool execution context
-_tool_context = threading.local()
+# Task-local storage for tool execution context (each asyncio task sees its own
+# value, so concurrent tool calls and nested sub-agent calls do not clobber it)
+_tool_context = contextvars.ContextVar("tool_context", default=None)
 
 
 class ToolContext:
     """Context information available to tool functions during execution."""
     
-    def __init__(self, working_directory: str, tool_manager: Optional[Any] = None):
+    def __init__(self, working_directory: str, tool_manager: Optional[Any] = None,
+                 event_callback: Optional[Callable[[AgentEvent], None]] = None):
         self.working_directory = working_directory
         self.tool_manager = tool_manager
+        self.event_callback = event_callback
 
 
 def get_tool_context() -> Optional[ToolContext]:
     """Get the current tool execution context."""
-    return getattr(_tool_context, 'context', None)
+    return _tool_context.get()
 
 
-def set_tool_context(context: ToolContext) -> None:
-    """Set the current tool execution context."""
-    _tool_context.context = context
+def set_tool_context(context: ToolContext) -> contextvars.Token:
+    """Set the current tool execution context and return a token to restore the previous one."""
+    return _tool_context.set(context)
 
 
-def clear_tool_context() -> None:
-    """Clear the current tool execution context."""
-    if hasattr(_tool_context, 'context'):
-        delattr(_tool_context, 'context')
+def clear_tool_context(token: Optional[contextvars.Token] = None) -> None:
+    """Clear the current tool execution context, restoring the previous one if a token is given."""
+    if token is not None:
+        _tool_context.reset(token)
+    else:
+        _tool_context.set(None)
+
+
+def emit_tool_event(event: AgentEvent) -> None:
+    """Emit an event (such as incremental output) from the currently running tool."""
+    context = get_tool_context()
+    if context and context.event_callback:
+        context.event_callback(event)
 
 
 def get_working_directory() -> str:
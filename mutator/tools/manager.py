@@ -17,7 +17,7 @@ from .mcp_server import MCPServer, MCPServerManager
 from .registry import ToolRegistry, get_global_registry
 from ..core.config import SafetyConfig, MCPServerConfig
 from ..core.path_utils import normalize_path_for_response
-from ..core.types import ToolCall, ToolResult, SafetyCheck, ConfirmationCallback
+from ..core.types import AgentEvent, ToolCall, ToolResult, SafetyCheck, ConfirmationCallback
 
 
 class ToolManager:
@@ -30,10 +30,12 @@ class ToolManager:
                  working_directory: Optional[str] = None,
                  llm_client: Optional[Any] = None,
                  config: Optional[Any] = None,
-                 registry: Optional[ToolRegistry] = None):
+                 registry: Optional[ToolRegistry] = None,
+                 event_callback: Optional[Callable[[AgentEvent], None]] = None):
         """Initialize the tool manager."""
         self.safety_config = safety_config or SafetyConfig()
         self.confirmation_callback = confirmation_callback
+        self.event_callback = event_callback
         self.working_directory = str(Path(working_directory or ".").absolute())
         self.llm_client = llm_client
         self.config = config
@@ -93,6 +95,10 @@ class ToolManager:
             except ImportError:
                 self.logger.warning("Batch tools not available")
     
+    def set_event_callback(self, callback: Optional[Callable[[AgentEvent], None]]) -> None:
+        """Set the callback that receives events emitted by running tools."""
+        self.event_callback = callback
+    
     def initialize_batch_processor(self) -> None:
         """Public method to initialize the batch processor."""
         self._initialize_batch_processor()
@@ -347,15 +353,19 @@ class ToolManager:
 
                 # Set tool context for @tool functions
                 from .decorator import set_tool_context, clear_tool_context, ToolContext
-                context = ToolContext(working_directory=self.working_directory, tool_manager=self)
-                set_tool_context(context)
+                context = ToolContext(
+                    working_directory=self.working_directory,
+                    tool_manager=self,
+                    event_callback=self.event_callback
+                )
+                context_token = set_tool_context(context)
 
                 try:
                     # Execute the tool
                     result = await tool.execute(**tool_arguments)
                 finally:
-                    # Always clear context after execution
-                    clear_tool_context()
+                    # Always restore the previous context after execution
+                    clear_tool_context(context_token)
 
                 # Normalize paths in the result
                 if result.success and result.result:
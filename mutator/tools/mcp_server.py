@@ -2,20 +2,34 @@
 MCP (Model Context Protocol) server integration for the Coding Agent Framework.
 
 This module provides the MCPServer class for integrating with external MCP servers
-and managing their lifecycle.
+and managing their lifecycle. Servers are spoken to over newline-delimited JSON-RPC
+on the process stdio pipes; a background reader task dispatches responses to the
+waiting requests, so many calls can be in flight on one server process at once.
 """
 
 import asyncio
+import itertools
 import json
 import logging
-import subprocess
-import time
+import os
 from typing import Any, Dict, List, Optional
 
 from ..core.config import MCPServerConfig
 from ..core.types import ToolResult
 
 
+# MCP protocol revision announced during the initialize handshake
+MCP_PROTOCOL_VERSION = "2024-11-05"
+
+# Largest single JSON-RPC message accepted from a server
+_MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class MCPConnectionError(Exception):
+    """Raised when the connection to an MCP server process is lost."""
+    pass
+
+
 class MCPServer:
     """Represents an MCP (Model Context Protocol) server."""
     
@@ -26,7 +40,7 @@ class MCPServer:
             # Old pattern: MCPServer(config)
             config = command
             self.name = config.name
-            self.command = config.command
+            self.command = config.command + config.args
             self.env = config.env
             self.config = config
         else:
@@ -36,105 +50,304 @@ class MCPServer:
             self.env = env or {}
             self.config = MCPServerConfig(name=name, command=self.command, env=self.env, **kwargs)
         
-        self.process: Optional[subprocess.Popen] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
         self.logger = logging.getLogger(f"{__name__}.mcp.{self.name}")
         self._tools_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # JSON-RPC state: monotonic request ids and responses awaited by id
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        
+        # Transport statistics
+        self.stats: Dict[str, int] = {
+            "requests_sent": 0,
+            "requests_timed_out": 0,
+            "restarts": 0
+        }
     
     async def start(self) -> bool:
-        """Start the MCP server process."""
-        if self.process and self.process.poll() is None:
-            return True  # Already running
+        """Start the MCP server process and perform the initialize handshake."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
         
+        async with self._start_lock:
+            if self.is_running():
+                return True  # Already running
+            return await self._spawn()
+    
+    async def _spawn(self) -> bool:
+        """Launch the server process and open the JSON-RPC session."""
         try:
-            self.process = subprocess.Popen(
-                self.command,
-                env={**self.env},
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                env={**os.environ, **self.env},
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=_MAX_MESSAGE_SIZE
             )
-            
-            # Wait a bit for the process to start
-            await asyncio.sleep(1)
-            
-            if self.process.poll() is None:
-                self.logger.debug(f"MCP server '{self.name}' started")
-                return True
-            else:
-                self.logger.error(f"MCP server '{self.name}' failed to start")
-                return False
-                
         except Exception as e:
             self.logger.error(f"Failed to start MCP server '{self.name}': {str(e)}")
+            self.process = None
+            return False
+        
+        self._write_lock = asyncio.Lock()
+        self._reader_task = asyncio.ensure_future(self._read_responses(self.process))
+        self._stderr_task = asyncio.ensure_future(self._drain_stderr(self.process))
+        
+        try:
+            await self._send_request("initialize", {
+                "protocolVersion": MCP_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "mutator", "version": "1.0"}
+            })
+            await self._send_notification("notifications/initialized")
+        except Exception as e:
+            self.logger.error(f"MCP server '{self.name}' failed to start: {str(e)}")
+            await self.stop()
+            return False
+        
+        self.logger.debug(f"MCP server '{self.name}' started")
+        return True
+    
+    async def _restart(self) -> bool:
+        """Restart a dead server process, trying up to max_retries times."""
+        async with self._start_lock:
+            if self.is_running():
+                return True  # Another request already restarted it
+            
+            for attempt in range(1, self.config.max_retries + 1):
+                await self.stop()
+                self.stats["restarts"] += 1
+                self.logger.warning(
+                    f"Restarting MCP server '{self.name}' (attempt {attempt}/{self.config.max_retries})"
+                )
+                if await self._spawn():
+                    return True
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - 1), 5.0))
+            
             return False
     
     async def stop(self) -> None:
         """Stop the MCP server process."""
-        if self.process:
+        process = self.process
+        self.process = None
+        
+        if process:
             try:
-                self.process.terminate()
-                await asyncio.sleep(1)
-                
-                if self.process.poll() is None:
-                    self.process.kill()
+                if process.returncode is None:
+                    if process.stdin:
+                        process.stdin.close()
+                    process.terminate()
+                    try:
+                        await asyncio.wait_for(process.wait(), timeout=1)
+                    except asyncio.TimeoutError:
+                        process.kill()
+                        await process.wait()
                 
                 self.logger.debug(f"MCP server '{self.name}' stopped")
+            except ProcessLookupError:
+                pass
             except Exception as e:
                 self.logger.error(f"Failed to stop MCP server '{self.name}': {str(e)}")
-            finally:
-                self.process = None
-    
-    async def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> ToolResult:
-        """Call a tool on this MCP server."""
-        if not self.process or self.process.poll() is not None:
-            return ToolResult(
-                tool_name=tool_name,
-                success=False,
-                error="MCP server not running"
-            )
         
+        for task in (self._reader_task, self._stderr_task):
+            if task and not task.done():
+                task.cancel()
+        self._reader_task = None
+        self._stderr_task = None
+        
+        self._fail_pending(MCPConnectionError(f"MCP server '{self.name}' stopped"))
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every request still waiting for a response."""
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+    
+    async def _read_responses(self, process: asyncio.subprocess.Process) -> None:
+        """Read JSON-RPC messages from stdout and resolve the matching requests."""
         try:
-            # This is a simplified implementation
-            # In a real implementation, you would use the MCP protocol
-            request = {
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                
+                line = line.strip()
+                if not line:
+                    continue
+                
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.debug(f"Ignoring non-JSON output: {line[:200]!r}")
+                    continue
+                
+                if "method" in message:
+                    await self._handle_server_message(message)
+                    continue
+                
+                future = self._pending.pop(message.get("id"), None)
+                if future and not future.done():
+                    future.set_result(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"MCP server '{self.name}' transport error: {str(e)}")
+        
+        if self.process is process:
+            self.logger.warning(f"MCP server '{self.name}' closed its output")
+        self._fail_pending(MCPConnectionError(f"Connection to MCP server '{self.name}' lost"))
+    
+    async def _drain_stderr(self, process: asyncio.subprocess.Process) -> None:
+        """Forward server stderr to the log so a full pipe cannot stall the server."""
+        while True:
+            line = await process.stderr.readline()
+            if not line:
+                break
+            self.logger.debug(line.decode("utf-8", errors="replace").rstrip())
+    
+    async def _handle_server_message(self, message: Dict[str, Any]) -> None:
+        """Answer requests initiated by the server; notifications are ignored."""
+        if "id" not in message:
+            return
+        
+        if message["method"] == "ping":
+            response = {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+        else:
+            response = {
                 "jsonrpc": "2.0",
-                "id": int(time.time()),
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": parameters
-                }
+                "id": message["id"],
+                "error": {"code": -32601, "message": f"Method not found: {message['method']}"}
             }
+        
+        try:
+            await self._write_message(response)
+        except MCPConnectionError:
+            pass
+    
+    async def _write_message(self, message: Dict[str, Any]) -> None:
+        """Write a single JSON-RPC message to the server stdin."""
+        process = self.process
+        if not process or process.returncode is not None or not process.stdin:
+            raise MCPConnectionError(f"MCP server '{self.name}' not running")
+        
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        try:
+            async with self._write_lock:
+                process.stdin.write(data)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise MCPConnectionError(f"Connection to MCP server '{self.name}' lost: {e}")
+    
+    async def _send_notification(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Send a JSON-RPC notification (no response expected)."""
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._write_message(message)
+    
+    async def _send_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request and wait for its response.
+        
+        Raises:
+            asyncio.TimeoutError: If no response arrives within the configured timeout
+            MCPConnectionError: If the server is not running or the connection drops
+        """
+        request_id = next(self._request_ids)
+        request: Dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        
+        try:
+            await self._write_message(request)
+            self.stats["requests_sent"] += 1
+            return await asyncio.wait_for(future, timeout=self.config.timeout)
+        except asyncio.TimeoutError:
+            self.stats["requests_timed_out"] += 1
+            # Let the server stop working on the abandoned request
+            try:
+                await self._send_notification("notifications/cancelled", {
+                    "requestId": request_id,
+                    "reason": "Request timed out"
+                })
+            except MCPConnectionError:
+                pass
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a request, restarting the server if the connection has been lost.
+        
+        Connection failures are retried after a restart up to max_retries times;
+        timeouts and JSON-RPC errors are returned to the caller unchanged.
+        """
+        attempts = 0
+        while True:
+            if not self.is_running():
+                if self._start_lock is None or not await self._restart():
+                    raise MCPConnectionError("MCP server not running")
+            try:
+                return await self._send_request(method, params)
+            except MCPConnectionError:
+                attempts += 1
+                if attempts > self.config.max_retries:
+                    raise
+    
+    async def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> ToolResult:
+        """Call a tool on this MCP server."""
+        try:
+            response = await self.request("tools/call", {
+                "name": tool_name,
+                "arguments": parameters
+            })
             
-            # Send request to MCP server
-            request_json = json.dumps(request) + "\n"
-            self.process.stdin.write(request_json)
-            self.process.stdin.flush()
+            if "error" in response:
+                return ToolResult(
+                    tool_name=tool_name,
+                    success=False,
+                    error=response["error"].get("message", str(response["error"]))
+                )
             
-            # Read response (simplified)
-            response_line = self.process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.strip())
-                
-                if "result" in response:
-                    return ToolResult(
-                        tool_name=tool_name,
-                        success=True,
-                        result=response["result"]
-                    )
-                elif "error" in response:
-                    return ToolResult(
-                        tool_name=tool_name,
-                        success=False,
-                        error=response["error"]["message"]
-                    )
+            result = response.get("result")
+            if isinstance(result, dict) and result.get("isError"):
+                return ToolResult(
+                    tool_name=tool_name,
+                    success=False,
+                    result=result,
+                    error=f"MCP tool '{tool_name}' reported an error"
+                )
             
             return ToolResult(
                 tool_name=tool_name,
-                success=False,
-                error="No response from MCP server"
+                success=True,
+                result=result
             )
             
+        except asyncio.TimeoutError:
+            return ToolResult(
+                tool_name=tool_name,
+                success=False,
+                error=f"MCP tool '{tool_name}' timed out after {self.config.timeout} seconds"
+            )
+        except MCPConnectionError as e:
+            return ToolResult(
+                tool_name=tool_name,
+                success=False,
+                error=str(e)
+            )
         except Exception as e:
             self.logger.error(f"Failed to call tool '{tool_name}' on MCP server: {str(e)}")
             return ToolResult(
@@ -145,27 +358,10 @@ class MCPServer:
     
     async def list_tools(self) -> List[Dict[str, Any]]:
         """List available tools from this MCP server."""
-        if not self.process or self.process.poll() is not None:
-            return []
-        
         try:
-            # This is a simplified implementation
-            request = {
-                "jsonrpc": "2.0",
-                "id": int(time.time()),
-                "method": "tools/list"
-            }
-            
-            request_json = json.dumps(request) + "\n"
-            self.process.stdin.write(request_json)
-            self.process.stdin.flush()
-            
-            response_line = self.process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.strip())
-                if "result" in response:
-                    return response["result"].get("tools", [])
-            
+            response = await self.request("tools/list")
+            if "result" in response:
+                return response["result"].get("tools", [])
             return []
             
         except Exception as e:
@@ -173,8 +369,13 @@ class MCPServer:
             return []
     
     def is_running(self) -> bool:
-        """Check if the MCP server is running."""
-        return self.process is not None and self.process.poll() is None
+        """Check if the MCP server is running and its connection is open."""
+        return (
+            self.process is not None
+            and self.process.returncode is None
+            and self._reader_task is not None
+            and not self._reader_task.done()
+        )
 
 
 class MCPServerManager:
@@ -190,7 +391,7 @@ class MCPServerManager:
             self.logger.warning(f"MCP server '{config.name}' is already registered")
             return False
         
-        server = MCPServer(config.name, config.command, config.env)
+        server = MCPServer(config.name, config)
         if await server.start():
             self.servers[config.name] = server
             
@@ -244,7 +445,9 @@ class MCPServerManager:
                 is_running = server.is_running()
                 health[name] = {
                     "status": "healthy" if is_running else "stopped",
-                    "process_running": is_running
+                    "process_running": is_running,
+                    "pending_requests": len(server._pending),
+                    **server.stats
                 }
             except Exception as e:
                 health[name] = {
@@ -0,0 +1,184 @@
+"""
+Asynchronous shell execution engine for the Coding Agent Framework.
+
+This module runs shell commands with asyncio subprocesses so the event loop keeps
+serving other tool calls, streaming and timeout checks while a command runs.
+Output is read incrementally, forwarded line by line to an optional callback and
+retained in a bounded head/tail buffer so huge outputs do not exhaust memory.
+On timeout or cancellation the whole process group is killed.
+"""
+
+import asyncio
+import codecs
+import os
+import signal
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional
+
+
+# Callback invoked for every complete output line: (stream_name, line)
+OutputCallback = Callable[[str, str], None]
+
+# Size of each read from the subprocess pipes
+_READ_CHUNK_SIZE = 64 * 1024
+
+# Longest single line kept in memory; the rest of the line is dropped
+_MAX_LINE_LENGTH = 64 * 1024
+
+
+class OutputBuffer:
+    """Bounded line buffer that keeps the first and last lines of a stream."""
+
+    def __init__(self, max_head_lines: int = 200, max_tail_lines: int = 200):
+        self.max_head_lines = max_head_lines
+        self.head: List[str] = []
+        self.tail: Deque[str] = deque(maxlen=max_tail_lines)
+        self.total_lines = 0
+        self.dropped_lines = 0
+
+    def append(self, line: str) -> None:
+        """Add a complete line (without its newline)."""
+        self.total_lines += 1
+        if len(self.head) < self.max_head_lines:
+            self.head.append(line)
+            return
+        if len(self.tail) == self.tail.maxlen:
+            self.dropped_lines += 1
+        self.tail.append(line)
+
+    @property
+    def truncated(self) -> bool:
+        """Whether lines were dropped from the middle of the stream."""
+        return self.dropped_lines > 0
+
+    def get_text(self) -> str:
+        """Get the retained output, marking where lines were dropped."""
+        lines = list(self.head)
+        if self.dropped_lines:
+            lines.append(f"... [{self.dropped_lines} lines omitted] ...")
+        lines.extend(self.tail)
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+@dataclass
+class ShellResult:
+    """Result of a shell command run by the engine."""
+    exit_code: int
+    stdout: OutputBuffer
+    stderr: OutputBuffer
+    execution_time: float
+
+
+async def _pump_stream(stream: asyncio.StreamReader, name: str, buffer: OutputBuffer,
+                       on_output: Optional[OutputCallback]) -> None:
+    """Read a pipe in chunks, split it into lines and feed the buffer and callback."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+
+    def emit(line: str) -> None:
+        if line.endswith("\r"):
+            line = line[:-1]
+        buffer.append(line)
+        if on_output:
+            on_output(name, line)
+
+    while True:
+        chunk = await stream.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        text = partial + decoder.decode(chunk)
+        lines = text.split("\n")
+        partial = lines.pop()
+        for line in lines:
+            emit(line)
+
+        # Guard against unbounded single lines (e.g. minified output)
+        if len(partial) > _MAX_LINE_LENGTH:
+            partial = partial[:_MAX_LINE_LENGTH]
+
+    partial += decoder.decode(b"", final=True)
+    if partial:
+        emit(partial)
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kill a process and every process it started."""
+    if process.returncode is not None:
+        return
+    try:
+        if sys.platform != "win32":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_command(command: str, cwd: Optional[str] = None, timeout: Optional[float] = None,
+                      on_output: Optional[OutputCallback] = None,
+                      max_head_lines: int = 200, max_tail_lines: int = 200) -> ShellResult:
+    """
+    Run a shell command without blocking the event loop.
+
+    Args:
+        command: Shell command to execute
+        cwd: Working directory for the command
+        timeout: Maximum execution time in seconds (None for no limit)
+        on_output: Optional callback receiving (stream_name, line) for each output line
+        max_head_lines: Number of leading lines retained per stream
+        max_tail_lines: Number of trailing lines retained per stream
+
+    Returns:
+        ShellResult with the exit code and bounded stdout/stderr buffers
+
+    Raises:
+        TimeoutError: If the command does not finish within the timeout
+    """
+    start_time = time.time()
+
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        # Run in a new session so the whole process tree can be killed together
+        start_new_session=sys.platform != "win32"
+    )
+
+    stdout = OutputBuffer(max_head_lines, max_tail_lines)
+    stderr = OutputBuffer(max_head_lines, max_tail_lines)
+
+    async def communicate() -> int:
+        await asyncio.gather(
+            _pump_stream(process.stdout, "stdout", stdout, on_output),
+            _pump_stream(process.stderr, "stderr", stderr, on_output)
+        )
+        return await process.wait()
+
+    try:
+        if timeout:
+            exit_code = await asyncio.wait_for(communicate(), timeout=timeout)
+        else:
+            exit_code = await communicate()
+    except asyncio.TimeoutError:
+        _kill_process_group(process)
+        await process.wait()
+        raise TimeoutError(f"Command timed out after {timeout} seconds")
+    finally:
+        # Also covers cancellation of the calling task
+        _kill_process_group(process)
+
+    return ShellResult(
+        exit_code=exit_code,
+        stdout=stdout,
+        stderr=stderr,
+        execution_time=time.time() - start_time
+    )
+
+
+__all__ = ["OutputBuffer", "ShellResult", "run_command"]
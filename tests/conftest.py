@@ -16,6 +16,12 @@ from mutator.core.config import (
 )
 from mutator.core.types import ExecutionMode
 
+# Recorded LLM responses used by MUTATOR_RESPONSE_CACHE=record/replay
+RESPONSE_CACHE_PATH = Path(__file__).parent / "fixtures" / "llm_responses.sqlite3"
+
+# Stands in for SONNET_KEY when replaying; never sent, replay makes no API calls
+REPLAY_API_KEY = "sk-ant-api-replay"
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -206,12 +212,19 @@ def test_config() -> AgentConfig:
     if not api_key or api_key == "test-api-key-for-mocking":
         api_key = "test-key"
     
+    # MUTATOR_RESPONSE_CACHE=record captures the LLM calls of a run, =replay
+    # repeats it offline from the recording. Requests are keyed without the
+    # project root, so the random temp_project_dir does not break replays.
+    response_cache_mode = os.getenv("MUTATOR_RESPONSE_CACHE", "off")
+    
     return AgentConfig(
         llm=LLMConfig(
             model="claude-3-haiku-20240307",  # Fast model for tests
             api_key=api_key,
             max_tokens=1000,
-            temperature=0.1
+            temperature=0.1,
+            response_cache_mode=response_cache_mode,
+            response_cache_path=str(RESPONSE_CACHE_PATH)
         ),
         context=ContextConfig(
             max_context_files=5,  # Limit files for faster testing
@@ -345,6 +358,16 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "slow: mark test as slow running"
     )
+    
+    # Replays run the e2e tests offline, so their API key checks must pass
+    if os.getenv("MUTATOR_RESPONSE_CACHE") == "replay":
+        if not RESPONSE_CACHE_PATH.exists():
+            raise pytest.UsageError(
+                f"MUTATOR_RESPONSE_CACHE=replay needs a recording at {RESPONSE_CACHE_PATH}; "
+                "create it with SONNET_KEY=... MUTATOR_RESPONSE_CACHE=record pytest tests/e2e"
+            )
+        if not os.getenv("SONNET_KEY"):
+            os.environ["SONNET_KEY"] = REPLAY_API_KEY
 
 
 def pytest_collection_modifyitems(config, items):
@@ -312,4 +312,49 @@ class TestProcessSearchFilesSementic:
             
             assert result["success"] is True
             assert result["results_found"] == 2
-            assert "results" in result 
\ No newline at end of file
+            assert "results" in result 
+
+class TestBatchGroupConcurrency:
+    """Test concurrent group processing in batch tools."""
+    
+    @pytest.mark.asyncio
+    async def test_groups_processed_concurrently(self):
+        """Test that groups are delegated concurrently up to max_parallel."""
+        import asyncio
+        from mutator.tools.batch_tools import process_search_files_by_name
+        
+        mock_search_result = Mock()
+        mock_search_result.success = True
+        mock_search_result.result = {
+            "matches": [{"file": f"test{i}.py", "size": 1000} for i in range(50)]
+        }
+        
+        tracker = {"running": 0, "peak": 0}
+        
+        async def fake_delegate(**kwargs):
+            tracker["running"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["running"])
+            await asyncio.sleep(0.01)
+            tracker["running"] -= 1
+            result = Mock()
+            result.success = True
+            result.result = {"success": True, "summary": "done", "tool_calls_made": 1}
+            return result
+        
+        with patch('mutator.tools.categories.search_tools.search_files_by_name') as mock_search, \
+             patch('mutator.tools.categories.task_tools.delegate_task') as mock_delegate:
+            
+            mock_search.execute = AsyncMock(return_value=mock_search_result)
+            mock_delegate.execute = AsyncMock(side_effect=fake_delegate)
+            
+            result = await process_search_files_by_name.execute(
+                pattern="test.*\\.py",
+                operation_description="Add type hints",
+                delegate_processing_results=True,
+                max_parallel=3
+            )
+            
+            assert result["total_groups"] == 3
+            assert result["successful_groups"] == 3
+            assert tracker["peak"] == 3
+            assert [gr["group_number"] for gr in result["group_results"]] == [1, 2, 3]
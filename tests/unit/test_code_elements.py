@@ -0,0 +1,102 @@
+"""
+Tests for code element extraction in CodeAnalyzer.
+"""
+
+import time
+import pytest
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.core.config import ContextConfig
+
+
+PYTHON_SOURCE = '''import os
+
+
+class Greeter:
+    """Says hello."""
+
+    def greet(self):
+        return "hi"
+
+
+def main():
+    greeter = Greeter()
+
+    print(greeter.greet())
+
+# trailing comment
+'''
+
+JAVASCRIPT_SOURCE = '''function add(a, b) {
+  if (a) {
+    return a + b;
+  }
+  return b;
+}
+
+class Counter {
+  increment() {
+    this.count++;
+  }
+}
+const noop = () => {};
+'''
+
+
+@pytest.fixture
+def analyzer():
+    return CodeAnalyzer(ContextConfig())
+
+
+def _by_name(elements):
+    return {element['name']: element for element in elements}
+
+
+class TestExtractCodeElements:
+    """Test element extraction, line numbers and end lines."""
+
+    def test_python_elements_and_end_lines(self, analyzer):
+        """Test that indentation-delimited blocks get their last code line as end."""
+        elements = analyzer.extract_code_elements(PYTHON_SOURCE, 'python')
+
+        assert [(e['type'], e['name']) for e in elements] == [('class', 'Greeter'), ('function', 'main')]
+        greeter, main = elements
+        assert (greeter['line'], greeter['end_line']) == (4, 8)
+        assert (main['line'], main['end_line']) == (11, 14)
+        assert main['signature'] == 'def main():'
+
+    def test_brace_elements_and_end_lines(self, analyzer):
+        """Test that brace-delimited blocks end at their matching closing brace."""
+        elements = _by_name(analyzer.extract_code_elements(JAVASCRIPT_SOURCE, 'javascript'))
+
+        assert elements['add']['type'] == 'function'
+        assert (elements['add']['line'], elements['add']['end_line']) == (1, 6)
+        assert elements['Counter']['type'] == 'class'
+        assert (elements['Counter']['line'], elements['Counter']['end_line']) == (8, 12)
+        assert (elements['noop']['line'], elements['noop']['end_line']) == (13, 13)
+
+    def test_unknown_language_has_no_elements(self, analyzer):
+        """Test that languages without patterns return no elements."""
+        assert analyzer.extract_code_elements("# Title\n", 'markdown') == []
+
+    def test_compiled_patterns_are_shared(self, analyzer):
+        """Test that the combined regex is compiled once per language."""
+        analyzer.extract_code_elements(PYTHON_SOURCE, 'python')
+        other = CodeAnalyzer(ContextConfig())
+
+        assert other._get_element_regex('python') is analyzer._get_element_regex('python')
+
+    def test_large_generated_file_is_linear(self, analyzer):
+        """Test that extraction on a large generated file stays fast."""
+        content = "\n".join(
+            f"def generated_{i}(value):\n    return value + {i}\n" for i in range(10000)
+        )
+
+        start_time = time.perf_counter()
+        elements = analyzer.extract_code_elements(content, 'python')
+        elapsed = time.perf_counter() - start_time
+
+        assert len(elements) == 10000
+        assert elements[-1]['line'] == 29998
+        assert elements[-1]['end_line'] == 29999
+        assert elapsed < 2.0
@@ -0,0 +1,163 @@
+"""
+Tests for the parallel content search engine.
+"""
+
+import re
+import pytest
+
+from mutator.tools import content_search
+from mutator.tools.content_search import (
+    compile_query, count_file_lines, required_literals, scan_bytes, scan_file, scan_text, search_files
+)
+from mutator.tools.categories.search_tools import search_files_by_content
+from mutator.tools.decorator import ToolContext, set_tool_context, clear_tool_context
+
+
+def _per_line_search(text, pattern):
+    """Reference implementation: the original line-by-line search."""
+    regex = re.compile(pattern, re.IGNORECASE)
+    lines = text.splitlines()
+    return [
+        (line_num, line.strip(), regex.search(line).group())
+        for line_num, line in enumerate(lines, 1)
+        if regex.search(line)
+    ]
+
+
+SAMPLE = "import os\n\ndef main():\n    value = os.getenv('X')\n    return value\n\nclass Main:\n    pass"
+
+
+class TestRequiredLiterals:
+    """Test literal extraction used by the prefilter."""
+
+    def test_plain_and_repeated_literals(self):
+        assert required_literals(r"def\s+(\w+)\(") == ["def", "("]
+        assert required_literals(r"(?:foo)+bar") == ["foo", "bar"]
+
+    def test_optional_parts_are_not_required(self):
+        assert required_literals(r"(?:foo)?bar") == ["bar"]
+        assert required_literals(r"x*") == []
+
+    def test_alternation_guarantees_nothing(self):
+        assert required_literals(r"foo|bar") == []
+
+
+class TestScanText:
+    """Test whole-buffer scanning against the per-line behavior."""
+
+    @pytest.mark.parametrize("pattern", [
+        r"main", r"^\s+return", r"value$", r"os\.\w+", r"\s+", r"x*", r"^$", r"[^a]+", r"class.*:"
+    ])
+    def test_matches_per_line_search(self, pattern):
+        """Test that results equal the original line-by-line search."""
+        found = scan_text(SAMPLE, compile_query(pattern), "sample.py", limit=100)
+
+        assert [(m["line_number"], m["line_content"], m["match"]) for m in found] == \
+            _per_line_search(SAMPLE, pattern)
+        assert all(m["file_line_count"] == len(SAMPLE.splitlines()) for m in found)
+
+    def test_limit_stops_scanning(self):
+        found = scan_text("hit\n" * 100, compile_query("hit"), "a.txt", limit=3)
+
+        assert [m["line_number"] for m in found] == [1, 2, 3]
+
+    def test_prefilter_rejects_file(self):
+        query = compile_query(r"\w+Error")
+
+        assert query.prefilter is not None
+        assert scan_text("nothing to see\n", query, "a.txt", limit=10) == []
+        assert scan_text("raise ValueError\n", query, "a.txt", limit=10)[0]["match"] == "ValueError"
+
+
+class TestBytesScanning:
+    """Test scanning raw and memory-mapped file data."""
+
+    @pytest.mark.parametrize("pattern", [
+        r"main", r"^\s+return", r"value$", r"os\.\w+", r"x*", r"^$", r"[^a]+", r"caf\w", r"\bMain\b"
+    ])
+    def test_bytes_scan_matches_per_line_search(self, pattern):
+        """Test that bytes scanning equals the per-line search, including non-ASCII lines."""
+        text = SAMPLE + "\ncafé = 'naïve'\r\nvalue = 1\r\n"
+
+        found = scan_bytes(text.encode("utf-8"), compile_query(pattern), "sample.py", limit=100)
+
+        assert [(m["line_number"], m["line_content"], m["match"]) for m in found] == \
+            _per_line_search(text, pattern)
+
+    def test_only_safe_patterns_run_as_bytes(self):
+        assert compile_query(r"def\s+\w+").bytes_regex is None
+        assert compile_query(r"def [a-z_]+\(").bytes_regex is not None
+        assert compile_query(r"value$").regex is None
+        assert compile_query(r"value$").bytes_prefilter is not None
+
+    def test_large_files_are_memory_mapped(self, tmp_path, monkeypatch):
+        """Test the mmap path gives the same results and line counts."""
+        monkeypatch.setattr(content_search, "MMAP_THRESHOLD", 16)
+        path = tmp_path / "big.log"
+        path.write_text("noise\n" * 1000 + "ERROR disk full\n" + "noise\n" * 10)
+
+        found = scan_file(path, compile_query(r"error \w+"), "big.log", limit=10)
+
+        assert [(m["line_number"], m["match"], m["file_line_count"]) for m in found] == [(1001, "ERROR disk", 1011)]
+        assert count_file_lines(path) == 1011
+
+    def test_count_file_lines(self, tmp_path):
+        (tmp_path / "a.txt").write_text("one\ntwo")
+        (tmp_path / "empty.txt").write_text("")
+
+        assert count_file_lines(tmp_path / "a.txt") == 2
+        assert count_file_lines(tmp_path / "empty.txt") == 0
+        assert count_file_lines(tmp_path / "missing.txt") == 0
+
+
+class TestSearchFiles:
+    """Test parallel search over many files."""
+
+    def _make_files(self, tmp_path, count):
+        paths = []
+        for i in range(count):
+            name = f"file_{i:03d}.txt"
+            (tmp_path / name).write_text(f"line one\nneedle {i}\n")
+            paths.append(name)
+        return paths
+
+    def test_results_follow_file_order(self, tmp_path):
+        """Test that parallel scanning returns matches in candidate order."""
+        paths = self._make_files(tmp_path, 100)
+
+        outcome = search_files(tmp_path, paths, compile_query(r"needle \d+"), max_results=500, max_workers=8)
+
+        assert [m["file"] for m in outcome.matches] == paths
+        assert outcome.files_scanned == 100
+        assert outcome.stopped_early is False
+
+    def test_early_termination(self, tmp_path):
+        """Test that workers stop once enough matches are found."""
+        paths = self._make_files(tmp_path, 400)
+
+        outcome = search_files(tmp_path, paths, compile_query("needle"), max_results=5, max_workers=2)
+
+        assert [m["file"] for m in outcome.matches] == paths[:5]
+        assert outcome.stopped_early is True
+        assert outcome.files_scanned < 400
+
+
+@pytest.mark.asyncio
+async def test_search_files_by_content_tool(tmp_path):
+    """Test the tool end to end, including multi-line matches counted per line."""
+    (tmp_path / "app.py").write_text("def handler():\n    raise KeyError('x')\n")
+    (tmp_path / "notes.md").write_text("KeyError is documented here\n")
+
+    token = set_tool_context(ToolContext(str(tmp_path)))
+    try:
+        result = await search_files_by_content.execute(content_pattern=r"\w+error", file_pattern="*.py")
+    finally:
+        clear_tool_context(token)
+
+    assert result.success
+    assert result.result["total_matches"] == 1
+    match = result.result["matches"][0]
+    assert match["file"] == "app.py"
+    assert match["line_number"] == 2
+    assert match["match"] == "KeyError"
+    assert match["file_line_count"] == 2
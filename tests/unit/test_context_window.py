@@ -0,0 +1,181 @@
+"""
+Tests for token counting and context window management of the agent history.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from mutator.core.config import AgentConfig, ContextConfig, LLMConfig
+from mutator.core.types import ConversationTurn, LLMResponse, ToolCall
+from mutator.execution.context_window import ContextWindowManager, merge_messages
+from mutator.llm.client import LLMClient
+from mutator.llm.rate_limiter import RateLimiter
+from mutator.llm.tokens import TokenCounter, get_context_window
+
+
+def _config(context_window=4000, **context):
+    return AgentConfig(
+        llm=LLMConfig(model="gpt-4.1-mini", api_key="test-key", max_tokens=500,
+                      context_window=context_window),
+        context=ContextConfig(**context)
+    )
+
+
+def _manager(config):
+    client = LLMClient(config.llm_config, rate_limiter=RateLimiter())
+    return ContextWindowManager(client, config)
+
+
+def _tool_turn(index, result):
+    """An assistant tool call and its result."""
+    call_id = f"call_{index}"
+    return [
+        AIMessage(content="", id=f"ai_{index}", additional_kwargs={"tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "read_file", "arguments": "{}"}}
+        ]}),
+        ToolMessage(content=result, tool_call_id=call_id, id=f"tool_{index}")
+    ]
+
+
+class TestTokenCounter:
+    """Test tokenizer-based counting."""
+
+    def test_counts_are_cached(self):
+        counter = TokenCounter("gpt-4.1-mini")
+        text = "def main():\n    return 42\n" * 20
+
+        first = counter.count(text)
+        second = counter.count(text)
+
+        assert first == second and 0 < first < len(text)
+        assert counter.stats == {"hits": 1, "misses": 1}
+
+    def test_message_includes_tool_calls(self):
+        counter = TokenCounter("gpt-4.1-mini")
+        plain = {"role": "assistant", "content": "Reading it"}
+        with_call = {**plain, "tool_calls": [{"function": {"name": "read_file", "arguments": "{}"}}]}
+
+        assert counter.count_message(with_call) > counter.count_message(plain)
+
+    def test_context_window_lookup(self):
+        assert get_context_window("anthropic/claude-3-haiku-20240307") == 200000
+        assert get_context_window("unknown/model-that-does-not-exist", 1234) == 1234
+
+    def test_client_history_is_trimmed_by_tokens(self):
+        client = LLMClient(LLMConfig(model="gpt-4.1-mini", api_key="test-key", context_window=1000),
+                           rate_limiter=RateLimiter())
+
+        for index in range(20):
+            client.add_conversation_turn(ConversationTurn(id=str(index), role="user", content="word " * 100))
+
+        history = client.get_conversation_history()
+        assert 1 <= len(history) < 20
+        assert history[-1].id == "19"
+
+
+@pytest.mark.asyncio
+class TestContextWindowManager:
+    """Test compaction of the agent message history."""
+
+    async def test_stale_tool_results_are_elided(self):
+        manager = _manager(_config(stale_tool_result_turns=2, context_role_budgets={}))
+        messages = [HumanMessage(content="Fix the bug", id="task")]
+        for index in range(3):
+            messages += _tool_turn(index, "line of code\n" * 100)
+
+        sent, updates = await manager.fit(messages)
+
+        assert [m.id for m in updates] == ["tool_0"]
+        assert sent[2].content.startswith("[Earlier read_file result elided")
+        assert sent[2].tool_call_id == "call_0"
+        assert sent[4].content == messages[4].content
+
+        # Applying the updates gives the state what was sent, and nothing changes on the next call
+        state = merge_messages(messages, updates)
+        assert [m.content for m in state] == [m.content for m in sent]
+        assert (await manager.fit(state))[1] == []
+
+    async def test_role_budget_elides_oldest_first(self):
+        manager = _manager(_config(stale_tool_result_turns=0, context_role_budgets={"tool": 0.2}))
+        messages = [HumanMessage(content="Fix the bug", id="task")]
+        for index in range(3):
+            messages += _tool_turn(index, "word " * 400)
+
+        sent, updates = await manager.fit(messages)
+
+        assert [m.id for m in updates] == ["tool_0", "tool_1"]
+        assert sent[-1].content == messages[-1].content
+
+    async def test_old_messages_are_summarized(self):
+        manager = _manager(_config(context_compression_threshold=6, stale_tool_result_turns=0,
+                                   context_role_budgets={}))
+        messages = [HumanMessage(content="Fix the bug", id="task")]
+        for index in range(5):
+            messages += _tool_turn(index, f"result {index}")
+        summary = LLMResponse(content="Read five files, nothing found yet.", success=True)
+
+        with patch.object(manager.llm_client, "complete_with_messages",
+                          new=AsyncMock(return_value=summary)) as complete:
+            sent, updates = await manager.fit(messages)
+
+        assert "result 0" in complete.call_args.args[0][0]["content"]
+        # Task, summary, then the latest turns starting at an assistant message
+        assert sent[0].id == "task"
+        assert sent[1].content == "Summary of the work so far:\nRead five files, nothing found yet."
+        assert isinstance(sent[2], AIMessage)
+        assert len(sent) == 2 + 4
+
+        state = merge_messages(messages, updates)
+        assert [m.id for m in state] == [m.id for m in sent]
+
+    @pytest.mark.parametrize("response", [
+        LLMResponse(content="", success=False, error="Service unavailable"),
+        LLMResponse(content="", success=True, tool_calls=[ToolCall(id="call_x", name="read_file", arguments={})])
+    ])
+    async def test_history_is_kept_without_a_summary(self, response):
+        manager = _manager(_config(context_compression_threshold=6, stale_tool_result_turns=0,
+                                   context_role_budgets={}))
+        messages = [HumanMessage(content="Fix the bug", id="task")]
+        for index in range(5):
+            messages += _tool_turn(index, f"result {index}")
+
+        with patch.object(manager.llm_client, "complete_with_messages",
+                          new=AsyncMock(return_value=response)) as complete:
+            sent, updates = await manager.fit(messages)
+
+        assert complete.call_args.kwargs["use_tools"] is False
+        assert [m.id for m in sent] == [m.id for m in messages]
+        assert updates == []
+        assert manager.get_stats()["summaries"] == 0
+
+    async def test_summary_request_has_no_tools(self):
+        manager = _manager(_config())
+        manager.llm_client.register_function("read_file", lambda args: None, {
+            "name": "read_file", "description": "Read a file", "parameters": {"type": "object", "properties": {}}
+        })
+        message = SimpleNamespace(content="Summary", tool_calls=None, function_call=None)
+        response = SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                                   usage=None, model="gpt-4.1-mini")
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=response)) as completion:
+            await manager._request_summary([HumanMessage(content="Fix the bug", id="task")])
+            await manager.llm_client.complete_with_messages([{"role": "user", "content": "hi"}])
+
+        without_tools, with_tools = (call.kwargs for call in completion.call_args_list)
+        assert "tools" not in without_tools and "tool_choice" not in without_tools
+        assert [tool["function"]["name"] for tool in with_tools["tools"]] == ["read_file"]
+
+    async def test_window_is_enforced_without_summaries(self):
+        manager = _manager(_config(context_window=1500, compress_old_context=False,
+                                   stale_tool_result_turns=0, context_role_budgets={}))
+        messages = [HumanMessage(content="Fix the bug", id="task")]
+        for index in range(4):
+            messages += _tool_turn(index, "word " * 300)
+
+        sent, _ = await manager.fit(messages)
+
+        assert sum(manager.message_tokens(m) for m in sent) <= manager.available_tokens()
+        assert sent[-1].content == messages[-1].content
@@ -0,0 +1,262 @@
+"""
+Tests for the shared project file index used by the search tools.
+"""
+
+import os
+import time
+import pytest
+from unittest.mock import patch
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.context.file_index import FileIndex
+from mutator.core.config import ContextConfig
+from mutator.tools.categories.file_tools import create_file
+from mutator.tools.categories.search_tools import (
+    _cached_line_count, _matches_glob, search_files_by_content, search_files_by_name, list_directory
+)
+from mutator.tools.decorator import ToolContext, set_tool_context, clear_tool_context
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Create a small git-style project tree."""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("generated/\n")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "main.py").write_text("print('main')\n")
+    (tmp_path / "src" / "pkg" / "util.py").write_text("def util():\n    pass\n")
+    (tmp_path / "generated").mkdir()
+    (tmp_path / "generated" / "out.py").write_text("x = 1\n")
+    (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+    (tmp_path / "node_modules" / "lib" / "index.js").write_text("module.exports = {}\n")
+    return tmp_path
+
+
+def _index(root):
+    return FileIndex(root, CodeAnalyzer(ContextConfig()), refresh_interval=0)
+
+
+def _paths(index):
+    return sorted(entry.path for entry in index.files())
+
+
+def _touch_dir(path):
+    """Bump a directory mtime so changes are visible on coarse-grained file systems."""
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+class TestFileIndex:
+    """Test FileIndex scanning and incremental refresh."""
+
+    def test_ignored_paths_are_pruned(self, project):
+        """Test that ignore rules are applied once while the tree is walked."""
+        index = _index(project)
+
+        assert _paths(index) == [".gitignore", "src/main.py", "src/pkg/util.py"]
+        assert index.list_directory("generated") is None
+        assert index.list_directory("node_modules") is None
+
+    def test_entries_carry_stat_metadata(self, project):
+        """Test that entries include size, mtime and permissions."""
+        index = _index(project)
+
+        entry = next(e for e in index.files() if e.path == "src/main.py")
+
+        assert entry.size == len("print('main')\n")
+        assert entry.mtime == (project / "src" / "main.py").stat().st_mtime
+        assert len(entry.permissions) == 3
+
+    def test_incremental_refresh_rescans_changed_directories(self, project):
+        """Test that added and removed files are picked up without a full rescan."""
+        index = _index(project)
+        index.files()
+
+        (project / "src" / "pkg" / "new.py").write_text("")
+        (project / "src" / "main.py").unlink()
+        _touch_dir(project / "src" / "pkg")
+        _touch_dir(project / "src")
+
+        assert _paths(index) == [".gitignore", "src/pkg/new.py", "src/pkg/util.py"]
+        stats = index.get_stats()
+        assert stats["full_scans"] == 1
+        assert stats["directories_rescanned"] == 2
+
+    def test_removed_directory_is_dropped(self, project):
+        """Test that a deleted subtree disappears from the index."""
+        index = _index(project)
+        index.files()
+
+        (project / "src" / "pkg" / "util.py").unlink()
+        (project / "src" / "pkg").rmdir()
+        _touch_dir(project / "src")
+
+        assert _paths(index) == [".gitignore", "src/main.py"]
+        assert index.list_directory("src/pkg") is None
+
+    def test_gitignore_change_triggers_full_rescan(self, project):
+        """Test that editing .gitignore re-applies the ignore rules everywhere."""
+        index = _index(project)
+        index.files()
+
+        gitignore = project / ".gitignore"
+        gitignore.write_text("generated/\npkg/\n")
+        stat = gitignore.stat()
+        os.utime(gitignore, (stat.st_atime, stat.st_mtime + 10))
+
+        assert _paths(index) == [".gitignore", "src/main.py"]
+        assert index.get_stats()["full_scans"] == 2
+
+    def test_refresh_is_throttled(self, project):
+        """Test that freshness checks are skipped within the refresh interval."""
+        index = FileIndex(project, CodeAnalyzer(ContextConfig()), refresh_interval=60)
+        index.files()
+
+        (project / "src" / "late.py").write_text("")
+        _touch_dir(project / "src")
+
+        assert "src/late.py" not in _paths(index)
+        index.invalidate()
+        assert "src/late.py" in _paths(index)
+
+
+class TestSearchToolsUseIndex:
+    """Test that the search tools query the shared index."""
+
+    @pytest.mark.asyncio
+    async def test_tools_skip_ignored_directories(self, project):
+        """Test that content, name and directory searches agree on ignored paths."""
+        token = set_tool_context(ToolContext(str(project)))
+        try:
+            content = await search_files_by_content.execute(content_pattern="=", file_pattern="*")
+            names = search_files_by_name("*.py")
+            listing = await list_directory.execute(directory=".", include_tree=True)
+        finally:
+            clear_tool_context(token)
+
+        assert [m["file"] for m in content.result["matches"]] == []
+        assert sorted(m["path"] for m in names["matches"]) == ["src/main.py", "src/pkg/util.py"]
+        assert sorted(item["name"] for item in listing.result["items"]) == [".gitignore", "src"]
+        src_tree = next(item for item in listing.result["tree"] if item["name"] == "src")
+        assert {child["name"] for child in src_tree["children"]} == {"main.py", "pkg"}
+
+    @pytest.mark.asyncio
+    async def test_list_directory_normalizes_paths(self, project, tmp_path_factory):
+        """Test that '..' paths resolve inside the index and outside paths are listed directly."""
+        outside = tmp_path_factory.mktemp("outside")
+        (outside / "notes.txt").write_text("hello\n")
+        token = set_tool_context(ToolContext(str(project)))
+        try:
+            inside = await list_directory.execute(directory="src/../src/pkg", include_tree=False)
+            by_path = await list_directory.execute(directory=str(outside), include_tree=True)
+            relative = await list_directory.execute(directory=f"../{outside.name}", include_tree=False)
+        finally:
+            clear_tool_context(token)
+
+        assert inside.result["directory"] == "src/pkg"
+        assert [item["name"] for item in inside.result["items"]] == ["util.py"]
+        assert [item["name"] for item in by_path.result["items"]] == ["notes.txt"]
+        assert by_path.result["items"][0]["line_count"] == 1
+        assert [node["name"] for node in by_path.result["tree"]] == ["notes.txt"]
+        assert relative.result["items"] == by_path.result["items"]
+
+    @pytest.mark.asyncio
+    async def test_written_files_are_visible_immediately(self, project):
+        """Test that file-writing tools invalidate the throttled index."""
+        token = set_tool_context(ToolContext(str(project)))
+        try:
+            assert search_files_by_name("new.py")["matches"] == []
+            await create_file.execute(file_path="src/new.py", full_content="x = 1\n")
+            names = search_files_by_name("new.py")
+        finally:
+            clear_tool_context(token)
+
+        assert [m["path"] for m in names["matches"]] == ["src/new.py"]
+
+
+class TestNameSearchResults:
+    """Test opt-in line counts and pagination of name searches."""
+
+    @pytest.fixture
+    def many_files(self, tmp_path):
+        """Create a project with a handful of matching files."""
+        (tmp_path / ".git").mkdir()
+        for i in range(5):
+            (tmp_path / f"mod_{i}.py").write_text("line\n" * (i + 1))
+        token = set_tool_context(ToolContext(str(tmp_path)))
+        yield tmp_path
+        clear_tool_context(token)
+
+    def test_line_counts_are_opt_in(self, many_files):
+        """Test that files are only read when line counts are requested."""
+        with patch("mutator.tools.categories.search_tools.count_file_lines", return_value=7) as counter:
+            result = search_files_by_name("*.py")
+            assert counter.call_count == 0
+            assert all("line_count" not in match for match in result["matches"])
+
+            result = search_files_by_name("*.py", include_line_counts=True)
+        assert [match["line_count"] for match in result["matches"]] == [7] * 5
+
+    def test_line_counts_are_cached_per_file_version(self, many_files):
+        """Test that unchanged files are not counted again."""
+        _cached_line_count.cache_clear()
+        first = search_files_by_name("mod_1.py", include_line_counts=True)
+        assert first["matches"][0]["line_count"] == 2
+
+        with patch("mutator.tools.categories.search_tools.count_file_lines") as counter:
+            search_files_by_name("mod_1.py", include_line_counts=True)
+        assert counter.call_count == 0
+
+        target = many_files / "mod_1.py"
+        target.write_text("line\n" * 10)
+        os.utime(target, (time.time() + 5, time.time() + 5))
+        second = search_files_by_name("mod_1.py", include_line_counts=True)
+        assert second["matches"][0]["line_count"] == 10
+
+    def test_cursor_pagination(self, many_files):
+        """Test that pages follow each other without gaps or repeats."""
+        seen = []
+        cursor = ""
+        while True:
+            page = search_files_by_name("*.py", max_results=2, cursor=cursor)
+            assert page["total_matches"] == 5
+            seen.extend(match["path"] for match in page["matches"])
+            if not page["has_more"]:
+                assert page["next_cursor"] is None
+                break
+            cursor = page["next_cursor"]
+
+        assert seen == [f"mod_{i}.py" for i in range(5)]
+
+    def test_unpaginated_search_returns_everything(self, many_files):
+        """Test the default of returning all matches in one page."""
+        result = search_files_by_name("*.py")
+        assert len(result["matches"]) == 5
+        assert result["has_more"] is False
+
+    @pytest.mark.asyncio
+    async def test_tree_nodes_skip_line_counts(self, many_files):
+        """Test that only the flat listing carries line counts."""
+        listing = await list_directory.execute(directory=".", include_tree=True)
+        assert all("line_count" in item for item in listing.result["items"])
+        assert all("line_count" not in node for node in listing.result["tree"])
+
+        listing = await list_directory.execute(directory=".", include_tree=False, include_line_counts=False)
+        assert all("line_count" not in item for item in listing.result["items"])
+
+
+class TestGlobMatching:
+    """Test glob matching against index paths."""
+
+    @pytest.mark.parametrize("path,pattern,expected", [
+        ("src/main.py", "*.py", True),
+        ("main.py", "**/*.py", True),
+        ("src/pkg/util.py", "**/*.py", True),
+        ("src/pkg/util.py", "src/**/*.py", True),
+        ("lib/pkg/util.py", "src/**/*.py", False),
+        ("src/pkg/util.py", "pkg/*.py", True),
+        ("src/pkg/util.js", "*.py", False),
+    ])
+    def test_matches_glob(self, path, pattern, expected):
+        """Test rglob-compatible matching of relative paths."""
+        assert _matches_glob(path, pattern) is expected
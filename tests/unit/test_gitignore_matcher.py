@@ -0,0 +1,159 @@
+"""
+Tests and benchmark for the compiled gitignore matcher used by CodeAnalyzer.
+"""
+
+import fnmatch
+import time
+import pytest
+
+from mutator.context.code_analyzer import CodeAnalyzer, GitignoreMatcher
+from mutator.core.config import ContextConfig
+
+
+class TestGitignoreMatcher:
+    """Test gitignore semantics of the compiled matcher."""
+
+    @pytest.fixture
+    def matcher(self):
+        matcher = GitignoreMatcher()
+        matcher.add_file("", [
+            "*.log",
+            "!keep.log",
+            "build/",
+            "/root_only.txt",
+            "docs/**/*.md",
+            "**/cache",
+            "a/b",
+        ])
+        matcher.add_file("sub", ["!*.log", "x/"])
+        return matcher
+
+    @pytest.mark.parametrize("path,is_dir,expected", [
+        ("app.log", False, True),
+        ("deep/dir/app.log", False, True),
+        ("keep.log", False, False),
+        ("build", True, True),
+        ("build", False, None),
+        ("root_only.txt", False, True),
+        ("nested/root_only.txt", False, None),
+        ("docs/c.md", False, True),
+        ("docs/a/b/c.md", False, True),
+        ("src/cache", True, True),
+        ("a/b", False, True),
+        ("z/a/b", False, None),
+        ("sub/app.log", False, False),
+        ("sub/x", True, True),
+        ("sub/q/x", True, True),
+        ("x", True, None),
+    ])
+    def test_match(self, matcher, path, is_dir, expected):
+        """Test anchoring, directory-only rules, negation order and nesting."""
+        assert matcher.match(path, is_dir) is expected
+
+    def test_last_rule_wins_across_lookup_kinds(self):
+        """Test that a later literal negation overrides an earlier extension rule."""
+        matcher = GitignoreMatcher()
+        matcher.add_file("", ["*.log", "!debug.log", "debug*"])
+
+        assert matcher.match("debug.log", False) is True
+        assert matcher.match("info.log", False) is True
+
+
+class TestCodeAnalyzerIgnore:
+    """Test CodeAnalyzer ignore checks built on the matcher."""
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".gitignore").write_text("out/\n*.tmp.py\n")
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / ".gitignore").write_text("secret.py\n")
+        (tmp_path / "out" / "ignored").mkdir(parents=True)
+        # Ignored directories are pruned, so this file is never read
+        (tmp_path / "out" / "ignored" / ".gitignore").write_text("!*\n")
+        return tmp_path
+
+    def test_files_inside_ignored_directories(self, repo):
+        """Test that files below an ignored directory are ignored."""
+        analyzer = CodeAnalyzer(ContextConfig())
+
+        assert analyzer.should_ignore_path("out/ignored/file.py", repo) is True
+        assert analyzer.should_ignore_path("out/ignored/file.py", repo, check_parents=False) is False
+        assert analyzer.should_ignore_path("pkg/secret.py", repo) is True
+        assert analyzer.should_ignore_path("secret.py", repo) is False
+        assert analyzer.should_ignore_path("pkg/a.tmp.py", repo) is True
+        assert analyzer.should_ignore_path("node_modules/lib/index.js", repo) is True
+
+    def test_gitignore_files_in_ignored_directories_are_skipped(self, repo):
+        """Test that .gitignore discovery does not descend into ignored directories."""
+        analyzer = CodeAnalyzer(ContextConfig())
+
+        files = analyzer._find_gitignore_files(repo)
+
+        assert sorted(f.relative_to(repo).as_posix() for f in files) == [".gitignore", "pkg/.gitignore"]
+
+    def test_should_ignore_file_detects_directories(self, repo):
+        """Test that directory-only rules apply to real directories."""
+        analyzer = CodeAnalyzer(ContextConfig())
+
+        assert analyzer.should_ignore_file(repo / "out", repo) is True
+        assert analyzer.should_ignore_file(repo / "pkg", repo) is False
+        assert analyzer.should_ignore_file(repo.parent / "elsewhere.py", repo) is True
+
+
+def _naive_is_ignored(rel_path, rules):
+    """Reference check looping over every pattern, as the per-pattern fnmatch approach did."""
+    ignored = False
+    name = rel_path.rsplit("/", 1)[-1]
+    for pattern in rules:
+        negated = pattern.startswith("!")
+        glob = pattern.lstrip("!").rstrip("/")
+        for candidate in (glob, glob + "/", glob + "/*"):
+            if fnmatch.fnmatch(name, candidate) or fnmatch.fnmatch(rel_path, candidate):
+                ignored = not negated
+                break
+    return ignored
+
+
+@pytest.mark.slow
+class TestGitignoreBenchmark:
+    """Benchmark ignore checks on a synthetic tree with hundreds of rules."""
+
+    def test_benchmark_synthetic_tree(self, tmp_path, capsys):
+        """Test that the compiled matcher stays fast as the number of rules grows."""
+        rules = []
+        for i in range(100):
+            rules.append(f"*.gen{i}")
+            rules.append(f"cache_{i}/")
+            rules.append(f"/vendor/lib{i}/*.js")
+            rules.append(f"tmp{i}_*.py")
+        rules.extend(f"!keep{i}.gen{i}" for i in range(50))
+
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".gitignore").write_text("\n".join(rules) + "\n")
+
+        paths = [
+            f"src/module_{d}/sub_{s}/file_{f}.{'py' if f % 3 else 'gen' + str(f)}"
+            for d in range(20) for s in range(10) for f in range(25)
+        ]
+
+        analyzer = CodeAnalyzer(ContextConfig(ignore_patterns=[]))
+        analyzer.should_ignore_path(paths[0], tmp_path)  # Load and compile the rules
+
+        start_time = time.perf_counter()
+        compiled = [analyzer.should_ignore_path(p, tmp_path) for p in paths]
+        compiled_time = time.perf_counter() - start_time
+
+        sample = paths[:500]
+        start_time = time.perf_counter()
+        naive = [_naive_is_ignored(p, rules) for p in sample]
+        naive_time = (time.perf_counter() - start_time) * len(paths) / len(sample)
+
+        with capsys.disabled():
+            print(
+                f"\n{len(paths)} paths x {len(rules)} rules: compiled {compiled_time * 1000:.1f}ms, "
+                f"per-pattern fnmatch (extrapolated) {naive_time * 1000:.1f}ms"
+            )
+
+        assert compiled[:len(sample)] == naive
+        assert compiled_time * 10 < naive_time
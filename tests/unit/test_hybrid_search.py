@@ -0,0 +1,179 @@
+"""
+Tests for hybrid (vector + lexical) retrieval in the context searcher.
+"""
+
+import threading
+import pytest
+from unittest.mock import Mock
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.context.indexer import directory_metadata
+from mutator.context.lexical_index import LexicalChunk
+from mutator.context.search import ContextSearcher, SearchFilters
+from mutator.core.config import ContextConfig, RetrievalMode
+from mutator.core.types import ContextItem, ContextType
+
+
+def _item(source, start, end, content="", score=0.5):
+    return ContextItem(type=ContextType.FILE, content=content or f"{source}:{start}",
+                       relevance_score=score, source=source, line_start=start, line_end=end)
+
+
+def _vector_results(*items):
+    """Vector store query results for (file_path, start_line, end_line, document) tuples."""
+    return {
+        'documents': [[document for _, _, _, document in items]],
+        'metadatas': [[{'file_path': path, 'start_line': start, 'end_line': end}
+                       for path, start, end, _ in items]],
+        'distances': [[0.1 * i for i in range(len(items))]]
+    }
+
+
+@pytest.fixture
+def searcher(tmp_path):
+    vector_store = Mock()
+    vector_store.has_embedding_model.return_value = True
+    searcher = ContextSearcher(vector_store, CodeAnalyzer(ContextConfig()), tmp_path, lexical_index=Mock())
+    yield searcher
+    searcher.close()
+
+
+class TestFusion:
+    """Test reciprocal-rank fusion and deduplication."""
+
+    def test_overlapping_chunks_are_merged(self, searcher):
+        vector = [_item("a.py", 1, 10), _item("b.py", 1, 5)]
+        lexical = [_item("a.py", 5, 8), _item("c.py", 1, 3)]
+
+        fused = searcher._fuse_results({'vector': vector, 'lexical': lexical})
+
+        assert [(item.source, item.line_start) for item in fused] == [("a.py", 1), ("b.py", 1), ("c.py", 1)]
+        assert fused[0].metadata['retrieved_by'] == ['lexical', 'vector']
+        assert fused[0].relevance_score == 1.0
+        assert fused[1].relevance_score == pytest.approx((1 / 62) / (1 / 61 + 1 / 61))
+
+    def test_agreement_beats_single_top_rank(self, searcher):
+        vector = [_item("a.py", 1, 2), _item("b.py", 1, 2)]
+        lexical = [_item("c.py", 1, 2), _item("b.py", 2, 4)]
+
+        fused = searcher._fuse_results({'vector': vector, 'lexical': lexical})
+
+        assert fused[0].source == "b.py"
+        assert len(fused) == 3
+
+    def test_rerank_by_term_coverage(self, searcher):
+        items = [
+            _item("a.py", 1, 2, content="def unrelated(): pass", score=1.0),
+            _item("b.py", 1, 2, content="def parse_config(path): load config", score=0.9)
+        ]
+
+        reranked = searcher._rerank("parse config", items)
+
+        assert [item.source for item in reranked] == ["b.py", "a.py"]
+
+
+class TestSearchModes:
+    """Test how search_context dispatches between retrievers."""
+
+    def test_hybrid_runs_both_retrievers_concurrently(self, searcher):
+        threads = {}
+
+        def lexical_search(query, limit, filters=None):
+            threads['lexical'] = threading.current_thread().name
+            return [_item("lex.py", 1, 2)]
+
+        def vector_search(query, limit):
+            threads['vector'] = threading.current_thread().name
+            return _vector_results(("vec.py", 1, 4, "vector doc"))
+
+        searcher._fallback_search = lexical_search
+        searcher.vector_store.search.side_effect = vector_search
+
+        items = searcher.search_context("query", limit=5)
+
+        assert {item.source for item in items} == {"lex.py", "vec.py"}
+        assert threads['lexical'] != threads['vector']
+        searcher.vector_store.search.assert_called_once_with("query", 15)
+
+    def test_hybrid_survives_vector_failure(self, searcher):
+        searcher._fallback_search = Mock(return_value=[_item("lex.py", 1, 2)])
+        searcher.vector_store.search.side_effect = RuntimeError("model unavailable")
+
+        items = searcher.search_context("query", limit=5)
+
+        assert [item.source for item in items] == ["lex.py"]
+
+    def test_vector_mode_skips_lexical(self, searcher):
+        searcher.retrieval_mode = RetrievalMode.VECTOR
+        searcher._fallback_search = Mock()
+        searcher.vector_store.search.return_value = _vector_results(("vec.py", 1, 4, "vector doc"))
+
+        items = searcher.search_context("query", limit=5)
+
+        assert [item.source for item in items] == ["vec.py"]
+        searcher._fallback_search.assert_not_called()
+
+    def test_lexical_mode_skips_vector(self, searcher):
+        searcher.retrieval_mode = RetrievalMode.LEXICAL
+        searcher._fallback_search = Mock(return_value=[])
+
+        searcher.search_context("query", limit=5)
+
+        searcher.vector_store.search.assert_not_called()
+
+
+class TestSearchFilters:
+    """Test filters applied inside the vector and lexical indexes."""
+
+    def test_where_combines_conditions(self):
+        filters = SearchFilters(language="python", document_type="element", path_prefix="./src/")
+
+        assert filters.path_prefix == "src"
+        assert SearchFilters(language="python").to_where() == {'language': 'python'}
+        assert filters.to_where() == {'$and': [
+            {'language': 'python'},
+            {'document_type': 'code_element'},
+            {'$or': [{'file_path': "src"}, {'dir_1': "src"}]}
+        ]}
+        assert SearchFilters(path_prefix="src/pkg").to_where() == {
+            '$or': [{'file_path': "src/pkg"}, {'dir_2': "src/pkg"}]
+        }
+        assert SearchFilters().to_where() is None
+
+    def test_chunk_matching(self):
+        chunk = LexicalChunk(path="src/pkg/util.py", start_line=1, end_line=5, length=3,
+                             element_type="function", element_name="util", language="python")
+
+        assert SearchFilters(path_prefix="src/pkg", element_type="function").matches_chunk(chunk)
+        assert not SearchFilters(path_prefix="src/pk").matches_chunk(chunk)
+        assert not SearchFilters(language="javascript").matches_chunk(chunk)
+        assert not SearchFilters(document_type="element").matches_chunk(
+            LexicalChunk(path="a.py", start_line=1, end_line=2, length=1)
+        )
+
+    def test_prefix_filter_matches_indexed_directories(self):
+        chromadb = pytest.importorskip("chromadb")
+        collection = chromadb.EphemeralClient().create_collection("prefix_filter")
+        paths = ["src/app.py", "src/pkg/util.py", "src_old.py", "main.py"]
+        collection.add(ids=paths, documents=paths, embeddings=[[1.0, 0.0]] * len(paths),
+                       metadatas=[{'file_path': path, **directory_metadata(path)} for path in paths])
+
+        def matching(prefix):
+            where = SearchFilters(path_prefix=prefix).to_where()
+            return sorted(collection.get(where=where)['ids'])
+
+        assert matching("src") == ["src/app.py", "src/pkg/util.py"]
+        assert matching("src/pkg") == ["src/pkg/util.py"]
+        assert matching("src/app.py") == ["src/app.py"]
+        assert matching("missing") == []
+
+    def test_raw_filters_bypass_lexical_search(self, searcher):
+        searcher._fallback_search = Mock()
+        searcher.vector_store.search.return_value = _vector_results(("a.py", 1, 4, "async def run()"))
+        filters = SearchFilters(where_document={'$contains': 'async'})
+
+        items = searcher.search_context("run", limit=5, filters=filters)
+
+        assert [item.source for item in items] == ["a.py"]
+        assert searcher.vector_store.search.call_args.kwargs["where_document"] == {'$contains': 'async'}
+        searcher._fallback_search.assert_not_called()
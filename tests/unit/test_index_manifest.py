@@ -0,0 +1,220 @@
+"""
+Tests for the SQLite indexing manifest.
+"""
+
+import json
+import sqlite3
+import pytest
+from unittest.mock import Mock
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.context.index_manifest import IndexManifest, MANIFEST_FILENAME
+from mutator.context.indexer import DOCUMENT_METADATA_VERSION, CodebaseIndexer
+from mutator.context.vector_store import VectorStoreManager
+from mutator.core.config import ContextConfig, VectorStoreConfig
+
+
+def _record(file_hash="abc", chunk_ids=None, doc_stats=None):
+    return {'hash': file_hash, 'mtime': 1.5, 'size': 10, 'chunk_ids': chunk_ids or ["a.py::0"],
+            'indexed_at': None, 'doc_stats': doc_stats}
+
+
+def _stats(language="python", chunks=1, elements=0):
+    return {'language': language,
+            'documents': {'code_chunk': chunks, 'code_element': elements},
+            'bytes': {'code_chunk': 100 * chunks, 'code_element': 10 * elements}}
+
+
+class TestIndexManifest:
+    """Test IndexManifest storage."""
+
+    def test_records_round_trip(self, tmp_path):
+        """Test that file records survive reopening the database."""
+        manifest = IndexManifest(tmp_path / MANIFEST_FILENAME)
+        manifest.upsert_files({"a.py": _record(), "b.py": _record("def")})
+        manifest.delete_files(["b.py"])
+        manifest.set_state(indexing_complete="True")
+        manifest.close()
+
+        reopened = IndexManifest(tmp_path / MANIFEST_FILENAME)
+
+        assert reopened.load_files() == {"a.py": _record()}
+        assert reopened.get_state("indexing_complete") == "True"
+        assert reopened.get_state("missing", "default") == "default"
+
+    def test_collections_are_isolated(self, tmp_path):
+        """Test that collections sharing a vector store path keep separate state."""
+        first = IndexManifest(tmp_path / MANIFEST_FILENAME, "first")
+        second = IndexManifest(tmp_path / MANIFEST_FILENAME, "second")
+
+        first.upsert_files({"a.py": _record()})
+        second.clear()
+
+        assert first.file_count() == 1
+        assert second.load_files() == {}
+
+    def test_document_stats_follow_updates(self, tmp_path):
+        """Test that aggregates track upserts, replacements and deletions."""
+        manifest = IndexManifest(tmp_path / MANIFEST_FILENAME)
+        manifest.upsert_files({
+            "a.py": _record(doc_stats=_stats(chunks=2, elements=3)),
+            "b.js": _record(doc_stats=_stats("javascript")),
+        })
+        manifest.upsert_files({"a.py": _record(doc_stats=_stats(chunks=1, elements=1))})
+        manifest.delete_files(["b.js"])
+        manifest.close()
+
+        stats = IndexManifest(tmp_path / MANIFEST_FILENAME).get_document_stats()
+
+        assert stats == {
+            'languages': {'python': {'documents': 2, 'bytes': 110}},
+            'document_types': {'code_chunk': {'documents': 1, 'bytes': 100},
+                               'code_element': {'documents': 1, 'bytes': 10}},
+            'total_bytes': 110,
+            'complete': True
+        }
+
+    def test_document_stats_of_records_without_stats(self, tmp_path):
+        """Test that records without stats mark the aggregates incomplete."""
+        manifest = IndexManifest(tmp_path / MANIFEST_FILENAME)
+        manifest.upsert_files({"a.py": _record(doc_stats=_stats()), "old.py": _record()})
+
+        assert manifest.get_document_stats()['complete'] is False
+        manifest.clear()
+        assert manifest.get_document_stats() == {
+            'languages': {}, 'document_types': {}, 'total_bytes': 0, 'complete': True
+        }
+
+    def test_older_database_is_migrated(self, tmp_path):
+        """Test that a manifest created before document stats gains the column."""
+        db_path = tmp_path / MANIFEST_FILENAME
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE files (collection TEXT NOT NULL, path TEXT NOT NULL, hash TEXT NOT NULL, "
+            "mtime REAL, size INTEGER, chunk_ids TEXT NOT NULL DEFAULT '[]', indexed_at TEXT, "
+            "PRIMARY KEY (collection, path))"
+        )
+        conn.execute("INSERT INTO files VALUES ('codebase', 'a.py', 'abc', 1.5, 10, '[\"a.py::0\"]', NULL)")
+        conn.commit()
+        conn.close()
+
+        manifest = IndexManifest(db_path)
+
+        assert manifest.load_files() == {"a.py": _record()}
+        assert manifest.get_document_stats()['complete'] is False
+
+    def test_stored_next_to_vector_store(self, tmp_path):
+        """Test that the manifest lives in the vector store directory."""
+        config = VectorStoreConfig(path=str(tmp_path / "store"), collection_name="project")
+
+        manifest = IndexManifest.for_vector_store(config)
+
+        assert manifest.db_path == str(tmp_path / "store" / MANIFEST_FILENAME)
+        assert manifest.collection_name == "project"
+
+
+class TestIndexerManifest:
+    """Test how the indexer persists its state in the manifest."""
+
+    def _make_indexer(self, tmp_path, vector_store):
+        context_config = ContextConfig()
+        return CodebaseIndexer(context_config, vector_store, CodeAnalyzer(context_config), tmp_path)
+
+    def _make_vector_store(self, tmp_path, legacy_metadata=None):
+        vector_store = Mock()
+        vector_store.vector_config = VectorStoreConfig(path=str(tmp_path / "store"))
+        vector_store.collection.get.return_value = {'metadatas': [legacy_metadata] if legacy_metadata else []}
+        vector_store.has_embedding_model.return_value = False
+        vector_store.get_file_documents.return_value = {'ids': [], 'documents': [], 'embeddings': []}
+        return vector_store
+
+    def test_state_persists_across_indexers(self, tmp_path):
+        """Test that a new indexer picks up file records without re-reading files."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "app.py").write_text("x = 1\n")
+        vector_store = self._make_vector_store(tmp_path)
+
+        indexer = self._make_indexer(project, vector_store)
+        indexer._index_codebase_sync()
+        indexer.close()
+
+        reloaded = self._make_indexer(project, vector_store)
+
+        assert reloaded._indexed_files["app.py"]["chunk_ids"] == ["app.py::0"]
+        assert reloaded._indexing_complete is True
+        assert not reloaded._has_file_changed(project / "app.py")
+
+    def test_collection_stats_come_from_manifest(self, tmp_path):
+        """Test that collection stats use the maintained counts instead of a query."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "app.py").write_text("def main():\n    return 1\n")
+        vector_store = self._make_vector_store(tmp_path)
+        indexer = self._make_indexer(project, vector_store)
+        indexer._index_codebase_sync()
+
+        vector_store.collection.count.return_value = 2
+        vector_store.vector_config.collection_name = "codebase"
+        stats = VectorStoreManager.get_collection_stats(vector_store, indexer.get_document_stats())
+
+        assert stats['total_documents'] == 2
+        assert stats['languages'] == {'python': 2}
+        assert stats['document_types'] == {'code_chunk': 1, 'code_element': 1}
+        assert stats['total_bytes'] == stats['language_bytes']['python'] > 0
+        assert stats['stats_complete'] is True
+        vector_store.collection.query.assert_not_called()
+
+    def test_records_without_stats_are_rechecked(self, tmp_path):
+        """Test that files indexed before document stats are read again once."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "app.py").write_text("x = 1\n")
+        vector_store = self._make_vector_store(tmp_path)
+        indexer = self._make_indexer(project, vector_store)
+        indexer._index_codebase_sync()
+        record = dict(indexer._indexed_files["app.py"], doc_stats=None)
+        indexer.manifest.upsert_files({"app.py": record})
+        indexer.close()
+
+        reloaded = self._make_indexer(project, vector_store)
+        assert reloaded._has_file_changed(project / "app.py")
+        reloaded._index_codebase_sync()
+
+        assert reloaded.get_document_stats()['complete'] is True
+        assert reloaded.get_document_stats()['languages']['python']['documents'] == 1
+
+    def test_older_metadata_version_reindexes(self, tmp_path):
+        """Test that an index written with older document metadata is rebuilt."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "app.py").write_text("x = 1\n")
+        vector_store = self._make_vector_store(tmp_path)
+        indexer = self._make_indexer(project, vector_store)
+        indexer._index_codebase_sync()
+        indexer.manifest.set_state(metadata_version="1")
+        indexer.close()
+
+        reloaded = self._make_indexer(project, vector_store)
+        reloaded.index_codebase(async_mode=False)
+
+        vector_store.clear_collection.assert_called_once()
+        assert reloaded.manifest.get_state('metadata_version') == DOCUMENT_METADATA_VERSION
+        assert "app.py" in reloaded._indexed_files
+
+    def test_legacy_metadata_is_migrated(self, tmp_path):
+        """Test that the old metadata document is moved out of the collection."""
+        legacy = {
+            'last_scan_time': None,
+            'indexed_files_json': json.dumps({"old.py": "d41d8cd98f00b204e9800998ecf8427e"}),
+            'indexing_complete': 'True',
+            'metadata_type': 'indexing_metadata'
+        }
+        vector_store = self._make_vector_store(tmp_path, legacy)
+
+        indexer = self._make_indexer(tmp_path, vector_store)
+
+        assert "old.py" in indexer._indexed_files
+        assert indexer._indexing_complete is True
+        assert "old.py" in indexer.manifest.load_files()
+        vector_store.collection.delete.assert_called_once_with(ids=["indexing_metadata"])
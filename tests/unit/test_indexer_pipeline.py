@@ -0,0 +1,241 @@
+"""
+Tests for the pipelined, incremental codebase indexer.
+"""
+
+import os
+import pytest
+from unittest.mock import Mock
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.context.index_manifest import IndexManifest
+from mutator.context.indexer import CodebaseIndexer
+from mutator.core.config import ContextConfig, VectorStoreConfig
+
+
+class _FakeVectorStore:
+    """In-memory stand-in for VectorStoreManager that records embedding work."""
+
+    def __init__(self, has_model: bool = True):
+        self.vector_config = VectorStoreConfig(embedding_batch_size=2, indexing_workers=2)
+        self.collection = Mock()
+        self.collection.get.return_value = {'metadatas': []}
+        self.has_model = has_model
+        self.docs = {}  # id -> (document, metadata, embedding)
+        self.embedded = []
+        self.upsert_calls = []
+        self.fail_upserts = False
+
+    def has_embedding_model(self):
+        return self.has_model
+
+    def embed_documents(self, documents):
+        self.embedded.extend(documents)
+        return [[float(len(doc)), 0.0] for doc in documents]
+
+    def upsert_documents(self, documents, metadatas, ids, embeddings=None):
+        if not documents:
+            return
+        if self.fail_upserts:
+            raise RuntimeError("disk full")
+        self.upsert_calls.append((documents, metadatas, ids, embeddings))
+        for i, doc_id in enumerate(ids):
+            self.docs[doc_id] = (documents[i], metadatas[i], embeddings[i] if embeddings else None)
+
+    def get_file_documents(self, file_paths):
+        ids = [doc_id for doc_id, (_, meta, _) in self.docs.items() if meta['file_path'] in file_paths]
+        return {
+            'ids': ids,
+            'documents': [self.docs[doc_id][0] for doc_id in ids],
+            'embeddings': [self.docs[doc_id][2] for doc_id in ids]
+        }
+
+    def get_ids_for_files(self, file_paths):
+        return self.get_file_documents(file_paths)['ids']
+
+    def delete_documents(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+    def file_ids(self, file_path):
+        return {doc_id for doc_id, (_, meta, _) in self.docs.items() if meta['file_path'] == file_path}
+
+
+def _make_indexer(tmp_path, vector_store):
+    context_config = ContextConfig()
+    return CodebaseIndexer(context_config, vector_store, CodeAnalyzer(context_config), tmp_path,
+                           manifest=IndexManifest(None))
+
+
+def _reindex(indexer):
+    indexer.file_index.invalidate()
+    indexer._index_codebase_sync()
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+class TestIndexingPipeline:
+    """Test the read/chunk -> embed -> write pipeline."""
+
+    def test_indexes_all_files_in_batches(self, tmp_path):
+        """Test that every file is written and embeddings are computed per batch."""
+        for i in range(6):
+            (tmp_path / f"module_{i}.py").write_text(f"def func_{i}():\n    return {i}\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+
+        indexer._index_codebase_sync()
+
+        for i in range(6):
+            assert f"module_{i}.py::0" in vector_store.docs
+            assert f"module_{i}.py::function::func_{i}" in vector_store.docs
+
+        # Several files share one upsert
+        assert len(vector_store.upsert_calls) < 6
+        for documents, metadatas, ids, embeddings in vector_store.upsert_calls:
+            assert len(embeddings) == len(documents) == len(metadatas) == len(ids)
+
+        progress = indexer.get_indexing_status()['progress']
+        assert progress['files_total'] == 6
+        assert progress['files_indexed'] == 6
+        assert progress['chunks_indexed'] == len(vector_store.docs)
+        assert progress['files_per_second'] > 0
+
+    def test_duplicate_element_names_get_unique_ids(self, tmp_path):
+        """Test that elements sharing a name in one file do not collide."""
+        (tmp_path / "dup.py").write_text("def run():\n    pass\n\n\ndef run():\n    pass\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+
+        indexer._index_codebase_sync()
+
+        assert "dup.py::function::run" in vector_store.docs
+        assert "dup.py::function::run::5" in vector_store.docs
+
+    def test_without_embedding_model(self, tmp_path):
+        """Test that documents are still written when no local model is loaded."""
+        (tmp_path / "app.py").write_text("x = 1\n")
+        vector_store = _FakeVectorStore(has_model=False)
+        indexer = _make_indexer(tmp_path, vector_store)
+
+        indexer._index_codebase_sync()
+
+        assert vector_store.embedded == []
+        assert vector_store.upsert_calls[0][3] is None
+        assert indexer.get_indexing_status()['progress']['files_indexed'] == 1
+
+    def test_write_failure_does_not_mark_files_indexed(self, tmp_path):
+        """Test that files whose batch failed to write are retried next time."""
+        (tmp_path / "app.py").write_text("x = 1\n")
+        vector_store = _FakeVectorStore()
+        vector_store.fail_upserts = True
+        indexer = _make_indexer(tmp_path, vector_store)
+
+        indexer._index_codebase_sync()
+
+        assert indexer._has_file_changed(tmp_path / "app.py")
+
+
+class TestIncrementalIndexing:
+    """Test content-hash based incremental indexing."""
+
+    def test_touch_does_not_reembed(self, tmp_path):
+        """Test that a changed mtime with identical content skips embedding."""
+        app = tmp_path / "app.py"
+        app.write_text("def main():\n    pass\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+        indexer._index_codebase_sync()
+        vector_store.embedded.clear()
+        upserts = len(vector_store.upsert_calls)
+
+        _bump_mtime(app)
+        _reindex(indexer)
+
+        assert vector_store.embedded == []
+        assert len(vector_store.upsert_calls) == upserts
+        assert indexer.get_indexing_status()['progress']['files_unchanged'] == 1
+        assert not indexer._has_file_changed(app)
+
+    def test_unchanged_elements_keep_embeddings(self, tmp_path):
+        """Test that only new or edited documents are embedded after an edit."""
+        app = tmp_path / "app.py"
+        app.write_text("def first():\n    pass\n\n\ndef second():\n    pass\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+        indexer._index_codebase_sync()
+        vector_store.embedded.clear()
+
+        # Shift both functions down and add a third one
+        app.write_text("import os\n\n\ndef first():\n    pass\n\n\ndef second():\n    pass\n\n\ndef third():\n    pass\n")
+        _bump_mtime(app)
+        _reindex(indexer)
+
+        assert "def second()" not in vector_store.embedded
+        assert any(doc.startswith("def third()") for doc in vector_store.embedded)
+        assert vector_store.docs["app.py::function::second"][1]['line_number'] == 8
+        assert indexer.get_indexing_status()['progress']['embeddings_reused'] >= 2
+
+    def test_removed_elements_are_deleted(self, tmp_path):
+        """Test that documents the new version of a file no longer produces are removed."""
+        app = tmp_path / "app.py"
+        app.write_text("def kept():\n    pass\n\n\ndef removed():\n    pass\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+        indexer._index_codebase_sync()
+
+        app.write_text("def kept():\n    pass\n")
+        _bump_mtime(app)
+        _reindex(indexer)
+
+        assert "app.py::function::kept" in vector_store.docs
+        assert "app.py::function::removed" not in vector_store.docs
+
+    def test_rename_reuses_vectors(self, tmp_path):
+        """Test that a renamed file is re-pointed without computing embeddings."""
+        (tmp_path / "old_name.py").write_text("def helper():\n    return 42\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+        indexer._index_codebase_sync()
+        vector_store.embedded.clear()
+
+        (tmp_path / "old_name.py").rename(tmp_path / "new_name.py")
+        _reindex(indexer)
+
+        assert vector_store.embedded == []
+        assert vector_store.file_ids("old_name.py") == set()
+        assert "new_name.py::function::helper" in vector_store.docs
+        assert "old_name.py" not in indexer._indexed_files
+        assert indexer.get_indexing_status()['progress']['renames_detected'] == 1
+
+    def test_deleted_files_are_purged(self, tmp_path):
+        """Test that documents of deleted files are removed."""
+        (tmp_path / "keep.py").write_text("def keep():\n    pass\n")
+        (tmp_path / "gone.py").write_text("def gone():\n    pass\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+        indexer._index_codebase_sync()
+
+        (tmp_path / "gone.py").unlink()
+        _reindex(indexer)
+
+        assert vector_store.file_ids("gone.py") == set()
+        assert vector_store.file_ids("keep.py")
+        assert "gone.py" not in indexer._indexed_files
+
+    def test_deletion_alone_triggers_reindex(self, tmp_path):
+        """Test that index_codebase does not skip a run in which files were only deleted."""
+        (tmp_path / "keep.py").write_text("def keep():\n    pass\n")
+        (tmp_path / "gone.py").write_text("def gone():\n    pass\n")
+        vector_store = _FakeVectorStore()
+        indexer = _make_indexer(tmp_path, vector_store)
+        indexer.index_codebase(async_mode=False)
+
+        (tmp_path / "gone.py").unlink()
+        indexer.file_index.invalidate()
+        indexer.index_codebase(async_mode=False)
+
+        assert vector_store.file_ids("gone.py") == set()
+        assert "gone.py" not in indexer._indexed_files
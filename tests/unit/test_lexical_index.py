@@ -0,0 +1,209 @@
+"""
+Tests for the BM25 lexical index behind semantic search and the fallback searcher.
+"""
+
+import os
+import time
+import pytest
+from unittest.mock import Mock
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.context.file_index import FileIndex
+from mutator.context.lexical_index import LexicalIndex, tokenize, tokenize_bytes
+from mutator.context.search import ContextSearcher
+from mutator.context.trigram_index import TrigramIndex, register_trigram_index, unregister_trigram_index
+from mutator.core.config import ContextConfig
+from mutator.core.types import ContextType
+from mutator.tools import content_search
+from mutator.tools.categories.ai_tools import search_files_sementic
+from mutator.tools.decorator import ToolContext, set_tool_context, clear_tool_context
+
+
+AUTH = '''import hashlib
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+class SessionManager:
+    def __init__(self):
+        self.sessions = {}
+
+    def getUserSession(self, user_id):
+        return self.sessions.get(user_id)
+'''
+
+MODELS = '''class User:
+    name = ""
+    email = ""
+
+
+def load_users(database):
+    return database.query(User)
+'''
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "auth.py").write_text(AUTH)
+    (tmp_path / "models.py").write_text(MODELS)
+    (tmp_path / "notes.md").write_text("The user session is cached\n")
+    return tmp_path
+
+
+def _make_index(root, **kwargs):
+    file_index = FileIndex(root, CodeAnalyzer(ContextConfig()), refresh_interval=0)
+    return LexicalIndex(root, file_index, **kwargs)
+
+
+class TestTokenize:
+    """Test identifier-aware tokenization."""
+
+    def test_splits_camel_and_snake_case(self):
+        assert tokenize("getUserSession") == ["get", "user", "session", "getusersession"]
+        assert tokenize("load_users") == ["load", "users", "load_users"]
+        assert tokenize("HTTPServer") == ["http", "server", "httpserver"]
+
+    def test_drops_stop_words_and_single_characters(self):
+        assert tokenize("find the x in a list") == ["find", "list"]
+
+    def test_bytes_match_decoded_text(self):
+        text = "naïve_parser — getUserName(größe)\n# load the config\xa0now"
+        assert tokenize_bytes(text.encode("utf-8")) == tokenize(text)
+
+
+class TestLexicalIndex:
+    """Test chunking, ranking and incremental updates."""
+
+    def test_chunks_follow_definitions(self, project):
+        index = _make_index(project)
+
+        hits = index.search("user session", limit=10, path_filter=lambda path: path.endswith(".py"))
+
+        best = hits[0].chunk
+        assert (best.path, best.element_name) == ("auth.py", "SessionManager")
+        assert (best.start_line, best.end_line) == (8, 13)
+        assert hits[0].matched_terms == ["session", "user"]
+        assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+
+    def test_limit_and_path_filter(self, project):
+        index = _make_index(project)
+
+        hits = index.search("user session", limit=1, path_filter=lambda path: path.endswith(".md"))
+
+        assert [hit.chunk.path for hit in hits] == ["notes.md"]
+
+    def test_long_definitions_are_split(self, tmp_path):
+        body = "".join(f"    value_{i} = {i}\n" for i in range(25))
+        (tmp_path / "long.py").write_text("def long_function():\n" + body)
+        index = _make_index(tmp_path, max_chunk_lines=10)
+
+        hits = index.search("value_24", limit=5)
+
+        assert [(hit.chunk.start_line, hit.chunk.end_line) for hit in hits] == [(21, 26), (1, 10), (11, 20)]
+        assert hits[0].chunk.element_name == "long_function"
+
+    def test_incremental_updates(self, project):
+        index = _make_index(project)
+        assert index.search("invoice", limit=5) == []
+
+        (project / "billing.py").write_text("def create_invoice():\n    pass\n")
+        assert [hit.chunk.path for hit in index.search("invoice", limit=5)] == ["billing.py"]
+        assert index.get_stats()["files_indexed"] == 4
+
+        (project / "models.py").write_text("class Invoice:\n    pass\n")
+        os.utime(project / "models.py", (time.time() + 5, time.time() + 5))
+        assert {hit.chunk.path for hit in index.search("invoice", limit=5)} == {"billing.py", "models.py"}
+        assert index.search("load_users", limit=5) == []
+        assert index.get_stats()["files_indexed"] == 5
+
+        (project / "billing.py").unlink()
+        assert [hit.chunk.path for hit in index.search("invoice", limit=5)] == ["models.py"]
+        assert index.get_stats()["files_removed"] == 1
+
+    def test_ranking_does_not_depend_on_earlier_queries(self, project):
+        def python_ranking(index):
+            hits = index.search("user session", limit=5, path_filter=lambda path: path.endswith(".py"))
+            return [(hit.chunk.path, hit.chunk.start_line, hit.score) for hit in hits]
+
+        fresh = python_ranking(_make_index(project))
+        index = _make_index(project)
+        index.search("cached", limit=5, path_filter=lambda path: path.endswith(".md"))
+
+        assert python_ranking(index) == fresh
+
+    def test_trigram_candidates_limit_hits(self, project):
+        file_index = FileIndex(project, CodeAnalyzer(ContextConfig()), refresh_interval=0)
+        trigram_index = TrigramIndex(project, file_index=file_index)
+        index = LexicalIndex(project, file_index)
+        register_trigram_index(trigram_index)
+        try:
+            hits = index.search("hash password", limit=5)
+        finally:
+            unregister_trigram_index(trigram_index)
+
+        assert {hit.chunk.path for hit in hits} == {"auth.py"}
+        assert index.get_stats()["files"] == 3
+        assert trigram_index.get_stats()["queries"] == 1
+
+    @pytest.mark.parametrize("mmap_threshold", [content_search.MMAP_THRESHOLD, 16])
+    def test_chunks_are_read_from_bytes(self, tmp_path, monkeypatch, mmap_threshold):
+        monkeypatch.setattr(content_search, "MMAP_THRESHOLD", mmap_threshold)
+        text = "import os\n\n\ndef naïve_parser(größe):\n    return größe\n\n\nclass Loader:\n    pass"
+        (tmp_path / "loader.py").write_text(text, encoding="utf-8")
+        index = _make_index(tmp_path)
+
+        hits = index.search("naïve_parser", limit=5)
+        loader = index.search("loader", limit=5)[0].chunk
+
+        chunk = hits[0].chunk
+        assert chunk.element_name == "naïve_parser"
+        assert index.read_lines(chunk) == text.split("\n")[chunk.start_line - 1:chunk.end_line]
+        assert index.read_lines(loader) == ["class Loader:", "    pass"]
+        assert index.file_line_count("loader.py") == 9
+
+    def test_unchanged_files_are_not_reread(self, project):
+        index = _make_index(project)
+        index.search("user", limit=5)
+
+        index.search("password", limit=5)
+
+        assert index.get_stats()["files_indexed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_search_files_sementic_tool(project):
+    """Test the tool's result format on top of the index."""
+    token = set_tool_context(ToolContext(str(project)))
+    try:
+        result = await search_files_sementic.execute(query="hash password", file_types=["py"])
+    finally:
+        clear_tool_context(token)
+
+    assert result.success
+    top = result.result["results"][0]
+    assert top["file"] == "auth.py"
+    assert top["function_class"] == "function hash_password"
+    assert top["line_number"] == 4
+    assert top["line_content"] == "def hash_password(password):"
+    assert top["matched_terms"] == ["hash", "password"]
+    assert top["file_line_count"] == 13
+    assert all(r["file"].endswith(".py") for r in result.result["results"])
+
+
+def test_fallback_search_uses_lexical_index(project):
+    """Test that the context searcher falls back to BM25 ranked chunks."""
+    vector_store = Mock()
+    vector_store.has_embedding_model.return_value = False
+    searcher = ContextSearcher(vector_store, CodeAnalyzer(ContextConfig()), project,
+                               lexical_index=_make_index(project))
+
+    items = searcher.search_context("load users database", limit=3)
+
+    assert items[0].source == "models.py"
+    assert items[0].type == ContextType.FUNCTION
+    assert items[0].relevance_score == 1.0
+    assert items[0].content.startswith("def load_users(database):")
+    assert items[0].metadata["search_method"] == "bm25"
+    assert all(0 < item.relevance_score <= 1.0 for item in items)
@@ -0,0 +1,128 @@
+"""
+Tests for the asynchronous MCP server JSON-RPC transport.
+"""
+
+import asyncio
+import sys
+import time
+import pytest
+
+from mutator.core.config import MCPServerConfig
+from mutator.tools.mcp_server import MCPServer
+
+
+# Minimal MCP server answering each request on its own thread, so slow calls
+# only overlap if the client keeps several requests in flight.
+FAKE_SERVER = r'''
+import json, os, sys, threading, time
+
+lock = threading.Lock()
+
+def reply(message):
+    with lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+def handle(request):
+    method = request["method"]
+    if method == "initialize":
+        reply({"jsonrpc": "2.0", "id": request["id"], "result": {"capabilities": {}}})
+    elif method == "tools/list":
+        reply({"jsonrpc": "2.0", "id": request["id"], "result": {"tools": [{"name": "sleep"}]}})
+    elif method == "tools/call":
+        args = request["params"]["arguments"]
+        if args.get("crash"):
+            os._exit(1)
+        time.sleep(args.get("delay", 0))
+        reply({"jsonrpc": "2.0", "id": request["id"], "result": {"request_id": request["id"]}})
+
+for line in sys.stdin:
+    request = json.loads(line)
+    if "id" in request:
+        threading.Thread(target=handle, args=(request,), daemon=True).start()
+'''
+
+
+@pytest.fixture
+def server_config(tmp_path):
+    script = tmp_path / "fake_mcp_server.py"
+    script.write_text(FAKE_SERVER)
+    return MCPServerConfig(name="fake", command=[sys.executable, str(script)], timeout=5, max_retries=2)
+
+
+class TestMCPServerTransport:
+    """Test MCPServer request multiplexing, timeouts and restarts."""
+
+    @pytest.mark.asyncio
+    async def test_list_tools(self, server_config):
+        """Test the initialize handshake followed by tools/list."""
+        server = MCPServer(server_config.name, server_config)
+        try:
+            assert await server.start() is True
+            tools = await server.list_tools()
+            assert [tool["name"] for tool in tools] == ["sleep"]
+        finally:
+            await server.stop()
+        assert server.is_running() is False
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self, server_config):
+        """Test that in-flight calls share one process and run concurrently."""
+        server = MCPServer(server_config.name, server_config)
+        try:
+            await server.start()
+            start_time = time.time()
+            results = await asyncio.gather(*[
+                server.call_tool("sleep", {"delay": 0.5}) for _ in range(5)
+            ])
+            elapsed = time.time() - start_time
+        finally:
+            await server.stop()
+
+        assert all(result.success for result in results)
+        request_ids = [result.result["request_id"] for result in results]
+        assert len(set(request_ids)) == 5
+        assert elapsed < 2.0
+
+    @pytest.mark.asyncio
+    async def test_request_timeout(self, server_config):
+        """Test that a slow call fails with a timeout without breaking the server."""
+        server_config.timeout = 1
+        server = MCPServer(server_config.name, server_config)
+        try:
+            await server.start()
+            slow = await server.call_tool("sleep", {"delay": 3})
+            fast = await server.call_tool("sleep", {"delay": 0})
+        finally:
+            await server.stop()
+
+        assert slow.success is False
+        assert "timed out" in slow.error
+        assert fast.success is True
+        assert server.stats["requests_timed_out"] == 1
+
+    @pytest.mark.asyncio
+    async def test_restart_after_crash(self, server_config):
+        """Test that the server is restarted when its process dies."""
+        server = MCPServer(server_config.name, server_config)
+        try:
+            await server.start()
+            crashed = await server.call_tool("sleep", {"crash": True})
+            recovered = await server.call_tool("sleep", {"delay": 0})
+        finally:
+            await server.stop()
+
+        assert recovered.success is True
+        assert server.stats["restarts"] >= 1
+        # The crashing call is retried after each restart until max_retries is exhausted
+        assert crashed.success is False
+
+    @pytest.mark.asyncio
+    async def test_call_before_start(self, server_config):
+        """Test that calls fail cleanly when the server was never started."""
+        server = MCPServer(server_config.name, server_config)
+
+        result = await server.call_tool("sleep", {})
+
+        assert result.success is False
+        assert "not running" in result.error
@@ -0,0 +1,123 @@
+"""
+Tests for prompt-prefix caching and cache usage accounting in the LLM client.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from mutator.llm.client import LLMClient
+from mutator.llm.rate_limiter import RateLimiter
+from mutator.core.config import LLMConfig, LLMProvider
+
+
+def _schema(name):
+    return {"name": name, "description": f"The {name} tool",
+            "parameters": {"type": "object", "properties": {}}}
+
+
+def _response(usage=None):
+    message = SimpleNamespace(content="done", tool_calls=None, function_call=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=Mock(dict=Mock(return_value=usage)) if usage is not None else None,
+        model="test-model"
+    )
+
+
+def _client(provider, **config):
+    client = LLMClient(LLMConfig(provider=provider, model="test-model", api_key="test-key", **config),
+                       rate_limiter=RateLimiter())
+    client.register_function("write_file", Mock(), _schema("write_file"))
+    client.register_function("read_file", Mock(), _schema("read_file"))
+    return client
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are a coding agent."},
+    {"role": "user", "content": "Read main.py"}
+]
+
+
+@pytest.mark.asyncio
+class TestPromptPrefix:
+    """Test the cacheable prompt prefix sent to the provider."""
+
+    async def test_anthropic_breakpoints(self):
+        client = _client(LLMProvider.ANTHROPIC)
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response())) as completion:
+            await client.complete_with_messages(MESSAGES)
+
+        params = completion.call_args.kwargs
+        assert [tool["name"] for tool in params["tools"]] == ["read_file", "write_file"]
+        assert params["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in params["tools"][0]
+        assert params["messages"][0]["content"] == [
+            {"type": "text", "text": "You are a coding agent.", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert params["messages"][1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+        # The shared tool list and the caller's messages stay unannotated
+        assert all("cache_control" not in tool for tool in client._get_tools())
+        assert MESSAGES[0]["content"] == "You are a coding agent."
+
+    async def test_openai_prefix_is_identical_across_calls(self):
+        client = _client(LLMProvider.OPENAI)
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response())) as completion:
+            await client.complete_with_messages(MESSAGES)
+            await client.complete_with_messages(MESSAGES + [{"role": "user", "content": "And utils.py"}])
+
+        first, second = (call.kwargs for call in completion.call_args_list)
+        assert first["tools"] is second["tools"]
+        assert [tool["function"]["name"] for tool in first["tools"]] == ["read_file", "write_file"]
+        assert first["messages"] == second["messages"][:2]
+        assert "cache_control" not in str(first)
+
+    async def test_caching_can_be_disabled(self):
+        client = _client(LLMProvider.ANTHROPIC, prompt_caching=False)
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response())) as completion:
+            await client.complete_with_messages(MESSAGES)
+
+        assert "cache_control" not in str(completion.call_args.kwargs)
+
+    async def test_registering_a_tool_rebuilds_the_list(self):
+        client = _client(LLMProvider.OPENAI)
+        tools = client._get_tools()
+
+        client.register_function("list_directory", Mock(), _schema("list_directory"))
+
+        assert client._get_tools() is not tools
+        assert [tool["function"]["name"] for tool in client._get_tools()] == [
+            "list_directory", "read_file", "write_file"
+        ]
+
+
+@pytest.mark.asyncio
+class TestCacheUsage:
+    """Test cache read and write accounting."""
+
+    async def test_anthropic_cache_tokens(self):
+        client = _client(LLMProvider.ANTHROPIC)
+        usage = {"prompt_tokens": 1200, "completion_tokens": 40,
+                 "cache_read_input_tokens": 1000, "cache_creation_input_tokens": 150}
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response(usage))):
+            response = await client.complete_with_messages(MESSAGES)
+            await client.complete_with_messages(MESSAGES)
+
+        assert (response.usage["cache_read_tokens"], response.usage["cache_write_tokens"]) == (1000, 150)
+        assert client.usage_totals == {"prompt_tokens": 2400, "completion_tokens": 80,
+                                       "cache_read_tokens": 2000, "cache_write_tokens": 300}
+
+    async def test_openai_cached_tokens(self):
+        client = _client(LLMProvider.OPENAI)
+        usage = {"prompt_tokens": 2048, "completion_tokens": 10,
+                 "prompt_tokens_details": {"cached_tokens": 1024}}
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response(usage))):
+            response = await client.complete_with_messages(MESSAGES)
+
+        assert (response.usage["cache_read_tokens"], response.usage["cache_write_tokens"]) == (1024, 0)
+        assert client.get_model_info()["usage_totals"]["cache_read_tokens"] == 1024
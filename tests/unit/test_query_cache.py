@@ -0,0 +1,100 @@
+"""
+Tests for the query embedding cache and batched search of the vector store.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from mutator.context.vector_store import QueryEmbeddingCache, VectorStoreManager
+from mutator.core.config import VectorStoreConfig
+
+
+class TestQueryEmbeddingCache:
+    """Test LRU and TTL behaviour of the cache."""
+
+    def test_lookup_normalizes_whitespace(self):
+        cache = QueryEmbeddingCache(max_size=4)
+        cache.put("model", "find  the\tparser ", [1.0])
+
+        assert cache.get("model", "find the Parser") is None
+        assert cache.get("model", "find the parser") == [1.0]
+        assert cache.get("other-model", "find the parser") is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryEmbeddingCache(max_size=2)
+        cache.put("model", "a", [1.0])
+        cache.put("model", "b", [2.0])
+        cache.get("model", "a")
+        cache.put("model", "c", [3.0])
+
+        assert cache.get("model", "b") is None
+        assert cache.get("model", "a") == [1.0]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_entries_expire(self):
+        cache = QueryEmbeddingCache(max_size=2, ttl=10)
+        with patch("mutator.context.vector_store.time.monotonic", return_value=100.0):
+            cache.put("model", "a", [1.0])
+        with patch("mutator.context.vector_store.time.monotonic", return_value=111.0):
+            assert cache.get("model", "a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_zero_size_disables_caching(self):
+        cache = QueryEmbeddingCache(max_size=0)
+        cache.put("model", "a", [1.0])
+
+        assert cache.get("model", "a") is None
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """A vector store manager with a fake embedding model and collection."""
+    model = Mock()
+    model.parameters.return_value = []
+    model._modules = {}
+    model.encode.side_effect = lambda texts, **kwargs: np.array([[float(len(text)), 1.0] for text in texts])
+
+    with patch("mutator.context.vector_store.chromadb") as chromadb, \
+            patch("mutator.context.vector_store.SentenceTransformer", return_value=model):
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path)))
+        manager.ready().result(timeout=10)
+
+    manager.collection = chromadb.PersistentClient.return_value.get_or_create_collection.return_value
+    return manager
+
+
+class TestCachedSearch:
+    """Test that searches reuse cached query embeddings."""
+
+    def test_repeated_query_is_embedded_once(self, manager):
+        manager.search("load config", limit=3)
+        manager.search("load  config", limit=3)
+
+        assert manager.embedding_model.encode.call_count == 1
+        assert manager.collection.query.call_args.kwargs["query_embeddings"] == [[11.0, 1.0]]
+        assert manager.health_check()["query_cache"]["hits"] == 1
+
+    def test_search_many_batches_misses(self, manager):
+        manager.search("cached", limit=3)
+        manager.collection.query.return_value = {
+            'ids': [['a'], ['b'], ['c']],
+            'documents': [['doc a'], ['doc b'], ['doc c']],
+            'metadatas': [[{}], [{}], [{}]],
+            'distances': [[0.1], [0.2], [0.3]],
+            'embeddings': None,
+            'included': ['documents', 'metadatas', 'distances']
+        }
+
+        results = manager.search_many(["cached", "first", "second"], limit=1)
+
+        assert manager.embedding_model.encode.call_count == 2
+        assert manager.embedding_model.encode.call_args.args[0] == ["first", "second"]
+        assert manager.collection.query.call_args.kwargs["query_embeddings"] == [[6.0, 1.0], [5.0, 1.0], [6.0, 1.0]]
+        assert [result['documents'] for result in results] == [[['doc a']], [['doc b']], [['doc c']]]
+        assert results[1]['included'] == ['documents', 'metadatas', 'distances']
+
+    def test_search_many_without_queries(self, manager):
+        assert manager.search_many([]) == []
+        manager.collection.query.assert_not_called()
@@ -6,6 +6,7 @@ import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from mutator.llm.client import LLMClient
+from mutator.llm.rate_limiter import RateLimiter
 from mutator.core.config import LLMConfig
 from mutator.core.types import LLMResponse
 
@@ -21,7 +22,7 @@ class TestRateLimitRetry:
             retry_delay=0.1,  # Short delay for testing
             debug=True
         )
-        self.client = LLMClient(self.config)
+        self.client = LLMClient(self.config, rate_limiter=RateLimiter())
     
     def test_rate_limit_error_detection(self):
         """Test that various rate limit errors are properly detected."""
@@ -95,7 +96,7 @@ class TestRateLimitRetry:
             nonlocal call_count
             call_count += 1
             if call_count <= 2:
-                raise Exception("litellm.RateLimitError: You exceeded your current quota")
+                raise Exception("litellm.RateLimitError: Rate limit reached for requests")
             return mock_response
         
         with patch('mutator.llm.client.acompletion', side_effect=mock_acompletion):
@@ -109,12 +110,42 @@ class TestRateLimitRetry:
                 # Should have called sleep twice (for the two failures)
                 assert mock_sleep.call_count == 2
                 
-                # Check that backoff times were appropriate for rate limits
+                # Without Retry-After the cool-down starts at 10 seconds and doubles
                 sleep_calls = mock_sleep.call_args_list
-                # First retry: 60 seconds base wait
-                assert sleep_calls[0][0][0] == 60.0
-                # Second retry: 120 seconds (60 * 2^1)
-                assert sleep_calls[1][0][0] == 120.0
+                assert sleep_calls[0][0][0] == pytest.approx(10.0, abs=0.5)
+                assert sleep_calls[1][0][0] == pytest.approx(20.0, abs=0.5)
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_retry_honors_retry_after(self):
+        """Test that the Retry-After header of a rate limit error sets the wait."""
+        from types import SimpleNamespace
+        
+        mock_response = SimpleNamespace(
+            choices=[SimpleNamespace(
+                message=SimpleNamespace(content="Success", tool_calls=None, function_call=None),
+                finish_reason="stop"
+            )],
+            usage=None,
+            model="gpt-3.5-turbo"
+        )
+        rate_limit_error = Exception("429 Too Many Requests")
+        rate_limit_error.response = SimpleNamespace(headers={"retry-after": "3"})
+        
+        responses = [rate_limit_error, mock_response]
+        async def mock_acompletion(*args, **kwargs):
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        
+        with patch('mutator.llm.client.acompletion', side_effect=mock_acompletion):
+            with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+                response = await self.client.complete_with_messages([{"role": "user", "content": "test"}])
+        
+        assert response.success
+        assert mock_sleep.call_count == 1
+        assert mock_sleep.call_args[0][0] == pytest.approx(3.0, abs=0.5)
+        assert self.client.rate_limiter.get_stats(self.client._rate_limit_key)["rate_limited"] == 1
     
     @pytest.mark.asyncio
     async def test_non_rate_limit_retry_with_standard_backoff(self):
@@ -188,7 +219,7 @@ class TestRateLimitRetry:
             nonlocal call_count
             call_count += 1
             if call_count == 1:
-                raise Exception("litellm.RateLimitError: You exceeded your current quota")
+                raise Exception("litellm.RateLimitError: Rate limit reached for requests")
             
             # Return an async generator for streaming
             async def mock_stream():
@@ -208,5 +239,5 @@ class TestRateLimitRetry:
                 # Should have called sleep once (for the first failure)
                 assert mock_sleep.call_count == 1
                 
-                # Should have used rate limit backoff
-                assert mock_sleep.call_args[0][0] == 60.0 
\ No newline at end of file
+                # Should have used the rate limit cool-down
+                assert mock_sleep.call_args[0][0] == pytest.approx(10.0, abs=0.5) 
\ No newline at end of file
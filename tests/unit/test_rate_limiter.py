@@ -0,0 +1,144 @@
+"""
+Tests for the shared client-side rate limiter.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from mutator.llm.rate_limiter import RateLimiter, parse_retry_after, response_headers
+
+
+KEY = ("openai", "gpt-4.1-mini")
+
+
+@pytest.fixture
+def clock():
+    """Controllable monotonic clock; mocked sleeps advance it."""
+    now = [1000.0]
+
+    async def sleep(seconds):
+        now[0] += seconds
+
+    with patch("mutator.llm.rate_limiter.time.monotonic", side_effect=lambda: now[0]), \
+            patch("mutator.llm.rate_limiter.asyncio.sleep", new=AsyncMock(side_effect=sleep)) as mock_sleep:
+        yield SimpleNamespace(now=now, sleep=mock_sleep)
+
+
+class TestHeaders:
+    """Test reading rate limit information from litellm objects."""
+
+    def test_headers_of_response_and_exception(self):
+        response = SimpleNamespace(_hidden_params={'additional_headers': {
+            'llm_provider-x-ratelimit-limit-requests': '500',
+            'X-RateLimit-Remaining-Tokens': '1000'
+        }})
+        error = SimpleNamespace(response=SimpleNamespace(headers={'Retry-After': '7'}))
+
+        assert response_headers(response) == {
+            'x-ratelimit-limit-requests': '500',
+            'x-ratelimit-remaining-tokens': '1000'
+        }
+        assert response_headers(error) == {'retry-after': '7'}
+        assert response_headers(Exception("plain")) == {}
+
+    def test_retry_after_formats(self):
+        assert parse_retry_after({'retry-after': '2.5'}) == 2.5
+        assert parse_retry_after({'retry-after-ms': '1500', 'retry-after': '9'}) == 1.5
+        assert parse_retry_after({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+        assert parse_retry_after({'retry-after': 'soon'}) is None
+        assert parse_retry_after({}) is None
+
+
+@pytest.mark.asyncio
+class TestPacing:
+    """Test token bucket pacing."""
+
+    async def test_unknown_limits_do_not_wait(self, clock):
+        limiter = RateLimiter()
+
+        for _ in range(10):
+            assert await limiter.acquire(KEY, tokens=5000) == 0.0
+        clock.sleep.assert_not_called()
+
+    async def test_requests_are_spaced_once_the_bucket_is_empty(self, clock):
+        limiter = RateLimiter()
+        limiter.configure(KEY, requests_per_minute=60)
+        limiter.get_stats(KEY)  # Buckets start full
+        limiter._states[KEY].requests.level = 1
+
+        waits = [await limiter.acquire(KEY) for _ in range(3)]
+
+        assert waits == [0.0, 1.0, 1.0]
+
+    async def test_concurrent_callers_queue_in_order(self, clock):
+        limiter = RateLimiter()
+        limiter.configure(KEY, tokens_per_minute=6000)
+
+        # Reservations are made before sleeping, so waits grow with queue position
+        clock.sleep.side_effect = None
+        waits = [await limiter.acquire(KEY, tokens=3000) for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 30.0, 60.0]
+
+    async def test_usage_refunds_overestimated_tokens(self, clock):
+        limiter = RateLimiter()
+        limiter.configure(KEY, tokens_per_minute=1000)
+
+        await limiter.acquire(KEY, tokens=800)
+        limiter.record_response(KEY, reserved_tokens=800, used_tokens=200)
+
+        assert limiter.get_stats(KEY)["tokens_available"] == 800
+
+    async def test_limits_are_learned_from_headers(self, clock):
+        limiter = RateLimiter()
+
+        limiter.record_response(KEY, {
+            'anthropic-ratelimit-requests-limit': '50',
+            'anthropic-ratelimit-requests-remaining': '0',
+            'anthropic-ratelimit-tokens-limit': '40000'
+        })
+
+        stats = limiter.get_stats(KEY)
+        assert (stats["requests_per_minute"], stats["tokens_per_minute"]) == (50, 40000)
+        assert await limiter.acquire(KEY) == pytest.approx(1.2)
+
+
+@pytest.mark.asyncio
+class TestRateLimitErrors:
+    """Test how rate limit errors pause a key."""
+
+    async def test_retry_after_pauses_every_caller(self, clock):
+        limiter = RateLimiter()
+
+        assert limiter.record_rate_limit(KEY, {'retry-after': '12'}) == 12.0
+        assert await limiter.acquire(KEY) == 12.0
+        assert await limiter.acquire(KEY) == 0.0
+        assert await limiter.acquire(("openai", "other-model")) == 0.0
+
+    async def test_cooldown_doubles_and_resets(self, clock):
+        limiter = RateLimiter()
+        limiter.configure(KEY, cooldown=5.0)
+
+        assert [limiter.record_rate_limit(KEY) for _ in range(3)] == [5.0, 10.0, 20.0]
+        limiter.record_response(KEY)
+        assert limiter.record_rate_limit(KEY) == 5.0
+
+    async def test_request_limit_is_learned_from_rejected_rate(self, clock):
+        limiter = RateLimiter()
+        for _ in range(10):
+            await limiter.acquire(KEY)
+
+        limiter.record_rate_limit(KEY, {'retry-after': '0'})
+
+        assert limiter.get_stats(KEY)["requests_per_minute"] == 9
+        limiter.record_response(KEY)
+        assert limiter.get_stats(KEY)["requests_per_minute"] == 10
+
+    async def test_few_requests_do_not_set_a_limit(self, clock):
+        limiter = RateLimiter()
+        await limiter.acquire(KEY)
+
+        limiter.record_rate_limit(KEY)
+
+        assert limiter.get_stats(KEY)["requests_per_minute"] is None
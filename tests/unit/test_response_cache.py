@@ -0,0 +1,190 @@
+"""
+Tests for the LLM response cache and record/replay.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from mutator.core.config import AgentConfig, LLMConfig, ResponseCacheMode
+from mutator.execution.executor import TaskExecutor
+from mutator.llm.client import LLMClient
+from mutator.llm.rate_limiter import RateLimiter
+from mutator.llm.response_cache import ResponseCache, request_key
+from mutator.tools.categories.system_tools import run_shell
+from mutator.tools.manager import ToolManager
+from mutator.tools.registry import ToolRegistry
+
+
+MESSAGES = [{"role": "user", "content": "Read main.py"}]
+
+
+def _response(content="done", tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls, function_call=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=None,
+        model="test-model"
+    )
+
+
+def _stream(*parts):
+    async def chunks():
+        for part in parts:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+    return chunks()
+
+
+def _client(cache, **config):
+    return LLMClient(LLMConfig(model="test-model", api_key="test-key", **config),
+                     rate_limiter=RateLimiter(), response_cache=cache)
+
+
+class TestResponseCache:
+    """Test the SQLite response store."""
+
+    def test_request_key_is_canonical(self):
+        params = {"model": "m", "messages": MESSAGES, "temperature": 0.1, "timeout": 30}
+        reordered = {"temperature": 0.1, "messages": MESSAGES, "model": "m", "timeout": 600}
+
+        assert request_key(params) == request_key(reordered)
+        assert request_key(params) != request_key({**params, "temperature": 0.2})
+        assert request_key(params) != request_key({**params, "stream": True})
+
+    def test_request_key_ignores_the_project_root(self, tmp_path):
+        first, second = tmp_path / "first", tmp_path / "second"
+
+        def params(root):
+            return {"model": "m", "messages": [{"role": "tool", "content": f"{root}/main.py:1: import os"}]}
+
+        assert request_key(params(first), str(first)) == request_key(params(second), str(second))
+        assert request_key(params(first)) != request_key(params(second))
+
+    def test_request_key_ignores_modification_times(self):
+        def params(mtime):
+            entry = {"name": "main.py", "type": "file", "size": 10, "modified": mtime}
+            return {"model": "m", "messages": [{"role": "tool", "content": str({"items": [entry]})}]}
+
+        assert request_key(params(1729312345.25)) == request_key(params(1760000000.5))
+        assert request_key(params(1.0)) != request_key({"model": "m", "messages": MESSAGES})
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(None, ResponseCacheMode.CACHE, max_size=60)
+
+        cache.put("a", {"content": "x" * 10})
+        cache.put("b", {"content": "y" * 10})
+        cache.get("a")
+        cache.put("c", {"content": "z" * 10})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_recording_is_not_evicted(self):
+        cache = ResponseCache(None, ResponseCacheMode.RECORD, max_size=1)
+
+        cache.put("a", {"content": "x"})
+        cache.put("b", {"content": "y"})
+
+        assert cache.get_stats()["entries"] == 2
+        # Recording always calls the provider
+        assert cache.get("a") is None
+
+    def test_recording_persists(self, tmp_path):
+        path = tmp_path / "responses.sqlite3"
+        recorder = ResponseCache(path, ResponseCacheMode.RECORD)
+        recorder.put("a", {"content": "x"}, latency=1.5)
+        recorder.close()
+
+        replay = ResponseCache(path, ResponseCacheMode.REPLAY)
+
+        assert replay.get("a") == {"content": "x"}
+        assert replay.get_stats()["provider_time_saved"] == 1.5
+
+
+@pytest.mark.asyncio
+class TestClientCaching:
+    """Test caching in LLMClient."""
+
+    async def test_repeated_request_is_served_from_cache(self):
+        client = _client(ResponseCache(None, ResponseCacheMode.CACHE))
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response())) as completion:
+            first = await client.complete_with_messages(MESSAGES)
+            second = await client.complete_with_messages(MESSAGES)
+            await client.complete_with_messages(MESSAGES, temperature=0.9)
+
+        assert completion.await_count == 2
+        assert (second.content, second.model, second.success) == (first.content, first.model, True)
+        assert client.get_model_info()["response_cache"]["hits"] == 1
+
+    async def test_replay_never_calls_the_provider(self):
+        cache = ResponseCache(None, ResponseCacheMode.RECORD)
+        recorder = _client(cache)
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_response("recorded"))):
+            await recorder.complete_with_messages(MESSAGES)
+
+        cache.mode = ResponseCacheMode.REPLAY
+        player = _client(cache)
+        with patch("mutator.llm.client.acompletion", new=AsyncMock()) as completion:
+            replayed = await player.complete_with_messages(MESSAGES)
+            missing = await player.complete_with_messages([{"role": "user", "content": "Something new"}])
+
+        completion.assert_not_called()
+        assert replayed.content == "recorded"
+        assert not missing.success and "replay mode" in missing.error
+
+    async def test_stream_is_replayed(self):
+        client = _client(ResponseCache(None, ResponseCacheMode.CACHE))
+        progress = Mock()
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_stream("Hel", "lo"))) as completion:
+            first = [part async for part in client.stream_completion("Say hello")]
+            second = [part async for part in client.stream_completion("Say hello", progress_callback=progress)]
+
+        assert completion.await_count == 1
+        assert first == second == ["Hel", "lo"]
+        progress.assert_called_with("", 1.0)
+
+    async def test_cache_is_off_by_default(self):
+        client = LLMClient(LLMConfig(model="test-model", api_key="test-key"), rate_limiter=RateLimiter())
+
+        assert client.response_cache is None
+
+
+async def _run_executor(project, cache, completion):
+    """Run a chat turn whose tool output contains the project path."""
+    llm_config = LLMConfig(model="test-model", api_key="test-key")
+    config = AgentConfig(llm=llm_config, working_directory=str(project))
+    client = LLMClient(llm_config, rate_limiter=RateLimiter(), response_cache=cache, project_root=str(project))
+    tool_manager = ToolManager(working_directory=str(project), registry=ToolRegistry())
+    tool_manager.register_tool(run_shell)
+    executor = TaskExecutor(client, tool_manager, Mock(), Mock(), config)
+    executor.setup_langchain_components()
+
+    with patch("mutator.llm.client.acompletion", new=completion):
+        return [event async for event in executor.execute_interactive_chat("Where is the project?")]
+
+
+@pytest.mark.asyncio
+async def test_executor_run_is_replayed_from_another_directory(tmp_path):
+    """Test that a recorded executor run replays in a different project directory."""
+    cache = ResponseCache(tmp_path / "responses.sqlite3", ResponseCacheMode.RECORD)
+    pwd = SimpleNamespace(id="call_1", type="function",
+                          function=SimpleNamespace(name="run_shell", arguments='{"command": "pwd"}'))
+    recorded = AsyncMock(side_effect=[_response("", tool_calls=[pwd]), _response("It is in the project")])
+    (tmp_path / "recorded").mkdir()
+    await _run_executor(tmp_path / "recorded", cache, recorded)
+
+    cache.mode = ResponseCacheMode.REPLAY
+    replayed = AsyncMock()
+    (tmp_path / "replayed").mkdir()
+    events = await _run_executor(tmp_path / "replayed", cache, replayed)
+
+    assert recorded.await_count == 2
+    replayed.assert_not_called()
+    assert cache.get_stats()["hits"] == 2
+    outputs = [event.data["result"] for event in events if event.event_type == "tool_call_completed"]
+    assert str(tmp_path / "replayed") in str(outputs[0])
+    responses = [event.data["content"] for event in events if event.event_type == "llm_response"]
+    assert responses == ["It is in the project"]
@@ -0,0 +1,99 @@
+"""
+Tests for the group scheduler used by the batch tools.
+"""
+
+import asyncio
+import pytest
+
+from mutator.execution.scheduler import GroupScheduler
+
+
+def _job(delay: float, success: bool = True, tracker: dict = None):
+    """Create a job that sleeps and records peak concurrency."""
+    async def job():
+        if tracker is not None:
+            tracker["running"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["running"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            if tracker is not None:
+                tracker["running"] -= 1
+        return {"success": success}
+    return job
+
+
+async def _collect(scheduler, jobs):
+    return [item async for item in scheduler.run(jobs)]
+
+
+class TestGroupScheduler:
+    """Test GroupScheduler behavior."""
+
+    @pytest.mark.asyncio
+    async def test_respects_parallelism_limit(self):
+        """Test that no more than max_parallel jobs run at once."""
+        tracker = {"running": 0, "peak": 0}
+        scheduler = GroupScheduler(max_parallel=3)
+
+        results = await _collect(scheduler, [_job(0.01, tracker=tracker) for _ in range(10)])
+
+        assert len(results) == 10
+        assert tracker["peak"] == 3
+        assert all(result["success"] for _, result in results)
+
+    @pytest.mark.asyncio
+    async def test_results_stream_in_completion_order(self):
+        """Test that faster jobs are yielded before slower ones."""
+        scheduler = GroupScheduler(max_parallel=3)
+
+        results = await _collect(scheduler, [_job(0.05), _job(0.01), _job(0.03)])
+
+        assert [index for index, _ in results] == [1, 2, 0]
+
+    @pytest.mark.asyncio
+    async def test_per_job_timeout(self):
+        """Test that a slow job is reported as timed out without failing others."""
+        scheduler = GroupScheduler(max_parallel=2, timeout=0.05)
+
+        results = dict(await _collect(scheduler, [_job(1.0), _job(0.01)]))
+
+        assert results[0]["success"] is False
+        assert results[0]["timed_out"] is True
+        assert results[1]["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_job_exception_becomes_failure(self):
+        """Test that exceptions raised by a job are reported as failed results."""
+        async def broken():
+            raise RuntimeError("boom")
+
+        scheduler = GroupScheduler(max_parallel=1)
+
+        results = await _collect(scheduler, [broken])
+
+        assert results[0][1]["success"] is False
+        assert "boom" in results[0][1]["error"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_on_failure(self):
+        """Test that remaining jobs are cancelled after the first failure."""
+        scheduler = GroupScheduler(max_parallel=2, cancel_on_failure=True)
+
+        results = dict(await _collect(scheduler, [_job(0.01, success=False), _job(1.0), _job(1.0)]))
+
+        assert len(results) == 3
+        assert results[0]["success"] is False
+        assert results[1]["cancelled"] is True
+        assert results[2]["cancelled"] is True
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_cancel_by_default(self):
+        """Test that all jobs run when cancel_on_failure is disabled."""
+        scheduler = GroupScheduler(max_parallel=2)
+
+        results = dict(await _collect(scheduler, [_job(0.01, success=False), _job(0.02)]))
+
+        assert results[0]["success"] is False
+        assert results[1]["success"] is True
+        assert "cancelled" not in results[1]
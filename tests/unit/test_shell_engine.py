@@ -0,0 +1,90 @@
+"""
+Tests for the asynchronous shell execution engine used by run_shell.
+"""
+
+import asyncio
+import sys
+import time
+import pytest
+
+from mutator.tools.shell_engine import OutputBuffer, run_command
+
+
+class TestOutputBuffer:
+    """Test the bounded head/tail output buffer."""
+    
+    def test_small_output_is_kept_whole(self):
+        """Test that output within the limits is returned unchanged."""
+        buffer = OutputBuffer(max_head_lines=5, max_tail_lines=5)
+        for i in range(8):
+            buffer.append(f"line {i}")
+        
+        assert buffer.total_lines == 8
+        assert not buffer.truncated
+        assert buffer.get_text() == "".join(f"line {i}\n" for i in range(8))
+    
+    def test_large_output_keeps_head_and_tail(self):
+        """Test that only the first and last lines are retained for huge output."""
+        buffer = OutputBuffer(max_head_lines=3, max_tail_lines=2)
+        for i in range(1000):
+            buffer.append(f"line {i}")
+        
+        text = buffer.get_text()
+        assert buffer.total_lines == 1000
+        assert buffer.truncated
+        assert text.splitlines() == [
+            "line 0", "line 1", "line 2",
+            "... [995 lines omitted] ...",
+            "line 998", "line 999"
+        ]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell commands")
+class TestRunCommand:
+    """Test run_command behavior."""
+    
+    @pytest.mark.asyncio
+    async def test_captures_stdout_stderr_and_exit_code(self, tmp_path):
+        """Test that both streams and the exit code are captured."""
+        result = await run_command("echo out; echo err 1>&2; exit 3", cwd=str(tmp_path))
+        
+        assert result.exit_code == 3
+        assert result.stdout.get_text() == "out\n"
+        assert result.stderr.get_text() == "err\n"
+    
+    @pytest.mark.asyncio
+    async def test_streams_lines_to_callback(self, tmp_path):
+        """Test that each output line is forwarded to the callback."""
+        received = []
+        
+        await run_command(
+            "printf 'a\\nb\\nc'",
+            cwd=str(tmp_path),
+            on_output=lambda stream, line: received.append((stream, line))
+        )
+        
+        assert received == [("stdout", "a"), ("stdout", "b"), ("stdout", "c")]
+    
+    @pytest.mark.asyncio
+    async def test_timeout_kills_process_group(self, tmp_path):
+        """Test that a timeout kills the command and its child processes."""
+        marker = tmp_path / "marker"
+        
+        start = time.time()
+        with pytest.raises(TimeoutError):
+            await run_command(f"(sleep 1; touch {marker}) & sleep 5", cwd=str(tmp_path), timeout=0.3)
+        
+        assert time.time() - start < 2
+        await asyncio.sleep(1.2)
+        assert not marker.exists()
+    
+    @pytest.mark.asyncio
+    async def test_commands_run_concurrently(self, tmp_path):
+        """Test that several commands overlap instead of blocking the event loop."""
+        start = time.time()
+        results = await asyncio.gather(*[
+            run_command("sleep 0.5", cwd=str(tmp_path)) for _ in range(4)
+        ])
+        
+        assert all(result.exit_code == 0 for result in results)
+        assert time.time() - start < 1.5
@@ -0,0 +1,180 @@
+"""
+Tests for streaming completions through the LLM client and the executor.
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from langchain_core.messages import HumanMessage
+
+from mutator.core.config import AgentConfig, LLMConfig
+from mutator.core.types import AgentEvent, LLMResponse, ToolCall
+from mutator.execution.executor import CustomLangChainModel, TaskExecutor
+from mutator.llm.client import LLMClient
+from mutator.llm.rate_limiter import RateLimiter
+from mutator.tools.categories.system_tools import run_shell
+from mutator.tools.manager import ToolManager
+from mutator.tools.registry import ToolRegistry
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(model="gpt-4.1-mini", usage=None,
+                           choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+def _tool_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def _stream(*chunks, error=None):
+    async def generate():
+        for chunk in chunks:
+            yield chunk
+        if error:
+            raise error
+    return generate()
+
+
+TOOL_CALL_STREAM = [
+    _chunk("Let me "),
+    _chunk("look."),
+    _chunk(tool_calls=[_tool_delta(0, "call_1", "read_file", '{"pa')]),
+    _chunk(tool_calls=[_tool_delta(0, arguments='th": "a.py"}'), _tool_delta(1, "call_2", "list_directory", "{}")]),
+    _chunk(finish_reason="tool_calls")
+]
+
+
+def _client(**config):
+    return LLMClient(LLMConfig(model="gpt-4.1-mini", api_key="test-key", **config), rate_limiter=RateLimiter())
+
+
+@pytest.mark.asyncio
+class TestStreamWithMessages:
+    """Test message streaming in the LLM client."""
+
+    async def test_text_and_tool_call_deltas_are_assembled(self):
+        client = _client()
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_stream(*TOOL_CALL_STREAM))):
+            items = [item async for item in client.stream_with_messages([{"role": "user", "content": "hi"}])]
+
+        *text, response = items
+        assert text == ["Let me ", "look."]
+        assert response.content == "Let me look."
+        assert response.finish_reason == "tool_calls"
+        assert [(tc.id, tc.name, tc.arguments) for tc in response.tool_calls] == [
+            ("call_1", "read_file", {"path": "a.py"}),
+            ("call_2", "list_directory", {})
+        ]
+
+    async def test_usage_is_requested_and_reported(self):
+        client = _client()
+        counts = {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+        usage = SimpleNamespace(**counts, dict=lambda: dict(counts))
+        final = SimpleNamespace(model="gpt-4.1-mini", usage=usage, choices=[])
+
+        with patch("mutator.llm.client.acompletion",
+                   new=AsyncMock(return_value=_stream(_chunk("Hi", finish_reason="stop"), final))) as completion, \
+                patch.object(client.rate_limiter, "record_response") as record:
+            items = [item async for item in client.stream_with_messages([{"role": "user", "content": "hi"}])]
+
+        assert completion.call_args.kwargs["stream_options"] == {"include_usage": True}
+        assert items[-1].usage["total_tokens"] == 15
+        assert record.call_args.kwargs["used_tokens"] == 15
+
+    async def test_error_after_output_is_not_retried(self):
+        client = _client()
+        stream = _stream(_chunk("partial"), error=Exception("Connection reset"))
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=stream)) as completion:
+            items = [item async for item in client.stream_with_messages([{"role": "user", "content": "hi"}])]
+
+        assert completion.await_count == 1
+        assert items[0] == "partial"
+        assert not items[-1].success and items[-1].content == "partial"
+
+
+@pytest.mark.asyncio
+class TestExecutorStreaming:
+    """Test token events from the executor's workflow."""
+
+    def _executor(self, **llm_config):
+        config = AgentConfig(llm=LLMConfig(model="gpt-4.1-mini", api_key="test-key", **llm_config))
+        client = _client(**llm_config)
+        executor = TaskExecutor(client, Mock(), Mock(), Mock(), config)
+        executor.model_with_tools = CustomLangChainModel(client, config)
+        executor._get_system_message = lambda: "You are a coding agent."
+        return executor
+
+    async def _run(self, executor, task="hi"):
+        class Workflow:
+            """Single agent step standing in for the compiled graph."""
+            async def astream(self, inputs, config, **kwargs):
+                yield {"agent": await executor._call_model(inputs, config)}
+
+        executor.workflow_app = Workflow()
+        inputs = {"messages": [HumanMessage(content=task, id="task")]}
+        return [event async for event in executor._stream_workflow(inputs, {"recursion_limit": 5})]
+
+    async def test_tokens_precede_the_agent_output(self):
+        executor = self._executor(stream=True)
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(return_value=_stream(*TOOL_CALL_STREAM))):
+            events = await self._run(executor)
+
+        tokens = [event.data["content"] for event in events if isinstance(event, AgentEvent)]
+        assert tokens == ["Let me ", "look."]
+        message = events[-1]["agent"]["messages"][-1]
+        assert message.content == "Let me look."
+        assert [call["name"] for call in message.tool_calls] == ["read_file", "list_directory"]
+
+    async def test_concurrent_runs_keep_their_tokens_apart(self):
+        executor = self._executor(stream=True)
+
+        async def completion(**params):
+            task = params["messages"][-1]["content"]
+            return _stream(*[_chunk(f"{task}-{index}") for index in range(3)], _chunk(finish_reason="stop"))
+
+        with patch("mutator.llm.client.acompletion", new=AsyncMock(side_effect=completion)):
+            first, second = await asyncio.gather(self._run(executor, "a"), self._run(executor, "b"))
+
+        assert [event.data["content"] for event in first if isinstance(event, AgentEvent)] == ["a-0", "a-1", "a-2"]
+        assert [event.data["content"] for event in second if isinstance(event, AgentEvent)] == ["b-0", "b-1", "b-2"]
+
+    async def test_streaming_is_off_by_default(self):
+        executor = self._executor()
+        response = LLMResponse(content="Hello", success=True)
+
+        with patch.object(executor.llm_client, "complete_with_messages",
+                          new=AsyncMock(return_value=response)) as complete:
+            events = await self._run(executor)
+
+        complete.assert_awaited_once()
+        assert len(events) == 1 and events[0]["agent"]["messages"][-1].content == "Hello"
+
+    async def test_tool_output_joins_the_event_stream(self, tmp_path):
+        config = AgentConfig(llm=LLMConfig(model="gpt-4.1-mini", api_key="test-key"),
+                             working_directory=str(tmp_path))
+        client = _client()
+        tool_manager = ToolManager(working_directory=str(tmp_path), registry=ToolRegistry())
+        tool_manager.register_tool(run_shell)
+        executor = TaskExecutor(client, tool_manager, Mock(), Mock(), config)
+        executor.setup_langchain_components()
+        executor._get_system_message = lambda: "You are a coding agent."
+        responses = [
+            LLMResponse(content="", success=True, tool_calls=[
+                ToolCall(id="call_1", name="run_shell", arguments={"command": "echo one; echo two"})
+            ]),
+            LLMResponse(content="Done", success=True)
+        ]
+
+        with patch.object(client, "complete_with_messages", new=AsyncMock(side_effect=responses)):
+            events = [event async for event in executor.execute_interactive_chat("Run it")]
+
+        types = [event.event_type for event in events]
+        lines = [event.data["line"] for event in events if event.event_type == "tool_output"]
+        assert lines == ["one", "two"]
+        assert types.index("tool_output") < types.index("tool_call_completed")
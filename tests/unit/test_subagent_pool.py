@@ -0,0 +1,177 @@
+"""
+Tests for the sub-agent runtime pool used by delegate_task.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from mutator.core.types import AgentEvent
+from mutator.execution import subagent_pool
+from mutator.execution.subagent_pool import SubAgentPool
+from mutator.tools.categories.task_tools import delegate_task
+from mutator.tools.decorator import ToolContext, set_tool_context, clear_tool_context
+
+
+def _make_runtime_factory(created):
+    """Create a fake Mutator class that records constructed runtimes."""
+    def factory(config, context_manager=None):
+        runtime = Mock()
+        runtime.config = config
+        runtime.context_manager = context_manager
+        runtime.initialize = AsyncMock()
+        runtime.cleanup = AsyncMock()
+        created.append(runtime)
+        return runtime
+    return factory
+
+
+class TestSubAgentPool:
+    """Test SubAgentPool runtime reuse."""
+
+    @pytest.mark.asyncio
+    async def test_runtime_is_reused_after_release(self, tmp_path):
+        """Test that a released runtime is handed to the next delegation."""
+        created = []
+        pool = SubAgentPool()
+
+        with patch('mutator.agent.Mutator', side_effect=_make_runtime_factory(created)):
+            async with pool.checkout(str(tmp_path)) as first:
+                pass
+            async with pool.checkout(str(tmp_path)) as second:
+                pass
+
+        assert first is second
+        assert len(created) == 1
+        first.initialize.assert_awaited_once()
+
+        stats = pool.get_stats()
+        assert stats["runtimes_created"] == 1
+        assert stats["runtimes_reused"] == 1
+        assert stats["active_runtimes"] == 1
+        assert stats["idle_runtimes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_get_separate_runtimes(self, tmp_path):
+        """Test that a checked-out runtime is never shared by concurrent delegations."""
+        created = []
+        pool = SubAgentPool()
+
+        with patch('mutator.agent.Mutator', side_effect=_make_runtime_factory(created)):
+            runtimes = await asyncio.gather(*[pool.acquire(str(tmp_path)) for _ in range(3)])
+            for runtime in runtimes:
+                await pool.release(runtime)
+            reused = await pool.acquire(str(tmp_path))
+
+        assert len(created) == 3
+        assert len({id(runtime) for runtime in runtimes}) == 3
+        assert reused in runtimes
+
+    @pytest.mark.asyncio
+    async def test_shared_context_manager_is_passed_to_runtime(self, tmp_path):
+        """Test that a registered parent context manager is reused by the runtime."""
+        created = []
+        pool = SubAgentPool()
+        parent_context = Mock()
+        pool.register_context_manager(str(tmp_path), parent_context)
+
+        with patch('mutator.agent.Mutator', side_effect=_make_runtime_factory(created)):
+            runtime = await pool.acquire(str(tmp_path))
+
+        assert runtime.context_manager is parent_context
+        assert runtime.config.working_directory == str(tmp_path.absolute())
+
+    @pytest.mark.asyncio
+    async def test_release_context_manager_drops_runtimes(self, tmp_path):
+        """Test that releasing a parent context manager evicts dependent runtimes."""
+        created = []
+        pool = SubAgentPool()
+        parent_context = Mock()
+        pool.register_context_manager(str(tmp_path), parent_context)
+
+        with patch('mutator.agent.Mutator', side_effect=_make_runtime_factory(created)):
+            await pool.release(await pool.acquire(str(tmp_path)))
+            await pool.release_context_manager(parent_context)
+            await pool.acquire(str(tmp_path))
+
+        assert len(created) == 2
+        created[0].cleanup.assert_awaited_once()
+        assert created[1].context_manager is None
+        assert pool.get_stats()["shared_context_managers"] == 0
+
+    @pytest.mark.asyncio
+    async def test_agent_cleanup_leaves_other_agents_runtimes(self, tmp_path):
+        """Test that cleaning up an agent only releases the runtimes built on its context manager."""
+        from mutator.agent import Mutator
+        from mutator.core.config import AgentConfig
+
+        created = []
+        pool = SubAgentPool()
+        agents = []
+        for name in ("first", "second"):
+            agent = Mutator(AgentConfig(working_directory=str(tmp_path / name)))
+            agent.context_manager = Mock(cleanup=AsyncMock())
+            pool.register_context_manager(agent.config.working_directory, agent.context_manager)
+            agents.append(agent)
+
+        with patch('mutator.agent.Mutator', side_effect=_make_runtime_factory(created)):
+            first_runtime = await pool.acquire(str(tmp_path / "first"))
+            second_runtime = await pool.acquire(str(tmp_path / "second"))
+            await pool.release(first_runtime)
+            await pool.release(second_runtime)
+
+        with patch.object(subagent_pool, "_global_pool", pool):
+            await agents[0].cleanup()
+
+        first_runtime.cleanup.assert_awaited_once()
+        second_runtime.cleanup.assert_not_awaited()
+        assert await pool.acquire(str(tmp_path / "second")) is second_runtime
+
+    @pytest.mark.asyncio
+    async def test_shutdown_cleans_up_runtimes(self, tmp_path):
+        """Test that shutdown cleans up idle runtimes and busy ones once released."""
+        created = []
+        pool = SubAgentPool()
+
+        with patch('mutator.agent.Mutator', side_effect=_make_runtime_factory(created)):
+            idle = await pool.acquire(str(tmp_path))
+            await pool.release(idle)
+            busy = await pool.acquire(str(tmp_path) + "/other")
+
+        await pool.shutdown()
+
+        idle.cleanup.assert_awaited_once()
+        busy.cleanup.assert_not_awaited()
+        assert pool.get_stats()["active_runtimes"] == 0
+
+        await pool.release(busy)
+
+        busy.cleanup.assert_awaited_once()
+        assert pool.get_stats()["idle_runtimes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_delegate_task_result_is_deterministic(tmp_path):
+    """Test that the tool result the model reads carries no timing data."""
+    created = []
+    pool = SubAgentPool()
+
+    async def execute_task(task, execution_mode=None):
+        yield AgentEvent(event_type="llm_response", data={"content": "Found it"})
+
+    def factory(config, context_manager=None):
+        runtime = _make_runtime_factory(created)(config, context_manager)
+        runtime.execute_task = execute_task
+        return runtime
+
+    token = set_tool_context(ToolContext(str(tmp_path)))
+    try:
+        with patch.object(subagent_pool, "_global_pool", pool), \
+                patch('mutator.agent.Mutator', side_effect=factory):
+            result = await delegate_task.execute(task_description="Find it", expected_output="location")
+    finally:
+        clear_tool_context(token)
+
+    assert result.result["final_response"] == "Found it"
+    assert "startup_time" not in result.result
+    assert pool.get_stats()["idle_runtimes"] == 1
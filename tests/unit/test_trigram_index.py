@@ -0,0 +1,151 @@
+"""
+Tests for the trigram index used by the content search tools.
+"""
+
+import os
+import re
+import threading
+import pytest
+
+from mutator.context.code_analyzer import CodeAnalyzer
+from mutator.context.file_index import FileIndex, invalidate_file_indexes
+from mutator.context.trigram_index import (
+    TrigramIndex, query_trigrams, register_trigram_index, unregister_trigram_index
+)
+from mutator.core.config import ContextConfig
+from mutator.tools.categories.ai_tools import search_files_sementic
+from mutator.tools.categories.search_tools import search_files_by_content
+from mutator.tools.decorator import ToolContext, set_tool_context, clear_tool_context
+
+
+def _make_index(root, db_path=None, **kwargs):
+    file_index = FileIndex(root, CodeAnalyzer(ContextConfig()), refresh_interval=0)
+    return TrigramIndex(root, db_path, file_index, **kwargs)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "auth.py").write_text("def login(user):\n    return check_password(user)\n")
+    (root / "models.py").write_text("class User:\n    name = ''\n")
+    (root / "README.md").write_text("Project readme\n")
+    return root
+
+
+class TestTrigramIndex:
+    """Test candidate selection and incremental maintenance."""
+
+    def test_query_trigrams_skip_non_ascii(self):
+        assert len(query_trigrams("abcd")) == 2
+        assert query_trigrams("ab") == set()
+        assert query_trigrams("ééé") == set()
+
+    def test_regex_narrows_candidates(self, project):
+        index = _make_index(project)
+
+        assert index.candidates_for_regex(r"check_\w+\(", re.IGNORECASE) == {"auth.py"}
+        assert index.candidates_for_regex(r"CLASS\s+user", re.IGNORECASE) == {"models.py"}
+        assert index.candidates_for_regex(r"missing_symbol") == set()
+
+    def test_unnarrowable_pattern_returns_none(self, project):
+        index = _make_index(project)
+
+        assert index.candidates_for_regex(r"login|User") is None
+        assert index.candidates_for_regex(r"\w+") is None
+
+    def test_candidates_for_any_term(self, project):
+        index = _make_index(project)
+
+        assert index.candidates_for_any(["login", "readme"]) == {"auth.py", "README.md"}
+        assert index.candidates_for_any(["login", "x"]) is None
+
+    def test_in_place_edits_and_deletions_are_picked_up(self, project):
+        index = _make_index(project)
+        assert index.candidates_for_regex("logout") == set()
+
+        auth = project / "auth.py"
+        auth.write_text("def logout(user):\n    pass\n")
+        stat = auth.stat()
+        os.utime(auth, (stat.st_atime, stat.st_mtime + 5))
+        (project / "models.py").unlink()
+        index.invalidate()
+
+        assert index.candidates_for_regex("logout") == {"auth.py"}
+        assert index.candidates_for_regex("class") == set()
+
+    def test_refresh_is_throttled_until_invalidated(self, project):
+        index = _make_index(project, refresh_interval=60)
+        register_trigram_index(index)
+        try:
+            assert index.candidates_for_regex("logout") == set()
+            (project / "session.py").write_text("def logout(user):\n    pass\n")
+
+            assert index.candidates_for_regex("logout") == set()
+            invalidate_file_indexes(project / "session.py")
+            assert index.candidates_for_regex("logout") == {"session.py"}
+        finally:
+            unregister_trigram_index(index)
+
+    def test_queries_read_only_the_query_trigrams(self, project):
+        index = _make_index(project)
+        index.refresh()
+        statements = []
+        index._conn.set_trace_callback(statements.append)
+
+        index.candidates_for_any(["login", "readme"])
+        index.candidates_for_regex("check_password")
+
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 3
+        assert all("FROM postings WHERE trigram IN (" in sql for sql in selects)
+
+    def test_background_build_does_not_block_queries(self, project, monkeypatch):
+        index = _make_index(project)
+        release = threading.Event()
+        add_file = index._add_file
+
+        def slow_add_file(*args):
+            release.wait(5)
+            add_file(*args)
+
+        monkeypatch.setattr(index, "_add_file", slow_add_file)
+        build = index.build_in_background()
+
+        assert index.candidates_for_regex("login") is None
+        release.set()
+        build.join(5)
+        assert index.candidates_for_regex("login") == {"auth.py"}
+
+    def test_large_files_are_always_candidates(self, project):
+        (project / "big.txt").write_text("x" * 200)
+        index = _make_index(project, max_file_size=100)
+
+        assert index.candidates_for_regex("login") == {"auth.py", "big.txt"}
+
+    def test_index_persists_on_disk(self, project, tmp_path):
+        db_path = tmp_path / "store" / "trigrams.sqlite3"
+        _make_index(project, db_path).candidates_for_regex("login")
+
+        reopened = _make_index(project, db_path)
+
+        assert reopened.candidates_for_regex("login") == {"auth.py"}
+        assert reopened.get_stats()["files_indexed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_tools_use_registered_index(project):
+    """Test that both content search tools consult a registered trigram index."""
+    index = _make_index(project)
+    register_trigram_index(index)
+    token = set_tool_context(ToolContext(str(project)))
+    try:
+        content = await search_files_by_content.execute(content_pattern=r"check_password")
+        semantic = await search_files_sementic.execute(query="login password")
+    finally:
+        clear_tool_context(token)
+        unregister_trigram_index(index)
+
+    assert [m["file"] for m in content.result["matches"]] == ["auth.py"]
+    assert {r["file"] for r in semantic.result["results"]} == {"auth.py"}
+    assert index.get_stats()["queries"] == 2
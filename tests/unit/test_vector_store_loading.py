@@ -0,0 +1,143 @@
+"""
+Tests for lazy loading and background warm-up of the vector store.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from mutator.context.suppress_warnings import configure_embedding_environment
+from mutator.context.vector_store import VectorStoreManager
+from mutator.core.config import VectorStoreConfig
+
+
+@pytest.fixture
+def backends():
+    """Patched ChromaDB module and SentenceTransformer class."""
+    model = Mock()
+    model.parameters.return_value = []
+    model._modules = {}
+    with patch("mutator.context.vector_store.chromadb") as chromadb, \
+            patch("mutator.context.vector_store.SentenceTransformer", return_value=model) as transformer:
+        yield chromadb, transformer
+
+
+def test_module_import_defers_heavy_dependencies():
+    """Test that importing the module imports neither ChromaDB nor sentence-transformers."""
+    code = (
+        "import sys\n"
+        "import mutator.context.vector_store\n"
+        "print('chromadb' in sys.modules, 'sentence_transformers' in sys.modules)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120)
+
+    assert output.stdout.split()[-2:] == ["False", "False"]
+
+
+def test_embedding_threads_are_not_pinned():
+    """Test that importing the context package leaves embedding on all cores, or the user's setting."""
+    code = (
+        "import os\n"
+        "import mutator.context\n"
+        "print(os.environ['OMP_NUM_THREADS'], os.environ['MKL_NUM_THREADS'], os.cpu_count())\n"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.endswith("_NUM_THREADS")}
+    default = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120, env=env)
+    preset = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120,
+                            env={**env, "OMP_NUM_THREADS": "3"})
+
+    omp, mkl, cpus = default.stdout.split()[-3:]
+    assert omp == mkl == cpus
+    assert preset.stdout.split()[-3] == "3"
+
+
+def test_configured_embedding_threads_override_the_environment(monkeypatch):
+    """Test that an explicit thread count is applied to every math library."""
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                     "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"):
+        monkeypatch.setenv(variable, "1")
+
+    configure_embedding_environment(6)
+
+    assert os.environ["OMP_NUM_THREADS"] == os.environ["OPENBLAS_NUM_THREADS"] == "6"
+
+
+class TestLazyLoading:
+    """Test that the client and the model are created on first use."""
+
+    def test_construction_loads_nothing(self, tmp_path, backends):
+        chromadb, transformer = backends
+
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path)))
+
+        chromadb.PersistentClient.assert_not_called()
+        transformer.assert_not_called()
+        assert manager.health_check()["collection_initialized"] is False
+        assert not manager.is_loaded()
+
+    def test_first_use_loads_each_component_once(self, tmp_path, backends):
+        chromadb, transformer = backends
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path)))
+
+        manager.collection.count()
+        manager.collection.count()
+        assert manager.has_embedding_model()
+        assert manager.has_embedding_model()
+
+        chromadb.PersistentClient.assert_called_once_with(path=str(tmp_path))
+        transformer.assert_called_once()
+        assert manager.is_loaded()
+
+    def test_failed_model_load_is_not_retried(self, tmp_path, backends):
+        _, transformer = backends
+        transformer.side_effect = OSError("model not found")
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path)))
+
+        assert not manager.has_embedding_model()
+        assert not manager.has_embedding_model()
+        transformer.assert_called_once()
+
+    def test_unsupported_type_fails_immediately(self, tmp_path):
+        config = VectorStoreConfig(path=str(tmp_path)).model_copy(update={"type": "faiss"})
+
+        with pytest.raises(ValueError):
+            VectorStoreManager(config)
+
+
+class TestWarmUp:
+    """Test background loading through ready()."""
+
+    def test_ready_loads_in_background(self, tmp_path, backends):
+        chromadb, transformer = backends
+        threads = []
+        transformer.side_effect = lambda *args, **kwargs: threads.append(threading.current_thread()) or Mock(
+            parameters=Mock(return_value=[]), _modules={}
+        )
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path)))
+
+        future = manager.ready()
+
+        assert future.result(timeout=10) is manager
+        assert manager.ready() is future
+        assert threads[0] is not threading.current_thread()
+        assert manager.is_loaded()
+        chromadb.PersistentClient.assert_called_once()
+
+    def test_ready_reports_vector_store_failure(self, tmp_path, backends):
+        chromadb, _ = backends
+        chromadb.PersistentClient.side_effect = RuntimeError("database is locked")
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path)))
+
+        with pytest.raises(RuntimeError):
+            manager.ready().result(timeout=10)
+
+    def test_warm_up_setting_starts_loading(self, tmp_path, backends):
+        _, transformer = backends
+
+        manager = VectorStoreManager(VectorStoreConfig(path=str(tmp_path), warm_up=True))
+        manager.ready().result(timeout=10)
+
+        transformer.assert_called_once()